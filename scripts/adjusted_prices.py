@@ -0,0 +1,210 @@
+# 株式分割・併合を考慮した調整後株価・株数系列
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 株価ストアの終値と、有価証券報告書の発行済株式数（期末ごと）から
+#   AdjClose  : 最新の株式基準に揃えた終値
+#   AdjShares : 最新の株式基準に揃えた発行済株式数（直近の開示値を日次に展開）
+#   MarketCap : AdjClose × AdjShares（百万円）
+# を全期間まとめてベクトル演算で作成する。
+# 期末株数の比率が分割・併合らしい比率（2:1, 1:10 など）に近い場合を株式アクションとみなし、
+# その期間内に逆比率の株価ギャップがあれば生株価と判定して株価も遡及調整する
+# （ギャップがない＝データソース側で調整済みの場合は株数のみ調整）。
+
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from price_store import load_price_frame
+from company_registry import add_registry_arguments, companies_from_args, symbol_mapping
+
+# 分割・併合とみなす株数比率（新株数 / 旧株数）
+ACTION_RATIOS = np.array([1 / 10, 1 / 5, 1 / 4, 1 / 3, 1 / 2, 2.0, 3.0, 4.0, 5.0, 10.0])
+# 比率の許容誤差（期中の新株発行・自己株式の変動を吸収）
+RATIO_TOLERANCE = 0.03
+# 株価ギャップ判定の許容誤差（対数差）
+PRICE_GAP_TOLERANCE = 0.15
+
+
+def share_observations(financials: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """財務レコードから (期末日, 発行済株式数) を日付昇順・重複排除で取り出す"""
+    frame = pd.DataFrame({
+        'date': pd.to_datetime([r['date'] for r in financials]),
+        'shares': [float(r.get('bs', {}).get('issuedShares') or 0.0) for r in financials],
+    })
+    frame = frame[frame['shares'] > 0].drop_duplicates(subset='date', keep='last').sort_values('date')
+    return frame['date'].to_numpy(dtype='datetime64[D]'), frame['shares'].to_numpy(dtype=float)
+
+
+def detect_share_actions(share_dates: np.ndarray, shares: np.ndarray) -> pd.DataFrame:
+    """
+    連続する開示間の株数比率から株式分割・併合を検出
+
+    Returns:
+        columns: start（前回開示日）, end（今回開示日）, ratio（ACTION_RATIOS の該当比率）
+    """
+    if len(shares) < 2:
+        return pd.DataFrame({'start': [], 'end': [], 'ratio': []})
+
+    observed = shares[1:] / shares[:-1]
+    # 各比率に最も近い候補（対数距離）
+    distance = np.abs(np.log(observed)[:, None] - np.log(ACTION_RATIOS)[None, :])
+    nearest = distance.argmin(axis=1)
+    is_action = distance[np.arange(len(observed)), nearest] < np.log1p(RATIO_TOLERANCE)
+    return pd.DataFrame({
+        'start': share_dates[:-1][is_action],
+        'end': share_dates[1:][is_action],
+        'ratio': ACTION_RATIOS[nearest[is_action]],
+    })
+
+
+def locate_price_gaps(price_dates: np.ndarray, close: np.ndarray, actions: pd.DataFrame) -> pd.DataFrame:
+    """
+    各株式アクションの効力発生日を株価ギャップから特定
+
+    期間 (start, end] 内で、前日比が 1/ratio に最も近い日を探す。
+    許容誤差内なら生株価（rawPrice=True, effective=その日）、
+    見つからなければ調整済み株価とみなし effective=end とする。
+    """
+    actions = actions.copy()
+    actions['effective'] = actions['end']
+    actions['rawPrice'] = False
+    if actions.empty or len(close) < 2:
+        return actions
+
+    log_return = np.full(len(close), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_return[1:] = np.log(close[1:] / close[:-1])
+
+    starts = actions['start'].to_numpy(dtype='datetime64[D]')
+    ends = actions['end'].to_numpy(dtype='datetime64[D]')
+    ratios = actions['ratio'].to_numpy(dtype=float)
+    effective = ends.copy()
+    raw = np.zeros(len(actions), dtype=bool)
+    for i in range(len(actions)):
+        window = (price_dates > starts[i]) & (price_dates <= ends[i]) & np.isfinite(log_return)
+        gap = np.where(window, np.abs(log_return + np.log(ratios[i])), np.inf)
+        best = int(gap.argmin())
+        if gap[best] < PRICE_GAP_TOLERANCE:
+            effective[i] = price_dates[best]
+            raw[i] = True
+    actions['effective'] = effective
+    actions['rawPrice'] = raw
+    return actions
+
+
+def _cumulative_factor(dates: np.ndarray, effective: np.ndarray, ratios: np.ndarray) -> np.ndarray:
+    """各日付より後に効力が発生する株式アクションの比率の累積積（最新基準への換算係数）"""
+    order = np.argsort(effective)
+    effective, ratios = effective[order], ratios[order]
+    # suffix[k] = ratios[k:] の積（suffix[n] = 1）
+    suffix = np.append(np.cumprod(ratios[::-1])[::-1], 1.0)
+    return suffix[np.searchsorted(effective, dates, side='right')]
+
+
+def build_adjusted_series(prices: pd.DataFrame, share_dates: np.ndarray, shares: np.ndarray) -> pd.DataFrame:
+    """
+    調整後株価・株数・時価総額の日次系列を作成
+
+    Args:
+        prices: Date インデックス（昇順）・Close 列（Volume 列は任意）
+        share_dates / shares: share_observations の戻り値
+
+    Returns:
+        prices に AdjClose, AdjShares, AdjFactor, MarketCap（百万円）、
+        Volume があれば AdjVolume を加えたDataFrame
+    """
+    price_dates = prices.index.to_numpy(dtype='datetime64[D]')
+    close = prices['Close'].to_numpy(dtype=float)
+    actions = locate_price_gaps(price_dates, close, detect_share_actions(share_dates, shares))
+
+    effective = actions['effective'].to_numpy(dtype='datetime64[D]')
+    ratios = actions['ratio'].to_numpy(dtype=float)
+    raw = actions['rawPrice'].to_numpy(dtype=bool)
+
+    # 株価は生株価と判定したアクションのみ遡及調整
+    price_factor = _cumulative_factor(price_dates, effective[raw], ratios[raw])
+
+    adjusted = prices.copy()
+    adjusted['AdjFactor'] = price_factor
+    adjusted['AdjClose'] = close / price_factor
+    if 'Volume' in adjusted.columns:
+        adjusted['AdjVolume'] = adjusted['Volume'].to_numpy(dtype=float) * price_factor
+
+    if len(shares) == 0:
+        adjusted['AdjShares'] = np.nan
+    else:
+        # 各日の直近開示株数（最初の開示より前は最初の開示値）を、開示時点から最新基準へ換算
+        observed = np.clip(np.searchsorted(share_dates, price_dates, side='right') - 1, 0, None)
+        share_factor = _cumulative_factor(share_dates, effective, ratios)
+        adjusted['AdjShares'] = (shares * share_factor)[observed]
+    adjusted['MarketCap'] = adjusted['AdjClose'] * adjusted['AdjShares'] / 1_000_000
+    adjusted.attrs['actions'] = actions
+    return adjusted
+
+
+def load_adjusted_prices(symbol: str, financials: Optional[List[Dict[str, Any]]]) -> Optional[pd.DataFrame]:
+    """株価ストアと財務データから調整後系列を作成（株価がなければNone）"""
+    prices = load_price_frame(symbol, columns=('Close', 'Volume'))
+    if prices is None:
+        prices = load_price_frame(symbol, columns=('Close',))
+    if prices is None or prices.empty:
+        return prices
+    share_dates, shares = share_observations(financials or [])
+    return build_adjusted_series(prices, share_dates, shares)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='株式分割・併合の検出と調整後株価系列の確認')
+    parser.add_argument('--input', default='data/edinet_parsed', help='入力ディレクトリ（デフォルト: data/edinet_parsed）')
+    parser.add_argument('--output', default='data/prices/corporate_actions.json', help='出力ファイル（デフォルト: data/prices/corporate_actions.json）')
+    add_registry_arguments(parser)
+    args = parser.parse_args()
+
+    input_dir = Path(args.input)
+    symbol_map = symbol_mapping(companies_from_args(args))
+    report = {}
+
+    print(f"調整後株価系列の作成開始: {input_dir}")
+    for company, symbol in symbol_map.items():
+        financials_file = input_dir / f"{company}_financials.json"
+        if not financials_file.exists():
+            print(f"⚠ {company} のデータが見つかりません。スキップします。")
+            continue
+        with open(financials_file, 'r', encoding='utf-8') as f:
+            financials = json.load(f)
+
+        adjusted = load_adjusted_prices(symbol, financials)
+        if adjusted is None or adjusted.empty:
+            print(f"⚠ {symbol} の株価データがありません。")
+            continue
+
+        actions = adjusted.attrs['actions']
+        report[company] = {
+            'symbol': symbol,
+            'rows': int(len(adjusted)),
+            'actions': [
+                {
+                    'effective': str(a['effective'])[:10],
+                    'ratio': float(a['ratio']),
+                    'priceAdjusted': bool(a['rawPrice']),
+                }
+                for _, a in actions.iterrows()
+            ],
+        }
+        print(f"  ✓ {company} ({symbol}): {len(adjusted)} 日, 株式アクション {len(actions)} 件")
+
+    output_file = Path(args.output)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n✓ 調整後株価系列の確認完了: {output_file}")
+
+
+if __name__ == '__main__':
+    main()
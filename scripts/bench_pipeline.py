@@ -0,0 +1,177 @@
+# パイプライン性能ベンチマーク（pytest-benchmark）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# synthetic_edinet.py の合成書類で、XBRL解析・CSV抽出・KPI算出・スコア評価の各ステージを
+# 現在の規模（3社 × 8年）の 1倍・10倍・100倍で計測する。出力データの検証（validate_thresholds.py）は
+# public/data/ の時系列・企業価値・スコアカードを企業数倍に複製して計測する。あわせて valuescope.py の軽いコマンド
+# （企業一覧・閾値検証）のインタプリタ起動から出力までの時間を計測する（目標 STARTUP_TARGET_SECONDS）。通常のテスト（test_*.py）とは別に、
+# ファイルを指定して実行する:
+#   cd scripts
+#   python -m pytest bench_pipeline.py --benchmark-autosave              # 結果を .benchmarks/ に保存（コミットID付き）
+#   python -m pytest bench_pipeline.py --benchmark-compare --benchmark-compare-fail=mean:20%
+#   VALUESCOPE_BENCH_SCALES=1,10 python -m pytest bench_pipeline.py      # 規模を絞る
+
+import os
+import sys
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import compute_scores  # noqa: E402
+import extract_xbrl_to_csv  # noqa: E402
+import parse_edinet_xbrl  # noqa: E402
+from rescore import build_scorecards, load_thresholds  # noqa: E402
+from validate_thresholds import DataValidator  # noqa: E402
+from synthetic_edinet import DEFAULT_COMPANIES, DEFAULT_YEARS, generate_corpus, synthetic_companies  # noqa: E402
+
+PUBLIC_DATA = Path(__file__).resolve().parent.parent / 'public' / 'data'
+TARGETS_FILE = PUBLIC_DATA / 'kpi_targets.json'
+
+# 規模（現在の企業数に対する倍率）。環境変数 VALUESCOPE_BENCH_SCALES で変更可
+SCALES = [int(s) for s in os.environ.get('VALUESCOPE_BENCH_SCALES', '1,10,100').split(',')]
+
+# 規模ごとの計測回数（100倍は1回でも十分長い）
+ROUNDS = {1: 5, 10: 3}
+
+# 軽いコマンドの起動時間の目標（インタプリタ起動から出力まで。pandas 等を読み込むと 0.5秒を超える）
+STARTUP_TARGET_SECONDS = 0.25
+VALUESCOPE = Path(__file__).resolve().parent / 'valuescope.py'
+TRIVIAL_COMMANDS = {
+    'companies': ['companies'],
+    'validate-thresholds': ['validate', '--timeseries', 'none', '--valuation', 'none', '--scorecards', 'none',
+                            '--thresholds', str(TARGETS_FILE)],
+}
+
+
+class Corpus:
+    """規模ごとの合成書類と、下流ステージの入力（解析済みJSON・KPI値）"""
+
+    def __init__(self, root: Path, scale: int):
+        self.root = root
+        self.companies = DEFAULT_COMPANIES * scale
+        self.registry = generate_corpus(root, companies=self.companies)
+        self.xbrl_dir = root / 'XBRL'
+        self.filings = self.companies * DEFAULT_YEARS
+        self._parsed = None
+        self._kpi_values = None
+
+    def args(self, output: Path, *extra: str):
+        return ['--input', str(self.xbrl_dir), '--output', str(output), '--registry', str(self.registry), *extra]
+
+    @property
+    def parsed_dir(self) -> Path:
+        if self._parsed is None:
+            self._parsed = self.root / 'parsed'
+            parse_edinet_xbrl.main(self.args(self._parsed))
+        return self._parsed
+
+    @property
+    def kpi_values(self):
+        if self._kpi_values is None:
+            keys = [c['key'] for c in synthetic_companies(self.companies)]
+            self._kpi_values = compute_scores.materialize_kpi_values(self.parsed_dir, keys)
+        return self._kpi_values
+
+
+@pytest.fixture(scope='session')
+def corpora(tmp_path_factory):
+    cache = {}
+
+    def get(scale: int) -> Corpus:
+        if scale not in cache:
+            cache[scale] = Corpus(tmp_path_factory.mktemp(f'corpus_{scale}x'), scale)
+        return cache[scale]
+    return get
+
+
+def run(benchmark, corpus: Corpus, scale: int, func, setup=None, rounds=None):
+    benchmark.extra_info.update({'scale': scale, 'companies': corpus.companies, 'filings': corpus.filings})
+    rounds = rounds or ROUNDS.get(scale, 1)
+    # 複数回計測する規模では初回（レジストリの読み込みなど）を計測から外す
+    return benchmark.pedantic(func, setup=setup, rounds=rounds, iterations=1, warmup_rounds=1 if rounds > 1 else 0)
+
+
+@pytest.mark.benchmark(group='parse_edinet_xbrl')
+@pytest.mark.parametrize('scale', SCALES)
+def test_parse_xbrl(benchmark, corpora, tmp_path, scale):
+    corpus = corpora(scale)
+    output = tmp_path / 'parsed'
+    # 書類キャッシュのない初回解析を計測
+    run(benchmark, corpus, scale, lambda: parse_edinet_xbrl.main(corpus.args(output, '--full')),
+        setup=lambda: shutil.rmtree(output, ignore_errors=True))
+    assert len(list(output.glob('*_financials.json'))) == corpus.companies
+
+
+@pytest.mark.benchmark(group='extract_xbrl_to_csv')
+@pytest.mark.parametrize('scale', SCALES)
+def test_extract_csv(benchmark, corpora, tmp_path, scale):
+    corpus = corpora(scale)
+    output = tmp_path / 'csv'
+    employees = tmp_path / 'employees.json'
+    run(benchmark, corpus, scale,
+        lambda: extract_xbrl_to_csv.main(corpus.args(output, '--employees', str(employees))),
+        setup=lambda: shutil.rmtree(output, ignore_errors=True))
+    assert len(list(output.glob('*/PL.csv'))) == corpus.companies
+
+
+@pytest.mark.benchmark(group='kpi_build')
+@pytest.mark.parametrize('scale', SCALES)
+def test_kpi_build(benchmark, corpora, scale):
+    corpus = corpora(scale)
+    keys = [c['key'] for c in synthetic_companies(corpus.companies)]
+    parsed_dir = corpus.parsed_dir
+    kpi_values = run(benchmark, corpus, scale, lambda: compute_scores.materialize_kpi_values(parsed_dir, keys))
+    assert len(kpi_values['columns']['company']) == corpus.filings
+
+
+@pytest.mark.benchmark(group='scoring')
+@pytest.mark.parametrize('scale', SCALES)
+def test_scoring(benchmark, corpora, scale):
+    corpus = corpora(scale)
+    kpi_values = corpus.kpi_values
+    thresholds = load_thresholds(TARGETS_FILE)
+    # 100倍でも数十ミリ秒なので、1回だけの計測にならないよう常に複数回計測する
+    scorecards = run(benchmark, corpus, scale, lambda: build_scorecards(kpi_values, thresholds), rounds=10)
+    assert len(scorecards['companies']) == corpus.companies
+
+
+def replicate(companies, scale: int):
+    """企業 → データ の辞書を scale 倍の企業数に複製"""
+    return {f'{key}_{i}': value for i in range(scale) for key, value in companies.items()}
+
+
+@pytest.mark.benchmark(group='validation')
+@pytest.mark.parametrize('scale', SCALES)
+def test_validation(benchmark, scale):
+    def load(name):
+        return json.loads((PUBLIC_DATA / name).read_text(encoding='utf-8'))
+    timeseries = replicate(load('timeseries.json'), scale)
+    valuation = replicate(load('valuation.json')['companies'], scale)
+    scorecards = replicate(load('scorecards.json')['companies'], scale)
+    thresholds = load_thresholds(TARGETS_FILE)
+
+    def validate():
+        validator = DataValidator()
+        _, frame = validator.validate_timeseries(timeseries)
+        validator.validate_valuation(valuation, frame)
+        validator.validate_scorecard(scorecards, thresholds, frame)
+        return frame
+
+    benchmark.extra_info.update({'scale': scale, 'companies': len(timeseries)})
+    frame = benchmark.pedantic(validate, rounds=5, iterations=1, warmup_rounds=1)
+    assert len(frame) == sum(len(records) for records in timeseries.values())
+
+
+@pytest.mark.benchmark(group='cli_startup')
+@pytest.mark.parametrize('command', list(TRIVIAL_COMMANDS))
+def test_cli_startup(benchmark, command):
+    argv = [sys.executable, str(VALUESCOPE), *TRIVIAL_COMMANDS[command]]
+    benchmark.pedantic(lambda: subprocess.run(argv, capture_output=True, check=True),
+                       rounds=10, iterations=1, warmup_rounds=1)
+    assert benchmark.stats.stats.min < STARTUP_TARGET_SECONDS
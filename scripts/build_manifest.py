@@ -0,0 +1,203 @@
+# 配信データのマニフェスト生成スクリプト
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# public/ 配下の全配信ファイル（public/data/*.json・財務諸表CSV・statements ペイロード）を
+# public/data/manifest.json に一覧化する（サイズ・内容ハッシュ・対象企業・年度範囲）。
+# 大きい時系列系ファイルは企業別・年度別のシャードにも分割して public/data/shards/ に出力するので、
+# フロントエンドは表示中のタブ・企業・年度に必要な分だけを取得し、ハッシュで再検証できる。
+
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Set, Tuple
+
+from company_registry import add_registry_arguments, companies_from_args, company_keys
+from build_statement_payloads import content_hash, write_hashed, INDEX_FILE
+from json_output import write_json
+
+# マニフェストのファイル名（public/data/ 配下、ハッシュなし）
+MANIFEST_FILE = 'manifest.json'
+
+# シャードの出力先（public/data/ 配下）
+SHARD_DIR = 'shards'
+
+# 企業別・年度別にシャード分割するファイル（企業キー → レコード配列 の形式）
+SHARDED_ARTIFACTS = ('timeseries', 'employees')
+
+# 企業別のみに分割するファイル（'companies' → 企業キー → 値 の形式）
+COMPANY_SHARDED_ARTIFACTS = ('scorecards', 'valuation')
+
+# 年度を表すキー（会計年度を優先）
+YEAR_KEYS = ('fiscalYear', 'fiscal_year', 'year')
+
+
+def record_year(record: Dict[str, Any]) -> Optional[int]:
+    """レコードの年度（fiscalYear → fiscal_year → year の順。なければNone）"""
+    for key in YEAR_KEYS:
+        value = record.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return int(value)
+        if isinstance(value, str) and value.isdigit():
+            return int(value)
+    return None
+
+
+def scan_coverage(data: Any, known_companies: Set[str]) -> Tuple[Set[str], Set[int]]:
+    """
+    JSONを再帰的に走査し、含まれる企業キーと年度を集める
+
+    企業キーは辞書のキー、または 'company'/'companies' の値に現れる登録企業。
+    年度は各レコードの YEAR_KEYS と、peer_ranks.json の 'fiscalYears'。
+    """
+    companies: Set[str] = set()
+    years: Set[int] = set()
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            companies.update(k for k in node if k in known_companies)
+            year = record_year(node)
+            if year is not None:
+                years.add(year)
+            for key in ('company', 'companies'):
+                values = node.get(key)
+                values = [values] if isinstance(values, str) else values
+                if isinstance(values, list):
+                    companies.update(v for v in values if isinstance(v, str) and v in known_companies)
+            for key in YEAR_KEYS + ('fiscalYears',):
+                values = node.get(key)
+                if isinstance(values, list):
+                    years.update(int(v) for v in values if isinstance(v, (int, float)) and not isinstance(v, bool))
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(item for item in node if isinstance(item, (dict, list)))
+    return companies, years
+
+
+def artifact_entry(path: Path, companies: Iterable[str], years: Iterable[int]) -> Dict[str, Any]:
+    """マニフェストの1エントリ（bytes・hash・companies・years=[最小, 最大]）"""
+    years = sorted(years)
+    return {
+        'bytes': path.stat().st_size,
+        'hash': content_hash(path.read_bytes()),
+        'companies': sorted(companies),
+        'years': [years[0], years[-1]] if years else None,
+    }
+
+
+def csv_coverage(path: Path) -> Set[int]:
+    """財務諸表CSVの年度（fiscal_year 列）"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        header = f.readline().strip().split(',')
+        if 'fiscal_year' not in header:
+            return set()
+        column = header.index('fiscal_year')
+        years = set()
+        for line in f:
+            value = line.strip().split(',')[column] if line.strip() else ''
+            if value.isdigit():
+                years.add(int(value))
+    return years
+
+
+def write_shards(name: str, data: Dict[str, Any], shard_root: Path, public_dir: Path,
+                 by_year: bool) -> Dict[str, Dict[str, str]]:
+    """
+    企業別（by_year=True なら年度別も）のシャードを書き出す
+
+    Returns:
+        {'companies': {企業: 相対パス}, 'years': {年度: 相対パス}}（パスは public/ からの相対）
+    """
+    shard_dir = shard_root / name
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    shards: Dict[str, Dict[str, str]] = {'companies': {}, 'years': {}}
+
+    yearly: Dict[int, Dict[str, List[Any]]] = {}
+    for company, value in data.items():
+        file_name = write_hashed(shard_dir, company, {company: value})
+        shards['companies'][company] = (shard_dir / file_name).relative_to(public_dir).as_posix()
+        if by_year and isinstance(value, list):
+            for record in value:
+                year = record_year(record) if isinstance(record, dict) else None
+                if year is not None:
+                    yearly.setdefault(year, {}).setdefault(company, []).append(record)
+
+    for year, records in sorted(yearly.items()):
+        file_name = write_hashed(shard_dir, str(year), records)
+        shards['years'][str(year)] = (shard_dir / file_name).relative_to(public_dir).as_posix()
+    return shards
+
+
+def build_manifest(public_dir: Path, known_companies: List[str]) -> Dict[str, Any]:
+    """
+    public/ 配下の配信ファイルを一覧化し、シャードを書き出してマニフェストを返す
+
+    Returns:
+        {'artifacts': {public/ からの相対パス: エントリ}, 'shards': {ファイル名: {'companies': ..., 'years': ...}}}
+    """
+    public_dir = Path(public_dir)
+    data_dir = public_dir / 'data'
+    known = set(known_companies)
+    artifacts: Dict[str, Dict[str, Any]] = {}
+    shards: Dict[str, Dict[str, Dict[str, str]]] = {}
+
+    for path in sorted(data_dir.glob('*.json')):
+        if path.name == MANIFEST_FILE:
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        companies, years = scan_coverage(data, known)
+        artifacts[path.relative_to(public_dir).as_posix()] = artifact_entry(path, companies, years)
+
+        if path.stem in SHARDED_ARTIFACTS:
+            series = {c: v for c, v in data.items() if c in known}
+            shards[path.stem] = write_shards(path.stem, series, data_dir / SHARD_DIR, public_dir, by_year=True)
+        elif path.stem in COMPANY_SHARDED_ARTIFACTS and isinstance(data.get('companies'), dict):
+            shards[path.stem] = write_shards(path.stem, data['companies'], data_dir / SHARD_DIR, public_dir,
+                                             by_year=False)
+
+    for path in sorted((public_dir / 'XBRL_output').glob('*/*.csv')):
+        artifacts[path.relative_to(public_dir).as_posix()] = artifact_entry(path, [path.parent.name], csv_coverage(path))
+
+    # 財務諸表ペイロード（build_statement_payloads.py の索引に載っている現行ファイルのみ）
+    statement_dir = public_dir / 'statements'
+    if (statement_dir / INDEX_FILE).exists():
+        with open(statement_dir / INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        concepts_path = statement_dir / index['concepts']
+        artifacts[concepts_path.relative_to(public_dir).as_posix()] = artifact_entry(concepts_path, [], [])
+        concepts = json.loads(concepts_path.read_bytes())
+        for company, statements in index['statements'].items():
+            for name in statements.values():
+                path = statement_dir / name
+                payload = json.loads(path.read_bytes())
+                headers = [concepts[i] for i in payload['columns']]
+                years = set()
+                if 'fiscal_year' in headers:
+                    years = {v for v in payload['values'][headers.index('fiscal_year')] if isinstance(v, int)}
+                artifacts[path.relative_to(public_dir).as_posix()] = artifact_entry(path, [company], years)
+
+    return {'artifacts': artifacts, 'shards': shards}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='配信データのマニフェスト・シャード生成')
+    parser.add_argument('--public', default='public', help='配信ディレクトリ（デフォルト: public）')
+    add_registry_arguments(parser)
+    args = parser.parse_args(argv)
+
+    public_dir = Path(args.public)
+    manifest = build_manifest(public_dir, company_keys(companies_from_args(args)))
+
+    output_file = public_dir / 'data' / MANIFEST_FILE
+    write_json(manifest, output_file, compact=True, sort_keys=True)
+
+    total = sum(entry['bytes'] for entry in manifest['artifacts'].values())
+    shard_count = sum(len(s['companies']) + len(s['years']) for s in manifest['shards'].values())
+    print(f"✓ {len(manifest['artifacts'])} ファイル（{total:,} B）、シャード {shard_count} 件")
+    print(f"✓ マニフェスト: {output_file}")
+
+
+if __name__ == '__main__':
+    main()
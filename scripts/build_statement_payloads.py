@@ -0,0 +1,157 @@
+# 財務諸表ペイロード生成スクリプト（フロントエンド配信用）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# XBRL_output/<企業>/<PL|BS|CF>.csv（数百列の疎な横持ちCSV）を、企業×財務諸表ごとの
+# 列指向JSONに変換して public/statements/ に出力する。
+#   concepts.<ハッシュ>.json           … 全ペイロード共通の項目名辞書（列名は辞書の番号で参照）
+#   <企業>_<PL|BS|CF>.<ハッシュ>.json   … 列指向の値（全行が空の列は除外）
+#   index.json                        … 企業・財務諸表 → ハッシュ付きファイル名（これだけは短期キャッシュ）
+# ハッシュ付きファイルは内容が変わらない限り同じ名前なので長期キャッシュできる。
+# 圧縮は配信側（GitHub Pages は gzip をその場で適用）に任せ、事前圧縮ファイルは併置しない。
+
+import gzip
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+from company_registry import add_registry_arguments, companies_from_args, company_keys
+from json_output import encode_json, replace_atomic, write_json
+
+# 対象の財務諸表
+STATEMENTS = ('PL', 'BS', 'CF')
+
+# ファイル名に付けるハッシュの桁数
+HASH_LENGTH = 10
+
+# 索引ファイル名（ハッシュなし）
+INDEX_FILE = 'index.json'
+
+
+def content_hash(payload: bytes) -> str:
+    """内容ハッシュ（SHA-256 の先頭 HASH_LENGTH 桁）"""
+    return hashlib.sha256(payload).hexdigest()[:HASH_LENGTH]
+
+
+def column_values(column: pd.Series) -> List[Any]:
+    """
+    CSVの1列（文字列）をJSON用の値リストに変換
+
+    useFinancialCSV.ts のCSV解析と同じく、数値に変換できるものは数値（整数値はint）、
+    できないものは文字列、空欄はNone。
+    """
+    numeric = pd.to_numeric(column, errors='coerce')
+    values = []
+    for text, number in zip(column, numeric):
+        if text == '':
+            values.append(None)
+        elif pd.isna(number):
+            values.append(text)
+        else:
+            values.append(int(number) if float(number).is_integer() else float(number))
+    return values
+
+
+def load_statement(csv_path: Path) -> Optional[pd.DataFrame]:
+    """財務諸表CSVを文字列のまま読み込み、全行が空の列を除外（ファイルがなければNone）"""
+    if not csv_path.exists():
+        return None
+    df = pd.read_csv(csv_path, encoding='utf-8-sig', dtype=str, keep_default_na=False)
+    df.columns = [c.strip() for c in df.columns]
+    return df.loc[:, (df != '').any(axis=0)] if len(df) else df
+
+
+def build_payload(company: str, statement: str, df: pd.DataFrame, concept_ids: Dict[str, int]) -> Dict[str, Any]:
+    """列指向ペイロード（columns: 項目名辞書の番号、values: 列ごとの値リスト）"""
+    return {
+        'company': company,
+        'statement': statement,
+        'rows': len(df),
+        'columns': [concept_ids[c] for c in df.columns],
+        'values': [column_values(df[c]) for c in df.columns],
+    }
+
+
+def write_hashed(output_dir: Path, prefix: str, data: Any) -> str:
+    """
+    ハッシュ付きファイル名でJSONを書き出し、同じ接頭辞の古いファイル（旧版の .gz/.br を含む）を削除
+
+    Returns:
+        書き出したファイル名（<接頭辞>.<ハッシュ>.json）
+    """
+    payload = encode_json(data, compact=True, sort_keys=True)
+    name = f'{prefix}.{content_hash(payload)}.json'
+    path = output_dir / name
+    if not path.exists():
+        replace_atomic(path, payload)
+
+    for stale in output_dir.glob(f'{prefix}.*.json*'):
+        if stale.name != name:
+            stale.unlink()
+    return name
+
+
+def build_statement_payloads(xbrl_output_dir: Path, output_dir: Path, companies: List[str]) -> Dict[str, Any]:
+    """
+    全企業・全財務諸表のペイロードと項目名辞書・索引を出力
+
+    Returns:
+        索引（{'concepts': 辞書ファイル名, 'statements': {企業: {財務諸表: ファイル名}}}）
+    """
+    frames = {}
+    for company in companies:
+        for statement in STATEMENTS:
+            df = load_statement(Path(xbrl_output_dir) / company / f'{statement}.csv')
+            if df is not None:
+                frames[(company, statement)] = df
+
+    # 項目名辞書（全ペイロードで共有。並びを固定して辞書のハッシュを安定させる）
+    concepts = sorted({c for df in frames.values() for c in df.columns})
+    concept_ids = {c: i for i, c in enumerate(concepts)}
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    index: Dict[str, Any] = {'concepts': write_hashed(output_dir, 'concepts', concepts), 'statements': {}}
+    for (company, statement), df in frames.items():
+        payload = build_payload(company, statement, df, concept_ids)
+        index['statements'].setdefault(company, {})[statement] = write_hashed(
+            output_dir, f'{company}_{statement}', payload)
+
+    write_json(index, output_dir / INDEX_FILE, compact=True, sort_keys=True)
+    return index
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='財務諸表ペイロード生成（列指向JSON）')
+    parser.add_argument('--input', default='XBRL_output', help='財務諸表CSVのディレクトリ（デフォルト: XBRL_output）')
+    parser.add_argument('--output', default='public/statements', help='出力ディレクトリ（デフォルト: public/statements）')
+    add_registry_arguments(parser)
+    args = parser.parse_args(argv)
+
+    companies = company_keys(companies_from_args(args))
+    index = build_statement_payloads(Path(args.input), Path(args.output), companies)
+
+    output_dir = Path(args.output)
+    csv_bytes = sum(
+        (Path(args.input) / company / f'{statement}.csv').stat().st_size
+        for company, statements in index['statements'].items() for statement in statements
+    )
+    payload_bytes = sum(
+        (output_dir / name).stat().st_size
+        for statements in index['statements'].values() for name in statements.values()
+    )
+    # 配信時の転送量の目安（Pages がその場で gzip 圧縮した場合）
+    gzip_bytes = sum(
+        len(gzip.compress((output_dir / name).read_bytes()))
+        for statements in index['statements'].values() for name in statements.values()
+    )
+    print(f"✓ {sum(len(s) for s in index['statements'].values())} ペイロード: "
+          f"CSV {csv_bytes:,} B → JSON {payload_bytes:,} B（gzip {gzip_bytes:,} B）")
+    print(f"✓ 索引: {output_dir / INDEX_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,17 @@ except ImportError:
     print("pandas not found")
     sys.exit(1)
 
+from compute_scores import COST_OF_EQUITY, TAX_RATE
+from adjusted_prices import load_adjusted_prices
+from company_registry import load_registry, company_keys, ticker_for, fiscal_year_end_for
+from fiscal_calendar import select_period
+from ttm_financials import financials_file, load_period_financials
+from kpi_trends import compute_trends, TREND_STATS
+from json_output import write_json
+
+# トレンド（前期比・移動平均・CAGR）を付与するKPI
+TREND_KPIS = ['roic', 'wacc', 'ebitdaMargin', 'fcfMargin', 'evEbitdaRatio', 'per', 'pbr']
+
 def load_json(path: Path) -> Optional[Any]:
     if not path.exists():
         return None
@@ -23,40 +34,28 @@ def load_json(path: Path) -> Optional[Any]:
 
 
 def load_financials(company: str) -> List[Dict[str, Any]]:
-    """財務データを読み込む"""
-    file_path = Path(f'data/edinet_parsed/{company}_financials.json')
-    if not file_path.exists():
+    """財務データを読み込む（通期と四半期・半期のパーティション）"""
+    data_dir = Path('data/edinet_parsed')
+    if not financials_file(data_dir, company).exists():
         return []
     
-    data = load_json(file_path)
-    return data if isinstance(data, list) else []
+    return load_period_financials(data_dir, company)
 
-def load_stock_prices(company: str) -> Optional[pd.DataFrame]:
-    """株価データを読み込む"""
-    # マッピング: TEPCO -> 9501.T, CHUBU -> 9502.T
-    symbol_map = {'TEPCO': '9501.T', 'CHUBU': '9502.T'}
-    symbol = symbol_map.get(company)
+def load_stock_prices(company: str, financials: Optional[List[Dict[str, Any]]] = None) -> Optional[pd.DataFrame]:
+    """株価データを読み込む（株式分割・併合を調整した AdjClose / AdjShares / MarketCap 列付き）"""
+    # 企業レジストリの ticker（非上場は None）
+    symbol = ticker_for(company)
     if not symbol:
         return None
     
-    csv_path = Path(f'data/prices/{symbol}.csv')
-    if not csv_path.exists():
-        return None
-    
     try:
-        df = pd.read_csv(csv_path, comment='#')
-        df['Date'] = pd.to_datetime(df['Date'])
-        df.set_index('Date', inplace=True)
-        df.sort_index(inplace=True)
-        # 重複排除
-        df = df[~df.index.duplicated(keep='last')]
-        return df
+        return load_adjusted_prices(symbol, financials)
     except Exception as e:
         print(f"Error loading stock prices for {company}: {e}")
         return None
 
-def get_stock_price(df: pd.DataFrame, date_str: str) -> Optional[float]:
-    """指定日（または直前営業日）の終値を取得"""
+def get_stock_price(df: pd.DataFrame, date_str: str, column: str = 'Close') -> Optional[float]:
+    """指定日（または直前営業日）の終値を取得（column='MarketCap' で調整後時価総額）"""
     if df is None or df.empty:
         return None
     
@@ -78,7 +77,8 @@ def get_stock_price(df: pd.DataFrame, date_str: str) -> Optional[float]:
         if (target_date - found_date).days > 10:
             return None
             
-        return float(df.loc[found_date]['Close'])
+        value = float(df.loc[found_date][column])
+        return None if pd.isna(value) else value
     except Exception as e:
         print(f"Error getting stock price for {date_str}: {e}")
         return None
@@ -97,15 +97,16 @@ def calculate_kpi(record: Dict[str, Any], stock_df: Optional[pd.DataFrame]) -> D
     
     # WACC計算（加重平均資本コスト）
     # WACC = (E/V × Re) + (D/V × Rd × (1-T))
-    # E: 自己資本, D: 有利子負債, V: E+D, Re: 株主資本コスト（仮定6%）, Rd: 負債コスト, T: 税率（仮定30%）
+    # E: 自己資本, D: 有利子負債, V: E+D, Re: 株主資本コスト, Rd: 負債コスト, T: 税率
+    # Re・Tの前提値は compute_scores.COST_OF_EQUITY / TAX_RATE を共有
     total_capital = bs['equity'] + bs['interestBearingDebt']
     if total_capital > 0:
         equity_ratio_wacc = bs['equity'] / total_capital
         debt_ratio_wacc = bs['interestBearingDebt'] / total_capital
-        cost_of_equity = 6.0  # 株主資本コスト（仮定6%）
+        cost_of_equity = COST_OF_EQUITY
         interest_expenses = pl.get('interestExpenses', 0.0)
         cost_of_debt = (interest_expenses / bs['interestBearingDebt'] * 100) if bs['interestBearingDebt'] > 0 else 0.0
-        tax_rate = 0.30  # 法人実効税率（仮定30%）
+        tax_rate = TAX_RATE
         wacc = (equity_ratio_wacc * cost_of_equity) + (debt_ratio_wacc * cost_of_debt * (1 - tax_rate))
     else:
         wacc = 0.0
@@ -129,7 +130,9 @@ def calculate_kpi(record: Dict[str, Any], stock_df: Optional[pd.DataFrame]) -> D
     
     # 株価・時価総額・EV
     stock_price = get_stock_price(stock_df, date_str)
-    issued_shares = bs.get('issuedShares', 0.0)
+    # 時価総額 = 調整後終値 × 調整後発行済株式数（百万円）
+    # 株式分割・併合の前後でも同じ株式基準で計算される（adjusted_prices.build_adjusted_series）
+    market_cap_adj = get_stock_price(stock_df, date_str, column='MarketCap')
     
     market_cap = None
     enterprise_value = None
@@ -137,12 +140,8 @@ def calculate_kpi(record: Dict[str, Any], stock_df: Optional[pd.DataFrame]) -> D
     per = None
     pbr = None
     
-    if stock_price is not None and issued_shares > 0:
-        # 時価総額 = 株価 * 発行済株式数
-        # bs['issuedShares'] は株数
-        # market_cap は百万円単位に合わせるため / 1,000,000
-        market_cap_val = stock_price * issued_shares
-        market_cap = market_cap_val / 1_000_000 # 百万円
+    if stock_price is not None and market_cap_adj is not None:
+        market_cap = market_cap_adj # 百万円
         
         net_debt = bs['interestBearingDebt'] - bs['cashAndDeposits']
         enterprise_value = market_cap + net_debt
@@ -220,7 +219,7 @@ def build_timeseries(companies: List[str]) -> Dict[str, Any]:
     
     for company in companies:
         financials = load_financials(company)
-        stock_df = load_stock_prices(company)
+        stock_df = load_stock_prices(company, financials)
         
         if not financials:
             print(f"⚠ {company}のデータが見つかりません。")
@@ -228,8 +227,8 @@ def build_timeseries(companies: List[str]) -> Dict[str, Any]:
         
         print(f"{company}を処理中... ({len(financials)} レコード)")
         
-        # 年度別データを抽出（Annual＝03-31決算のみ）
-        annual_records = [r for r in financials if r['date'].endswith('03-31')]
+        # 年度別データを抽出（Annual＝各社の決算期末の通期のみ）
+        annual_records = select_period(financials, 'FY', fiscal_year_end_for(company))
         
         # 時系列データを構築
         timeseries = []
@@ -241,6 +240,7 @@ def build_timeseries(companies: List[str]) -> Dict[str, Any]:
                 timeseries.append({
                     'date': date_obj.strftime('%Y-%m-%d'),
                     'year': date_obj.year,
+                    'fiscalYear': record['fiscalYear'],
                     **kpi
                 })
             except Exception as e:
@@ -252,81 +252,35 @@ def build_timeseries(companies: List[str]) -> Dict[str, Any]:
         result[company] = timeseries
         print(f"  ✓ {len(timeseries)} 年分のデータ生成")
     
+    attach_trends(result)
     return result
 
-def build_valuation_snapshot(companies: List[str]) -> Dict[str, Any]:
-    """最新の企業価値スナップショットを作成"""
-    valuation_data = {
-        'asOf': datetime.now().strftime('%Y-%m-%d'),
-        'companies': {}
-    }
+def attach_trends(result: Dict[str, List[Dict[str, Any]]]) -> None:
+    """全企業の時系列にトレンド（前年比・移動平均・CAGR）を一括付与"""
+    points = [(company, point) for company, series in result.items() for point in series]
+    if not points:
+        return
     
-    for company in companies:
-        financials = load_financials(company)
-        stock_df = load_stock_prices(company)
-        
-        if not financials:
-            continue
-            
-        annual_records = [r for r in financials if r['date'].endswith('03-31')]
-        if not annual_records:
-            continue
-            
-        latest_record = sorted(annual_records, key=lambda x: x['date'])[-1]
-        bs = latest_record['bs']
-        pl = latest_record['pl']
-        date_str = latest_record['date']
-        
-        stock_price = get_stock_price(stock_df, date_str)
-        market_cap = None
-        if stock_price is not None and bs.get('issuedShares'):
-             market_cap = stock_price * bs['issuedShares'] / 1_000_000 # 百万円
-        
-        # 計算
-        interest_bearing_debt = bs.get('interestBearingDebt', 0)
-        cash = bs.get('cashAndDeposits', 0)
-        net_debt = interest_bearing_debt - cash
-        ebitda = pl.get('ebitda', 0)
-        net_income = pl.get('netIncome', 0)
-        equity = bs.get('equity', 0)
-        
-        enterprise_value = None
-        ev_ebitda = None
-        per = None
-        pbr = None
-        
-        if market_cap is not None:
-            enterprise_value = market_cap + net_debt
-            ev_ebitda = enterprise_value / ebitda if ebitda > 0 else 0
-            per = market_cap / net_income if net_income > 0 else 0
-            pbr = market_cap / equity if equity > 0 else 0
-            
-        valuation_data['companies'][company] = {
-            'marketCap': market_cap,
-            'interestBearingDebt': interest_bearing_debt,
-            'cashAndDeposits': cash,
-            'netDebt': net_debt,
-            'enterpriseValue': enterprise_value,
-            'ebitda': ebitda,
-            'evEbitdaRatio': ev_ebitda,
-            'netIncome': net_income,
-            'per': per,
-            'equity': equity,
-            'pbr': pbr,
-            'dividendYield': 0, # 配当情報は現在ない
-            'eps': 0, # EPS情報は現在ない
-            'bps': 0, # BPS情報は現在ない
+    frame = pd.DataFrame([
+        {'company': company, 'date': point['date'], 'fiscalYear': point['fiscalYear'],
+         **{kpi: point.get(kpi) for kpi in TREND_KPIS}}
+        for company, point in points
+    ])
+    trends = compute_trends(frame, TREND_KPIS, group_col='company', year_col='fiscalYear')
+    trends = trends.round(2).astype(object).where(trends.notna(), None)
+    
+    for row, (_, point) in enumerate(points):
+        point['trends'] = {
+            kpi: {stat: trends.iat[row, trends.columns.get_loc(f'{kpi}_{stat}')] for stat in TREND_STATS}
+            for kpi in TREND_KPIS
         }
-        
-    return valuation_data
 
 def main():
-    companies = ['TEPCO', 'CHUBU', 'JERA']
+    companies = company_keys(load_registry())
     
     print("=== 時系列データ生成開始 ===\n")
     
     timeseries_data = build_timeseries(companies)
-    valuation_data = build_valuation_snapshot(companies)
 
     public_dir = Path('public/data')
     public_dir.mkdir(parents=True, exist_ok=True)
@@ -336,11 +290,6 @@ def main():
     def has_payload_data(name: str, data: Dict[str, Any]) -> bool:
         if not isinstance(data, dict):
             return False
-        if name == 'valuation.json':
-            companies = data.get('companies')
-            if isinstance(companies, dict):
-                return any(bool(value) for value in companies.values())
-            return False
         return any(bool(value) for value in data.values())
 
     def ensure_data(name: str, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -360,29 +309,14 @@ def main():
         return data
 
     timeseries_data = ensure_data('timeseries.json', timeseries_data)
-    valuation_data = ensure_data('valuation.json', valuation_data)
     
-    # timeseries.json 保存
+    # timeseries.json 保存（data/ と public/data/ に同じ内容を書き込み、変化がなければ書き込まない）
     output_file = cache_dir / 'timeseries.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(timeseries_data, f, ensure_ascii=False, indent=2)
-    
     public_output_file = public_dir / 'timeseries.json'
-    with open(public_output_file, 'w', encoding='utf-8') as f:
-        json.dump(timeseries_data, f, ensure_ascii=False, indent=2)
-    
-    # valuation.json 保存
-    val_output_file = cache_dir / 'valuation.json'
-    with open(val_output_file, 'w', encoding='utf-8') as f:
-        json.dump(valuation_data, f, ensure_ascii=False, indent=2)
-        
-    public_val_output_file = public_dir / 'valuation.json'
-    with open(public_val_output_file, 'w', encoding='utf-8') as f:
-        json.dump(valuation_data, f, ensure_ascii=False, indent=2)
+    write_json(timeseries_data, output_file, public_output_file, compact=True)
     
     print(f"\n✓ 時系列データ生成完了: {output_file}")
     print(f"✓ Public用データ保存: {public_output_file}")
-    print(f"✓ Valuationデータ生成完了: {val_output_file}")
 
 if __name__ == '__main__':
     main()
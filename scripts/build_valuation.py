@@ -2,37 +2,41 @@
 # Version: 1.0.0
 # Date: 2025-12-15
 
-import json
 import argparse
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import traceback
 
-def load_stock_prices(company: str) -> Optional[pd.DataFrame]:
-    """株価データを読み込む"""
-    symbol_map = {'TEPCO': '9501.T', 'CHUBU': '9502.T'}
-    symbol = symbol_map.get(company)
+from compute_scores import TAX_RATE
+from adjusted_prices import load_adjusted_prices
+from company_registry import add_registry_arguments, companies_from_args, company_keys, ticker_for, fiscal_year_end_for
+from ttm_financials import financials_file as period_financials_file, load_period_financials, latest_valuation_record
+from json_output import write_json
+
+# モンテカルロ評価の既定値
+MC_MAX_SAMPLES = 1_000_000
+MC_DEFAULT_PRICE_VOL = 0.25  # 株価の年率ボラティリティ（株価履歴から推定できない場合）
+MC_PERCENTILES = (5, 50, 95)
+MC_HISTOGRAM_BINS = 8192
+
+def load_stock_prices(company: str, financials: Optional[List[Dict[str, Any]]] = None) -> Optional[pd.DataFrame]:
+    """株価データを読み込む（株式分割・併合を調整した AdjClose / AdjShares / MarketCap 列付き）"""
+    # 企業レジストリの ticker（非上場は None）
+    symbol = ticker_for(company)
     if not symbol:
         return None
     
-    csv_path = Path(f'data/prices/{symbol}.csv')
-    if not csv_path.exists():
-        return None
-    
     try:
-        df = pd.read_csv(csv_path, comment='#')
-        df['Date'] = pd.to_datetime(df['Date'])
-        df.set_index('Date', inplace=True)
-        df.sort_index(inplace=True)
-        return df
+        return load_adjusted_prices(symbol, financials)
     except Exception as e:
         print(f"Error loading stock prices for {company}: {e}")
         return None
 
-def get_stock_price(df: pd.DataFrame, date_str: str) -> Optional[float]:
-    """指定日（または直前営業日）の終値を取得"""
+def get_stock_price(df: pd.DataFrame, date_str: str, column: str = 'Close') -> Optional[float]:
+    """指定日（または直前営業日）の終値を取得（column='MarketCap' で調整後時価総額）"""
     if df is None:
         return None
     
@@ -50,7 +54,8 @@ def get_stock_price(df: pd.DataFrame, date_str: str) -> Optional[float]:
         if (target_date - found_date).days > 10:
             return None
             
-        return float(df.iloc[idx]['Close'])
+        value = float(df.iloc[idx][column])
+        return None if np.isnan(value) else value
     except Exception:
         return None
 
@@ -82,11 +87,11 @@ def calculate_enterprise_value(bs_data: Dict[str, Any], pl_data: Dict[str, Any],
     net_debt = interest_bearing_debt - cash
     
     # ROIC計算（簡易版）: NOPAT / Invested Capital
-    # NOPAT = Operating Income * (1 - tax rate) ≈ Operating Income * 0.7
+    # NOPAT = Operating Income * (1 - tax rate)
     # Invested Capital ≈ Equity + Interest Bearing Debt
     roic = None
     if equity + interest_bearing_debt > 0:
-        nopat = operating_income * 0.7  # 仮定: 実効税率30%
+        nopat = operating_income * (1 - TAX_RATE)
         invested_capital = equity + interest_bearing_debt
         roic = (nopat / invested_capital) * 100  # パーセント表示
 
@@ -137,11 +142,174 @@ def calculate_enterprise_value(bs_data: Dict[str, Any], pl_data: Dict[str, Any],
         'pbr': pbr,
     }
 
-def main():
+def estimate_price_volatility(df: Optional[pd.DataFrame], date_str: str, window: int = 250) -> Optional[float]:
+    """指定日以前の日次対数リターンから年率ボラティリティを推定"""
+    if df is None or df.empty:
+        return None
+
+    # 分割・併合による株価ギャップを含めないよう調整後終値を使う
+    column = 'AdjClose' if 'AdjClose' in df.columns else 'Close'
+    closes = df.loc[:pd.to_datetime(date_str), column].to_numpy(dtype=float)[-(window + 1):]
+    if len(closes) < 20:
+        return None
+
+    log_returns = np.diff(np.log(closes))
+    return float(np.std(log_returns, ddof=1) * np.sqrt(252))
+
+
+def simulate_enterprise_value(
+    market_cap: np.ndarray,
+    net_debt: np.ndarray,
+    ebitda: np.ndarray,
+    price_vol: np.ndarray,
+    net_debt_sd: float = 0.05,
+    ebitda_sd: float = 0.10,
+    samples: int = 100_000,
+    chunk_size: int = 100_000,
+    seed: Optional[int] = None,
+    percentiles: tuple = MC_PERCENTILES,
+) -> Dict[str, np.ndarray]:
+    """
+    EVとEV/EBITDA倍率のパーセンタイル帯をモンテカルロ法で推定（全企業を同時に計算）
+
+    株価: 対数正規（年率ボラティリティ price_vol、期待値は現在値）
+    純有利子負債・EBITDA: 正規分布（相対標準偏差 net_debt_sd / ebitda_sd）
+
+    サンプルは chunk_size 件ずつ生成し、1パス目で値域、2パス目で企業別ヒストグラムを
+    集計してパーセンタイルを求めるため、メモリ使用量はサンプル数に依存しない。
+    各チャンクの乱数は SeedSequence から派生させるので seed を指定すれば再現可能。
+
+    Returns:
+        {'enterpriseValue': (len(percentiles), 企業数), 'evEbitdaRatio': 同形状}
+    """
+    market_cap = np.asarray(market_cap, dtype=float)
+    net_debt = np.asarray(net_debt, dtype=float)
+    ebitda = np.asarray(ebitda, dtype=float)
+    price_vol = np.asarray(price_vol, dtype=float)
+    n_companies = len(market_cap)
+
+    chunk_sizes = [min(chunk_size, samples - start) for start in range(0, samples, chunk_size)]
+    chunk_seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    def generate(index: int):
+        rng = np.random.default_rng(chunk_seeds[index])
+        shape = (chunk_sizes[index], n_companies)
+        price_factor = np.exp(price_vol * rng.standard_normal(shape) - 0.5 * price_vol ** 2)
+        ev = market_cap * price_factor + net_debt * (1 + net_debt_sd * rng.standard_normal(shape))
+        sampled_ebitda = ebitda * (1 + ebitda_sd * rng.standard_normal(shape))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ev_ebitda = np.where(sampled_ebitda > 0, ev / sampled_ebitda, np.nan)
+        return {'enterpriseValue': ev, 'evEbitdaRatio': ev_ebitda}
+
+    # 1パス目: 企業別の値域
+    lower = {}
+    upper = {}
+    for index in range(len(chunk_sizes)):
+        for name, values in generate(index).items():
+            lo = np.nanmin(np.where(np.isnan(values), np.inf, values), axis=0)
+            hi = np.nanmax(np.where(np.isnan(values), -np.inf, values), axis=0)
+            lower[name] = np.minimum(lower.get(name, lo), lo)
+            upper[name] = np.maximum(upper.get(name, hi), hi)
+
+    # 2パス目: 企業別ヒストグラム（bincountで全企業を一括集計）
+    bins = MC_HISTOGRAM_BINS
+    counts = {name: np.zeros(n_companies * bins, dtype=np.int64) for name in lower}
+    widths = {}
+    for name in lower:
+        span = np.where(np.isfinite(upper[name] - lower[name]), upper[name] - lower[name], 0.0)
+        widths[name] = np.where(span > 0, span / bins, 1.0)
+
+    offsets = np.arange(n_companies) * bins
+    for index in range(len(chunk_sizes)):
+        for name, values in generate(index).items():
+            valid = ~np.isnan(values)
+            position = np.floor((np.where(valid, values, 0.0) - lower[name]) / widths[name])
+            position = np.clip(np.nan_to_num(position), 0, bins - 1).astype(np.int64)
+            counts[name] += np.bincount((position + offsets)[valid], minlength=n_companies * bins)
+
+    result = {}
+    for name, flat_counts in counts.items():
+        cumulative = np.cumsum(flat_counts.reshape(n_companies, bins), axis=1)
+        totals = cumulative[:, -1]
+        bands = np.full((len(percentiles), n_companies), np.nan)
+        for row, pct in enumerate(percentiles):
+            target = np.ceil(totals * pct / 100).clip(min=1)
+            bin_index = (cumulative < target[:, None]).sum(axis=1)
+            value = lower[name] + (bin_index + 0.5) * widths[name]
+            bands[row] = np.where(totals > 0, value, np.nan)
+        result[name] = bands
+
+    return result
+
+
+def build_valuation_bands(
+    inputs: List[Dict[str, Any]],
+    samples: int,
+    chunk_size: int,
+    seed: Optional[int],
+    net_debt_sd: float,
+    ebitda_sd: float,
+) -> Dict[str, Any]:
+    """valuation_bands.json 用のデータを作成"""
+    bands_data = {
+        'asOf': datetime.now().strftime('%Y-%m-%d'),
+        'samples': samples,
+        'seed': seed,
+        'assumptions': {
+            'netDebtSd': net_debt_sd,
+            'ebitdaSd': ebitda_sd,
+            'defaultPriceVol': MC_DEFAULT_PRICE_VOL,
+        },
+        'companies': {},
+    }
+
+    listed = [item for item in inputs if item['marketCap'] is not None]
+    for item in inputs:
+        if item['marketCap'] is None:
+            bands_data['companies'][item['company']] = None
+    if not listed:
+        return bands_data
+
+    simulated = simulate_enterprise_value(
+        market_cap=np.array([item['marketCap'] for item in listed]),
+        net_debt=np.array([item['netDebt'] for item in listed]),
+        ebitda=np.array([item['ebitda'] for item in listed]),
+        price_vol=np.array([item['priceVol'] for item in listed]),
+        net_debt_sd=net_debt_sd,
+        ebitda_sd=ebitda_sd,
+        samples=samples,
+        chunk_size=chunk_size,
+        seed=seed,
+    )
+
+    for col, item in enumerate(listed):
+        company_bands = {'date': item['date'], 'priceVol': round(item['priceVol'], 4)}
+        for name, bands in simulated.items():
+            company_bands[name] = {
+                f"p{pct}": (None if np.isnan(bands[row, col]) else float(bands[row, col]))
+                for row, pct in enumerate(MC_PERCENTILES)
+            }
+        bands_data['companies'][item['company']] = company_bands
+
+    return bands_data
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='企業価値計算スクリプト')
     parser.add_argument('--input', default='data/edinet_parsed', help='入力ディレクトリ（デフォルト: data/edinet_parsed）')
     parser.add_argument('--output', default='data/valuation.json', help='出力ファイル（デフォルト: data/valuation.json）')
-    args = parser.parse_args()
+    parser.add_argument('--monte-carlo', action='store_true', help='モンテカルロ法でEV・EV/EBITDAのパーセンタイル帯も出力する')
+    parser.add_argument('--mc-samples', type=int, default=100_000, help=f'モンテカルロのサンプル数（最大 {MC_MAX_SAMPLES:,}、デフォルト: 100000）')
+    parser.add_argument('--mc-chunk-size', type=int, default=100_000, help='1チャンクあたりのサンプル数（デフォルト: 100000）')
+    parser.add_argument('--mc-seed', type=int, default=None, help='乱数シード（指定時は再現可能）')
+    parser.add_argument('--mc-net-debt-sd', type=float, default=0.05, help='純有利子負債の相対標準偏差（デフォルト: 0.05）')
+    parser.add_argument('--mc-ebitda-sd', type=float, default=0.10, help='EBITDAの相対標準偏差（デフォルト: 0.10）')
+    add_registry_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not 0 < args.mc_samples <= MC_MAX_SAMPLES:
+        parser.error(f'--mc-samples は 1〜{MC_MAX_SAMPLES:,} の範囲で指定してください')
+    if args.mc_chunk_size <= 0:
+        parser.error('--mc-chunk-size は正の整数で指定してください')
     
     input_dir = Path(args.input)
     output_file = Path(args.output)
@@ -154,10 +322,11 @@ def main():
         'companies': {}
     }
     
-    companies = ['TEPCO', 'CHUBU', 'JERA']
+    companies = company_keys(companies_from_args(args))
+    mc_inputs = []
     
     for company_name in companies:
-        financials_file = input_dir / f"{company_name}_financials.json"
+        financials_file = period_financials_file(input_dir, company_name)
         
         if not financials_file.exists():
             print(f"⚠ {company_name} のデータが見つかりません。スキップします。")
@@ -165,45 +334,69 @@ def main():
         
         print(f"\n{company_name} を処理中...")
         
-        with open(financials_file, 'r', encoding='utf-8') as f:
-            financials = json.load(f)
+        # 通期と四半期・半期のパーティションを読み込み
+        financials = load_period_financials(input_dir, company_name)
             
-        # 最新のAnnualデータを取得
-        annual_records = [r for r in financials if r['date'].endswith('03-31')]
-        if not annual_records:
+        # 最新のデータを取得（通期、または前期比較でTTMを計算できた四半期・半期）
+        latest_record = latest_valuation_record(financials, fiscal_year_end_for(company_name))
+        if latest_record is None:
             print(f"  ⚠ Annualデータがありません。")
             continue
             
-        latest_record = sorted(annual_records, key=lambda x: x['date'])[-1]
         bs_data = latest_record['bs']
         pl_data = latest_record['pl']
         
         # 株価取得
-        stock_df = load_stock_prices(company_name)
-        stock_price = get_stock_price(stock_df, latest_record['date'])
+        stock_df = load_stock_prices(company_name, financials)
         
-        market_cap = None
-        if stock_price is not None and bs_data.get('issuedShares'):
-             market_cap = stock_price * bs_data['issuedShares'] / 1_000_000 # 百万円
+        # 時価総額 = 調整後終値 × 調整後発行済株式数（百万円）
+        market_cap = get_stock_price(stock_df, latest_record['date'], column='MarketCap')
         
         company_valuation = calculate_enterprise_value(bs_data, pl_data, market_cap)
         valuation_data['companies'][company_name] = company_valuation
+
+        if args.monte_carlo:
+            price_vol = estimate_price_volatility(stock_df, latest_record['date'])
+            mc_inputs.append({
+                'company': company_name,
+                'date': latest_record['date'],
+                'marketCap': market_cap,
+                'netDebt': company_valuation['netDebt'],
+                'ebitda': company_valuation['ebitda'],
+                'priceVol': price_vol if price_vol is not None else MC_DEFAULT_PRICE_VOL,
+            })
         
         ev_disp = f"¥{company_valuation['enterpriseValue']:,.0f} 百万円" if company_valuation['enterpriseValue'] is not None else "N/A"
         print(f"  ✓ EV: {ev_disp}")
     
-    # JSON保存
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(valuation_data, f, ensure_ascii=False, indent=2)
-    
-    # publicにも保存
-    public_output = Path('public/data/valuation.json')
-    public_output.parent.mkdir(parents=True, exist_ok=True)
-    with open(public_output, 'w', encoding='utf-8') as f:
-        json.dump(valuation_data, f, ensure_ascii=False, indent=2)
+    # JSON保存（publicにも同じ内容を保存）
+    write_json(valuation_data, output_file, Path('public/data/valuation.json'), compact=True)
 
     print(f"\n✓ 企業価値計算完了: {output_file}")
 
+    if args.monte_carlo:
+        print(f"\nモンテカルロ評価開始: {args.mc_samples:,} サンプル (チャンク {args.mc_chunk_size:,})")
+        bands_data = build_valuation_bands(
+            mc_inputs,
+            samples=args.mc_samples,
+            chunk_size=args.mc_chunk_size,
+            seed=args.mc_seed,
+            net_debt_sd=args.mc_net_debt_sd,
+            ebitda_sd=args.mc_ebitda_sd,
+        )
+
+        # valuation.json と同じディレクトリに保存
+        bands_file = output_file.with_name('valuation_bands.json')
+        write_json(bands_data, bands_file, Path('public/data/valuation_bands.json'), compact=True)
+
+        for company_name, company_bands in bands_data['companies'].items():
+            if company_bands is None:
+                print(f"  ⚠ {company_name}: 時価総額なし（非上場）")
+                continue
+            ev = company_bands['enterpriseValue']
+            print(f"  ✓ {company_name}: EV P5 ¥{ev['p5']:,.0f} / P50 ¥{ev['p50']:,.0f} / P95 ¥{ev['p95']:,.0f} 百万円")
+        print(f"✓ モンテカルロ評価完了: {bands_file}")
+
 if __name__ == '__main__':
     try:
         main()
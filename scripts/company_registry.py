@@ -0,0 +1,164 @@
+# 企業レジストリ読み込みモジュール
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# public/data/companies.json（EDINETコード・企業名・ティッカー・決算期末・業種）を
+# 全スクリプトで共有する。各スクリプトが個別に持っていた企業リスト・コード対応表・
+# 株価銘柄コード対応表はここから生成する。
+
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterator, Sequence, Callable
+
+import instrumentation
+
+REGISTRY_FILE = Path(__file__).resolve().parent.parent / 'public' / 'data' / 'companies.json'
+
+REQUIRED_FIELDS = ('key', 'edinetCode', 'name', 'fiscalYearEnd', 'sector')
+
+# 1バッチで処理する企業数の既定値
+DEFAULT_BATCH_SIZE = 20
+
+
+def parse_registry(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    companies.json 形式の辞書を企業リストに変換
+
+    EDINETコードは環境変数 <key>_EDINET_CODE（例: TEPCO_EDINET_CODE）で上書きできる。
+    必須項目の欠落やキー・EDINETコードの重複は ValueError。
+    """
+    companies = []
+    seen_keys = set()
+    seen_codes = set()
+    for entry in config.get('companies', []):
+        missing = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+        if missing:
+            raise ValueError(f"企業レジストリの必須項目がありません: {entry.get('key', entry)} {missing}")
+
+        company = dict(entry)
+        company['edinetCode'] = os.getenv(f"{company['key']}_EDINET_CODE", company['edinetCode'])
+        company.setdefault('ticker', None)
+
+        if company['key'] in seen_keys:
+            raise ValueError(f"企業キーが重複しています: {company['key']}")
+        if company['edinetCode'] in seen_codes:
+            raise ValueError(f"EDINETコードが重複しています: {company['edinetCode']}")
+        seen_keys.add(company['key'])
+        seen_codes.add(company['edinetCode'])
+        companies.append(company)
+    return companies
+
+
+@lru_cache(maxsize=None)
+def _load_registry_cached(registry_file: str) -> tuple:
+    with open(registry_file, 'r', encoding='utf-8') as f:
+        return tuple(parse_registry(json.load(f)))
+
+
+def load_registry(registry_file: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """企業レジストリを読み込む（同一プロセス内ではファイルを1度だけ読む）"""
+    path = Path(registry_file) if registry_file else REGISTRY_FILE
+    return [dict(c) for c in _load_registry_cached(str(path.resolve()))]
+
+
+def select_companies(registry: List[Dict[str, Any]], names: Optional[Sequence[str]] = None,
+                     sector: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    企業キーまたはEDINETコードのリスト・業種で絞り込む（レジストリの順序を保持）
+
+    names に未登録の値が含まれる場合は ValueError。
+    """
+    selected = [c for c in registry if sector is None or c['sector'] == sector]
+    if names:
+        wanted = set(names)
+        known = {c['key'] for c in registry} | {c['edinetCode'] for c in registry}
+        unknown = sorted(wanted - known)
+        if unknown:
+            raise ValueError(f"企業レジストリに未登録です: {', '.join(unknown)}")
+        selected = [c for c in selected if c['key'] in wanted or c['edinetCode'] in wanted]
+    return selected
+
+
+def add_registry_arguments(parser: argparse.ArgumentParser) -> None:
+    """企業選択用の共通CLI引数を追加"""
+    parser.add_argument('--registry', default=None, help='企業レジストリ（デフォルト: public/data/companies.json）')
+    parser.add_argument('--companies', nargs='+', default=None, help='対象企業のキーまたはEDINETコード（デフォルト: レジストリの全企業）')
+    parser.add_argument('--sector', default=None, help='対象業種（例: electric, gas）')
+
+
+def add_batch_arguments(parser: argparse.ArgumentParser) -> None:
+    """企業単位のバッチ処理用の共通CLI引数を追加"""
+    parser.add_argument('--workers', type=int, default=1, help='企業単位の並列プロセス数（デフォルト: 1 = 逐次）')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help=f'1バッチで処理する企業数（デフォルト: {DEFAULT_BATCH_SIZE}）')
+
+
+def companies_from_args(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """add_registry_arguments で追加した引数から対象企業を決定"""
+    registry = load_registry(getattr(args, 'registry', None))
+    return select_companies(registry, getattr(args, 'companies', None), getattr(args, 'sector', None))
+
+
+def company_keys(companies: List[Dict[str, Any]]) -> List[str]:
+    """企業キーのリスト（例: ['TEPCO', 'CHUBU', 'JERA']）"""
+    return [c['key'] for c in companies]
+
+
+def edinet_mapping(companies: List[Dict[str, Any]]) -> Dict[str, str]:
+    """EDINETコード → 企業キー"""
+    return {c['edinetCode']: c['key'] for c in companies}
+
+
+def symbol_mapping(companies: List[Dict[str, Any]]) -> Dict[str, str]:
+    """企業キー → 株価銘柄コード（上場企業のみ）"""
+    return {c['key']: c['ticker'] for c in companies if c.get('ticker')}
+
+
+def ticker_for(company: str, registry_file: Optional[Path] = None) -> Optional[str]:
+    """企業キーから株価銘柄コードを取得（非上場・未登録はNone）"""
+    return symbol_mapping(load_registry(registry_file)).get(company)
+
+
+def fiscal_year_end_for(company: str, registry_file: Optional[Path] = None) -> str:
+    """企業キーから決算期末（'MM-DD'）を取得（未登録は3月決算とみなす）"""
+    for c in load_registry(registry_file):
+        if c['key'] == company:
+            return c['fiscalYearEnd']
+    return '03-31'
+
+
+def batched(items: Sequence[Any], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Any]]:
+    """items を batch_size 件ずつに分割"""
+    if batch_size <= 0:
+        raise ValueError('batch_size は正の整数で指定してください')
+    for start in range(0, len(items), batch_size):
+        yield list(items[start:start + batch_size])
+
+
+def run_in_batches(func: Callable[..., Any], companies: List[Dict[str, Any]], *args: Any,
+                   workers: int = 1, batch_size: int = DEFAULT_BATCH_SIZE) -> List[Any]:
+    """
+    func(edinetCode, key, *args) を企業ごとに batch_size 社ずつ実行し、結果をレジストリ順で返す
+
+    workers > 1 の場合は同じプロセスプールでバッチ内の企業を並列処理する
+    （バッチ単位で投入するので、未処理タスクが企業数に比例して溜まらない）。
+    """
+    stage = getattr(func, '__module__', '')
+    results: List[Any] = []
+    if workers <= 1:
+        for batch in batched(companies, batch_size):
+            for c in batch:
+                with instrumentation.span(c['key'], 'company', stage=stage):
+                    results.append(func(c['edinetCode'], c['key'], *args))
+        return results
+
+    # 子プロセス内の計測は集約できないので、並列時はバッチ単位で計測する
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, batch in enumerate(batched(companies, batch_size)):
+            with instrumentation.span(f'{stage}[{index}]', 'batch', stage=stage, companies=len(batch)):
+                futures = [executor.submit(func, c['edinetCode'], c['key'], *args) for c in batch]
+                results.extend(future.result() for future in futures)
+    return results
@@ -5,9 +5,22 @@
 import json
 import argparse
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+import pandas as pd
+
+from rescore import KPI_NAMES, load_thresholds, build_scorecards
+from kpi_trends import compute_trends, trends_to_dict
+from company_registry import add_registry_arguments, companies_from_args, company_keys, fiscal_year_end_for
+from fiscal_calendar import period_label
+from ttm_financials import QUARTER_PERIODS, attach_ttm, load_period_financials
+from json_output import write_json
+
+# WACC前提（日本電力業界の標準値）
+COST_OF_EQUITY = 6.0  # 株主資本コスト（%）
+TAX_RATE = 0.3  # 実効税率
+
 def calculate_roic(bs_data: Dict[str, Any], pl_data: Dict[str, Any]) -> float:
     """ROIC（投下資本利益率）を計算
     ROIC = EBIT / 投下資本 × 100
@@ -19,12 +32,13 @@ def calculate_roic(bs_data: Dict[str, Any], pl_data: Dict[str, Any]) -> float:
     invested_capital = equity + interest_bearing_debt
     return (operating_income / invested_capital * 100) if invested_capital > 0 else 0.0
 
-def calculate_wacc(bs_data: Dict[str, Any], pl_data: Dict[str, Any]) -> float:
+def calculate_wacc(bs_data: Dict[str, Any], pl_data: Dict[str, Any],
+                   cost_of_equity: float = COST_OF_EQUITY, tax_rate: float = TAX_RATE) -> float:
     """WACC（加重平均資本コスト）を計算
     WACC = (E/V × Re) + (D/V × Rd × (1-T))
-    Re: 株主資本コスト（日本電力業界6%と仮定）
+    Re: 株主資本コスト（既定: COST_OF_EQUITY = 6%）
     Rd: 負債コスト = 支払利息 / 有利子負債
-    T: 実効税率（30%と仮定）
+    T: 実効税率（既定: TAX_RATE = 30%）
     """
     equity = bs_data.get('equity', 0)
     interest_bearing_debt = bs_data.get('interestBearingDebt', 0)
@@ -37,11 +51,9 @@ def calculate_wacc(bs_data: Dict[str, Any], pl_data: Dict[str, Any]) -> float:
     e_ratio = equity / v
     d_ratio = interest_bearing_debt / v
     
-    re = 6.0  # 株主資本コスト（日本電力業界の標準値）
     rd = (interest_expenses / interest_bearing_debt * 100) if interest_bearing_debt > 0 else 0.0
-    tax_rate = 0.3  # 実効税率30%
     
-    wacc = (e_ratio * re) + (d_ratio * rd * (1 - tax_rate))
+    wacc = (e_ratio * cost_of_equity) + (d_ratio * rd * (1 - tax_rate))
     return wacc
 
 def calculate_ebitda_margin(pl_data: Dict[str, Any]) -> float:
@@ -60,8 +72,14 @@ def calculate_fcf_margin(pl_data: Dict[str, Any]) -> float:
     revenue = pl_data.get('revenue', 0)
     return (operating_cf / revenue * 100) if revenue > 0 else 0.0
 
-def evaluate_score(value: float, thresholds: Dict[str, float]) -> str:
-    """閾値に基づいてスコア評価"""
+def evaluate_score(value: float, thresholds: Dict[str, Any]) -> str:
+    """閾値に基づいてスコア評価（direction='lower' は低いほど良い）"""
+    if thresholds.get('direction') == 'lower':
+        if value < thresholds['green']:
+            return 'green'
+        elif value < thresholds['yellow']:
+            return 'yellow'
+        return 'red'
     if value >= thresholds['green']:
         return 'green'
     elif value >= thresholds['yellow']:
@@ -89,12 +107,93 @@ def determine_period(date_str: str) -> str:
     except:
         return 'Annual'
 
-def main():
+def determine_period_from_end_date(date_str: str) -> str:
+    """対象期間末日から期間（Annual, Q1, Q2, Q3）を判定（3月決算を想定）
+    3/31 -> Annual, 6/30 -> Q1, 9/30 -> Q2, 12/31 -> Q3
+    parse_edinet_xbrl.py で抽出した date は対象期間末日（Instant/EndDate）
+    """
+    try:
+        month = datetime.strptime(date_str, '%Y-%m-%d').month
+    except (ValueError, TypeError):
+        return 'Annual'
+    return {3: 'Annual', 6: 'Q1', 9: 'Q2', 12: 'Q3'}.get(month, 'Annual')
+
+def load_company_financials(input_dir: Path, company_name: str) -> List[Dict[str, Any]]:
+    """企業の財務データを読み込む（新旧どちらのファイル形式にも対応。四半期・半期のパーティションも含む）"""
+    # 新しい形式のファイルをチェック
+    financials_file = input_dir / f"{company_name}_financials.json"
+    
+    # 古い形式のファイルもチェック（互換性のため）
+    bs_file = input_dir / f"{company_name}_bs.json"
+    pl_file = input_dir / f"{company_name}_pl.json"
+    
+    if financials_file.exists():
+        return load_period_financials(input_dir, company_name)
+    if bs_file.exists() and pl_file.exists():
+        with open(bs_file, 'r', encoding='utf-8') as f:
+            bs_data = json.load(f)
+        with open(pl_file, 'r', encoding='utf-8') as f:
+            pl_data = json.load(f)
+        return [{'date': bs_data.get('date', '2025-09-30'), 'bs': bs_data, 'pl': pl_data}]
+    return []
+
+def materialize_kpi_values(input_dir: Path, companies: List[str]) -> Dict[str, Any]:
+    """全企業・全期間のKPI値を列指向で計算（閾値に依存しない部分）
+
+    rescore.py はこの結果に閾値を適用するだけなので、閾値変更時に再計算は不要。
+    """
+    columns: Dict[str, List[Any]] = {
+        'company': [], 'companyCode': [], 'date': [], 'fiscalYear': [], 'period': [],
+        **{kpi: [] for kpi in KPI_NAMES},
+    }
+    
+    for company_name in companies:
+        financials = load_company_financials(input_dir, company_name)
+        if not financials:
+            print(f"⚠ {company_name} のデータが見つかりません。スキップします。")
+            continue
+        
+        print(f"\n{company_name} を処理中... ({len(financials)} 件)")
+        fiscal_year_end = fiscal_year_end_for(company_name)
+        attach_ttm(financials, fiscal_year_end)
+        
+        for item in sorted(financials, key=lambda x: x['date']):
+            bs_data = item['bs']
+            pl_data = item['pl']
+            if item.get('fiscalPeriod') in QUARTER_PERIODS and item['ttm']:
+                # 四半期・半期は期首からの累計ではなくTTMで評価（前期の通期・同期がなければ従来どおり累計値）
+                pl_data = {**pl_data, **item['ttm']}
+            
+            # KPI計算（電力業界特化版）
+            columns['company'].append(company_name)
+            columns['companyCode'].append(bs_data.get('companyCode', ''))
+            columns['date'].append(item['date'])
+            # 期間は会計カレンダー（jpdei・決算期末）で判定し、判定できない場合は月で判定
+            columns['period'].append(period_label(item, fiscal_year_end) or determine_period_from_end_date(item['date']))
+            columns['fiscalYear'].append(item['fiscalYear'])
+            columns['roic'].append(round(calculate_roic(bs_data, pl_data), 2))
+            columns['wacc'].append(round(calculate_wacc(bs_data, pl_data), 2))
+            columns['ebitdaMargin'].append(round(calculate_ebitda_margin(pl_data), 2))
+            columns['fcfMargin'].append(round(calculate_fcf_margin(pl_data), 2))
+    
+    # 前年同期比・前期比・移動平均・CAGRを全企業まとめて計算
+    frame = pd.DataFrame(columns)
+    trends = compute_trends(frame, KPI_NAMES, group_col='company', period_col='period', year_col='fiscalYear')
+    
+    return {
+        'asOf': datetime.now().strftime('%Y-%m-%d'),
+        'kpis': list(KPI_NAMES),
+        'columns': columns,
+        'trends': trends_to_dict(trends, KPI_NAMES),
+    }
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='KPIスコアリングスクリプト')
     parser.add_argument('--input', default='data/edinet_parsed', help='入力ディレクトリ（デフォルト: data/edinet_parsed）')
     parser.add_argument('--targets', default='public/data/kpi_targets.json', help='閾値定義ファイル（デフォルト: public/data/kpi_targets.json）')
     parser.add_argument('--output', default='data/scorecards.json', help='出力ファイル（デフォルト: data/scorecards.json）')
-    args = parser.parse_args()
+    add_registry_arguments(parser)
+    args = parser.parse_args(argv)
     
     input_dir = Path(args.input)
     targets_file = Path(args.targets)
@@ -109,135 +208,35 @@ def main():
         # フォールバック2: data/kpi_targets.json
         targets_file = Path('data/kpi_targets.json')
     
-    with open(targets_file, 'r', encoding='utf-8') as f:
-        targets_config = json.load(f)
-    
-    # 閾値を辞書形式に変換
-    targets = {}
-    for threshold in targets_config['thresholds']:
-        kpi_name = threshold['kpiName']
-        targets[kpi_name] = {
-            'green': threshold['greenThreshold'],
-            'yellow': threshold['yellowThreshold']
-        }
+    targets = load_thresholds(targets_file)
     
     print(f"KPIスコアリング開始: {input_dir}")
     
-    scorecard_data = {
-        'asOf': datetime.now().strftime('%Y-%m-%d'),
-        'companies': {}
-    }
+    companies = company_keys(companies_from_args(args))
     
-    companies = ['TEPCO', 'CHUBU', 'JERA']
+    # KPI値を一度だけ計算して保存（閾値変更時は rescore.py で再評価のみ）
+    kpi_values = materialize_kpi_values(input_dir, companies)
     
-    for company_name in companies:
-        # 新しい形式のファイルをチェック
-        financials_file = input_dir / f"{company_name}_financials.json"
-        
-        # 古い形式のファイルもチェック（互換性のため）
-        bs_file = input_dir / f"{company_name}_bs.json"
-        pl_file = input_dir / f"{company_name}_pl.json"
-        
-        financials = []
-        
-        if financials_file.exists():
-            with open(financials_file, 'r', encoding='utf-8') as f:
-                financials = json.load(f)
-        elif bs_file.exists() and pl_file.exists():
-            with open(bs_file, 'r', encoding='utf-8') as f:
-                bs_data = json.load(f)
-            with open(pl_file, 'r', encoding='utf-8') as f:
-                pl_data = json.load(f)
-            financials = [{'date': bs_data.get('date', '2025-09-30'), 'bs': bs_data, 'pl': pl_data}]
-        else:
-            print(f"⚠ {company_name} のデータが見つかりません。スキップします。")
-            continue
-        
-        print(f"\n{company_name} を処理中... ({len(financials)} 件)")
-        
-        company_scores = {}
-        
-        # 日付でソート（新しい順）
-        financials.sort(key=lambda x: x['date'], reverse=True)
-        
-        for item in financials:
-            bs_data = item['bs']
-            pl_data = item['pl']
-            date_str = item['date']
-            
-            # KPI計算（電力業界特化版）
-            roic = calculate_roic(bs_data, pl_data)
-            wacc = calculate_wacc(bs_data, pl_data)
-            ebitda_margin = calculate_ebitda_margin(pl_data)
-            fcf_margin = calculate_fcf_margin(pl_data)
-            
-            # スコア評価
-            roic_score = evaluate_score(roic, targets['roic'])
-            # WACCは低いほど良い（逆評価）
-            wacc_score = 'green' if wacc < 4.0 else 'yellow' if wacc < 5.0 else 'red'
-            ebitda_margin_score = evaluate_score(ebitda_margin, targets['ebitdaMargin'])
-            fcf_margin_score = evaluate_score(fcf_margin, targets['fcfMargin'])
-            
-            score_entry = {
-                'date': date_str,
-                'companyCode': bs_data.get('companyCode', ''),
-                'roic': {'value': round(roic, 2), 'score': roic_score, 'change': 0},
-                'wacc': {'value': round(wacc, 2), 'score': wacc_score, 'change': 0},
-                'ebitdaMargin': {'value': round(ebitda_margin, 2), 'score': ebitda_margin_score, 'change': 0},
-                'fcfMargin': {'value': round(fcf_margin, 2), 'score': fcf_margin_score, 'change': 0},
-            }
-            
-            # 期間判定（簡易ロジック）
-            # 実際にはXBRLのコンテキストから判定すべきだが、ここでは日付から推測
-            # 3/31 -> Annual, 6/30 -> Q1, 9/30 -> Q2, 12/31 -> Q3
-            # ただし、提出日ではなく対象期間末日が必要。
-            # parse_edinet_xbrl.py で抽出した date は対象期間末日（Instant/EndDate）
-            
-            try:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                month = date_obj.month
-                if month == 3:
-                    period = 'Annual'
-                elif month == 6:
-                    period = 'Q1'
-                elif month == 9:
-                    period = 'Q2'
-                elif month == 12:
-                    period = 'Q3'
-                else:
-                    period = 'Annual' # デフォルト
-            except:
-                period = 'Annual'
-            
-            # 同じ期間が複数ある場合は最新を優先（リストは新しい順なので最初に見つかったもの）
-            if period not in company_scores:
-                company_scores[period] = score_entry
-        
-        # 最新データをトップレベルに配置（互換性のため、またはデフォルト表示用）
-        if financials:
-            company_scores['latest'] = company_scores.get('Annual') or company_scores.get('Q2') or list(company_scores.values())[0]
-            
-        scorecard_data['companies'][company_name] = company_scores
-        
+    values_file = output_file.with_name('kpi_values.json')
+    write_json(kpi_values, values_file, Path('public/data/kpi_values.json'), compact=True)
+    
+    # スコア評価（ベクトル演算で全企業・全期間を一括評価）
+    scorecard_data = build_scorecards(kpi_values, targets, as_of=kpi_values['asOf'])
+    
+    for company_name, company_scores in scorecard_data['companies'].items():
         latest = company_scores.get('latest')
         if latest:
-            print(f"  ✓ 最新データ ({latest['date']}):")
+            print(f"  ✓ {company_name} 最新データ ({latest['date']}):")
             print(f"    ROIC: {latest['roic']['value']}%")
             print(f"    WACC: {latest['wacc']['value']}%")
             print(f"    EBITDAマージン: {latest['ebitdaMargin']['value']}%")
             print(f"    FCFマージン: {latest['fcfMargin']['value']}%")
     
-    # JSON保存
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(scorecard_data, f, ensure_ascii=False, indent=2)
-    
-    # publicにも保存
-    public_output = Path('public/data/scorecards.json')
-    public_output.parent.mkdir(parents=True, exist_ok=True)
-    with open(public_output, 'w', encoding='utf-8') as f:
-        json.dump(scorecard_data, f, ensure_ascii=False, indent=2)
+    # JSON保存（publicにも同じ内容を保存）
+    write_json(scorecard_data, output_file, Path('public/data/scorecards.json'), compact=True)
     
-    print(f"\n✓ KPIスコアリング完了: {output_file}")
+    print(f"\n✓ KPI値保存: {values_file}")
+    print(f"✓ KPIスコアリング完了: {output_file}")
 
 if __name__ == '__main__':
     main()
@@ -7,9 +7,11 @@ CSVは横長フォーマット: 列名が項目名
 from pathlib import Path
 import pandas as pd
 
+from company_registry import load_registry, company_keys
+
 def count_csv_items():
     base_path = Path('XBRL_output')
-    companies = ['TEPCO', 'CHUBU', 'JERA']
+    companies = company_keys(load_registry())
     statements = ['PL', 'BS', 'CF']
     
     counts = {}
@@ -0,0 +1,278 @@
+# EDINET API v2 ローカル再生サーバー（オフラインでの取得テスト・ベンチマーク用）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# XBRL/ のダウンロード済みZIPと記録済みの書類一覧（<日付>.json）から、EDINET API v2 の
+#   GET <base>/documents.json?date=YYYY-MM-DD&type=2   書類一覧
+#   GET <base>/documents/<docID>?type=1                  XBRL ZIP
+# を返す。遅延・429（レート超過）・500（障害）を設定に応じて注入できるので、fetch_edinet.py の
+# 並列数・レート制限・再開（ダウンロード済みのスキップ）の挙動をネットワークなしで計測できる。
+#   python scripts/edinet_replay_server.py --port 8080 --latency 0.2 --rate-limit 5
+#   EDINET_BASE_URL=http://127.0.0.1:8080/api/v2 EDINET_REQUEST_INTERVAL=0 python scripts/fetch_edinet.py --bulk
+# GET /_stats で受けたリクエスト数（エンドポイント・ステータス別）と最大同時接続数を返す。
+
+import json
+import time
+import random
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from company_registry import load_registry
+from fact_store import parse_zip_name, load_supersession_index
+from fiscal_calendar import PERIODIC_REPORT_SUBDIR, AMENDMENT_REPORT_SUBDIR
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# APIのパス接頭辞（EDINET_BASE_URL は http://<host>:<port>/api/v2 になる）
+API_PREFIX = '/api/v2'
+
+# 保存先ディレクトリ → 書類種別コード（XBRL/ の配置からは四半期と半期を区別できないので 140 とする）
+SUBDIR_DOC_TYPES = {'': '120', PERIODIC_REPORT_SUBDIR: '140', AMENDMENT_REPORT_SUBDIR: '130'}
+
+DOC_DESCRIPTIONS = {'120': '有価証券報告書', '130': '訂正有価証券報告書', '140': '四半期報告書', '160': '半期報告書'}
+
+
+class ReplayArchive:
+    """XBRL/ のZIPと記録済みの書類一覧から、提出日 → 書類一覧 と docID → ZIP の索引を作る"""
+
+    def __init__(self, xbrl_dir: Path, fixtures_dir: Optional[Path] = None,
+                 registry_file: Optional[Path] = None):
+        names = {c['edinetCode']: c['name'] for c in load_registry(registry_file)}
+        self.listings: Dict[str, List[Dict[str, Any]]] = {}
+        self.files: Dict[str, Path] = {}
+
+        for company_dir in sorted(p for p in Path(xbrl_dir).iterdir() if p.is_dir()):
+            supersession = load_supersession_index(company_dir / AMENDMENT_REPORT_SUBDIR)
+            for subdir, default_type in SUBDIR_DOC_TYPES.items():
+                for zip_path in sorted((company_dir / subdir).glob('*.zip')):
+                    filed_at, doc_id = parse_zip_name(zip_path)
+                    self.files[doc_id] = zip_path
+                    doc_type = supersession.get(doc_id, {}).get('docTypeCode') or default_type
+                    self.listings.setdefault(filed_at, []).append({
+                        'docID': doc_id,
+                        'edinetCode': company_dir.name,
+                        'filerName': names.get(company_dir.name, company_dir.name),
+                        'docTypeCode': doc_type,
+                        'docDescription': DOC_DESCRIPTIONS.get(doc_type, ''),
+                        'parentDocID': supersession.get(doc_id, {}).get('parentDocID'),
+                        'submitDateTime': f'{filed_at} 09:00',
+                        'xbrlFlag': '1',
+                    })
+
+        # 記録済みの書類一覧（実APIのレスポンスまたは results の配列）はその日付の一覧を置き換える
+        if fixtures_dir is not None:
+            for fixture in sorted(Path(fixtures_dir).glob('*.json')):
+                with open(fixture, 'r', encoding='utf-8') as f:
+                    recorded = json.load(f)
+                self.listings[fixture.stem] = recorded['results'] if isinstance(recorded, dict) else recorded
+
+    def document_list(self, date_str: str) -> Dict[str, Any]:
+        """documents.json のレスポンス（書類がない日は空の results）"""
+        results = self.listings.get(date_str, [])
+        return {
+            'metadata': {
+                'title': '提出された書類を把握するためのAPI',
+                'parameter': {'date': date_str, 'type': '2'},
+                'resultset': {'count': len(results)},
+                'status': '200',
+                'message': 'OK',
+            },
+            'results': results,
+        }
+
+
+class FaultInjector:
+    """
+    応答の遅延と障害を注入する
+
+    Args:
+        latency: 全リクエストに加える遅延（秒）
+        jitter: 遅延に加える 0〜jitter 秒の一様乱数
+        rate_limit: 1秒あたりの許容リクエスト数（超えたら429。0なら無制限）
+        throttle_rate: レートに関係なく429を返す確率
+        failure_rate: 500を返す確率
+        retry_after: 429の Retry-After ヘッダー（秒）
+        seed: 乱数シード（同じ順序のリクエストには同じ障害を返す）
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit: float = 0.0,
+                 throttle_rate: float = 0.0, failure_rate: float = 0.0, retry_after: int = 1, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._recent: deque = deque()
+        self._lock = threading.Lock()
+
+    def decide(self) -> Tuple[float, Optional[int]]:
+        """(遅延秒, 障害のステータスコード。正常ならNone)"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if self.rate_limit and len(self._recent) >= self.rate_limit:
+                return delay, 429
+            self._recent.append(now)
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.failure_rate:
+            return delay, 500
+        return delay, None
+
+
+class ReplayStats:
+    """受けたリクエストの集計（エンドポイント・ステータス別の件数、送信バイト数、最大同時接続数）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.active = 0
+        self.peak_active = 0
+
+    def enter(self) -> None:
+        with self._lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+    def leave(self, endpoint: str, status: int, size: int) -> None:
+        with self._lock:
+            self.active -= 1
+            key = f'{endpoint} {status}'
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_sent += size
+
+    def count(self, endpoint: str, status: Optional[int] = None) -> int:
+        """エンドポイント（'list' / 'document'）のリクエスト数（status 指定時はそのステータスのみ）"""
+        with self._lock:
+            return sum(n for key, n in self.requests.items()
+                       if key.split()[0] == endpoint and (status is None or key.split()[1] == str(status)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'requests': dict(sorted(self.requests.items())), 'bytesSent': self.bytes_sent,
+                    'peakActive': self.peak_active}
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server_version = 'ValueScopeEdinetReplay/1.0'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/_stats':
+            self._send(200, json.dumps(self.server.stats.to_dict()).encode('utf-8'), 'application/json')
+            return
+
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        if path == '/documents.json':
+            endpoint = 'list'
+        elif path.startswith('/documents/'):
+            endpoint = 'document'
+        else:
+            self._send(404, b'{"message": "Not Found"}', 'application/json')
+            return
+
+        self.server.stats.enter()
+        status, size = 500, 0
+        try:
+            delay, fault = self.server.faults.decide()
+            if delay:
+                time.sleep(delay)
+            if fault == 429:
+                status, size = 429, self._send(429, b'{"message": "Too Many Requests"}', 'application/json',
+                                               {'Retry-After': str(self.server.faults.retry_after)})
+            elif fault is not None:
+                status, size = fault, self._send(fault, b'{"message": "Internal Server Error"}', 'application/json')
+            elif endpoint == 'list':
+                date_str = parse_qs(url.query).get('date', [''])[0]
+                body = json.dumps(self.server.archive.document_list(date_str), ensure_ascii=False).encode('utf-8')
+                status, size = 200, self._send(200, body, 'application/json; charset=utf-8')
+            else:
+                zip_path = self.server.archive.files.get(path[len('/documents/'):])
+                if zip_path is None:
+                    status, size = 404, self._send(404, b'{"message": "Not Found"}', 'application/json')
+                else:
+                    status, size = 200, self._send(200, zip_path.read_bytes(), 'application/octet-stream')
+        finally:
+            self.server.stats.leave(endpoint, status, size)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> int:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(archive: ReplayArchive, faults: Optional[FaultInjector] = None, host: str = '127.0.0.1',
+                port: int = 0, verbose: bool = False) -> ThreadingHTTPServer:
+    """再生サーバーを作成（port=0 なら空いているポート。server.base_url を EDINET_BASE_URL に使う）"""
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.daemon_threads = True
+    server.archive = archive
+    server.faults = faults or FaultInjector()
+    server.stats = ReplayStats()
+    server.verbose = verbose
+    server.base_url = f'http://{host}:{server.server_address[1]}{API_PREFIX}'
+    return server
+
+
+def start_server(archive: ReplayArchive, faults: Optional[FaultInjector] = None, **kwargs) -> ThreadingHTTPServer:
+    """別スレッドで再生サーバーを起動（終了は server.shutdown()）"""
+    server = make_server(archive, faults, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='EDINET API v2 ローカル再生サーバー（XBRL/ のZIPと記録済み書類一覧を配信）')
+    parser.add_argument('--xbrl-dir', default=str(ROOT_DIR / 'XBRL'), help='ZIPの配信元（デフォルト: XBRL）')
+    parser.add_argument('--fixtures', default=None, help='記録済み書類一覧（<日付>.json）のディレクトリ（デフォルト: なし）')
+    parser.add_argument('--registry', default=None, help='企業レジストリ（デフォルト: public/data/companies.json）')
+    parser.add_argument('--host', default='127.0.0.1', help='待ち受けアドレス（デフォルト: 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=8080, help='待ち受けポート（デフォルト: 8080）')
+    parser.add_argument('--latency', type=float, default=0.0, help='応答の遅延秒（デフォルト: 0）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='遅延に加える乱数の上限秒（デフォルト: 0）')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='1秒あたりの許容リクエスト数、超過は429（デフォルト: 0 = 無制限）')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='429を返す確率（デフォルト: 0）')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='500を返す確率（デフォルト: 0）')
+    parser.add_argument('--retry-after', type=int, default=1, help='429の Retry-After 秒（デフォルト: 1）')
+    parser.add_argument('--seed', type=int, default=0, help='障害注入の乱数シード（デフォルト: 0）')
+    parser.add_argument('--verbose', action='store_true', help='リクエストごとにログを出力する')
+    args = parser.parse_args(argv)
+
+    archive = ReplayArchive(Path(args.xbrl_dir), Path(args.fixtures) if args.fixtures else None,
+                            Path(args.registry) if args.registry else None)
+    faults = FaultInjector(args.latency, args.jitter, args.rate_limit, args.throttle_rate,
+                           args.failure_rate, args.retry_after, args.seed)
+    server = make_server(archive, faults, args.host, args.port, args.verbose)
+    print(f"✓ 書類 {len(archive.files)} 件（提出日 {len(archive.listings)} 日分）を配信: {server.base_url}")
+    print(f"  EDINET_BASE_URL={server.base_url} を設定して fetch_edinet.py を実行してください（Ctrl+C で終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"✓ 統計: {json.dumps(server.stats.to_dict(), ensure_ascii=False)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# 従業員情報（employees.json）生成モジュール
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 有報の「従業員の状況」（jpcrp_cor）から平均年間給与・平均勤続年数・平均年齢・従業員数を取り出し、
+# public/data/employees.json（useEmployeeData.ts が読み込む）を企業単位で差分更新する。
+# 事実の抽出は extract_xbrl_to_csv.py の1回の走査（scan_facts）で行い、ここでは値の選択と保存のみ。
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from json_output import write_json
+
+# 出力項目 → (XBRL要素名, 優先するコンテキストIDの順)
+# 平均給与・勤続・年齢は提出会社単体（NonConsolidatedMember。連結子会社のない会社はメンバーなし）の値を使う。
+# 従業員数は連結・単体の両方を拾い、企業ごとに全年度で揃う基準を select_headcount_basis で選ぶ
+EMPLOYEE_FACTS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'averageAnnualSalary': (
+        'AverageAnnualSalaryInformationAboutReportingCompanyInformationAboutEmployees',
+        ('CurrentYearInstant_NonConsolidatedMember', 'CurrentYearInstant'),
+    ),
+    'averageLengthOfServiceYears': (
+        'AverageLengthOfServiceYearsInformationAboutReportingCompanyInformationAboutEmployees',
+        ('CurrentYearInstant_NonConsolidatedMember', 'CurrentYearInstant'),
+    ),
+    'averageLengthOfServiceMonths': (
+        'AverageLengthOfServiceMonthsInformationAboutReportingCompanyInformationAboutEmployees',
+        ('CurrentYearInstant_NonConsolidatedMember', 'CurrentYearInstant'),
+    ),
+    'averageAgeYears': (
+        'AverageAgeYearsInformationAboutReportingCompanyInformationAboutEmployees',
+        ('CurrentYearInstant_NonConsolidatedMember', 'CurrentYearInstant'),
+    ),
+    'averageAgeMonths': (
+        'AverageAgeMonthsInformationAboutReportingCompanyInformationAboutEmployees',
+        ('CurrentYearInstant_NonConsolidatedMember', 'CurrentYearInstant'),
+    ),
+}
+
+# 従業員数の要素名と、基準（numberOfEmployeesBasis）→ コンテキストID（優先順）
+HEADCOUNT_ELEMENT = 'NumberOfEmployees'
+HEADCOUNT_CONTEXTS = {
+    'consolidated': 'CurrentYearInstant',
+    'nonConsolidated': 'CurrentYearInstant_NonConsolidatedMember',
+}
+
+# 走査時に拾う要素名（scan_facts で使用）
+EMPLOYEE_ELEMENTS = frozenset([element for element, _ in EMPLOYEE_FACTS.values()] + [HEADCOUNT_ELEMENT])
+
+# 整数で出力する項目
+INTEGER_FIELDS = {'averageAnnualSalary', 'numberOfEmployees'}
+
+
+def employee_record(facts: Dict[Tuple[str, str], float], date: str) -> Optional[Dict[str, Any]]:
+    """
+    走査で集めた {(要素名, コンテキストID): 値} から employees.json の1レコードを作成
+
+    year は決算日の年（従来の employees.json と同じ）。該当する値が1つもなければNone。
+    従業員数は連結を優先し、採用した基準を numberOfEmployeesBasis に記録する。
+    基準ごとの値は headcounts に残す（select_headcount_basis で企業内の基準を揃えた後に削除）。
+    """
+    record: Dict[str, Any] = {'year': int(date[:4]), 'date': date}
+    found = False
+    for field, (element, contexts) in EMPLOYEE_FACTS.items():
+        value = next((facts[(element, ctx)] for ctx in contexts if (element, ctx) in facts), None)
+        if value is not None:
+            found = True
+            value = int(value) if field in INTEGER_FIELDS else value
+        record[field] = value
+
+    headcounts = {basis: int(facts[(HEADCOUNT_ELEMENT, ctx)]) for basis, ctx in HEADCOUNT_CONTEXTS.items()
+                  if (HEADCOUNT_ELEMENT, ctx) in facts}
+    basis = next(iter(headcounts), None)
+    record['numberOfEmployees'] = headcounts.get(basis)
+    record['numberOfEmployeesBasis'] = basis
+    record['headcounts'] = headcounts
+    return record if found or headcounts else None
+
+
+def select_headcount_basis(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    1社分のレコードの従業員数を、全年度で取得できる基準（連結を優先）に揃える（その場で更新）
+
+    連結の値が一部の年度にしかない会社は単体に揃え、年度ごとに連結・単体が混ざった推移にしない。
+    どちらの基準も全年度は揃わない場合は年度ごとの値のまま（numberOfEmployeesBasis で区別できる）。
+    """
+    with_headcount = [r for r in records if r.get('headcounts')]
+    common = next((basis for basis in HEADCOUNT_CONTEXTS
+                   if all(basis in r['headcounts'] for r in with_headcount)), None)
+    for record in records:
+        headcounts = record.pop('headcounts', {})
+        if common is not None and common in headcounts:
+            record['numberOfEmployees'] = headcounts[common]
+            record['numberOfEmployeesBasis'] = common
+    return records
+
+
+def update_employees_json(path: Path, company: str, records: List[Dict[str, Any]],
+                          as_of: Optional[str] = None) -> Dict[str, Any]:
+    """
+    employees.json の1社分を差分更新（同じ決算日のレコードは置き換え、他社・他年度はそのまま）
+
+    一時ファイルに書いてから置き換えるので、途中で中断しても既存ファイルは壊れない。
+    """
+    path = Path(path)
+    data: Dict[str, Any] = {}
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+    merged = {r['date']: r for r in data.get(company, [])}
+    merged.update({r['date']: r for r in records})
+    data['asOf'] = as_of or datetime.now().strftime('%Y-%m-%d')
+    data[company] = sorted(merged.values(), key=lambda r: r['date'], reverse=True)
+
+    write_json(data, path, compact=True)
+    return data
@@ -10,28 +10,20 @@ import csv
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional
 from lxml import etree
-from datetime import datetime
+
+import instrumentation
+
+from company_registry import (
+    add_registry_arguments, add_batch_arguments, companies_from_args, run_in_batches, fiscal_year_end_for,
+)
+from fiscal_calendar import DEI_FIELDS, calendar_from_dei, calendar_from_date
+from employee_metrics import EMPLOYEE_ELEMENTS, employee_record, select_headcount_basis, update_employees_json
 
 # 基本XBRL名前空間
 BASE_NAMESPACES = {
     'xbrli': 'http://www.xbrl.org/2003/instance'
 }
 
-def calculate_fiscal_year(date_str: str) -> str:
-    """
-    決算日から会計年度を計算
-    例: 2025-03-31 → FY2024
-    日本企業は通常3月決算なので、決算日の年-1が会計年度
-    """
-    try:
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        # 3月決算の場合、FY2024は2024年4月1日～2025年3月31日
-        # 決算日が2025-03-31の場合、会計年度は2024
-        fiscal_year = date_obj.year - 1
-        return str(fiscal_year)
-    except:
-        return "unknown"
-
 def detect_namespaces(root: etree.Element) -> Dict[str, str]:
     """
     XBRLファイルから動的に名前空間を検出
@@ -105,131 +97,97 @@ def get_date_from_context(root: etree.Element, namespaces: Dict[str, str], conte
     
     return "unknown"
 
-def extract_all_elements(root: etree.Element, namespaces: Dict[str, str], 
-                         context_filter: str = 'Instant') -> Dict[str, float]:
+# 財務数値として抽出する名前空間（URIに含まれる文字列）
+FACT_NAMESPACES = ('jppfs', 'jpcrp', 'jpdei')
+CF_NAMESPACES = ('jppfs', 'jpcrp')
+CF_KEYWORDS = ('CashFlow', 'CF', 'NetCash', 'CashAndCash')
+
+def _keep_largest(result: Dict[str, float], local_name: str, value: float) -> None:
+    """同じ要素名が複数のコンテキストにある場合は絶対値の大きい値を残す（百万円単位に変換）"""
+    if local_name not in result or abs(value) > abs(result.get(local_name, 0)):
+        result[local_name] = value / 1_000_000 if abs(value) > 1000 else value
+
+def scan_facts(root: etree.Element) -> Dict[str, Any]:
     """
-    XBRLからすべての数値要素を抽出
+    XBRLの全要素を1回だけ走査し、BS（Instant）・PL（Duration）・CF・従業員情報・DEIをまとめて抽出
+    
+    Returns:
+        {'instant': {要素名: 値}, 'duration': {...}, 'cf': {...},
+         'employees': {(要素名, コンテキストID): 値（単位変換なし）}, 'dei': {DEI項目: 文字列}}
     """
-    result = {}
+    facts: Dict[str, Any] = {'instant': {}, 'duration': {}, 'cf': {}, 'employees': {}, 'dei': {}}
+    dei_elements = {f'{field}DEI': field for field in DEI_FIELDS}
     
-    # すべての要素を走査
     for elem in root.iter():
         # 名前空間を持つ要素のみ処理
-        if elem.tag.startswith('{'):
-            tag_parts = elem.tag.split('}')
-            if len(tag_parts) == 2:
-                namespace_uri, local_name = tag_parts
-                namespace_uri = namespace_uri[1:]  # '{' を除去
-                
-                # jppfs, jpcrp などの企業系名前空間のみ抽出
-                is_relevant_ns = any(prefix in namespace_uri for prefix in ['jppfs', 'jpcrp', 'jpdei'])
-                
-                if is_relevant_ns and elem.text and elem.text.strip():
-                    context_ref = elem.get('contextRef', '')
-                    
-                    # contextRefのフィルタリング
-                    if context_filter in context_ref or context_filter == 'All':
-                        try:
-                            # 数値変換を試みる
-                            value = float(elem.text.replace(',', ''))
-                            
-                            # タグ名をキーとして保存（百万円単位に変換）
-                            if local_name not in result or abs(value) > abs(result.get(local_name, 0)):
-                                result[local_name] = value / 1_000_000 if abs(value) > 1000 else value
-                        except (ValueError, TypeError):
-                            # 数値でない場合はスキップ
-                            pass
-    
-    return result
-
-def parse_balance_sheet(xbrl_path: str, company_code: str, fiscal_year: str) -> Dict[str, Any]:
-    """
-    貸借対照表（BS）を解析
-    """
-    tree = etree.parse(xbrl_path)
-    root = tree.getroot()
-    namespaces = detect_namespaces(root)
-    
-    date = get_date_from_context(root, namespaces, 'Instant')
-    bs_elements = extract_all_elements(root, namespaces, 'Instant')
-    
-    # 基本項目
-    bs_data = {
-        'fiscal_year': fiscal_year,
-        'date': date,
-        'company_code': company_code,
-    }
-    
-    # すべてのBS要素を追加
-    bs_data.update(bs_elements)
+        if not isinstance(elem.tag, str) or not elem.tag.startswith('{'):
+            continue
+        tag_parts = elem.tag.split('}')
+        if len(tag_parts) != 2 or not elem.text or not elem.text.strip():
+            continue
+        namespace_uri, local_name = tag_parts
+        namespace_uri = namespace_uri[1:]  # '{' を除去
+        context_ref = elem.get('contextRef', '')
+        
+        if 'jpdei_cor' in namespace_uri and local_name in dei_elements:
+            facts['dei'].setdefault(dei_elements[local_name], elem.text.strip())
+        
+        # jppfs, jpcrp などの企業系名前空間のみ抽出
+        if not any(prefix in namespace_uri for prefix in FACT_NAMESPACES):
+            continue
+        try:
+            # 数値変換を試みる
+            value = float(elem.text.replace(',', ''))
+        except (ValueError, TypeError):
+            # 数値でない場合はスキップ
+            continue
+        
+        if 'Instant' in context_ref:
+            _keep_largest(facts['instant'], local_name, value)
+        if 'Duration' in context_ref:
+            _keep_largest(facts['duration'], local_name, value)
+            # CF関連タグを検出
+            if (any(keyword in local_name for keyword in CF_KEYWORDS)
+                    and any(prefix in namespace_uri for prefix in CF_NAMESPACES)):
+                _keep_largest(facts['cf'], local_name, value)
+        if local_name in EMPLOYEE_ELEMENTS:
+            facts['employees'].setdefault((local_name, context_ref), value)
     
-    return bs_data
+    return facts
 
-def parse_profit_loss(xbrl_path: str, company_code: str, fiscal_year: str) -> Dict[str, Any]:
-    """
-    損益計算書（PL）を解析
+def parse_filing(xbrl_path: str, company_code: str, company_name: str) -> Dict[str, Any]:
     """
-    tree = etree.parse(xbrl_path)
-    root = tree.getroot()
-    namespaces = detect_namespaces(root)
-    
-    date = get_date_from_context(root, namespaces, 'Duration')
-    pl_elements = extract_all_elements(root, namespaces, 'Duration')
-    
-    pl_data = {
-        'fiscal_year': fiscal_year,
-        'date': date,
-        'company_code': company_code,
-    }
+    1書類を解析（XBRLの読み込み・要素の走査はそれぞれ1回）
     
-    pl_data.update(pl_elements)
-    
-    return pl_data
-
-def parse_cash_flow(xbrl_path: str, company_code: str, fiscal_year: str) -> Dict[str, Any]:
+    Returns:
+        {'fiscalYear': 会計年度, 'periodEnd': 決算日, 'bs': {...}, 'pl': {...}, 'cf': {...},
+         'employees': employees.json のレコード（従業員情報がなければNone）}
     """
-    キャッシュフロー計算書（CF）を解析
-    """
-    tree = etree.parse(xbrl_path)
-    root = tree.getroot()
+    root = etree.parse(xbrl_path).getroot()
     namespaces = detect_namespaces(root)
+    facts = scan_facts(root)
+    instant_date = get_date_from_context(root, namespaces, 'Instant')
+    duration_date = get_date_from_context(root, namespaces, 'Duration')
     
-    date = get_date_from_context(root, namespaces, 'Duration')
-    
-    # CF関連要素のみ抽出（OpeCF, InvCF, FinCFなどを含む）
-    cf_elements = {}
-    for elem in root.iter():
-        if elem.tag.startswith('{'):
-            tag_parts = elem.tag.split('}')
-            if len(tag_parts) == 2:
-                namespace_uri, local_name = tag_parts
-                namespace_uri = namespace_uri[1:]
-                
-                # CF関連タグを検出
-                is_cf_tag = any(keyword in local_name for keyword in 
-                               ['CashFlow', 'CF', 'NetCash', 'CashAndCash'])
-                
-                is_relevant_ns = any(prefix in namespace_uri for prefix in ['jppfs', 'jpcrp'])
-                
-                if is_cf_tag and is_relevant_ns and elem.text and elem.text.strip():
-                    context_ref = elem.get('contextRef', '')
-                    if 'Duration' in context_ref:
-                        try:
-                            value = float(elem.text.replace(',', ''))
-                            if local_name not in cf_elements or abs(value) > abs(cf_elements.get(local_name, 0)):
-                                cf_elements[local_name] = value / 1_000_000 if abs(value) > 1000 else value
-                        except (ValueError, TypeError):
-                            pass
-    
-    cf_data = {
-        'fiscal_year': fiscal_year,
-        'date': date,
-        'company_code': company_code,
-    }
+    # 会計カレンダー（jpdei の期首年 = 会計年度。jpdei がなければ決算日と決算期末から補完）
+    calendar = calendar_from_dei(facts['dei'])
+    if calendar is None and instant_date != 'unknown':
+        calendar = calendar_from_date(instant_date, fiscal_year_end_for(company_name))
+    fiscal_year = str(calendar['fiscalYear']) if calendar else 'unknown'
     
-    cf_data.update(cf_elements)
+    def statement(date: str, values: Dict[str, float]) -> Dict[str, Any]:
+        data = {'fiscal_year': fiscal_year, 'date': date, 'company_code': company_code}
+        data.update(values)
+        return data
     
-    return cf_data
+    return {
+        'fiscalYear': fiscal_year,
+        'periodEnd': calendar['periodEnd'] if calendar else 'unknown',
+        'bs': statement(instant_date, facts['instant']),
+        'pl': statement(duration_date, facts['duration']),
+        'cf': statement(duration_date, facts['cf']),
+        'employees': employee_record(facts['employees'], instant_date) if instant_date != 'unknown' else None,
+    }
 
 def save_to_csv(data_list: List[Dict[str, Any]], output_file: Path):
     """
@@ -265,94 +223,100 @@ def save_to_csv(data_list: List[Dict[str, Any]], output_file: Path):
     
     print(f"  ✓ CSV保存: {output_file} ({len(data_list)} 行)")
 
-def main():
+def process_company(company_code: str, company_name: str, input_dir: Path, output_dir: Path) -> List[Dict[str, Any]]:
+    """
+    1社分のZIPを解析してCSV保存（run_in_batches から企業ごとに呼ばれる）
+    
+    Returns:
+        employees.json 用の従業員情報レコード（決算期ごと）
+    """
+    company_dir = input_dir / company_code
+    if not company_dir.exists():
+        print(f"⚠ {company_name} ({company_code}) のデータが見つかりません。スキップします。")
+        return []
+    
+    print(f"\n{company_name} ({company_code}) を処理中...")
+    
+    zip_files = sorted(list(company_dir.glob('*.zip')))
+    if not zip_files:
+        print(f"⚠ ZIPファイルが見つかりません。")
+        return []
+    
+    bs_data_list = []
+    pl_data_list = []
+    cf_data_list = []
+    employee_records = []
+    
+    for zip_path in zip_files:
+        print(f"  処理中: {zip_path.name}")
+        
+        try:
+            # XBRL抽出
+            temp_dir = output_dir / f"{company_code}_temp"
+            temp_dir.mkdir(parents=True, exist_ok=True)
+            xbrl_file = extract_xbrl_from_zip(str(zip_path), str(temp_dir))
+            
+            with instrumentation.span(zip_path.name, 'filing', company=company_name):
+                filing = parse_filing(xbrl_file, company_code, company_name)
+            print(f"    決算日: {filing['periodEnd']} → 会計年度: FY{filing['fiscalYear']}")
+            bs_data, pl_data, cf_data = filing['bs'], filing['pl'], filing['cf']
+            bs_data_list.append(bs_data)
+            pl_data_list.append(pl_data)
+            cf_data_list.append(cf_data)
+            if filing['employees'] is not None:
+                employee_records.append(filing['employees'])
+            
+            # 一時ディレクトリ削除
+            import shutil
+            shutil.rmtree(temp_dir)
+            
+            print(f"    ✓ 解析完了: BS({len(bs_data)} 項目), PL({len(pl_data)} 項目), CF({len(cf_data)} 項目)")
+            
+        except Exception as e:
+            print(f"    ❌ エラー: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            continue
+    
+    # 企業別にCSV保存
+    company_output_dir = output_dir / company_name
+    company_output_dir.mkdir(parents=True, exist_ok=True)
+    
+    save_to_csv(bs_data_list, company_output_dir / 'BS.csv')
+    save_to_csv(pl_data_list, company_output_dir / 'PL.csv')
+    save_to_csv(cf_data_list, company_output_dir / 'CF.csv')
+    
+    print(f"  ✓ {company_name} 完了（従業員情報 {len(employee_records)} 期）")
+    # 従業員数は全年度で同じ基準（連結/単体）に揃える
+    return select_headcount_basis(employee_records)
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='XBRL全解析 - PL/BS/CF CSV出力')
     parser.add_argument('--input', default='XBRL', help='入力ディレクトリ（デフォルト: XBRL）')
     parser.add_argument('--output', default='XBRL_output', help='出力ディレクトリ（デフォルト: XBRL_output）')
-    args = parser.parse_args()
+    parser.add_argument('--employees', default='public/data/employees.json', help='従業員情報の出力ファイル（デフォルト: public/data/employees.json）')
+    add_registry_arguments(parser)
+    add_batch_arguments(parser)
+    args = parser.parse_args(argv)
     
     input_dir = Path(args.input)
     output_dir = Path(args.output)
     output_dir.mkdir(parents=True, exist_ok=True)
+    employees_file = Path(args.employees)
     
     print(f"XBRL全解析開始: {input_dir} → {output_dir}")
     
-    # 企業コードマッピング
-    company_mapping = {
-        'E04498': 'TEPCO',
-        'E04502': 'CHUBU',
-        'E34837': 'JERA',
-    }
+    companies = companies_from_args(args)
+    print(f"対象企業: {len(companies)} 社")
     
-    for company_code, company_name in company_mapping.items():
-        company_dir = input_dir / company_code
-        if not company_dir.exists():
-            print(f"⚠ {company_name} ({company_code}) のデータが見つかりません。スキップします。")
-            continue
-        
-        print(f"\n{company_name} ({company_code}) を処理中...")
-        
-        zip_files = sorted(list(company_dir.glob('*.zip')))
-        if not zip_files:
-            print(f"⚠ ZIPファイルが見つかりません。")
-            continue
-        
-        bs_data_list = []
-        pl_data_list = []
-        cf_data_list = []
-        
-        for zip_path in zip_files:
-            print(f"  処理中: {zip_path.name}")
-            
-            try:
-                # XBRL抽出
-                temp_dir = output_dir / f"{company_code}_temp"
-                temp_dir.mkdir(parents=True, exist_ok=True)
-                xbrl_file = extract_xbrl_from_zip(str(zip_path), str(temp_dir))
-                
-                # 決算日を取得
-                tree = etree.parse(xbrl_file)
-                root = tree.getroot()
-                namespaces = detect_namespaces(root)
-                decision_date = get_date_from_context(root, namespaces, 'Instant')
-                
-                # 決算日から会計年度を計算
-                fiscal_year = calculate_fiscal_year(decision_date)
-                print(f"    決算日: {decision_date} → 会計年度: FY{fiscal_year}")
-                
-                # BS解析
-                bs_data = parse_balance_sheet(xbrl_file, company_code, fiscal_year)
-                bs_data_list.append(bs_data)
-                
-                # PL解析
-                pl_data = parse_profit_loss(xbrl_file, company_code, fiscal_year)
-                pl_data_list.append(pl_data)
-                
-                # CF解析
-                cf_data = parse_cash_flow(xbrl_file, company_code, fiscal_year)
-                cf_data_list.append(cf_data)
-                
-                # 一時ディレクトリ削除
-                import shutil
-                shutil.rmtree(temp_dir)
-                
-                print(f"    ✓ 解析完了: BS({len(bs_data)} 項目), PL({len(pl_data)} 項目), CF({len(cf_data)} 項目)")
-                
-            except Exception as e:
-                print(f"    ❌ エラー: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                continue
-        
-        # 企業別にCSV保存
-        company_output_dir = output_dir / company_name
-        company_output_dir.mkdir(parents=True, exist_ok=True)
-        
-        save_to_csv(bs_data_list, company_output_dir / 'BS.csv')
-        save_to_csv(pl_data_list, company_output_dir / 'PL.csv')
-        save_to_csv(cf_data_list, company_output_dir / 'CF.csv')
-        
-        print(f"  ✓ {company_name} 完了")
+    results = run_in_batches(process_company, companies, input_dir, output_dir,
+                             workers=args.workers, batch_size=args.batch_size)
+    
+    # 従業員情報を企業ごとに差分更新（解析しなかった企業・年度の既存データは残す）
+    for company, employee_records in zip(companies, results):
+        if employee_records:
+            update_employees_json(employees_file, company['key'], employee_records)
+    print(f"✓ 従業員情報更新: {employees_file}")
     
     print(f"\n✓ XBRL全解析完了: {output_dir}")
 
@@ -0,0 +1,143 @@
+# 財務ファクトストア（書類単位の解析キャッシュ・訂正報告書の置換索引）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 有報・四半期・半期報告書とその訂正報告書を書類（docID）単位で保持し、
+# (会計年度, 期間種別) ごとに「ある日付時点で提出済みの最新の書類」を索引から引く。
+#   XBRL/<EDINETコード>/amendments/index.json       … 置換索引（訂正docID → parentDocID・書類種別・提出日時）
+#   data/edinet_parsed/<企業>_documents.json         … 書類単位の解析結果キャッシュ（解析済みZIPは再解析しない）
+# 訂正報告書を取得した場合は、その書類が属する (会計年度, 期間種別) だけが置き換わる。
+
+import json
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+# 訂正報告書の書類種別 → 訂正対象の書類種別（130: 訂正有価証券報告書, 150: 訂正四半期報告書, 170: 訂正半期報告書）
+AMENDMENT_DOC_TYPES = {'130': '120', '150': '140', '170': '160'}
+
+# 置換索引のファイル名（XBRL/<EDINETコード>/amendments/ 配下）
+SUPERSESSION_INDEX_FILE = 'index.json'
+
+FactKey = Tuple[int, str]
+
+
+def parse_zip_name(zip_path: Path) -> Tuple[str, str]:
+    """ZIPファイル名（YYYY-MM-DD_docID.zip）から (提出日, docID) を取得"""
+    filed_at, _, doc_id = Path(zip_path).stem.partition('_')
+    return filed_at, doc_id
+
+
+def load_supersession_index(amendment_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """置換索引を読み込む（{訂正docID: {parentDocID, docTypeCode, submitDateTime}}、なければ空）"""
+    path = Path(amendment_dir) / SUPERSESSION_INDEX_FILE
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def record_amendments(amendment_dir: Path, docs: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    書類一覧APIの訂正報告書メタデータを置換索引に追記して保存
+
+    Args:
+        amendment_dir: XBRL/<EDINETコード>/amendments
+        docs: 書類一覧APIの結果（docID・parentDocID・docTypeCode・submitDateTime を使用）
+    """
+    index = load_supersession_index(amendment_dir)
+    for doc in docs:
+        index[doc['docID']] = {
+            'parentDocID': doc.get('parentDocID'),
+            'docTypeCode': doc.get('docTypeCode'),
+            'submitDateTime': doc.get('submitDateTime'),
+        }
+    amendment_dir = Path(amendment_dir)
+    amendment_dir.mkdir(parents=True, exist_ok=True)
+    with open(amendment_dir / SUPERSESSION_INDEX_FILE, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(index.items())), f, ensure_ascii=False, indent=2)
+    return index
+
+
+def supersession_chains(index: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+    """置換索引を parentDocID → [訂正docID（提出順）] に変換"""
+    chains: Dict[str, List[str]] = {}
+    for doc_id, entry in sorted(index.items(), key=lambda item: (item[1].get('submitDateTime') or '', item[0])):
+        if entry.get('parentDocID'):
+            chains.setdefault(entry['parentDocID'], []).append(doc_id)
+    return chains
+
+
+def documents_file(data_dir: Path, company: str) -> Path:
+    """書類単位の解析結果キャッシュのパス"""
+    return Path(data_dir) / f'{company}_documents.json'
+
+
+def load_documents(data_dir: Path, company: str, parser_version: int) -> Dict[str, Dict[str, Any]]:
+    """解析結果キャッシュを読み込む（{ZIPの相対パス: 書類レコード}。解析器のバージョンが違えば空）"""
+    path = documents_file(data_dir, company)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        cache = json.load(f)
+    if cache.get('parserVersion') != parser_version:
+        return {}
+    return {doc['source']: doc for doc in cache.get('documents', [])}
+
+
+def save_documents(data_dir: Path, company: str, documents: List[Dict[str, Any]], parser_version: int) -> None:
+    """解析結果キャッシュを保存（提出日・docID順）"""
+    ordered = sorted(documents, key=lambda d: (d['filedAt'], d['docID']))
+    with open(documents_file(data_dir, company), 'w', encoding='utf-8') as f:
+        json.dump({'parserVersion': parser_version, 'documents': ordered}, f, ensure_ascii=False, indent=2)
+
+
+def build_fact_index(documents: Iterable[Dict[str, Any]]) -> Dict[FactKey, Tuple[List[str], List[Dict[str, Any]]]]:
+    """
+    書類を (会計年度, 期間種別) ごとに提出日順に並べた索引を作成
+
+    Returns:
+        {(会計年度, 期間種別): ([提出日...], [書類レコード...])}（期間を特定できない書類は除外）
+    """
+    grouped: Dict[FactKey, List[Dict[str, Any]]] = {}
+    for doc in documents:
+        if doc.get('fiscalYear') is None or doc.get('fiscalPeriod') is None:
+            continue
+        grouped.setdefault((doc['fiscalYear'], doc['fiscalPeriod']), []).append(doc)
+
+    index = {}
+    for key, docs in grouped.items():
+        docs.sort(key=lambda d: (d['filedAt'], d['docID']))
+        index[key] = ([d['filedAt'] for d in docs], docs)
+    return index
+
+
+def lookup_as_of(index: Dict[FactKey, Tuple[List[str], List[Dict[str, Any]]]], key: FactKey,
+                 as_of: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """as_of（YYYY-MM-DD、省略時は最新）までに提出された書類のうち最新のもの（二分探索）"""
+    entry = index.get(key)
+    if entry is None:
+        return None
+    filed, docs = entry
+    position = len(filed) if as_of is None else bisect_right(filed, as_of)
+    return docs[position - 1] if position else None
+
+
+def resolve_as_of(index: Dict[FactKey, Tuple[List[str], List[Dict[str, Any]]]],
+                  as_of: Optional[str] = None) -> List[Dict[str, Any]]:
+    """全 (会計年度, 期間種別) について as_of 時点で最新の書類を返す（期末日順）"""
+    resolved = [lookup_as_of(index, key, as_of) for key in index]
+    return sorted((doc for doc in resolved if doc is not None), key=lambda d: (d['date'], d['fiscalPeriod']))
+
+
+def changed_keys(previous: Iterable[Dict[str, Any]], current: Iterable[Dict[str, Any]]) -> List[FactKey]:
+    """
+    前回と今回で内容が変わった (会計年度, 期間種別) の一覧
+
+    採用書類（docID）だけでなくレコード全体を比較する（--full や PARSER_VERSION 更新で
+    同じ書類を再解析し、抽出値だけが変わった期間も書き直し対象にする）。
+    """
+    before = {(r.get('fiscalYear'), r.get('fiscalPeriod')): r for r in previous}
+    after = {(r.get('fiscalYear'), r.get('fiscalPeriod')): r for r in current}
+    return sorted((key for key in before.keys() | after.keys() if before.get(key) != after.get(key)),
+                  key=lambda k: (k[0] is None, k[0] or 0, k[1] or ''))
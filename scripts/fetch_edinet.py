@@ -20,10 +20,20 @@ import time
 import argparse
 import json
 import os
+import calendar
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Iterable
 from dotenv import load_dotenv
 
+import instrumentation
+
+from company_registry import load_registry, select_companies, edinet_mapping, fiscal_year_end_for
+from fiscal_calendar import PERIODIC_REPORT_SUBDIR, AMENDMENT_REPORT_SUBDIR
+from fact_store import AMENDMENT_DOC_TYPES, record_amendments
+
 
 # .env.localから環境変数読み込み（ローカル環境のみ）
 env_file = Path(__file__).parent.parent / ".env.local"
@@ -33,14 +43,29 @@ if env_file.exists():
 # EDINET API v2エンドポイント（環境変数を優先）
 EDINET_API_BASE = os.getenv("EDINET_BASE_URL", "https://disclosure2.edinet-fsa.go.jp/api/v2")
 EDINET_API_KEY = os.getenv("EDINET_API_KEY", "")
+
+# 書類一覧APIの呼び出し間隔（秒）。ローカルの再生サーバー（edinet_replay_server.py）では 0 にできる
+REQUEST_INTERVAL = float(os.getenv("EDINET_REQUEST_INTERVAL", "1"))
 XBRL_DIR = Path(__file__).parent.parent / "XBRL"
 
 # 企業コードマッピング（EDINETコード → 企業名）
-COMPANY_MAPPING = {
-    os.getenv("TEPCO_EDINET_CODE", "E04498"): "TEPCO",  # 東京電力ホールディングス
-    os.getenv("CHUBU_EDINET_CODE", "E04502"): "CHUBU",  # 中部電力
-    os.getenv("JERA_EDINET_CODE", "E34837"): "JERA",   # JERA
-}
+# public/data/companies.json から生成（<key>_EDINET_CODE 環境変数での上書きに対応）
+COMPANY_MAPPING = edinet_mapping(load_registry())
+
+# 取得対象の書類種別（120: 有価証券報告書）
+ANNUAL_REPORT_DOC_TYPES = ["120"]
+
+# 四半期・半期の書類種別（140: 四半期報告書, 160: 半期報告書）。--periodic 指定時に取得
+PERIODIC_REPORT_DOC_TYPES = ["140", "160"]
+
+# 四半期・半期報告書を遡る年数の既定値（TTM計算には前期の通期・同期が必要）
+DEFAULT_PERIODIC_YEARS = 2
+
+# 訂正報告書を遡る年数の既定値（訂正は提出月が決まっていないため、この期間は全日付の書類一覧を走査）
+DEFAULT_AMENDMENT_YEARS = 1
+
+# 一括取得モードの同時ダウンロード数（書類一覧の取得は従来どおり1秒間隔で逐次）
+DEFAULT_DOWNLOAD_WORKERS = 2
 
 
 def get_document_list(date_str: str) -> list:
@@ -69,6 +94,7 @@ def get_document_list(date_str: str) -> list:
     
     # print(f"Fetching document list for {date_str}...")
     try:
+        instrumentation.increment('http.edinet.list')
         response = requests.get(url, params=params, headers=headers, timeout=30)
         if response.status_code == 404:
             return []
@@ -81,7 +107,15 @@ def get_document_list(date_str: str) -> list:
         return []
 
 
-def download_xbrl(doc_id: str, company_code: str, date_str: str) -> Path:
+def report_dir(company_code: str, doc_type: str = "120") -> Path:
+    """書類の保存先（有報は XBRL/<EDINETコード>/、四半期・半期報告書は periodic/、訂正報告書は amendments/ 配下）"""
+    company_dir = XBRL_DIR / company_code
+    if doc_type in AMENDMENT_DOC_TYPES:
+        return company_dir / AMENDMENT_REPORT_SUBDIR
+    return company_dir / PERIODIC_REPORT_SUBDIR if doc_type in PERIODIC_REPORT_DOC_TYPES else company_dir
+
+
+def download_xbrl(doc_id: str, company_code: str, date_str: str, doc_type: str = "120") -> Path:
     """
     EDINET APIからXBRL ZIPをダウンロード
     
@@ -89,6 +123,7 @@ def download_xbrl(doc_id: str, company_code: str, date_str: str) -> Path:
         doc_id: 書類管理番号
         company_code: EDINETコード
         date_str: 提出日
+        doc_type: 書類種別コード（保存先の判定に使用）
     
     Returns:
         保存先パス
@@ -105,11 +140,13 @@ def download_xbrl(doc_id: str, company_code: str, date_str: str) -> Path:
     }
     
     print(f"Downloading XBRL for {doc_id} ({date_str})...")
+    instrumentation.increment('http.edinet.documents')
     response = requests.get(url, params=params, headers=headers, timeout=60)
     response.raise_for_status()
+    instrumentation.increment('http.edinet.documentBytes', len(response.content))
     
     # ZIPファイルを保存
-    company_dir = XBRL_DIR / company_code
+    company_dir = report_dir(company_code, doc_type)
     company_dir.mkdir(parents=True, exist_ok=True)
     
     # ファイル名に日付を含める
@@ -120,10 +157,16 @@ def download_xbrl(doc_id: str, company_code: str, date_str: str) -> Path:
     return zip_path
 
 
-def cleanup_non_annual_files(company_code: str):
+def cleanup_non_annual_files(company_code: str, fiscal_year_end: Optional[str] = None):
     """
-    有価証券報告書（通常6-7月提出）以外のファイルを削除する
+    有価証券報告書以外のファイルを削除する
+
+    有報の提出月（決算期末の3・4か月後。3月決算なら6-7月）以外に提出されたファイルを削除する。
+    fiscal_year_end を省略した場合は企業レジストリの決算期末（未登録は3月決算）を使う。
     """
+    if fiscal_year_end is None:
+        fiscal_year_end = fiscal_year_end_for(COMPANY_MAPPING.get(company_code, company_code))
+    annual_months = filing_months([fiscal_year_end])
     company_dir = XBRL_DIR / company_code
     if not company_dir.exists():
         return
@@ -135,9 +178,8 @@ def cleanup_non_annual_files(company_code: str):
         try:
             date_part = zip_file.name.split("_")[0]
             file_date = datetime.strptime(date_part, "%Y-%m-%d")
-            # Keep only June and July files (Annual reports usually)
-            # 3月決算企業の有報は6月末提出。訂正などで7月になることも考慮。
-            if file_date.month not in [6, 7]:
+            # 有報は期末から3か月以内に提出。訂正などで翌月になることも考慮。
+            if file_date.month not in annual_months:
                 print(f"  Removing {zip_file.name} (Month: {file_date.month})")
                 zip_file.unlink()
                 count += 1
@@ -149,17 +191,20 @@ def cleanup_non_annual_files(company_code: str):
         print("  No non-annual files found.")
 
 
-def fetch_latest_xbrl(company_code: str, years_back: int = 3) -> list:
+def fetch_latest_xbrl(company_code: str, years_back: int = 3, fiscal_year_end: Optional[str] = None) -> list:
     """
     最新および過去のXBRLデータを取得（複数年対応）
     
     Args:
         company_code: EDINETコード
         years_back: 遡る年数
+        fiscal_year_end: 決算期末（'MM-DD'、省略時は企業レジストリの値）
     
     Returns:
         ダウンロードしたZIPファイルパスのリスト
     """
+    if fiscal_year_end is None:
+        fiscal_year_end = fiscal_year_end_for(COMPANY_MAPPING.get(company_code, company_code))
     downloaded = []
     today = datetime.now()
     
@@ -169,11 +214,13 @@ def fetch_latest_xbrl(company_code: str, years_back: int = 3) -> list:
         print(f"Checking year {target_year}...")
         
         # チェックする期間リスト (開始日, 終了日)
-        # 有価証券報告書: 6月中旬〜6月下旬 (通常は6月末提出)
-        # 余裕を持って6月1日〜7月31日を検索範囲とする
+        # 有価証券報告書: 決算期末から3か月以内に提出（3月決算なら通常6月末）
+        # 余裕を持って期末の3・4か月後の月（3月決算なら6月1日〜7月31日）を検索範囲とする
         
         check_periods = [
-            (datetime(target_year, 6, 1), datetime(target_year, 7, 31)),   # Annual
+            (datetime(target_year, month, 1),
+             datetime(target_year, month, calendar.monthrange(target_year, month)[1]))   # Annual
+            for month in filing_months([fiscal_year_end])
         ]
         
         for start_date, end_date in check_periods:
@@ -184,13 +231,13 @@ def fetch_latest_xbrl(company_code: str, years_back: int = 3) -> list:
             while current_date <= end_date and current_date <= today:
                 date_str = current_date.strftime("%Y-%m-%d")
                 
-                # レート制限遵守（1秒間隔）
-                time.sleep(1)
+                # レート制限遵守（既定は1秒間隔）
+                time.sleep(REQUEST_INTERVAL)
                 
                 docs = get_document_list(date_str)
                 
                 # 指定企業の書類をフィルタ
-                # 有価証券報告書（有報）のみを対象とする。訂正有報(130)は除外。
+                # 有価証券報告書（有報）のみを対象とする。訂正有報(130)は一括取得モードの --amendments で取得する。
                 allowed_codes = ["120"]  # 120:有報
                 
                 target_docs = []
@@ -249,7 +296,210 @@ def fetch_latest_xbrl(company_code: str, years_back: int = 3) -> list:
     return downloaded
 
 
-def main():
+def filing_months(fiscal_year_ends: Iterable[str]) -> List[int]:
+    """
+    決算期末（'MM-DD'）から有価証券報告書の提出月を求める
+
+    有報は期末から3か月以内に提出されるため、期末月の3・4か月後を検索対象とする
+    （3月決算なら6月・7月＝従来の6/1〜7/31と同じ）。
+    """
+    months = set()
+    for fiscal_year_end in fiscal_year_ends:
+        month = int(fiscal_year_end.split('-')[0])
+        months.update({(month + 2) % 12 + 1, (month + 3) % 12 + 1})
+    return sorted(months)
+
+
+def periodic_filing_months(fiscal_year_ends: Iterable[str]) -> List[int]:
+    """
+    決算期末（'MM-DD'）から四半期報告書・半期報告書の提出月を求める
+
+    各四半期末（期末月の3・6・9か月後）の翌月〜3か月後を検索対象とする
+    （四半期報告書は45日以内、半期報告書は3か月以内に提出）。
+    """
+    months = set()
+    for fiscal_year_end in fiscal_year_ends:
+        month = int(fiscal_year_end.split('-')[0])
+        for quarter in (3, 6, 9):
+            months.update((month + quarter + lag - 1) % 12 + 1 for lag in (1, 2, 3))
+    return sorted(months)
+
+
+def bulk_scan_dates(years_back: int, months: Iterable[int], today: Optional[datetime] = None) -> List[str]:
+    """一括取得で書類一覧を取得する日付（重複なし・昇順、未来日は除外）"""
+    today = today or datetime.now()
+    dates = set()
+    for year in range(today.year - years_back, today.year + 1):
+        for month in months:
+            for day in range(1, calendar.monthrange(year, month)[1] + 1):
+                date = datetime(year, month, day)
+                if date <= today:
+                    dates.add(date.strftime("%Y-%m-%d"))
+    return sorted(dates)
+
+
+def load_industry_codes(code_list_csv: Path, industry: str) -> Dict[str, str]:
+    """
+    EDINETコードリスト（EdinetcodeDlInfo.csv）から業種に該当する提出者を抽出
+
+    Returns:
+        {EDINETコード: 決算期末（'MM-DD'）}（決算日が読めない場合は '03-31'）
+    """
+    import pandas as pd
+
+    df = pd.read_csv(code_list_csv, encoding="cp932", skiprows=1, dtype=str)
+    df = df[df["提出者業種"] == industry]
+    # 決算日は「3月31日」形式
+    parsed = df["決算日"].str.extract(r"(\d+)月(\d+)日").astype(float)
+    fiscal_year_end = [
+        f"{int(m):02d}-{int(d):02d}" if m == m and d == d else "03-31"
+        for m, d in zip(parsed[0], parsed[1])
+    ]
+    return dict(zip(df["ＥＤＩＮＥＴコード"], fiscal_year_end))
+
+
+def find_existing_download(company_code: str, doc_id: str, date_str: str, doc_type: str = "120") -> Optional[Path]:
+    """ダウンロード済みのZIPを探す（docIDを含むファイルを優先、なければ同日付のファイル）"""
+    company_dir = report_dir(company_code, doc_type)
+    if not company_dir.exists():
+        return None
+    for pattern in (f"*{doc_id}*.zip", f"{date_str}_*.zip"):
+        for f in company_dir.glob(pattern):
+            return f
+    return None
+
+
+def select_reports(docs: list, target_codes: Iterable[str], doc_types: Iterable[str]) -> list:
+    """書類一覧から対象企業のXBRL付き書類（指定した書類種別）を抽出"""
+    target_codes = set(target_codes)
+    doc_types = set(doc_types)
+    return [
+        doc for doc in docs
+        if doc.get("edinetCode") in target_codes
+        and doc.get("xbrlFlag") == "1"
+        and doc.get("docTypeCode") in doc_types
+    ]
+
+
+def select_annual_reports(docs: list, target_codes: Iterable[str]) -> list:
+    """書類一覧から対象企業のXBRL付き有価証券報告書を抽出"""
+    return select_reports(docs, target_codes, ANNUAL_REPORT_DOC_TYPES)
+
+
+def fetch_bulk_xbrl(target_codes: Iterable[str], dates: List[str],
+                    download_workers: int = DEFAULT_DOWNLOAD_WORKERS, force: bool = False,
+                    doc_types: Iterable[str] = tuple(ANNUAL_REPORT_DOC_TYPES)) -> dict:
+    """
+    日付ごとに書類一覧を1回だけ取得し、全対象企業の有報（doc_types で四半期・半期・訂正報告書も）をまとめてダウンロード
+
+    書類一覧APIの呼び出し回数は対象企業数によらず日付数と同じ。
+    ダウンロードは上限付きキュー（同時 download_workers 件、待ち行列も同数まで）で並列実行し、
+    キューが埋まっている間は一覧の走査を待たせる。
+
+    Returns:
+        {"listCalls": 一覧取得回数, "downloaded": {EDINETコード: [ZIPパス]}, "failed": [docID],
+         "amendments": {EDINETコード: [訂正報告書の書類一覧メタデータ]}}
+    """
+    target_codes = set(target_codes)
+    downloaded: Dict[str, List[Path]] = {code: [] for code in sorted(target_codes)}
+    amendments: Dict[str, List[dict]] = {}
+    failed: List[str] = []
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(max(1, download_workers) * 2)
+    list_calls = 0
+
+    def download(doc_id: str, company_code: str, date_str: str, doc_type: str) -> None:
+        try:
+            zip_path = download_xbrl(doc_id, company_code, date_str, doc_type)
+            with lock:
+                downloaded[company_code].append(zip_path)
+        except Exception as e:
+            print(f"  Failed to download {doc_id}: {e}")
+            with lock:
+                failed.append(doc_id)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=max(1, download_workers)) as executor:
+        for date_str in dates:
+            # レート制限遵守（既定は1秒間隔）
+            time.sleep(REQUEST_INTERVAL)
+            docs = get_document_list(date_str)
+            list_calls += 1
+
+            for doc in select_reports(docs, target_codes, doc_types):
+                doc_id = doc.get("docID")
+                company_code = doc.get("edinetCode")
+                doc_type = doc.get("docTypeCode")
+                if doc_type in AMENDMENT_DOC_TYPES:
+                    amendments.setdefault(company_code, []).append(doc)
+                existing = None if force else find_existing_download(company_code, doc_id, date_str, doc_type)
+                if existing is not None:
+                    print(f"  Already downloaded: {doc_id} ({date_str}) - {doc.get('docDescription')} -> {existing.name}")
+                    with lock:
+                        downloaded[company_code].append(existing)
+                    continue
+
+                print(f"  Found document: {doc.get('docDescription')} ({date_str})")
+                slots.acquire()
+                executor.submit(download, doc_id, company_code, date_str, doc_type)
+
+    return {"listCalls": list_calls, "downloaded": downloaded, "failed": failed, "amendments": amendments}
+
+
+def run_bulk(args: argparse.Namespace) -> int:
+    """一括取得モードの実行（main から呼ばれる）"""
+    registry = {c["edinetCode"]: c for c in load_registry()}
+    targets: Dict[str, str] = {}
+    if args.industry:
+        if args.edinet_code_list is None:
+            print("Error: --industry には --edinet-code-list（EdinetcodeDlInfo.csv）が必要です")
+            return 1
+        targets.update(load_industry_codes(args.edinet_code_list, args.industry))
+        print(f"Industry '{args.industry}': {len(targets)} filers")
+    for code in args.companies:
+        targets[code] = registry[code]["fiscalYearEnd"] if code in registry else "03-31"
+
+    # 不要なファイル（半期・四半期など）を削除（各社の決算期末から提出月を判定）
+    for code, fiscal_year_end in targets.items():
+        cleanup_non_annual_files(code, fiscal_year_end)
+
+    dates = bulk_scan_dates(args.years, filing_months(set(targets.values())))
+    doc_types = list(ANNUAL_REPORT_DOC_TYPES)
+    if args.periodic:
+        # 四半期・半期報告書の提出月も（直近 --periodic-years 年分だけ）走査する
+        periodic_dates = bulk_scan_dates(min(args.years, args.periodic_years),
+                                         periodic_filing_months(set(targets.values())))
+        dates = sorted(set(dates) | set(periodic_dates))
+        doc_types += PERIODIC_REPORT_DOC_TYPES
+    if args.amendments:
+        # 訂正報告書（対象書類の訂正のみ）は提出月が決まっていないため、直近 --amendment-years 年分は全日付を走査する
+        amendment_dates = bulk_scan_dates(min(args.years, args.amendment_years), list(range(1, 13)))
+        dates = sorted(set(dates) | set(amendment_dates))
+        doc_types += [code for code, original in AMENDMENT_DOC_TYPES.items() if original in doc_types]
+    print(f"Bulk mode: {len(targets)} companies, {len(dates)} document lists to scan")
+    bulk = fetch_bulk_xbrl(targets, dates, args.download_workers, force=args.force, doc_types=doc_types)
+
+    # 置換索引（訂正docID → parentDocID）を更新（parse_edinet_xbrl.py が訂正の適用に使用）
+    for code, docs in bulk["amendments"].items():
+        record_amendments(XBRL_DIR / code / AMENDMENT_REPORT_SUBDIR, docs)
+        print(f"  Supersession index updated: {code} ({len(docs)} amendments)")
+
+    results = {
+        code: {
+            "company": COMPANY_MAPPING.get(code, code),
+            "downloaded": len(files),
+            "files": [str(f) for f in files],
+        }
+        for code, files in bulk["downloaded"].items()
+    }
+    print("=== Summary ===")
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"Document list calls: {bulk['listCalls']}, failed downloads: {len(bulk['failed'])}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(
         description="EDINET API v2からXBRLデータを取得"
     )
@@ -259,6 +509,11 @@ def main():
         default=list(COMPANY_MAPPING.keys()),
         help="取得対象のEDINETコード"
     )
+    parser.add_argument(
+        "--sector",
+        default=None,
+        help="企業レジストリの業種で対象を絞り込む（例: electric, gas）"
+    )
     parser.add_argument(
         "--years",
         type=int,
@@ -270,13 +525,60 @@ def main():
         action="store_true",
         help="既存のファイルがあっても強制的に再ダウンロードする"
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="一括取得モード: 日付ごとの書類一覧を1回だけ取得し、全対象企業の有報をまとめて取得する"
+    )
+    parser.add_argument(
+        "--industry",
+        default=None,
+        help="一括取得モードで業種（提出者業種、例: 電気・ガス業）の全提出者も対象にする（--edinet-code-list が必要）"
+    )
+    parser.add_argument(
+        "--edinet-code-list",
+        type=Path,
+        default=None,
+        help="EDINETコードリスト（EdinetcodeDlInfo.csv）のパス"
+    )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=DEFAULT_DOWNLOAD_WORKERS,
+        help=f"一括取得モードの同時ダウンロード数（デフォルト: {DEFAULT_DOWNLOAD_WORKERS}）"
+    )
+    parser.add_argument(
+        "--periodic",
+        action="store_true",
+        help="四半期報告書（140）・半期報告書（160）も取得する（一括取得モードで実行、XBRL/<EDINETコード>/periodic/ に保存）"
+    )
+    parser.add_argument(
+        "--periodic-years",
+        type=int,
+        default=DEFAULT_PERIODIC_YEARS,
+        help=f"四半期・半期報告書を遡る年数（デフォルト: {DEFAULT_PERIODIC_YEARS}）"
+    )
+    parser.add_argument(
+        "--amendments",
+        action="store_true",
+        help="訂正報告書（130/150/170）も取得し、置換索引 XBRL/<EDINETコード>/amendments/index.json を更新する（一括取得モードで実行）"
+    )
+    parser.add_argument(
+        "--amendment-years",
+        type=int,
+        default=DEFAULT_AMENDMENT_YEARS,
+        help=f"訂正報告書を遡る年数（デフォルト: {DEFAULT_AMENDMENT_YEARS}）"
+    )
     parser.add_argument(
         "--ci",
         action="store_true",
         help="CIモード: 7月1日以外はスキップ"
     )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.sector:
+        sector_codes = set(edinet_mapping(select_companies(load_registry(), sector=args.sector)))
+        args.companies = [code for code in args.companies if code in sector_codes]
     
     # CIモードの場合、7月1日以外はスキップ
     if args.ci:
@@ -291,6 +593,9 @@ def main():
     print(f"API Key: {'Set' if EDINET_API_KEY else 'Not set (using public API)'}")
     print()
     
+    if args.bulk or args.periodic or args.amendments:
+        return run_bulk(args)
+    
     results = {}
     
     for company_code in args.companies:
@@ -5,73 +5,172 @@ Stooq経由でpandas_datareaderを使用して株価データを取得
 """
 
 import argparse
-import sys
+import json
 import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional, List, Dict, Any
 
-try:
-    import pandas as pd
-    from pandas_datareader import data as pdr
-except ImportError:
-    print("エラー: 必要なライブラリがインストールされていません")
-    print("実行: pip install -r scripts/requirements.txt")
-    sys.exit(1)
+import pandas as pd
+
+import instrumentation
+from company_registry import add_registry_arguments, companies_from_args, symbol_mapping
+from price_store import write_price_store
 
 # プロジェクトルート
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 PRICES_DIR = DATA_DIR / "prices"
 
-def fetch_stock_data(symbol: str, start_date: str, end_date: str, output_dir: Path) -> bool:
+SCHEMA_HEADER = '# schema_version: 1.0\n'
+PRICE_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+# 並列取得の既定値（Stooqへの同時接続数と銘柄ごとの再試行回数）
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_WAIT = 2.0
+
+
+class StooqPriceSource:
+    """Stooq（pandas_datareader経由）の株価データソース"""
+    
+    name = 'Stooq'
+    
+    def fetch(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        # pandas_datareaderは実際に取得する時だけ読み込む（オフライン実行・テストでは不要）
+        try:
+            from pandas_datareader import data as pdr
+        except ImportError:
+            raise RuntimeError("pandas_datareader がインストールされていません (pip install -r scripts/requirements.txt)")
+        
+        # Stooqの銘柄コードは .T ではなく .JP
+        stooq_symbol = symbol.replace('.T', '.JP')
+        print(f"       Stooq銘柄コード: {stooq_symbol}")
+        instrumentation.increment('http.stooq')
+        return pdr.DataReader(stooq_symbol, 'stooq', start_date, end_date)
+
+
+class CSVPriceSource:
+    """
+    ローカルCSVを読む株価データソース（オフライン検証・テスト用のStooq代替）
+    
+    <directory>/<symbol>.csv（Date列 + OHLCV、#コメント行可）を読み、
+    Stooqと同じく指定期間の行だけを Date インデックスで返す。
+    """
+    
+    name = 'LocalCSV'
+    
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+    
+    def fetch(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        csv_path = self.directory / f"{symbol}.csv"
+        if not csv_path.exists():
+            return pd.DataFrame(columns=PRICE_COLUMNS).set_index('Date')
+        
+        df = pd.read_csv(csv_path, comment='#', parse_dates=['Date'])
+        mask = (df['Date'] >= pd.Timestamp(start_date)) & (df['Date'] <= pd.Timestamp(end_date))
+        # Stooqは新しい日付順で返すので合わせる
+        return df.loc[mask].sort_values('Date', ascending=False).set_index('Date')
+
+
+def read_stored_prices(path: Path) -> Optional[pd.DataFrame]:
+    """保存済みCSVを読み込む（存在しない・壊れている場合はNone）"""
+    if not path.exists():
+        return None
+    try:
+        df = pd.read_csv(path, comment='#', parse_dates=['Date'])
+    except Exception as e:
+        print(f"[WARNING] 既存データの読み込みに失敗: {path} ({e})")
+        return None
+    return df if not df.empty else None
+
+
+def merge_prices(existing: Optional[pd.DataFrame], new: pd.DataFrame) -> pd.DataFrame:
+    """既存データと新規データを結合（日付重複は新規データを優先）"""
+    if existing is None or existing.empty:
+        merged = new
+    else:
+        merged = pd.concat([existing, new], ignore_index=True)
+    merged = merged.drop_duplicates(subset='Date', keep='last')
+    return merged.sort_values('Date').reset_index(drop=True)
+
+
+def write_prices_atomic(df: pd.DataFrame, output_path: Path) -> None:
+    """スキーマヘッダー付きCSVを一時ファイル経由でアトミックに書き込む"""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{output_path.name}.", suffix='.tmp', dir=output_path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(SCHEMA_HEADER)
+            df.to_csv(f, index=False, date_format='%Y-%m-%d')
+        os.replace(tmp_name, output_path)
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def fetch_stock_data(symbol: str, start_date: str, end_date: str, output_dir: Path,
+                     source=None, incremental: bool = False) -> bool:
     """
     指定された銘柄の株価データを取得してCSVに保存
+    
+    incremental=True の場合は保存済みの最終日以降だけを取得し、
+    最終日を含めて重複排除したうえで追記する（最終日の値は取り直した値で上書き）。
     """
+    source = source or StooqPriceSource()
+    output_path = output_dir / f"{symbol}.csv"
+    
     try:
-        print(f"[INFO] {symbol} のデータを取得中...")
-        print(f"       期間: {start_date} ～ {end_date}")
-        print(f"       データソース: Stooq")
+        existing = read_stored_prices(output_path) if incremental else None
+        if existing is not None:
+            last_date = existing['Date'].max()
+            start_date = max(start_date, last_date.strftime('%Y-%m-%d'))
+            if start_date > end_date:
+                print(f"[INFO] {symbol} は最新です（最終日: {last_date:%Y-%m-%d}）")
+                return True
         
-        # Stooqからデータ取得（pandas_datareader）
-        stooq_symbol = symbol.replace('.T', '.JP')
-        print(f"       Stooq銘柄コード: {stooq_symbol}")
+        print(f"[INFO] {symbol} のデータを取得中...")
+        print(f"       期間: {start_date} ～ {end_date}{'（差分取得）' if existing is not None else ''}")
+        print(f"       データソース: {source.name}")
         
-        df = pdr.DataReader(stooq_symbol, 'stooq', start_date, end_date)
+        df = source.fetch(symbol, start_date, end_date)
         
         if df.empty:
+            if existing is not None:
+                print(f"[INFO] {symbol} の新規データはありません")
+                return True
             print(f"[WARNING] {symbol} のデータが取得できませんでした")
             return False
         
         # インデックス（Date）をリセット
-        df.reset_index(inplace=True)
+        df = df.reset_index()
         
         # カラム名を確認
         print(f"       取得したカラム: {list(df.columns)}")
         
         # 必要なカラムのみ選択（存在するカラムのみ）
-        required_columns = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
-        available_columns = [col for col in required_columns if col in df.columns]
-        df = df[available_columns]
+        available_columns = [col for col in PRICE_COLUMNS if col in df.columns]
+        df = df[available_columns].copy()
+        df['Date'] = pd.to_datetime(df['Date'])
         
         # 銘柄コード列を追加
         df['symbol'] = symbol
         
-        # 日付でソート（昇順）
-        df.sort_values('Date', inplace=True)
-        
-        # ファイル名を生成
-        filename = f"{symbol}.csv"
-        output_path = output_dir / filename
-        
-        # 出力ディレクトリを作成
-        output_dir.mkdir(parents=True, exist_ok=True)
+        # 既存データと結合（日付でソート・重複排除）
+        merged = merge_prices(existing, df)
+        added = len(merged) - (len(existing) if existing is not None else 0)
         
-        # CSV保存
-        with open(output_path, 'w', encoding='utf-8', newline='') as f:
-            f.write('# schema_version: 1.0\n')
-            df.to_csv(f, index=False)
+        # CSV保存（アトミック置換）
+        write_prices_atomic(merged, output_path)
+        # 列指向ストアも更新（build_timeseries / build_valuation はこちらを読む）
+        write_price_store(merged, symbol, output_dir)
         
-        print(f"[SUCCESS] {len(df)} 行のデータを保存: {output_path}")
+        print(f"[SUCCESS] {len(merged)} 行のデータを保存（新規 {added} 行）: {output_path}")
         return True
         
     except Exception as e:
@@ -81,28 +180,135 @@ def fetch_stock_data(symbol: str, start_date: str, end_date: str, output_dir: Pa
         return False
 
 
-def main():
+def fetch_with_retry(symbol: str, start_date: str, end_date: str, output_dir: Path,
+                     source=None, incremental: bool = False,
+                     retries: int = DEFAULT_RETRIES, retry_wait: float = DEFAULT_RETRY_WAIT) -> Dict[str, Any]:
+    """
+    1銘柄を再試行付きで取得し、結果を辞書で返す
+    
+    失敗時は retry_wait × 2^(試行回数-1) 秒待ってから最大 retries 回まで再試行する。
+    """
+    started = time.perf_counter()
+    attempts = 0
+    success = False
+    while attempts <= retries:
+        attempts += 1
+        success = fetch_stock_data(symbol, start_date, end_date, output_dir,
+                                   source=source, incremental=incremental)
+        if success or attempts > retries:
+            break
+        wait = retry_wait * (2 ** (attempts - 1))
+        print(f"[RETRY] {symbol} を {wait:.1f} 秒後に再試行します（{attempts}/{retries}）")
+        time.sleep(wait)
+    
+    return {
+        'symbol': symbol,
+        'success': success,
+        'attempts': attempts,
+        'elapsedSeconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def fetch_all_symbols(symbols: List[str], start_date: str, end_date: str, output_dir: Path,
+                      source=None, incremental: bool = False, max_workers: int = DEFAULT_WORKERS,
+                      retries: int = DEFAULT_RETRIES, retry_wait: float = DEFAULT_RETRY_WAIT) -> Dict[str, Any]:
+    """
+    複数銘柄をスレッドプールで並列取得し、サマリーレポートを返す
+    
+    同時接続数は max_workers で制限する（1なら従来どおり逐次取得）。
+    銘柄ごとに出力ファイルが分かれているため、書き込みの排他は不要。
+    results は入力した銘柄順に並べる。
+    """
+    source = source or StooqPriceSource()
+    symbols = [s.strip() for s in symbols if s.strip()]
+    started = time.perf_counter()
+    results: Dict[str, Dict[str, Any]] = {}
+    
+    workers = max(1, min(max_workers, len(symbols) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fetch_with_retry, symbol, start_date, end_date, output_dir,
+                            source, incremental, retries, retry_wait): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                results[symbol] = {'symbol': symbol, 'success': False, 'attempts': 0,
+                                   'elapsedSeconds': 0.0, 'error': str(e)}
+    
+    ordered = [results[symbol] for symbol in symbols]
+    return {
+        'source': source.name,
+        'incremental': incremental,
+        'workers': workers,
+        'total': len(ordered),
+        'succeeded': sum(r['success'] for r in ordered),
+        'failed': [r['symbol'] for r in ordered if not r['success']],
+        'retried': [r['symbol'] for r in ordered if r['attempts'] > 1],
+        'elapsedSeconds': round(time.perf_counter() - started, 3),
+        'results': ordered,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='ValueScope株価データ取得スクリプト')
     parser.add_argument(
         '--symbols',
         type=str,
-        default='9501.T,9502.T',
-        help='取得する銘柄コード（カンマ区切り）'
+        default=None,
+        help='取得する銘柄コード（カンマ区切り、デフォルト: レジストリの上場企業の銘柄コード）'
     )
+    add_registry_arguments(parser)
     parser.add_argument(
         '--years',
         type=int,
         default=10,
         help='過去何年分のデータを取得するか'
     )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='保存済みCSVの最終日以降だけを取得して追記する'
+    )
+    parser.add_argument(
+        '--source-dir',
+        type=Path,
+        default=None,
+        help='Stooqの代わりにローカルCSV（<dir>/<symbol>.csv）から取得する（オフライン検証用）'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'同時に取得する銘柄数の上限（デフォルト: {DEFAULT_WORKERS}）'
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f'銘柄ごとの再試行回数（デフォルト: {DEFAULT_RETRIES}）'
+    )
+    parser.add_argument(
+        '--report',
+        type=Path,
+        default=None,
+        help='取得結果のサマリーをJSONで保存するパス'
+    )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    source = CSVPriceSource(args.source_dir) if args.source_dir else StooqPriceSource()
     
     # 日付範囲を計算
     end_date = datetime.now()
     start_date = end_date - timedelta(days=args.years * 365)
     
-    symbols = args.symbols.split(',')
+    if args.symbols:
+        symbols = args.symbols.split(',')
+    else:
+        symbols = list(symbol_mapping(companies_from_args(args)).values())
     
     print("=" * 60)
     print("ValueScope - Stock Price Data Fetcher")
@@ -110,26 +316,38 @@ def main():
     print(f"銘柄数: {len(symbols)}")
     print(f"期間: {start_date.strftime('%Y-%m-%d')} ～ {end_date.strftime('%Y-%m-%d')}")
     print(f"出力先: {PRICES_DIR}")
+    print(f"データソース: {source.name}{'（差分取得）' if args.incremental else ''}")
     print("=" * 60)
     print()
     
-    success_count = 0
-    for symbol in symbols:
-        symbol = symbol.strip()
-        if fetch_stock_data(
-            symbol,
-            start_date.strftime('%Y-%m-%d'),
-            end_date.strftime('%Y-%m-%d'),
-            PRICES_DIR
-        ):
-            success_count += 1
-        print()
+    report = fetch_all_symbols(
+        symbols,
+        start_date.strftime('%Y-%m-%d'),
+        end_date.strftime('%Y-%m-%d'),
+        PRICES_DIR,
+        source=source,
+        incremental=args.incremental,
+        max_workers=args.workers,
+        retries=args.retries,
+    )
     
+    print()
     print("=" * 60)
-    print(f"完了: {success_count}/{len(symbols)} 銘柄のデータ取得に成功")
+    for result in report['results']:
+        mark = '✓' if result['success'] else '⚠'
+        print(f"{mark} {result['symbol']}: 試行 {result['attempts']} 回, {result['elapsedSeconds']:.1f} 秒")
+    print(f"完了: {report['succeeded']}/{report['total']} 銘柄のデータ取得に成功"
+          f"（並列数 {report['workers']}, {report['elapsedSeconds']:.1f} 秒）")
+    if report['failed']:
+        print(f"失敗: {', '.join(report['failed'])}")
     print("=" * 60)
     
-    return 0 if success_count == len(symbols) else 1
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    return 0 if not report['failed'] else 1
 
 
 if __name__ == '__main__':
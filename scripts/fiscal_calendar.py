@@ -0,0 +1,158 @@
+# 会計カレンダーモジュール（決算期末・会計年度・期間種別）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 提出書類の jpdei（CurrentFiscalYearStartDate / CurrentFiscalYearEndDate /
+# CurrentPeriodEndDate / TypeOfCurrentPeriod）から会計年度と期間種別を決め、
+# 財務レコードを (会計年度, 期間) で引けるようにする。
+# 会計年度ラベルは期首の属する年（3月決算: 2024-04-01〜2025-03-31 → FY2024、
+# 12月決算: 2024-01-01〜2024-12-31 → FY2024）。
+# jpdei を持たない古い解析結果は、企業レジストリの決算期末（fiscalYearEnd）から同じ規則で補完する。
+
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from lxml import etree
+
+# 読み込む jpdei 項目（要素名から 'DEI' を除いた名前で返す）
+DEI_FIELDS = (
+    'CurrentFiscalYearStartDate',
+    'CurrentFiscalYearEndDate',
+    'CurrentPeriodEndDate',
+    'TypeOfCurrentPeriod',
+)
+
+# TypeOfCurrentPeriod → 期間種別（半期報告書 HY は第2四半期と同じ期間）
+PERIOD_TYPES = {'FY': 'FY', 'HY': 'Q2', 'Q1': 'Q1', 'Q2': 'Q2', 'Q3': 'Q3'}
+
+# 期間種別 → スコアカード等で使う期間ラベル
+PERIOD_LABELS = {'FY': 'Annual', 'Q1': 'Q1', 'Q2': 'Q2', 'Q3': 'Q3'}
+
+DEFAULT_FISCAL_YEAR_END = '03-31'
+
+# 四半期報告書・半期報告書のZIP保存先（XBRL/<EDINETコード>/periodic/。有報は XBRL/<EDINETコード>/ 直下）
+PERIODIC_REPORT_SUBDIR = 'periodic'
+
+# 訂正報告書のZIPと置換索引の保存先（XBRL/<EDINETコード>/amendments/）
+AMENDMENT_REPORT_SUBDIR = 'amendments'
+
+
+def read_dei(xbrl_path: str) -> Dict[str, str]:
+    """
+    XBRLインスタンスから jpdei の主要項目を読み込む
+
+    DEIはインスタンスの先頭付近にあるため iterparse で走査し、
+    必要な項目が揃った時点で打ち切る（財務データ本体は読まない）。
+    """
+    dei: Dict[str, str] = {}
+    wanted = {f'{field}DEI': field for field in DEI_FIELDS}
+    for _, elem in etree.iterparse(xbrl_path, events=('end',)):
+        tag = elem.tag
+        if isinstance(tag, str) and 'jpdei_cor' in tag:
+            field = wanted.get(etree.QName(tag).localname)
+            if field and elem.text:
+                dei[field] = elem.text.strip()
+                if len(dei) == len(wanted):
+                    break
+        elem.clear()
+    return dei
+
+
+def _parse_date(value: str) -> date:
+    return date.fromisoformat(value[:10])
+
+
+def calendar_from_dei(dei: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """jpdei から会計カレンダー項目を作成（必要な項目がなければNone）"""
+    try:
+        start = _parse_date(dei['CurrentFiscalYearStartDate'])
+        end = _parse_date(dei['CurrentFiscalYearEndDate'])
+        period_end = _parse_date(dei.get('CurrentPeriodEndDate') or dei['CurrentFiscalYearEndDate'])
+    except (KeyError, ValueError):
+        return None
+
+    period = PERIOD_TYPES.get(dei.get('TypeOfCurrentPeriod', 'FY'))
+    if period is None:
+        return None
+    return {
+        'fiscalYear': start.year,
+        'fiscalPeriod': period,
+        'fiscalYearEnd': end.isoformat(),
+        'periodEnd': period_end.isoformat(),
+    }
+
+
+def _year_end_in(year: int, month: int, day: int) -> date:
+    """
+    指定年の決算期末日
+
+    月末決算（'02-28' / '02-29' / '03-31' など）はその年の月末に揃える
+    （2月決算は閏年なら 02-29、平年なら 02-28）。
+    """
+    if day >= monthrange(2001, month)[1]:  # 平年の月末以降 = 月末決算
+        day = monthrange(year, month)[1]
+    return date(year, month, day)
+
+
+def calendar_from_date(date_str: str, fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END) -> Optional[Dict[str, Any]]:
+    """
+    期末日と企業の決算期末（'MM-DD'）から会計カレンダー項目を作成
+
+    期末日が決算期末の 0/3/6/9 か月前の月末でなければNone（期間を特定できない）。
+    """
+    period_end = _parse_date(date_str)
+    month, day = (int(x) for x in fiscal_year_end.split('-'))
+    year_end = _year_end_in(period_end.year, month, day)
+    if year_end < period_end:
+        year_end = _year_end_in(period_end.year + 1, month, day)
+
+    months_before = (year_end.year * 12 + year_end.month) - (period_end.year * 12 + period_end.month)
+    period = {0: 'FY', 3: 'Q3', 6: 'Q2', 9: 'Q1'}.get(months_before)
+    if period is None:
+        return None
+
+    start = _year_end_in(year_end.year - 1, month, day) + timedelta(days=1)
+    return {
+        'fiscalYear': start.year,
+        'fiscalPeriod': period,
+        'fiscalYearEnd': year_end.isoformat(),
+        'periodEnd': period_end.isoformat(),
+    }
+
+
+def ensure_calendar(record: Dict[str, Any], fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END) -> Dict[str, Any]:
+    """
+    レコードに fiscalYear / fiscalPeriod / fiscalYearEnd がなければ補完する（その場で更新）
+
+    解析時に jpdei から付与済みのレコードはそのまま。補完できない場合は fiscalPeriod=None。
+    """
+    if record.get('fiscalPeriod') is None or record.get('fiscalYear') is None:
+        calendar = calendar_from_date(record['date'], fiscal_year_end) or {}
+        record['fiscalYear'] = calendar.get('fiscalYear')
+        record['fiscalPeriod'] = calendar.get('fiscalPeriod')
+        record['fiscalYearEnd'] = calendar.get('fiscalYearEnd')
+    return record
+
+
+def index_records(financials: List[Dict[str, Any]],
+                  fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END) -> Dict[Tuple[int, str], Dict[str, Any]]:
+    """財務レコードを (会計年度, 期間種別) で索引化（同じキーは期末日の新しいものを優先）"""
+    index: Dict[Tuple[int, str], Dict[str, Any]] = {}
+    for record in sorted(financials, key=lambda r: r['date']):
+        ensure_calendar(record, fiscal_year_end)
+        if record['fiscalPeriod'] is not None:
+            index[(record['fiscalYear'], record['fiscalPeriod'])] = record
+    return index
+
+
+def select_period(financials: List[Dict[str, Any]], period: str = 'FY',
+                  fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END) -> List[Dict[str, Any]]:
+    """指定した期間種別のレコードを会計年度順に返す（既定は通期 = 有価証券報告書）"""
+    index = index_records(financials, fiscal_year_end)
+    return [index[key] for key in sorted(index) if key[1] == period]
+
+
+def period_label(record: Dict[str, Any], fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END) -> Optional[str]:
+    """レコードの期間ラベル（Annual / Q1 / Q2 / Q3）"""
+    return PERIOD_LABELS.get(ensure_calendar(record, fiscal_year_end)['fiscalPeriod'])
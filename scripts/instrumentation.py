@@ -0,0 +1,177 @@
+# 計測モジュール（ステージ・企業・書類ごとの時間・メモリ・I/O、HTTP回数、キャッシュヒット率）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# with span('parse_edinet_xbrl'): ... のように処理を囲むと、経過時間と（有効時は）tracemalloc の
+# ピークメモリ、プロセスの読み書きバイト数（/proc/self/io がある環境のみ）を記録する。
+# increment() でHTTP呼び出し回数などを、cache_access() でキャッシュのヒット/ミスを数え、
+# write_report() で1回の実行分をJSONレポートに書き出す（valuescope.py --report）。
+# 記録は常に行う（軽量）が、メモリ計測と cProfile は enable() で有効にした場合のみ。
+# プロセスプールの子プロセス内の記録は集約しない。並列実行中の区間のメモリ・I/Oはプロセス全体の値なので、
+# 同時に動いている他の区間の分を含む（上限値として扱う）。
+
+import time
+import cProfile
+import platform
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+from json_output import write_json
+
+# プロセスI/Oカウンタ（Linuxのみ。読み書きしたバイト数の累計）
+PROC_IO_FILE = Path('/proc/self/io')
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {}
+
+
+def reset() -> None:
+    """記録を消去して計測を初期状態に戻す（メモリ計測・プロファイルは無効）"""
+    if _state.get('memory') and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.clear()
+    _state.update({
+        'startedAt': datetime.now().isoformat(timespec='seconds'),
+        'origin': time.perf_counter(),
+        'spans': [],
+        'open': [],
+        'counters': {},
+        'caches': {},
+        'memory': False,
+        'profileDir': None,
+    })
+
+
+def enable(memory: bool = False, profile_dir: Optional[Path] = None) -> None:
+    """メモリ計測（tracemalloc）とステージ単位の cProfile 出力を有効にする"""
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _state['memory'] = memory
+    _state['profileDir'] = Path(profile_dir) if profile_dir else None
+    if _state['profileDir']:
+        _state['profileDir'].mkdir(parents=True, exist_ok=True)
+
+
+def process_io() -> Optional[Tuple[int, int]]:
+    """プロセスの累計 (読み込みバイト数, 書き込みバイト数)。取得できない環境ではNone"""
+    try:
+        fields = dict(line.split(': ') for line in PROC_IO_FILE.read_text().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _fold_peak() -> None:
+    """現在のピークを開いている全区間に反映してからピークをリセット（入れ子・並列の区間でも各区間の最大を保つ）"""
+    _, peak = tracemalloc.get_traced_memory()
+    for entry in _state['open']:
+        entry['peakBytes'] = max(entry['peakBytes'], peak)
+    tracemalloc.reset_peak()
+
+
+@contextmanager
+def span(name: str, kind: str = 'stage', **tags: Any) -> Iterator[Dict[str, Any]]:
+    """
+    処理区間を計測して記録する
+
+    Args:
+        name: 区間名（ステージ名・企業キー・書類名など）
+        kind: 'stage' | 'company' | 'filing' など（レポートの集計単位）
+        tags: 付加情報（stage=..., company=... など）
+    """
+    memory = _state['memory'] and tracemalloc.is_tracing()
+    entry: Dict[str, Any] = {'name': name, 'kind': kind, **tags, 'thread': threading.current_thread().name}
+    with _lock:
+        if memory:
+            entry['peakBytes'] = 0
+            _fold_peak()
+            _state['open'].append(entry)
+    io_before = process_io()
+    profiler = None
+    if kind == 'stage' and _state['profileDir'] is not None:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12 以降は同時に1つしか有効にできない（並列実行中の他ステージを計測中）
+            profiler = None
+    started = time.perf_counter()
+    try:
+        yield entry
+    finally:
+        elapsed = time.perf_counter() - started
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(str(_state['profileDir'] / f'{name}.prof'))
+        io_after = process_io()
+        entry['start'] = round(started - _state['origin'], 6)
+        entry['seconds'] = round(elapsed, 6)
+        if io_before and io_after:
+            entry['bytesRead'] = io_after[0] - io_before[0]
+            entry['bytesWritten'] = io_after[1] - io_before[1]
+        with _lock:
+            if memory:
+                _fold_peak()
+                _state['open'].remove(entry)
+            _state['spans'].append(entry)
+
+
+def increment(counter: str, value: int = 1) -> None:
+    """カウンタを加算（例: 'http.edinet.documents'）"""
+    with _lock:
+        _state['counters'][counter] = _state['counters'].get(counter, 0) + value
+
+
+def cache_access(cache: str, hit: bool) -> None:
+    """キャッシュのヒット/ミスを記録（例: 'parse.documents'）"""
+    with _lock:
+        stats = _state['caches'].setdefault(cache, {'hits': 0, 'misses': 0})
+        stats['hits' if hit else 'misses'] += 1
+
+
+def summarize(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """区間を種類・名前ごとに集計（count・合計秒・最大ピークメモリ）"""
+    summary: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for entry in spans:
+        item = summary.setdefault(entry['kind'], {}).setdefault(entry['name'], {'count': 0, 'seconds': 0.0})
+        item['count'] += 1
+        item['seconds'] = round(item['seconds'] + entry['seconds'], 6)
+        if 'peakBytes' in entry:
+            item['peakBytes'] = max(item.get('peakBytes', 0), entry['peakBytes'])
+    return summary
+
+
+def report() -> Dict[str, Any]:
+    """これまでの記録をレポート（dict）にまとめる"""
+    with _lock:
+        spans = sorted(_state['spans'], key=lambda e: e['start'])
+        caches = {
+            name: {**stats, 'hitRate': round(stats['hits'] / (stats['hits'] + stats['misses']), 4)
+                   if stats['hits'] + stats['misses'] else None}
+            for name, stats in sorted(_state['caches'].items())
+        }
+        counters = dict(sorted(_state['counters'].items()))
+    return {
+        'startedAt': _state['startedAt'],
+        'seconds': round(time.perf_counter() - _state['origin'], 6),
+        'python': platform.python_version(),
+        'memoryTracing': bool(_state['memory']),
+        'summary': summarize(spans),
+        'counters': counters,
+        'caches': caches,
+        'spans': spans,
+    }
+
+
+def write_report(path: Path, **extra: Any) -> Dict[str, Any]:
+    """レポートをJSONで保存（extra はレポートに追加する項目。例: status=ステージごとの結果）"""
+    data = {**report(), **extra}
+    write_json(data, path)
+    return data
+
+
+reset()
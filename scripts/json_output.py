@@ -0,0 +1,124 @@
+# パイプライン出力用JSON書き込みモジュール
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 生成物（data/ と public/data/ の両方に置くJSON）を1回だけシリアライズし、同じバイト列を
+# 各出力先に一時ファイル + os.replace でアトミックに書き込む。
+#   - 浮動小数点は有効12桁に正規化（計算順序による末尾の揺れを吸収）、NaN/Inf は null
+#   - 内容が既存ファイルと同じなら書き込まない（asOf だけが違う場合は既存の asOf を残す）
+# これにより、データが変わらない限りデプロイのたびにファイルが書き換わらず、差分も出ない。
+
+import os
+import json
+import math
+import shutil
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Union
+
+# 浮動小数点の有効桁数
+FLOAT_SIGNIFICANT_DIGITS = 12
+
+# 生成日として扱うキー（内容の比較から除外する）
+AS_OF_KEY = 'asOf'
+
+PathLike = Union[str, Path]
+
+
+def canonical(value: Any) -> Any:
+    """
+    JSON出力用に値を正規化
+
+    numpy の数値型・配列は Python の int/float/list に、float は有効 FLOAT_SIGNIFICANT_DIGITS 桁に丸め、
+    NaN/Inf は None、-0.0 は 0.0 にする。タプルはリストにする。
+    （numpy は tolist() で変換するので、このモジュール自体は numpy を読み込まない）
+    """
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        value = float(value)
+        if not math.isfinite(value):
+            return None
+        return float(f'{value:.{FLOAT_SIGNIFICANT_DIGITS}g}') + 0.0
+    if hasattr(value, 'tolist') and not isinstance(value, str):
+        return canonical(value.tolist())
+    return value
+
+
+def encode_json(data: Any, compact: bool = False, sort_keys: bool = False) -> bytes:
+    """正規化した値をUTF-8のJSONバイト列に変換（compact=True で区切りの空白なし・改行なし）"""
+    if compact:
+        text = json.dumps(canonical(data), ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys)
+    else:
+        text = json.dumps(canonical(data), ensure_ascii=False, indent=2, sort_keys=sort_keys)
+    return text.encode('utf-8')
+
+
+def _without_as_of(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {k: v for k, v in data.items() if k != AS_OF_KEY}
+    return data
+
+
+def _existing_as_of(data: Any, paths: Sequence[Path]) -> Optional[str]:
+    """既存ファイルが asOf 以外同じ内容なら、その asOf を返す"""
+    if not isinstance(data, dict) or AS_OF_KEY not in data:
+        return None
+    expected = _without_as_of(canonical(data))
+    for path in paths:
+        if not path.exists():
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(existing, dict) and AS_OF_KEY in existing and _without_as_of(existing) == expected:
+            return existing[AS_OF_KEY]
+    return None
+
+
+def replace_atomic(path: Path, payload: bytes, source: Optional[Path] = None) -> None:
+    """一時ファイルに書いてから置き換える（source があればそのファイルからハードリンクまたはコピー）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+    if source is None:
+        tmp_path.write_bytes(payload)
+    else:
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_json(data: Any, *paths: PathLike, compact: bool = False, sort_keys: bool = False) -> List[Path]:
+    """
+    JSONを1回だけシリアライズして全出力先に書き込む
+
+    内容（asOf を除く）が既存ファイルと同じなら既存の asOf を引き継ぐので、
+    バイト列が一致する出力先は書き込まずに済む。
+
+    Returns:
+        実際に書き込んだパスのリスト（全て最新なら空）
+    """
+    paths = [Path(p) for p in paths]
+    as_of = _existing_as_of(data, paths)
+    if as_of is not None:
+        data = {**data, AS_OF_KEY: as_of}
+    payload = encode_json(data, compact=compact, sort_keys=sort_keys)
+
+    written: List[Path] = []
+    for path in paths:
+        if path.exists() and path.stat().st_size == len(payload) and path.read_bytes() == payload:
+            continue
+        replace_atomic(path, payload, source=written[0] if written else None)
+        written.append(path)
+    return written
@@ -0,0 +1,95 @@
+# KPIトレンド計算モジュール（前期比・移動平均・CAGR）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 全企業・全KPIの前年同期比・前期比・3/5年移動平均・3/5年CAGRを
+# (企業, 期間種別, 年度) の索引で n 年度前の値を引いて一括計算する（企業ごとのループなし）。
+# 年度が飛んでいる場合は古い年度で代用せず NaN にする。
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+TREND_STATS = ['change', 'popChange', 'avg3', 'avg5', 'cagr3', 'cagr5']
+
+
+def _by_year(values: pd.DataFrame, keys: List[pd.Series], years: pd.Series):
+    """(企業[, 期間種別], 年度) で索引し、n年度前のKPI値を元の行順で返す関数を作る"""
+    index = pd.MultiIndex.from_arrays([*keys, years])
+    table = values.set_axis(index)
+    table = table[~index.duplicated(keep='last')]
+
+    def lagged(n: int) -> pd.DataFrame:
+        target = pd.MultiIndex.from_arrays([*keys, years - n])
+        return table.reindex(target).set_axis(values.index)
+    return lagged
+
+
+def _cagr(current: pd.DataFrame, base: pd.DataFrame, years: int) -> pd.DataFrame:
+    """CAGR（%）。始点・終点のどちらかが0以下ならNaN"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.power(current / base, 1.0 / years) - 1
+    return (growth * 100).where((current > 0) & (base > 0))
+
+
+def compute_trends(df: pd.DataFrame, value_columns: List[str], group_col: str = 'company',
+                   period_col: Optional[str] = None, date_col: str = 'date',
+                   year_col: Optional[str] = None) -> pd.DataFrame:
+    """
+    KPIトレンドを一括計算
+
+    Args:
+        df: 1行 = 1企業×1期間のKPI値
+        value_columns: 対象KPI列
+        group_col: 企業列
+        period_col: 期間種別列（Annual/Q1...）。指定時は同じ期間種別内で前年同期比を計算
+        date_col: 期間末日列（YYYY-MM-DD）
+        year_col: 会計年度列。省略時は期間末日の年
+
+    Returns:
+        df と同じインデックスを持ち、列名が f'{kpi}_{stat}' のDataFrame
+        change:    前年同期比の差分（同じ期間種別の前年度との差）
+        popChange: 前期比の差分（期間種別を問わず直前レコードとの差）
+        avg3/avg5: 同じ期間種別の直近3/5年度の平均
+        cagr3/cagr5: 同じ期間種別の3/5年度前からの年平均成長率（%）
+        前年度などのデータが欠けている年度（年度の飛び）は、古い年度で代用せずNaNとする。
+    """
+    ordered = df.sort_values([group_col, date_col], kind='stable')
+    values = ordered[value_columns].astype(float)
+    same_period_keys = [group_col, period_col] if period_col else [group_col]
+    years = pd.to_numeric(ordered[date_col].astype(str).str[:4])
+    if year_col:
+        # 会計年度を判定できなかった行は3月決算とみなす（2025-03-31 → 2024）
+        years = pd.to_numeric(ordered[year_col], errors='coerce').fillna(years - 1)
+    years = years.astype(int)
+
+    lagged = _by_year(values, [ordered[key] for key in same_period_keys], years)
+    any_period = values.groupby(ordered[group_col], sort=False)
+    history = [values] + [lagged(n) for n in range(1, 6)]
+
+    stats = {
+        'change': values - history[1],
+        'popChange': values - any_period.shift(1),
+        # 1年度でも欠けていればNaN（NaNは和に伝播する）
+        'avg3': sum(history[:3]) / 3,
+        'avg5': sum(history[:5]) / 5,
+        'cagr3': _cagr(values, history[3], 3),
+        'cagr5': _cagr(values, history[5], 5),
+    }
+
+    result = pd.concat(
+        {stat: frame for stat, frame in stats.items()},
+        axis=1,
+    )
+    result.columns = [f'{kpi}_{stat}' for stat, kpi in result.columns]
+    return result.reindex(df.index)
+
+
+def trends_to_dict(trends: pd.DataFrame, value_columns: List[str], decimals: int = 2) -> Dict[str, Dict[str, List[Any]]]:
+    """compute_trends の結果を {kpi: {stat: [値...]}} 形式（NaNはNone）に変換"""
+    rounded = trends.round(decimals).astype(object).where(trends.notna(), None)
+    return {
+        kpi: {stat: rounded[f'{kpi}_{stat}'].tolist() for stat in TREND_STATS}
+        for kpi in value_columns
+    }
@@ -8,14 +8,42 @@ import zipfile
 import argparse
 import re
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional
 from lxml import etree
 
+import instrumentation
+
+from company_registry import (
+    add_registry_arguments, add_batch_arguments, companies_from_args, run_in_batches, fiscal_year_end_for,
+)
+from fiscal_calendar import (
+    read_dei, calendar_from_dei, calendar_from_date, PERIODIC_REPORT_SUBDIR, AMENDMENT_REPORT_SUBDIR,
+)
+from ttm_financials import QUARTER_PERIODS, financials_file, load_period_financials
+from fact_store import (
+    parse_zip_name, load_supersession_index, load_documents, save_documents, build_fact_index, resolve_as_of,
+    changed_keys,
+)
+
+# 解析結果キャッシュの版（抽出ロジックを変えたら上げる。版が違うキャッシュは使わず全ZIPを再解析）
+PARSER_VERSION = 1
+
+# 有報以外のZIPの保存先（XBRL/<EDINETコード>/ 配下）
+REPORT_SUBDIRS = (PERIODIC_REPORT_SUBDIR, AMENDMENT_REPORT_SUBDIR)
+
 # 基本XBRL名前空間
 BASE_NAMESPACES = {
     'xbrli': 'http://www.xbrl.org/2003/instance'
 }
 
+# 当期のコンテキストID接頭辞（有報: CurrentYear*、四半期: CurrentYTDDuration / CurrentQuarterInstant、
+# 半期・中間: Interim*）。前期（Prior*）や3か月単独（CurrentQuarterDuration）の値は使わない
+CURRENT_CONTEXT_PREFIXES = ('CurrentYear', 'CurrentYTD', 'CurrentQuarterInstant', 'Interim')
+
+def is_current_context(context_ref: str, context_filter: str) -> bool:
+    """当期のコンテキスト（context_filter = 'Instant' / 'Duration'）か判定"""
+    return context_ref.startswith(CURRENT_CONTEXT_PREFIXES) and context_filter in context_ref
+
 def detect_namespaces(root: etree.Element) -> Dict[str, str]:
     """
     XBRLファイルから動的に名前空間を検出
@@ -65,8 +93,8 @@ def extract_value_from_xbrl(root: etree.Element, namespaces: Dict[str, str], tag
         
         for elem in elements:
             context_ref = elem.get('contextRef', '')
-            # 最新期間のデータを優先（Interim/Current）
-            if context_filter in context_ref:
+            # 当期のデータのみ（同じ書類に含まれる前期の値は使わない）
+            if is_current_context(context_ref, context_filter):
                 try:
                     val = float(elem.text) if elem.text else 0.0
                     if val != 0.0:
@@ -163,7 +191,7 @@ def parse_profit_loss(xbrl_path: str, company_code: str) -> Dict[str, Any]:
     revenue_elements = root.findall('.//jppfs:ElectricUtilityOperatingRevenueELE', namespaces) if 'jppfs' in namespaces else []
     revenue = 0.0
     for elem in revenue_elements:
-        if 'Duration' in elem.get('contextRef', ''):
+        if is_current_context(elem.get('contextRef', ''), 'Duration'):
             try:
                 revenue = float(elem.text) if elem.text else 0.0
                 break
@@ -225,11 +253,166 @@ def parse_profit_loss(xbrl_path: str, company_code: str) -> Dict[str, Any]:
     
     return pl_data
 
-def main():
+def save_financials(financials: List[Dict[str, Any]], output_file: Path) -> None:
+    """財務レコードをJSONと同名のCSV（BS・PLを横持ち）に保存"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(financials, f, ensure_ascii=False, indent=2)
+    print(f"  ✓ 解析結果保存: {output_file}")
+
+    # CSV保存
+    csv_file = output_file.with_suffix('.csv')
+    if financials:
+        import csv
+        # ヘッダー作成 (日付 + BSキー + PLキー)
+        # 最初の要素からキーを取得
+        first_item = financials[0]
+        bs_keys = [k for k in first_item['bs'].keys() if k not in ['date', 'companyCode']]
+        pl_keys = [k for k in first_item['pl'].keys() if k not in ['date', 'companyCode']]
+        
+        headers = ['date'] + [f"bs_{k}" for k in bs_keys] + [f"pl_{k}" for k in pl_keys]
+        
+        with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            
+            for item in financials:
+                row = [item['date']]
+                # BS values
+                for k in bs_keys:
+                    row.append(item['bs'].get(k, ''))
+                # PL values
+                for k in pl_keys:
+                    row.append(item['pl'].get(k, ''))
+                writer.writerow(row)
+        print(f"  ✓ CSV保存: {csv_file}")
+
+def parse_document(zip_path: Path, company_code: str, company_name: str, output_dir: Path) -> Dict[str, Any]:
+    """ZIP（1書類）を解析して書類レコードを作成"""
+    filed_at, doc_id = parse_zip_name(zip_path)
+    
+    # XBRL抽出
+    temp_dir = output_dir / f"{company_code}_temp"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        xbrl_file = extract_xbrl_from_zip(str(zip_path), str(temp_dir))
+        
+        # 貸借対照表解析
+        bs_data = parse_balance_sheet(xbrl_file, company_code)
+        
+        # 損益計算書解析
+        pl_data = parse_profit_loss(xbrl_file, company_code)
+        
+        # 会計カレンダー（jpdei の期首・期末・期間種別、なければ決算期末から補完）
+        calendar = (calendar_from_dei(read_dei(xbrl_file))
+                    or calendar_from_date(bs_data['date'], fiscal_year_end_for(company_name))
+                    or {})
+    finally:
+        # 一時ディレクトリ削除
+        import shutil
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    return {
+        'date': bs_data['date'],
+        'fiscalYear': calendar.get('fiscalYear'),
+        'fiscalPeriod': calendar.get('fiscalPeriod'),
+        'fiscalYearEnd': calendar.get('fiscalYearEnd'),
+        'docID': doc_id,
+        'filedAt': filed_at,
+        'bs': bs_data,
+        'pl': pl_data
+    }
+
+def process_company(company_code: str, company_name: str, input_dir: Path, output_dir: Path,
+                    full: bool = False) -> Dict[str, Any]:
+    """
+    1社分のZIPを解析して保存（run_in_batches から企業ごとに呼ばれる）
+    
+    解析済みのZIPは書類キャッシュ（<企業>_documents.json）を再利用し、新しいZIP（訂正報告書など）だけを解析する。
+    (会計年度, 期間種別) ごとに提出日が最新の書類を採用し、採用書類または解析結果が変わった期間種別のファイルだけを書き直す。
+    
+    Returns:
+        {'company': 企業キー, 'parsed': 新たに解析した書類数, 'invalidated': [[会計年度, 期間種別], ...]}
+    """
+    summary = {'company': company_name, 'parsed': 0, 'invalidated': []}
+    company_dir = input_dir / company_code
+    if not company_dir.exists():
+        print(f"⚠ {company_name} ({company_code}) のデータが見つかりません。スキップします。")
+        return summary
+    
+    print(f"\n{company_name} ({company_code}) を処理中...")
+    
+    # ZIPファイルを検索（有報は直下、四半期・半期報告書は periodic/、訂正報告書は amendments/ 配下）
+    zip_files = list(company_dir.glob('*.zip'))
+    for subdir in REPORT_SUBDIRS:
+        zip_files += list((company_dir / subdir).glob('*.zip'))
+    if not zip_files:
+        print(f"⚠ ZIPファイルが見つかりません。")
+        return summary
+    
+    supersession = load_supersession_index(company_dir / AMENDMENT_REPORT_SUBDIR)
+    cached = {} if full else load_documents(output_dir, company_name, PARSER_VERSION)
+    documents = []
+    
+    for zip_path in sorted(zip_files, key=lambda p: p.name):
+        source = zip_path.relative_to(company_dir).as_posix()
+        document = cached.get(source)
+        instrumentation.cache_access('parse.documents', document is not None)
+        if document is None:
+            print(f"  ZIP: {source}")
+            try:
+                with instrumentation.span(source, 'filing', company=company_name):
+                    document = parse_document(zip_path, company_code, company_name, output_dir)
+            except Exception as e:
+                print(f"  ❌ エラー: {str(e)}")
+                continue
+            document['source'] = source
+            summary['parsed'] += 1
+        document['parentDocID'] = supersession.get(document['docID'], {}).get('parentDocID')
+        documents.append(document)
+    
+    # 訂正報告書で期間を特定できない場合は訂正対象の書類の期間を引き継ぐ
+    by_doc_id = {d['docID']: d for d in documents}
+    for document in documents:
+        parent = by_doc_id.get(document['parentDocID'])
+        if document['fiscalPeriod'] is None and parent is not None:
+            for field in ('fiscalYear', 'fiscalPeriod', 'fiscalYearEnd'):
+                document[field] = parent[field]
+        if document['fiscalPeriod'] is None:
+            print(f"  ⚠ 期間を特定できない書類を除外: {document['source']} ({document['date']})")
+    
+    save_documents(output_dir, company_name, documents, PARSER_VERSION)
+    print(f"  ✓ 書類キャッシュ: {len(documents)} 件（新規解析 {summary['parsed']} 件）")
+    
+    # (会計年度, 期間種別) ごとに最新の提出書類を採用
+    financials = [
+        {k: v for k, v in document.items() if k != 'source'}
+        for document in resolve_as_of(build_fact_index(documents))
+    ]
+    previous = load_period_financials(output_dir, company_name)
+    invalidated = changed_keys(previous, financials)
+    summary['invalidated'] = [list(key) for key in invalidated]
+    stale_periods = {period for _, period in invalidated}
+    
+    # 結果を期間種別ごとに保存（通期は従来どおり <企業>_financials.json、四半期・半期は別ファイル）
+    for period in ('FY',) + QUARTER_PERIODS:
+        records = [r for r in financials if r['fiscalPeriod'] == period]
+        output_file = financials_file(output_dir, company_name, period)
+        if (period == 'FY' or records) and (period in stale_periods or not output_file.exists()):
+            save_financials(records, output_file)
+    if invalidated:
+        print(f"  ✓ 更新された期間: {', '.join(f'FY{year} {period}' for year, period in invalidated)}")
+    else:
+        print(f"  ✓ 変更なし")
+    return summary
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='XBRL解析スクリプト')
     parser.add_argument('--input', default='XBRL', help='入力ディレクトリ（デフォルト: XBRL）')
     parser.add_argument('--output', default='data/edinet_parsed', help='出力ディレクトリ（デフォルト: data/edinet_parsed）')
-    args = parser.parse_args()
+    parser.add_argument('--full', action='store_true', help='書類キャッシュを使わず全ZIPを再解析する')
+    add_registry_arguments(parser)
+    add_batch_arguments(parser)
+    args = parser.parse_args(argv)
     
     input_dir = Path(args.input)
     output_dir = Path(args.output)
@@ -237,93 +420,15 @@ def main():
     
     print(f"XBRLデータ解析開始: {input_dir}")
     
-    # 企業コードマッピング
-    company_mapping = {
-        'E04498': 'TEPCO',  # 東京電力HD
-        'E04502': 'CHUBU',  # 中部電力
-        'E34837': 'JERA',   # JERA
-    }
+    companies = companies_from_args(args)
+    print(f"対象企業: {len(companies)} 社")
     
-    for company_code, company_name in company_mapping.items():
-        company_dir = input_dir / company_code
-        if not company_dir.exists():
-            print(f"⚠ {company_name} ({company_code}) のデータが見つかりません。スキップします。")
-            continue
-        
-        print(f"\n{company_name} ({company_code}) を処理中...")
-        
-        # ZIPファイルを検索
-        zip_files = list(company_dir.glob('*.zip'))
-        if not zip_files:
-            print(f"⚠ ZIPファイルが見つかりません。")
-            continue
-        
-        financials = []
-        
-        for zip_path in sorted(zip_files):
-            print(f"  ZIP: {zip_path.name}")
-            
-            try:
-                # XBRL抽出
-                temp_dir = output_dir / f"{company_code}_temp"
-                temp_dir.mkdir(parents=True, exist_ok=True)
-                xbrl_file = extract_xbrl_from_zip(str(zip_path), str(temp_dir))
-                # print(f"  XBRL: {Path(xbrl_file).name}")
-                
-                # 貸借対照表解析
-                bs_data = parse_balance_sheet(xbrl_file, company_code)
-                
-                # 損益計算書解析
-                pl_data = parse_profit_loss(xbrl_file, company_code)
-                
-                financials.append({
-                    'date': bs_data['date'],
-                    'bs': bs_data,
-                    'pl': pl_data
-                })
-                
-                # 一時ディレクトリ削除
-                import shutil
-                shutil.rmtree(temp_dir)
-                
-            except Exception as e:
-                print(f"  ❌ エラー: {str(e)}")
-                continue
-        
-        # 結果を保存
-        output_file = output_dir / f"{company_name}_financials.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(financials, f, ensure_ascii=False, indent=2)
-        print(f"  ✓ 解析結果保存: {output_file}")
-
-        # CSV保存
-        csv_file = output_dir / f"{company_name}_financials.csv"
-        if financials:
-            import csv
-            # ヘッダー作成 (日付 + BSキー + PLキー)
-            # 最初の要素からキーを取得
-            first_item = financials[0]
-            bs_keys = [k for k in first_item['bs'].keys() if k not in ['date', 'companyCode']]
-            pl_keys = [k for k in first_item['pl'].keys() if k not in ['date', 'companyCode']]
-            
-            headers = ['date'] + [f"bs_{k}" for k in bs_keys] + [f"pl_{k}" for k in pl_keys]
-            
-            with open(csv_file, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
-                
-                for item in financials:
-                    row = [item['date']]
-                    # BS values
-                    for k in bs_keys:
-                        row.append(item['bs'].get(k, ''))
-                    # PL values
-                    for k in pl_keys:
-                        row.append(item['pl'].get(k, ''))
-                    writer.writerow(row)
-            print(f"  ✓ CSV保存: {csv_file}")
-    
-    print(f"\n✓ XBRL解析完了: {output_dir}")
+    summaries = run_in_batches(process_company, companies, input_dir, output_dir, args.full,
+                               workers=args.workers, batch_size=args.batch_size)
+    
+    parsed = sum(s['parsed'] for s in summaries)
+    invalidated = sum(len(s['invalidated']) for s in summaries)
+    print(f"\n✓ XBRL解析完了: {output_dir}（新規解析 {parsed} 件、更新された期間 {invalidated} 件）")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,186 @@
+# ピア順位・パーセンタイル算出スクリプト
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 会計年度ごとに全企業を各KPI・主要XBRL項目で順位付けし、
+# (会計年度, 指標, 企業) のコンパクトな順位/パーセンタイルキューブとして保存する。
+# groupby().rank() による一括計算なので、対象企業数が増えても1パスで済む。
+
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from rescore import load_thresholds
+from json_output import write_json
+
+# 順位付けするKPI（timeseries.json の列）
+KPI_METRICS = ['roic', 'wacc', 'ebitdaMargin', 'fcfMargin', 'evEbitdaRatio', 'per', 'pbr']
+
+# 順位付けする主要XBRL項目（XBRL_output/<企業>/<PL|BS|CF>.csv の列）
+RAW_LINE_ITEMS = {
+    'PL': ['NetSalesSummaryOfBusinessResults', 'OperatingIncome', 'OrdinaryIncome', 'ProfitLoss'],
+    'BS': ['Assets', 'NetAssets'],
+    'CF': ['NetCashProvidedByUsedInOperatingActivities'],
+}
+
+# 低いほど良い指標（WACCは kpi_targets.json の direction からも取得）
+LOWER_IS_BETTER = {'evEbitdaRatio', 'per', 'pbr'}
+
+# 正の値のみ意味を持つ倍率（EBITDA・純利益・自己資本が0以下の期は 0.0 が出力されるため順位対象外）
+POSITIVE_ONLY = {'evEbitdaRatio', 'per', 'pbr'}
+
+
+def fiscal_year_from_date(dates: pd.Series) -> pd.Series:
+    """決算日から会計年度を計算（3月決算: 2025-03-31 → 2024）"""
+    return pd.to_datetime(dates, errors='coerce').dt.year - 1
+
+
+def load_kpi_frame(timeseries: Dict[str, List[Dict[str, Any]]]) -> pd.DataFrame:
+    """timeseries.json を (company, fiscalYear, metric, value) の縦持ちに変換"""
+    records = [
+        {'company': company, 'date': point['date'], 'fiscalYear': point.get('fiscalYear'),
+         **{m: point.get(m) for m in KPI_METRICS}}
+        for company, series in timeseries.items()
+        if isinstance(series, list)
+        for point in series
+    ]
+    if not records:
+        return pd.DataFrame(columns=['company', 'fiscalYear', 'metric', 'value'])
+
+    wide = pd.DataFrame(records)
+    # 会計年度は timeseries の fiscalYear を優先（古い出力は3月決算とみなして決算日から計算）
+    wide['fiscalYear'] = pd.to_numeric(wide['fiscalYear'], errors='coerce').fillna(fiscal_year_from_date(wide['date']))
+    return wide.melt(id_vars=['company', 'fiscalYear'], value_vars=KPI_METRICS,
+                     var_name='metric', value_name='value')
+
+
+def load_line_item_frame(xbrl_output_dir: Path, companies: List[str]) -> pd.DataFrame:
+    """XBRL_output の必要列だけを読み込み、縦持ちに変換"""
+    frames = []
+    for statement, items in RAW_LINE_ITEMS.items():
+        wanted = {'fiscal_year', *items}
+        for company in companies:
+            csv_path = xbrl_output_dir / company / f'{statement}.csv'
+            if not csv_path.exists():
+                continue
+            df = pd.read_csv(csv_path, encoding='utf-8-sig', usecols=lambda c: c in wanted)
+            if 'fiscal_year' not in df.columns:
+                continue
+            present = [item for item in items if item in df.columns]
+            if not present:
+                continue
+            long = df.melt(id_vars=['fiscal_year'], value_vars=present, var_name='metric', value_name='value')
+            long['company'] = company
+            frames.append(long.rename(columns={'fiscal_year': 'fiscalYear'}))
+
+    if not frames:
+        return pd.DataFrame(columns=['company', 'fiscalYear', 'metric', 'value'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def rank_peers(long: pd.DataFrame, lower_is_better: set) -> pd.DataFrame:
+    """
+    会計年度×指標ごとに企業を順位付け
+
+    rank: 1 = 最良（同値は最小順位）
+    percentile: 0〜100（100 = 最良、比較対象が1社のみなら100）
+    欠損値と0以下の倍率（POSITIVE_ONLY）は順位付けしない
+    """
+    long = long.dropna(subset=['value', 'fiscalYear']).copy()
+    long['value'] = pd.to_numeric(long['value'], errors='coerce')
+    long = long.dropna(subset=['value'])
+    # 符号反転後に 0.0 が最良にならないよう、0以下の倍率は除外
+    long = long[~(long['metric'].isin(POSITIVE_ONLY) & (long['value'] <= 0))].copy()
+    long['fiscalYear'] = long['fiscalYear'].astype(int)
+
+    # 低いほど良い指標は符号反転して「高いほど良い」に揃える
+    sign = np.where(long['metric'].isin(lower_is_better), -1.0, 1.0)
+    goodness = long['value'] * sign
+    groups = goodness.groupby([long['fiscalYear'], long['metric']], sort=False)
+
+    long['rank'] = groups.rank(method='min', ascending=False).astype(int)
+    long['peers'] = groups.transform('count').astype(int)
+    below = groups.rank(method='min', ascending=True) - 1
+    long['percentile'] = np.where(long['peers'] > 1, below / (long['peers'] - 1).clip(lower=1) * 100, 100.0)
+    return long
+
+
+def build_rank_index(ranked: pd.DataFrame, companies: List[str], metrics: List[str],
+                     lower_is_better: set) -> Dict[str, Any]:
+    """
+    順位をコンパクトなキューブに変換
+
+    rank / percentile は (会計年度, 指標, 企業) の行優先でフラット化した配列。
+    インデックス = (y * nMetrics + m) * nCompanies + c
+    """
+    years = sorted(int(y) for y in ranked['fiscalYear'].unique())
+    shape = (len(years), len(metrics), len(companies))
+    rank_cube = np.zeros(shape, dtype=np.int32)
+    pct_cube = np.full(shape, np.nan)
+
+    y_index = pd.Index(years).get_indexer(ranked['fiscalYear'])
+    m_index = pd.Index(metrics).get_indexer(ranked['metric'])
+    c_index = pd.Index(companies).get_indexer(ranked['company'])
+    valid = (y_index >= 0) & (m_index >= 0) & (c_index >= 0)
+    rank_cube[y_index[valid], m_index[valid], c_index[valid]] = ranked['rank'].to_numpy()[valid]
+    pct_cube[y_index[valid], m_index[valid], c_index[valid]] = ranked['percentile'].to_numpy()[valid]
+
+    pct_flat = np.round(pct_cube.ravel(), 1)
+    return {
+        'asOf': datetime.now().strftime('%Y-%m-%d'),
+        'fiscalYears': years,
+        'metrics': metrics,
+        'lowerIsBetter': [m for m in metrics if m in lower_is_better],
+        'companies': companies,
+        'shape': list(shape),
+        # 0 = データなし
+        'rank': rank_cube.ravel().tolist(),
+        'percentile': np.where(np.isnan(pct_flat), None, pct_flat).tolist(),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='ピア順位・パーセンタイル算出スクリプト')
+    parser.add_argument('--timeseries', default='data/timeseries.json', help='時系列データ（デフォルト: data/timeseries.json）')
+    parser.add_argument('--xbrl-output', default='XBRL_output', help='XBRL CSVディレクトリ（デフォルト: XBRL_output）')
+    parser.add_argument('--targets', default='public/data/kpi_targets.json', help='閾値定義ファイル（KPIの評価方向に使用）')
+    parser.add_argument('--output', default='data/peer_ranks.json', help='出力ファイル（デフォルト: data/peer_ranks.json）')
+    args = parser.parse_args(argv)
+
+    timeseries_file = Path(args.timeseries)
+    if not timeseries_file.exists():
+        timeseries_file = Path('public/data/timeseries.json')
+    with open(timeseries_file, 'r', encoding='utf-8') as f:
+        timeseries = json.load(f)
+
+    lower_is_better = set(LOWER_IS_BETTER)
+    targets_file = Path(args.targets)
+    if targets_file.exists():
+        thresholds = load_thresholds(targets_file)
+        lower_is_better |= {kpi for kpi, t in thresholds.items() if t['direction'] == 'lower'}
+
+    companies = [c for c, series in timeseries.items() if isinstance(series, list)]
+    print(f"ピア順位算出開始: {len(companies)} 社")
+
+    long = pd.concat([
+        load_kpi_frame(timeseries),
+        load_line_item_frame(Path(args.xbrl_output), companies),
+    ], ignore_index=True)
+    ranked = rank_peers(long, lower_is_better)
+
+    metrics = KPI_METRICS + [item for items in RAW_LINE_ITEMS.values() for item in items]
+    rank_index = build_rank_index(ranked, companies, metrics, lower_is_better)
+    print(f"  ✓ {len(rank_index['fiscalYears'])} 年度 × {len(metrics)} 指標 × {len(companies)} 社")
+
+    output_file = Path(args.output)
+    write_json(rank_index, output_file, Path('public/data/peer_ranks.json'), compact=True)
+
+    print(f"\n✓ ピア順位算出完了: {output_file}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# ポイントインタイム財務照会モジュール（バックテスト用）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 書類キャッシュ（data/edinet_parsed/<企業>_documents.json）の提出日（filedAt）を使い、
+# 「ある日付の時点で市場が知り得た財務数値」を返す。決算期末日ではなく提出日で結合するので、
+# KPIシグナルのバックテストに先読み（look-ahead）が入らない。
+#   as-of       … その日までの訂正報告書も反映した最新値
+#   as-reported … 訂正報告書を無視した当初提出値
+# 企業ごとに提出日順の配列と「各提出時点で最新の期間を表す行」を前計算しておき、
+# 多数の日付は np.searchsorted でまとめて引く（日次スナップショット数千件でも1回の二分探索）。
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from company_registry import add_registry_arguments, companies_from_args, company_keys, ticker_for
+from fact_store import documents_file, load_documents
+from parse_edinet_xbrl import PARSER_VERSION
+from ttm_financials import load_period_financials
+from adjusted_prices import load_adjusted_prices
+
+# 期間種別の並び順（同じ会計年度内で後の期間ほど大きい）
+PERIOD_ORDER = {'Q1': 1, 'Q2': 2, 'Q3': 3, 'FY': 4}
+
+# 書類ごとの識別・時点列（財務数値は bs_* / pl_* 列）
+KEY_COLUMNS = ['company', 'docID', 'parentDocID', 'filedAt', 'date', 'fiscalYear', 'fiscalPeriod']
+
+
+def load_document_frame(data_dir: Path, companies: Sequence[str]) -> pd.DataFrame:
+    """
+    書類キャッシュを1つの表にまとめる（1行 = 1書類、企業・提出日・docID順）
+
+    BS・PLの各項目は bs_<項目> / pl_<項目> 列に展開する。期間を特定できない書類は除外。
+    """
+    rows = []
+    for company in companies:
+        for doc in load_documents(data_dir, company, PARSER_VERSION).values():
+            if doc.get('fiscalPeriod') not in PERIOD_ORDER:
+                continue
+            row = {'company': company, **{key: doc.get(key) for key in KEY_COLUMNS[1:]}}
+            row.update({f'bs_{k}': v for k, v in doc['bs'].items() if k not in ('date', 'companyCode')})
+            row.update({f'pl_{k}': v for k, v in doc['pl'].items() if k not in ('date', 'companyCode')})
+            rows.append(row)
+    if not rows:
+        return pd.DataFrame(columns=KEY_COLUMNS)
+
+    frame = pd.DataFrame(rows)
+    frame['filedAt'] = pd.to_datetime(frame['filedAt'])
+    return frame.sort_values(['company', 'filedAt', 'docID'], kind='stable').reset_index(drop=True)
+
+
+def build_pit_index(frame: pd.DataFrame, as_reported: bool = False) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    企業ごとのポイントインタイム索引を作成
+
+    Returns:
+        {企業: (提出日の昇順配列, その提出時点で採用される行番号の配列)}
+        各提出の時点で既知の最も新しい (会計年度, 期間) のうち最後に提出された書類を採用する
+        （古い期間の訂正は最新期間の採用行を変えない）。
+    """
+    if as_reported:
+        frame = frame[frame['parentDocID'].isna()]
+
+    index = {}
+    for company, group in frame.groupby('company', sort=False):
+        ordinal = group['fiscalYear'].to_numpy(dtype=np.int64) * 10 + group['fiscalPeriod'].map(PERIOD_ORDER).to_numpy()
+        frontier = ordinal == np.maximum.accumulate(ordinal)
+        rows = pd.Series(np.where(frontier, group.index.to_numpy(), -1)).replace(-1, np.nan).ffill()
+        index[company] = (group['filedAt'].to_numpy(dtype='datetime64[ns]'), rows.to_numpy(dtype=np.int64))
+    return index
+
+
+def snapshots(frame: pd.DataFrame, index: Dict[str, Tuple[np.ndarray, np.ndarray]], dates: Sequence[Any],
+              companies: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    複数日付 × 複数企業の「その日に知り得た最新の財務数値」を一括取得
+
+    Returns:
+        1行 = (asOf, 企業) の表（その日までに書類がない企業・日付は含まない）
+    """
+    as_of = pd.to_datetime(pd.Index(dates)).to_numpy(dtype='datetime64[ns]')
+    parts = []
+    for company in companies if companies is not None else list(index):
+        if company not in index:
+            continue
+        filed, rows = index[company]
+        position = np.searchsorted(filed, as_of, side='right') - 1
+        known = position >= 0
+        part = frame.iloc[rows[position[known]]].reset_index(drop=True)
+        part.insert(0, 'asOf', as_of[known])
+        parts.append(part)
+    if not parts:
+        return pd.DataFrame(columns=['asOf'] + list(frame.columns))
+    return pd.concat(parts, ignore_index=True)
+
+
+def snapshot(frame: pd.DataFrame, index: Dict[str, Tuple[np.ndarray, np.ndarray]], as_of: Any,
+             companies: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """1日分のスナップショット（1行 = 企業）"""
+    return snapshots(frame, index, [as_of], companies)
+
+
+def attach_market_cap(result: pd.DataFrame, data_dir: Path) -> pd.DataFrame:
+    """スナップショット日（決算期末日ではない）の時価総額（百万円）を付与"""
+    result = result.copy()
+    result['marketCap'] = np.nan
+    for company, rows in result.groupby('company', sort=False).groups.items():
+        symbol = ticker_for(company)
+        prices = load_adjusted_prices(symbol, load_period_financials(data_dir, company)) if symbol else None
+        if prices is None or prices.empty:
+            continue
+        position = prices.index.get_indexer(pd.DatetimeIndex(result.loc[rows, 'asOf']), method='pad')
+        values = prices['MarketCap'].to_numpy()[np.maximum(position, 0)]
+        result.loc[rows, 'marketCap'] = np.where(position >= 0, values, np.nan)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ポイントインタイム財務スナップショット生成（バックテスト用）')
+    parser.add_argument('--input', default='data/edinet_parsed', help='書類キャッシュのディレクトリ（デフォルト: data/edinet_parsed）')
+    parser.add_argument('--start', required=True, help='開始日（YYYY-MM-DD）')
+    parser.add_argument('--end', default=None, help='終了日（YYYY-MM-DD、デフォルト: 今日）')
+    parser.add_argument('--freq', default='B', help='スナップショットの間隔（pandasの頻度文字列、デフォルト: B = 営業日）')
+    parser.add_argument('--as-reported', action='store_true', help='訂正報告書を反映せず当初提出値を使う')
+    parser.add_argument('--market-cap', action='store_true', help='スナップショット日の時価総額を付与する')
+    parser.add_argument('--output', default='data/pit_snapshots.csv', help='出力CSV（デフォルト: data/pit_snapshots.csv）')
+    add_registry_arguments(parser)
+    args = parser.parse_args()
+
+    input_dir = Path(args.input)
+    companies = [c for c in company_keys(companies_from_args(args)) if documents_file(input_dir, c).exists()]
+    dates = pd.date_range(args.start, args.end or datetime.now().strftime('%Y-%m-%d'), freq=args.freq)
+
+    frame = load_document_frame(input_dir, companies)
+    index = build_pit_index(frame, as_reported=args.as_reported)
+    result = snapshots(frame, index, dates, companies)
+    if args.market_cap:
+        result = attach_market_cap(result, input_dir)
+
+    output_file = Path(args.output)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    result.to_csv(output_file, index=False, encoding='utf-8')
+    mode = '当初提出値' if args.as_reported else '訂正反映'
+    print(f"✓ {len(dates)} 日 × {len(companies)} 社（{mode}）: {len(result)} 行 → {output_file}")
+
+
+if __name__ == '__main__':
+    main()
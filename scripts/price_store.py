@@ -0,0 +1,205 @@
+# 株価の列指向バイナリストア
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# data/prices/<symbol>.csv を、日付昇順・重複排除済みの列ごとの .npy に保存する。
+#   data/prices/store/<symbol>/Date.npy   (datetime64[D])
+#   data/prices/store/<symbol>/Close.npy  (float64) ...
+# 読み込み側は必要な列だけをメモリマップで開くため、CSVの再パース・ソート・重複排除が不要。
+# ストアがない（またはCSVより古い）場合はCSVから読み込み、その場でストアを作り直す。
+# パイプラインは株価を読むステージをスレッドで並列実行するため、作り直しと読み込みは銘柄ごとのロックで直列化する。
+
+import os
+import json
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+PRICES_DIR = Path('data/prices')
+STORE_DIRNAME = 'store'
+STORE_VERSION = 1
+
+# 保存する列と型（Dateは必須）
+STORE_COLUMNS = {
+    'Open': np.float64,
+    'High': np.float64,
+    'Low': np.float64,
+    'Close': np.float64,
+    'Volume': np.float64,
+}
+
+# ストアディレクトリ → ロック（同じ銘柄の作り直しと読み込みを直列化）
+_STORE_LOCKS: Dict[str, threading.Lock] = {}
+_STORE_LOCKS_GUARD = threading.Lock()
+
+
+def store_path(symbol: str, prices_dir: Path = PRICES_DIR) -> Path:
+    """銘柄のストアディレクトリ"""
+    return Path(prices_dir) / STORE_DIRNAME / symbol
+
+
+def _save_array_atomic(path: Path, values: np.ndarray) -> None:
+    """1列を一時ファイル経由でアトミックに保存"""
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.stem}.", suffix='.npy.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, values, allow_pickle=False)
+        os.replace(tmp_name, path)
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def write_price_store(df: pd.DataFrame, symbol: str, prices_dir: Path = PRICES_DIR) -> Path:
+    """
+    株価DataFrame（Date列 + OHLCV）をソート・重複排除して列ごとの .npy に保存
+
+    書き込み中は meta.json を外し、全列の保存後に書き戻すので、
+    途中で失敗しても新旧の列が混ざったストアが読まれることはない（読み込み側はCSVにフォールバック）。
+    """
+    directory = store_path(symbol, prices_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    meta_file = directory / 'meta.json'
+    if meta_file.exists():
+        meta_file.unlink()
+
+    frame = df.copy()
+    frame['Date'] = pd.to_datetime(frame['Date']).dt.normalize()
+    frame = frame.drop_duplicates(subset='Date', keep='last').sort_values('Date')
+
+    dates = frame['Date'].to_numpy(dtype='datetime64[D]')
+    _save_array_atomic(directory / 'Date.npy', dates)
+    columns = []
+    for column, dtype in STORE_COLUMNS.items():
+        if column not in frame.columns:
+            continue
+        values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=dtype)
+        _save_array_atomic(directory / f'{column}.npy', values)
+        columns.append(column)
+
+    meta = {
+        'version': STORE_VERSION,
+        'symbol': symbol,
+        'rows': int(len(dates)),
+        'columns': columns,
+        'firstDate': str(dates[0]) if len(dates) else None,
+        'lastDate': str(dates[-1]) if len(dates) else None,
+    }
+    with open(meta_file, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return directory
+
+
+def read_store_meta(symbol: str, prices_dir: Path = PRICES_DIR) -> Optional[Dict]:
+    """ストアのメタ情報（存在しない・バージョン違いの場合はNone）"""
+    meta_file = store_path(symbol, prices_dir) / 'meta.json'
+    if not meta_file.exists():
+        return None
+    try:
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == STORE_VERSION else None
+
+
+def load_price_columns(symbol: str, columns: Sequence[str] = ('Close',),
+                       prices_dir: Path = PRICES_DIR) -> Optional[Dict[str, np.ndarray]]:
+    """
+    ストアから必要な列だけをメモリマップで読み込む
+
+    Returns:
+        {'Date': datetime64[D], <列>: float64} の読み取り専用配列。ストアが使えない場合はNone
+    """
+    meta = read_store_meta(symbol, prices_dir)
+    if meta is None or any(c not in meta['columns'] for c in columns):
+        return None
+
+    directory = store_path(symbol, prices_dir)
+    arrays = {}
+    for column in ('Date', *columns):
+        arrays[column] = np.load(directory / f'{column}.npy', mmap_mode='r', allow_pickle=False)
+        if len(arrays[column]) != meta['rows']:
+            return None
+    return arrays
+
+
+def _store_is_stale(symbol: str, prices_dir: Path) -> bool:
+    """CSVがストアより新しければTrue（CSVを手で更新した場合など）"""
+    csv_path = Path(prices_dir) / f'{symbol}.csv'
+    meta_file = store_path(symbol, prices_dir) / 'meta.json'
+    if not meta_file.exists():
+        return True
+    return csv_path.exists() and csv_path.stat().st_mtime > meta_file.stat().st_mtime
+
+
+def _store_lock(symbol: str, prices_dir: Path) -> threading.Lock:
+    """銘柄のストアに対応するロック（同じストアには同じロックを返す）"""
+    key = str(store_path(symbol, prices_dir).resolve())
+    with _STORE_LOCKS_GUARD:
+        return _STORE_LOCKS.setdefault(key, threading.Lock())
+
+
+def load_price_frame(symbol: str, columns: Sequence[str] = ('Close',),
+                     prices_dir: Path = PRICES_DIR) -> Optional[pd.DataFrame]:
+    """
+    株価を Date インデックス（昇順・重複なし）のDataFrameとして読み込む
+
+    ストアが最新ならメモリマップで読み、そうでなければCSVから読み込んでストアを作り直す。
+    別スレッドが作り直している途中（meta.json がない）のストアを読まないよう、銘柄ごとのロック内で行う。
+    """
+    with _store_lock(symbol, prices_dir):
+        return _load_price_frame(symbol, columns, prices_dir)
+
+
+def _load_price_frame(symbol: str, columns: Sequence[str], prices_dir: Path) -> Optional[pd.DataFrame]:
+    csv_path = Path(prices_dir) / f'{symbol}.csv'
+    if _store_is_stale(symbol, prices_dir):
+        if not csv_path.exists():
+            return None
+        df = pd.read_csv(csv_path, comment='#')
+        try:
+            write_price_store(df, symbol, prices_dir)
+        except OSError as e:
+            print(f"⚠ 株価ストアを書き込めません: {symbol} ({e})")
+            df['Date'] = pd.to_datetime(df['Date'])
+            df = df.drop_duplicates(subset='Date', keep='last').set_index('Date').sort_index()
+            return df[[c for c in columns if c in df.columns]]
+
+    arrays = load_price_columns(symbol, columns, prices_dir)
+    if arrays is None:
+        return None
+    index = pd.DatetimeIndex(arrays['Date'].astype('datetime64[ns]'), name='Date')
+    return pd.DataFrame({c: np.asarray(arrays[c]) for c in columns}, index=index)
+
+
+def build_all_stores(prices_dir: Path = PRICES_DIR) -> int:
+    """prices_dir 内の全CSVからストアを作成し、作成した銘柄数を返す"""
+    count = 0
+    for csv_path in sorted(Path(prices_dir).glob('*.csv')):
+        df = pd.read_csv(csv_path, comment='#')
+        write_price_store(df, csv_path.stem, prices_dir)
+        print(f"  ✓ {csv_path.stem}: {len(df)} 行")
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='株価CSVから列指向バイナリストアを作成')
+    parser.add_argument('--prices-dir', default=str(PRICES_DIR), help=f'株価CSVディレクトリ（デフォルト: {PRICES_DIR}）')
+    args = parser.parse_args()
+
+    prices_dir = Path(args.prices_dir)
+    print(f"株価ストア作成開始: {prices_dir}")
+    count = build_all_stores(prices_dir)
+    print(f"\n✓ 株価ストア作成完了: {count} 銘柄 → {prices_dir / STORE_DIRNAME}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+# KPI再スコアリングスクリプト（閾値のWhat-if評価）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# compute_scores.py が保存した KPI値（kpi_values.json）に閾値セットを適用し、
+# 全企業・全期間の信号機評価をベクトル演算で一括で付け直す。
+# 閾値を変更してもKPIの再計算（XBRL由来のBS/PLの再読込）は不要。
+
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+import numpy as np
+
+from json_output import write_json
+
+KPI_NAMES = ['roic', 'wacc', 'ebitdaMargin', 'fcfMargin']
+
+# 期間ラベルの優先順位（latest の選定に使用）
+LATEST_PERIOD_PRIORITY = ['Annual', 'Q2']
+
+
+def load_thresholds(targets_file: Path) -> Dict[str, Dict[str, Any]]:
+    """kpi_targets.json を {kpiName: {green, yellow, direction}} 形式で読み込む
+
+    direction: 'higher'（高いほど良い、既定）/ 'lower'（低いほど良い）
+    """
+    with open(targets_file, 'r', encoding='utf-8') as f:
+        targets_config = json.load(f)
+
+    return parse_thresholds(targets_config)
+
+
+def parse_thresholds(targets_config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """閾値定義（kpi_targets.json 形式）を辞書形式に変換"""
+    targets = {}
+    for threshold in targets_config['thresholds']:
+        targets[threshold['kpiName']] = {
+            'green': threshold['greenThreshold'],
+            'yellow': threshold['yellowThreshold'],
+            'direction': threshold.get('direction', 'higher'),
+        }
+    return targets
+
+
+def score_values(values: np.ndarray, thresholds: Dict[str, Any]) -> np.ndarray:
+    """閾値に基づいて配列全体をスコア評価
+
+    higher: value >= green → green, value >= yellow → yellow, それ以外 red
+    lower:  value <  green → green, value <  yellow → yellow, それ以外 red
+    NaN は red として扱う。
+    """
+    values = np.asarray(values, dtype=float)
+    if thresholds.get('direction', 'higher') == 'lower':
+        conditions = [values < thresholds['green'], values < thresholds['yellow']]
+    else:
+        conditions = [values >= thresholds['green'], values >= thresholds['yellow']]
+    return np.select(conditions, ['green', 'yellow'], default='red')
+
+
+def rescore(kpi_values: Dict[str, Any], thresholds: Dict[str, Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """KPI値の列ごとにスコアを一括計算"""
+    columns = kpi_values['columns']
+    return {
+        kpi: score_values(np.asarray(columns[kpi], dtype=float), thresholds[kpi])
+        for kpi in kpi_values['kpis']
+        if kpi in thresholds
+    }
+
+
+def select_period_rows(kpi_values: Dict[str, Any]) -> np.ndarray:
+    """企業×期間ごとに最新日付の行インデックスを返す（企業・期間の出現順）"""
+    columns = kpi_values['columns']
+    company = np.asarray(columns['company'], dtype=str)
+    period = np.asarray(columns['period'], dtype=str)
+    date = np.asarray(columns['date'], dtype=str)
+    if len(company) == 0:
+        return np.array([], dtype=int)
+
+    # (企業, 期間, 日付) 昇順に並べ、各 (企業, 期間) グループの末尾＝最新日付を選択
+    order = np.lexsort((date, period, company))
+    company, period = company[order], period[order]
+    is_last = np.ones(len(order), dtype=bool)
+    is_last[:-1] = (company[1:] != company[:-1]) | (period[1:] != period[:-1])
+    return np.sort(order[is_last])
+
+
+def build_scorecards(kpi_values: Dict[str, Any], thresholds: Dict[str, Dict[str, Any]],
+                     as_of: Optional[str] = None) -> Dict[str, Any]:
+    """KPI値と閾値から scorecards.json を組み立てる"""
+    columns = kpi_values['columns']
+    scores = rescore(kpi_values, thresholds)
+    trends = kpi_values.get('trends', {})
+
+    scorecard_data = {
+        'asOf': as_of or datetime.now().strftime('%Y-%m-%d'),
+        'companies': {},
+    }
+
+    # 企業の出現順を保ちつつ、企業内は新しい期間から並べる
+    rows = select_period_rows(kpi_values)
+    company_order = {name: i for i, name in enumerate(dict.fromkeys(columns['company']))}
+    rows = sorted(rows, key=lambda r: columns['date'][r], reverse=True)
+    rows = sorted(rows, key=lambda r: company_order[columns['company'][r]])
+    for row in rows:
+        company = columns['company'][row]
+        entry = {
+            'date': columns['date'][row],
+            'companyCode': columns['companyCode'][row],
+        }
+        for kpi in kpi_values['kpis']:
+            kpi_trends = {stat: values[row] for stat, values in trends.get(kpi, {}).items()}
+            entry[kpi] = {
+                'value': columns[kpi][row],
+                'score': str(scores[kpi][row]),
+                **kpi_trends,
+                # 前年同期比（比較対象がない場合は0）
+                'change': kpi_trends.get('change') or 0,
+            }
+        scorecard_data['companies'].setdefault(company, {})[columns['period'][row]] = entry
+
+    for company, company_scores in scorecard_data['companies'].items():
+        latest = next((company_scores[p] for p in LATEST_PERIOD_PRIORITY if p in company_scores), None)
+        company_scores['latest'] = latest or list(company_scores.values())[0]
+
+    return scorecard_data
+
+
+def load_kpi_values(values_file: Path) -> Dict[str, Any]:
+    """compute_scores.py が保存した kpi_values.json を読み込む"""
+    with open(values_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='KPI再スコアリングスクリプト（閾値のWhat-if評価）')
+    parser.add_argument('--values', default='data/kpi_values.json', help='KPI値ファイル（デフォルト: data/kpi_values.json）')
+    parser.add_argument('--targets', default='public/data/kpi_targets.json', help='閾値定義ファイル（デフォルト: public/data/kpi_targets.json）')
+    parser.add_argument('--output', default='data/scorecards.json', help='出力ファイル（デフォルト: data/scorecards.json）')
+    parser.add_argument('--no-public', action='store_true', help='public/data/scorecards.json を更新しない（What-if確認用）')
+    args = parser.parse_args()
+
+    values_file = Path(args.values)
+    if not values_file.exists():
+        print(f"⚠ {values_file} が見つかりません。先に compute_scores.py を実行してください。")
+        return 1
+
+    kpi_values = load_kpi_values(values_file)
+    thresholds = load_thresholds(Path(args.targets))
+    scorecard_data = build_scorecards(kpi_values, thresholds, as_of=kpi_values.get('asOf'))
+
+    output_file = Path(args.output)
+    outputs = [output_file] if args.no_public else [output_file, Path('public/data/scorecards.json')]
+    write_json(scorecard_data, *outputs, compact=True)
+
+    print(f"✓ 再スコアリング完了: {len(kpi_values['columns']['date'])} 行 → {output_file}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
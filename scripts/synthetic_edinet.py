@@ -0,0 +1,246 @@
+# EDINET形式の合成XBRL ZIP生成スクリプト（ベンチマーク・テスト用）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 実際の有報ZIPと同じ構成（XBRL/PublicDoc/*.xbrl、jppfs_cor・jpcrp_cor・jpdei_cor、
+# CurrentYearInstant 等のコンテキストIDとディメンション付きコンテキスト）の書類を、
+# 企業数・年数・事実数・コンテキスト数・ディメンション数を指定して決定的に生成する。
+# 同じ引数・シードなら同じバイト列になる（ZIP内のタイムスタンプも固定）。
+# 既定値は現在の実データ1書類の規模（事実 約2,500・コンテキスト 約250）に合わせている。
+
+import json
+import random
+import zipfile
+import argparse
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+# 1書類あたりの既定値（実データの有報と同程度）
+DEFAULT_COMPANIES = 3
+DEFAULT_YEARS = 8
+DEFAULT_FACTS = 2500
+DEFAULT_CONTEXTS = 250
+DEFAULT_DIMENSIONS = 1
+DEFAULT_FIRST_YEAR = 2017
+
+# 明細項目1つあたりの事実数（実データは 約2,500事実 / 約630要素）
+FACTS_PER_LINE_ITEM = 4
+
+# ZIP内のタイムスタンプ（決定的な出力のため固定）
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+NAMESPACES = {
+    'xbrli': 'http://www.xbrl.org/2003/instance',
+    'xbrldi': 'http://xbrl.org/2006/xbrldi',
+    'iso4217': 'http://www.xbrl.org/2003/iso4217',
+    'link': 'http://www.xbrl.org/2003/linkbase',
+    'xlink': 'http://www.w3.org/1999/xlink',
+    'jppfs_cor': 'http://disclosure.edinet-fsa.go.jp/taxonomy/jppfs/2024-11-01/jppfs_cor',
+    'jpcrp_cor': 'http://disclosure.edinet-fsa.go.jp/taxonomy/jpcrp/2024-11-01/jpcrp_cor',
+    'jpdei_cor': 'http://disclosure.edinet-fsa.go.jp/taxonomy/jpdei/2013-08-31/jpdei_cor',
+}
+
+# 解析スクリプトが読む主要項目 → (名前空間接頭辞, コンテキスト種別, 売上高に対する目安の倍率)
+CORE_FACTS: Dict[str, Tuple[str, str, float]] = {
+    'ElectricUtilityOperatingRevenueELE': ('jppfs_cor', 'Duration', 1.0),
+    'OperatingIncome': ('jppfs_cor', 'Duration', 0.06),
+    'OrdinaryIncome': ('jppfs_cor', 'Duration', 0.05),
+    'InterestExpensesNOE': ('jppfs_cor', 'Duration', 0.01),
+    'ProfitLoss': ('jppfs_cor', 'Duration', 0.03),
+    'DepreciationAndAmortizationOpeCF': ('jppfs_cor', 'Duration', 0.07),
+    'NetCashProvidedByUsedInOperatingActivities': ('jppfs_cor', 'Duration', 0.1),
+    'NetCashProvidedByUsedInInvestmentActivities': ('jppfs_cor', 'Duration', -0.09),
+    'NetCashProvidedByUsedInFinancingActivities': ('jppfs_cor', 'Duration', -0.01),
+    'CurrentAssets': ('jppfs_cor', 'Instant', 0.5),
+    'NoncurrentAssets': ('jppfs_cor', 'Instant', 2.0),
+    'Assets': ('jppfs_cor', 'Instant', 2.5),
+    'CurrentLiabilities': ('jppfs_cor', 'Instant', 0.6),
+    'NoncurrentLiabilities': ('jppfs_cor', 'Instant', 1.3),
+    'Liabilities': ('jppfs_cor', 'Instant', 1.9),
+    'NetAssets': ('jppfs_cor', 'Instant', 0.6),
+    'BondsPayable': ('jppfs_cor', 'Instant', 0.8),
+    'CashAndDeposits': ('jppfs_cor', 'Instant', 0.15),
+    'CurrentPortionOfNoncurrentLiabilities': ('jppfs_cor', 'Instant', 0.2),
+    'CashAndCashEquivalents': ('jppfs_cor', 'Instant', 0.14),
+}
+
+# 従業員の状況（提出会社単体の平均値と連結の従業員数）
+EMPLOYEE_VALUES = {
+    'AverageAnnualSalaryInformationAboutReportingCompanyInformationAboutEmployees': 8_000_000,
+    'AverageLengthOfServiceYearsInformationAboutReportingCompanyInformationAboutEmployees': 20.5,
+    'AverageAgeYearsInformationAboutReportingCompanyInformationAboutEmployees': 43.2,
+    'NumberOfEmployees': 30_000,
+}
+
+
+def synthetic_companies(count: int) -> List[Dict[str, Any]]:
+    """companies.json 形式の合成企業（3月決算・非上場）"""
+    return [
+        {'key': f'SYN{i:04d}', 'edinetCode': f'E9{i:04d}', 'name': f'合成電力{i:04d}',
+         'ticker': None, 'fiscalYearEnd': '03-31', 'sector': 'electric'}
+        for i in range(count)
+    ]
+
+
+def _context(context_id: str, edinet_code: str, period: Tuple[str, ...], members: List[str]) -> str:
+    if len(period) == 1:
+        period_xml = f'<xbrli:instant>{period[0]}</xbrli:instant>'
+    else:
+        period_xml = f'<xbrli:startDate>{period[0]}</xbrli:startDate><xbrli:endDate>{period[1]}</xbrli:endDate>'
+    scenario = ''
+    if members:
+        scenario = '<xbrli:scenario>' + ''.join(
+            f'<xbrldi:explicitMember dimension="jpcrp_cor:Axis{i}">jpcrp_cor:{member}</xbrldi:explicitMember>'
+            for i, member in enumerate(members)) + '</xbrli:scenario>'
+    return (f'<xbrli:context id="{context_id}"><xbrli:entity>'
+            f'<xbrli:identifier scheme="http://disclosure.edinet-fsa.go.jp">{edinet_code}-000</xbrli:identifier>'
+            f'{scenario}</xbrli:entity><xbrli:period>{period_xml}</xbrli:period></xbrli:context>')
+
+
+def _fact(prefix: str, name: str, context_id: str, value: Any) -> str:
+    if isinstance(value, str):
+        return f'<{prefix}:{name} contextRef="{context_id}">{escape(value)}</{prefix}:{name}>'
+    decimals = '-6' if isinstance(value, int) else '1'
+    return (f'<{prefix}:{name} contextRef="{context_id}" unitRef="JPY" '
+            f'decimals="{decimals}">{value}</{prefix}:{name}>')
+
+
+def build_instance(edinet_code: str, fiscal_year: int, facts: int = DEFAULT_FACTS,
+                   contexts: int = DEFAULT_CONTEXTS, dimensions: int = DEFAULT_DIMENSIONS,
+                   seed: int = 0) -> bytes:
+    """
+    1書類（有報・3月決算）のXBRLインスタンスを生成
+
+    Args:
+        edinet_code: EDINETコード
+        fiscal_year: 会計年度（期首の年。期末は翌年3月31日）
+        facts: 事実（数値要素）の総数の目安（主要項目・DEI・従業員情報を含む）
+        contexts: コンテキスト数（当期・前期の4つ以外はディメンション付き）
+        dimensions: ディメンション付きコンテキスト1つあたりの explicitMember の数
+        seed: 乱数シード（企業・年度と組み合わせて値を決める）
+    """
+    rng = random.Random(f'{seed}:{edinet_code}:{fiscal_year}')
+    start = date(fiscal_year, 4, 1).isoformat()
+    end = date(fiscal_year + 1, 3, 31).isoformat()
+    prior_start = date(fiscal_year - 1, 4, 1).isoformat()
+    prior_end = date(fiscal_year, 3, 31).isoformat()
+    filed = date(fiscal_year + 1, 6, 27).isoformat()
+
+    base_contexts = [
+        ('CurrentYearInstant', (end,)), ('CurrentYearDuration', (start, end)),
+        ('Prior1YearInstant', (prior_end,)), ('Prior1YearDuration', (prior_start, prior_end)),
+    ]
+    context_xml = [_context(cid, edinet_code, period, []) for cid, period in base_contexts]
+    context_ids = [cid for cid, _ in base_contexts]
+    context_xml.append(_context('CurrentYearInstant_NonConsolidatedMember', edinet_code, (end,),
+                                ['NonConsolidatedMember']))
+    context_ids.append('CurrentYearInstant_NonConsolidatedMember')
+    for i in range(max(0, contexts - len(context_ids))):
+        base_id, period = base_contexts[i % len(base_contexts)]
+        members = [f'Segment{i:04d}Member'] + [f'Detail{i:04d}_{d}Member' for d in range(1, dimensions)]
+        context_id = f'{base_id}_{"_".join(members)}'
+        context_xml.append(_context(context_id, edinet_code, period, members))
+        context_ids.append(context_id)
+
+    dei = {
+        'EDINETCodeDEI': edinet_code,
+        'CurrentFiscalYearStartDateDEI': start,
+        'CurrentFiscalYearEndDateDEI': end,
+        'CurrentPeriodEndDateDEI': end,
+        'TypeOfCurrentPeriodDEI': 'FY',
+    }
+    fact_xml = [_fact('jpdei_cor', name, 'FilingDateInstant', value) for name, value in dei.items()]
+
+    revenue = rng.randint(500_000, 7_000_000) * 1_000_000
+    for name, (prefix, kind, ratio) in CORE_FACTS.items():
+        for context_id, scale in ((f'CurrentYear{kind}', 1.0), (f'Prior1Year{kind}', 0.97)):
+            value = int(revenue * ratio * scale * rng.uniform(0.9, 1.1)) // 1_000_000 * 1_000_000
+            fact_xml.append(_fact(prefix, name, context_id, value))
+    for name, value in EMPLOYEE_VALUES.items():
+        context_id = 'CurrentYearInstant' if name == 'NumberOfEmployees' else 'CurrentYearInstant_NonConsolidatedMember'
+        jittered = round(value * rng.uniform(0.9, 1.1), 1)
+        fact_xml.append(_fact('jpcrp_cor', name, context_id, int(jittered) if isinstance(value, int) else jittered))
+
+    # 残りは明細項目（jppfs と jpcrp を交互、1項目を FACTS_PER_LINE_ITEM 個の連続したコンテキストで報告）
+    for i in range(max(0, facts - len(fact_xml))):
+        item = i // FACTS_PER_LINE_ITEM
+        prefix = 'jppfs_cor' if item % 2 == 0 else 'jpcrp_cor'
+        context_id = context_ids[i % len(context_ids)]
+        value = rng.randint(-10_000, 500_000) * 1_000_000
+        fact_xml.append(_fact(prefix, f'SyntheticLineItem{item:04d}', context_id, value))
+
+    namespaces = ' '.join(f'xmlns:{prefix}="{uri}"' for prefix, uri in NAMESPACES.items())
+    filing_context = _context('FilingDateInstant', edinet_code, (filed,), [])
+    document = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<xbrli:xbrl {namespaces}>'
+        f'<link:schemaRef xlink:type="simple" xlink:href="jpcrp030000-asr-001_{edinet_code}-000_{end}_01_{filed}.xsd"/>'
+        f'{filing_context}{"".join(context_xml)}'
+        '<xbrli:unit id="JPY"><xbrli:measure>iso4217:JPY</xbrli:measure></xbrli:unit>'
+        f'{"".join(fact_xml)}</xbrli:xbrl>'
+    )
+    return document.encode('utf-8')
+
+
+def write_filing(zip_path: Path, edinet_code: str, fiscal_year: int, instance: bytes) -> None:
+    """XBRLインスタンスを EDINET と同じ構成（XBRL/PublicDoc/）のZIPに保存"""
+    end = date(fiscal_year + 1, 3, 31).isoformat()
+    filed = date(fiscal_year + 1, 6, 27).isoformat()
+    name = f'XBRL/PublicDoc/jpcrp030000-asr-001_{edinet_code}-000_{end}_01_{filed}.xbrl'
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME), instance, compress_type=zipfile.ZIP_DEFLATED)
+
+
+def generate_corpus(output_dir: Path, companies: int = DEFAULT_COMPANIES, years: int = DEFAULT_YEARS,
+                    facts: int = DEFAULT_FACTS, contexts: int = DEFAULT_CONTEXTS,
+                    dimensions: int = DEFAULT_DIMENSIONS, first_year: int = DEFAULT_FIRST_YEAR,
+                    seed: int = 0) -> Path:
+    """
+    合成企業のレジストリと有報ZIPを生成
+
+    出力:
+        <output_dir>/companies.json             レジストリ（--registry に渡す）
+        <output_dir>/XBRL/<EDINETコード>/<提出日>_<docID>.zip
+
+    Returns:
+        レジストリファイルのパス
+    """
+    output_dir = Path(output_dir)
+    registry = synthetic_companies(companies)
+    for index, company in enumerate(registry):
+        for offset in range(years):
+            fiscal_year = first_year + offset
+            filed = date(fiscal_year + 1, 6, 27).isoformat()
+            doc_id = f'S9{index:04d}{offset:02d}'
+            instance = build_instance(company['edinetCode'], fiscal_year, facts, contexts, dimensions, seed)
+            write_filing(output_dir / 'XBRL' / company['edinetCode'] / f'{filed}_{doc_id}.zip',
+                         company['edinetCode'], fiscal_year, instance)
+
+    registry_file = output_dir / 'companies.json'
+    with open(registry_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': '1.0.0', 'companies': registry}, f, ensure_ascii=False, indent=2)
+    return registry_file
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='EDINET形式の合成XBRL ZIPを生成（ベンチマーク・テスト用）')
+    parser.add_argument('--output', required=True, help='出力ディレクトリ（companies.json と XBRL/ を作成）')
+    parser.add_argument('--companies', type=int, default=DEFAULT_COMPANIES, help=f'企業数（デフォルト: {DEFAULT_COMPANIES}）')
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS, help=f'1社あたりの年数（デフォルト: {DEFAULT_YEARS}）')
+    parser.add_argument('--facts', type=int, default=DEFAULT_FACTS, help=f'1書類あたりの事実数（デフォルト: {DEFAULT_FACTS}）')
+    parser.add_argument('--contexts', type=int, default=DEFAULT_CONTEXTS, help=f'1書類あたりのコンテキスト数（デフォルト: {DEFAULT_CONTEXTS}）')
+    parser.add_argument('--dimensions', type=int, default=DEFAULT_DIMENSIONS, help=f'ディメンション付きコンテキストのメンバー数（デフォルト: {DEFAULT_DIMENSIONS}）')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード（デフォルト: 0）')
+    args = parser.parse_args(argv)
+
+    registry_file = generate_corpus(Path(args.output), args.companies, args.years, args.facts,
+                                    args.contexts, args.dimensions, seed=args.seed)
+    print(f"✓ 合成書類: {args.companies} 社 × {args.years} 年 → {Path(args.output) / 'XBRL'}")
+    print(f"✓ レジストリ: {registry_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from adjusted_prices import build_adjusted_series, detect_share_actions, share_observations  # noqa: E402
+
+
+def make_prices(closes, start='2024-03-25'):
+    index = pd.bdate_range(start, periods=len(closes), name='Date')
+    return pd.DataFrame({'Close': closes, 'Volume': 1000.0}, index=index)
+
+
+def records(*rows):
+    return [{'date': d, 'bs': {'issuedShares': s}} for d, s in rows]
+
+
+def test_detects_split_but_ignores_small_issuance():
+    dates, shares = share_observations(records(
+        ('2023-03-31', 1_000_000), ('2024-03-29', 1_010_000), ('2025-03-31', 2_020_000),
+    ))
+    actions = detect_share_actions(dates, shares)
+    assert actions['ratio'].tolist() == [2.0]
+    assert str(actions['end'].iloc[0])[:10] == '2025-03-31'
+
+
+def test_raw_price_split_keeps_market_cap_continuous():
+    # 2024-03-29 に 1:2 の株式分割（生株価は半値に）
+    closes = [1000.0, 1010.0, 1005.0, 1000.0, 502.0, 500.0, 505.0]
+    prices = make_prices(closes)
+    dates, shares = share_observations(records(('2024-03-22', 1_000_000), ('2024-04-02', 2_000_000)))
+
+    adjusted = build_adjusted_series(prices, dates, shares)
+
+    assert adjusted.attrs['actions']['rawPrice'].tolist() == [True]
+    np.testing.assert_allclose(adjusted['AdjClose'].to_numpy()[:4], np.array(closes[:4]) / 2)
+    np.testing.assert_allclose(adjusted['AdjClose'].to_numpy()[4:], closes[4:])
+    assert (adjusted['AdjShares'] == 2_000_000).all()
+    np.testing.assert_allclose(adjusted['AdjVolume'].to_numpy()[:4], 2000.0)
+    # 分割日をまたいでも時価総額は連続（株価ギャップ分のみ）
+    assert abs(adjusted['MarketCap'].iloc[4] / adjusted['MarketCap'].iloc[3] - 1) < 0.01
+
+
+def test_pre_adjusted_prices_only_rescale_shares():
+    closes = [500.0, 505.0, 502.0, 500.0, 501.0]
+    prices = make_prices(closes)
+    dates, shares = share_observations(records(('2024-03-22', 1_000_000), ('2024-03-28', 2_000_000)))
+
+    adjusted = build_adjusted_series(prices, dates, shares)
+
+    assert adjusted.attrs['actions']['rawPrice'].tolist() == [False]
+    np.testing.assert_allclose(adjusted['AdjClose'].to_numpy(), closes)
+    assert (adjusted['AdjShares'] == 2_000_000).all()
+    np.testing.assert_allclose(adjusted['MarketCap'].to_numpy(), np.array(closes) * 2)
+
+
+def test_without_share_data_market_cap_is_missing():
+    adjusted = build_adjusted_series(make_prices([100.0, 101.0]), *share_observations([]))
+    assert adjusted['MarketCap'].isna().all()
+    np.testing.assert_allclose(adjusted['AdjClose'].to_numpy(), [100.0, 101.0])
@@ -0,0 +1,52 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from build_manifest import build_manifest, scan_coverage  # noqa: E402
+from build_statement_payloads import build_statement_payloads  # noqa: E402
+
+COMPANIES = ['TEPCO', 'CHUBU']
+
+
+def write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+
+def test_scan_coverage_finds_companies_and_years_in_nested_layouts():
+    assert scan_coverage({'TEPCO': [{'fiscalYear': 2023}, {'year': 2025}], 'asOf': '2025-01-01'}, set(COMPANIES)) \
+        == ({'TEPCO'}, {2023, 2025})
+    assert scan_coverage({'companies': ['CHUBU', 'OTHER'], 'fiscalYears': [2020, 2021]}, set(COMPANIES)) \
+        == ({'CHUBU'}, {2020, 2021})
+
+
+def test_manifest_lists_artifacts_and_writes_company_and_year_shards(tmp_path):
+    public = tmp_path / 'public'
+    write_json(public / 'data' / 'timeseries.json', {
+        'TEPCO': [{'fiscalYear': 2023, 'roic': 1.0}, {'fiscalYear': 2024, 'roic': 2.0}],
+        'CHUBU': [{'fiscalYear': 2024, 'roic': 3.0}],
+    })
+    write_json(public / 'data' / 'valuation.json', {'asOf': '2025-01-01', 'companies': {'TEPCO': {'ev': 1}}})
+    csv_path = public / 'XBRL_output' / 'TEPCO' / 'PL.csv'
+    csv_path.parent.mkdir(parents=True)
+    csv_path.write_text('fiscal_year,NetSales\n2022,10\n2024,12\n', encoding='utf-8')
+    build_statement_payloads(public / 'XBRL_output', public / 'statements', COMPANIES)
+
+    manifest = build_manifest(public, COMPANIES)
+    artifacts = manifest['artifacts']
+
+    assert artifacts['data/timeseries.json']['companies'] == ['CHUBU', 'TEPCO']
+    assert artifacts['data/timeseries.json']['years'] == [2023, 2024]
+    assert artifacts['data/timeseries.json']['bytes'] == (public / 'data' / 'timeseries.json').stat().st_size
+    assert artifacts['XBRL_output/TEPCO/PL.csv']['years'] == [2022, 2024]
+    assert any(path.startswith('statements/TEPCO_PL.') and entry['years'] == [2022, 2024]
+               for path, entry in artifacts.items())
+
+    shards = manifest['shards']['timeseries']
+    year_shard = json.loads((public / shards['years']['2024']).read_text(encoding='utf-8'))
+    assert year_shard == {'TEPCO': [{'fiscalYear': 2024, 'roic': 2.0}], 'CHUBU': [{'fiscalYear': 2024, 'roic': 3.0}]}
+    company_shard = json.loads((public / shards['companies']['CHUBU']).read_text(encoding='utf-8'))
+    assert company_shard == {'CHUBU': [{'fiscalYear': 2024, 'roic': 3.0}]}
+    assert set(manifest['shards']['valuation']['companies']) == {'TEPCO'}
@@ -0,0 +1,49 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from build_statement_payloads import INDEX_FILE, build_statement_payloads  # noqa: E402
+
+
+def write_csv(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('﻿' + text, encoding='utf-8')
+
+
+def test_payloads_are_columnar_share_concepts_and_drop_empty_columns(tmp_path):
+    write_csv(tmp_path / 'in' / 'TEPCO' / 'PL.csv',
+              'fiscal_year,date,company_code,NetSales,Unused\n2024,2025-03-31,E04498,1500.5,\n2023,2024-03-31,E04498,,\n')
+    write_csv(tmp_path / 'in' / 'CHUBU' / 'PL.csv', 'fiscal_year,date,company_code,NetSales\n2024,2025-03-31,E04502,900\n')
+
+    output = tmp_path / 'out'
+    index = build_statement_payloads(tmp_path / 'in', output, ['TEPCO', 'CHUBU', 'JERA'])
+    concepts = json.loads((output / index['concepts']).read_text(encoding='utf-8'))
+    payload = json.loads((output / index['statements']['TEPCO']['PL']).read_text(encoding='utf-8'))
+
+    assert 'Unused' not in concepts
+    assert set(index['statements']) == {'TEPCO', 'CHUBU'}
+    assert [concepts[i] for i in payload['columns']] == ['fiscal_year', 'date', 'company_code', 'NetSales']
+    assert payload['values'] == [[2024, 2023], ['2025-03-31', '2024-03-31'], ['E04498', 'E04498'], [1500.5, None]]
+    # 事前圧縮ファイルは出力しない（配信時の圧縮は Pages に任せる）
+    assert not list(output.glob('*.gz')) and not list(output.glob('*.br'))
+    assert json.loads((output / INDEX_FILE).read_text(encoding='utf-8')) == index
+
+
+def test_unchanged_content_keeps_file_names_and_changes_replace_stale_files(tmp_path):
+    csv_path = tmp_path / 'in' / 'TEPCO' / 'BS.csv'
+    write_csv(csv_path, 'fiscal_year,Assets\n2024,100\n')
+    output = tmp_path / 'out'
+
+    first = build_statement_payloads(tmp_path / 'in', output, ['TEPCO'])
+    assert build_statement_payloads(tmp_path / 'in', output, ['TEPCO']) == first
+
+    write_csv(csv_path, 'fiscal_year,Assets\n2024,200\n')
+    # 旧版が出力した事前圧縮ファイルも削除する
+    (output / (first['statements']['TEPCO']['BS'] + '.gz')).write_bytes(b'old')
+    second = build_statement_payloads(tmp_path / 'in', output, ['TEPCO'])
+    name = second['statements']['TEPCO']['BS']
+
+    assert name != first['statements']['TEPCO']['BS']
+    assert {p.name for p in output.glob('TEPCO_BS.*')} == {name}
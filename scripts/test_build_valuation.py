@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from build_valuation import simulate_enterprise_value  # noqa: E402
+
+
+def simulate(**kwargs):
+    params = dict(
+        market_cap=np.array([1000.0, 500.0]),
+        net_debt=np.array([2000.0, -100.0]),
+        ebitda=np.array([400.0, 50.0]),
+        price_vol=np.array([0.3, 0.2]),
+        samples=50_000,
+        chunk_size=7_000,
+        seed=7,
+    )
+    params.update(kwargs)
+    return simulate_enterprise_value(**params)
+
+
+def test_seeded_simulation_is_reproducible():
+    first = simulate()
+    second = simulate()
+    assert np.array_equal(first['enterpriseValue'], second['enterpriseValue'])
+    assert np.array_equal(first['evEbitdaRatio'], second['evEbitdaRatio'])
+
+
+def test_bands_are_ordered_and_centered():
+    bands = simulate()['enterpriseValue']
+    assert bands.shape == (3, 2)
+    assert np.all(bands[0] < bands[1]) and np.all(bands[1] < bands[2])
+    # 中央値は点推定（時価総額 + 純有利子負債）の近傍
+    point = np.array([3000.0, 400.0])
+    assert np.allclose(bands[1], point, rtol=0.03)
+
+
+def test_histogram_percentiles_match_exact_percentiles():
+    # ゼロ分散に近いEBITDA・純有利子負債なら EV = 時価総額 × 対数正規
+    bands = simulate(net_debt_sd=0.0, ebitda_sd=0.0)['enterpriseValue']
+    z = np.array([-1.6448536, 0.0, 1.6448536])
+    for col, (mc, nd, vol) in enumerate([(1000.0, 2000.0, 0.3), (500.0, -100.0, 0.2)]):
+        expected = mc * np.exp(vol * z - 0.5 * vol ** 2) + nd
+        assert np.allclose(bands[:, col], expected, rtol=0.01)
+
+
+def test_nonpositive_ebitda_yields_nan_ratio():
+    bands = simulate(ebitda=np.array([400.0, -10.0]), ebitda_sd=0.0)['evEbitdaRatio']
+    assert np.all(np.isnan(bands[:, 1]))
+    assert np.all(np.isfinite(bands[:, 0]))
@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from company_registry import (  # noqa: E402
+    batched, edinet_mapping, load_registry, parse_registry, run_in_batches, select_companies, symbol_mapping,
+)
+
+
+CONFIG = {
+    'companies': [
+        {'key': 'TEPCO', 'edinetCode': 'E04498', 'name': '東京電力HD', 'ticker': '9501.T',
+         'fiscalYearEnd': '03-31', 'sector': 'electric'},
+        {'key': 'TOKYOGAS', 'edinetCode': 'E04520', 'name': '東京ガス', 'ticker': '9531.T',
+         'fiscalYearEnd': '03-31', 'sector': 'gas'},
+        {'key': 'JERA', 'edinetCode': 'E34837', 'name': 'JERA', 'ticker': None,
+         'fiscalYearEnd': '03-31', 'sector': 'electric'},
+    ]
+}
+
+
+def test_default_registry_matches_previous_hard_coded_lists():
+    registry = load_registry()
+    assert edinet_mapping(registry) == {'E04498': 'TEPCO', 'E04502': 'CHUBU', 'E34837': 'JERA'}
+    assert symbol_mapping(registry) == {'TEPCO': '9501.T', 'CHUBU': '9502.T'}
+
+
+def test_env_override_and_selection(monkeypatch):
+    monkeypatch.setenv('JERA_EDINET_CODE', 'E99999')
+    registry = parse_registry(CONFIG)
+
+    assert edinet_mapping(registry)['E99999'] == 'JERA'
+    assert [c['key'] for c in select_companies(registry, sector='electric')] == ['TEPCO', 'JERA']
+    # キーとEDINETコードのどちらでも指定でき、順序はレジストリ順
+    assert [c['key'] for c in select_companies(registry, ['E99999', 'TEPCO'])] == ['TEPCO', 'JERA']
+    with pytest.raises(ValueError):
+        select_companies(registry, ['KANSAI'])
+
+
+def test_invalid_registry_entries_are_rejected():
+    duplicate = {'companies': CONFIG['companies'] + [dict(CONFIG['companies'][0], key='TEPCO2')]}
+    with pytest.raises(ValueError):
+        parse_registry(duplicate)
+    with pytest.raises(ValueError):
+        parse_registry({'companies': [{'key': 'X', 'edinetCode': 'E1'}]})
+
+
+def test_run_in_batches_preserves_registry_order():
+    registry = parse_registry(CONFIG)
+    assert [len(b) for b in batched(registry, 2)] == [2, 1]
+    assert run_in_batches(lambda code, key, suffix: key + suffix, registry, '!', batch_size=2) == [
+        'TEPCO!', 'TOKYOGAS!', 'JERA!',
+    ]
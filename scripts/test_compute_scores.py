@@ -5,43 +5,43 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent))
 
 from compute_scores import (  # noqa: E402
-    calculate_roe,
-    calculate_equity_ratio,
-    calculate_dscr,
+    calculate_roic,
+    calculate_wacc,
+    calculate_ebitda_margin,
+    calculate_fcf_margin,
     evaluate_score,
 )
 
 
-def test_calculate_roe_returns_percentage():
-    bs_data = {'equity': 2000}
-    pl_data = {'netIncome': 160}
+def test_calculate_roic_returns_percentage():
+    bs_data = {'equity': 1500, 'interestBearingDebt': 500}
+    pl_data = {'operatingIncome': 160}
 
-    assert math.isclose(calculate_roe(bs_data, pl_data), 8.0)
+    assert math.isclose(calculate_roic(bs_data, pl_data), 8.0)
 
 
-def test_calculate_roe_handles_zero_equity():
-    assert calculate_roe({'equity': 0}, {'netIncome': 100}) == 0.0
+def test_calculate_roic_handles_zero_invested_capital():
+    assert calculate_roic({'equity': 0, 'interestBearingDebt': 0}, {'operatingIncome': 100}) == 0.0
 
 
-def test_calculate_equity_ratio():
-    bs_data = {'equity': 1500, 'totalAssets': 5000}
-    assert math.isclose(calculate_equity_ratio(bs_data), 30.0)
+def test_calculate_wacc_weights_equity_and_after_tax_debt_cost():
+    bs_data = {'equity': 1000, 'interestBearingDebt': 1000}
+    pl_data = {'interestExpenses': 20}
 
+    # 0.5 × 6% + 0.5 × 2% × (1 - 0.3) = 3.7%
+    assert math.isclose(calculate_wacc(bs_data, pl_data), 3.7)
 
-def test_calculate_equity_ratio_handles_zero_assets():
-    assert calculate_equity_ratio({'equity': 1000, 'totalAssets': 0}) == 0.0
 
+def test_calculate_wacc_handles_zero_capital():
+    assert calculate_wacc({'equity': 0, 'interestBearingDebt': 0}, {'interestExpenses': 10}) == 0.0
 
-def test_calculate_dscr_uses_debt_service_proxy():
-    bs_data = {'interestBearingDebt': 5000}
-    pl_data = {'ebitda': 1000}
 
-    # debt service proxy = 5000 * 0.1 = 500
-    assert math.isclose(calculate_dscr(pl_data, bs_data), 2.0)
+def test_margins_use_revenue():
+    pl_data = {'ebitda': 150, 'operatingCashFlow': 80, 'revenue': 1000}
 
-
-def test_calculate_dscr_handles_zero_debt():
-    assert calculate_dscr({'ebitda': 1000}, {'interestBearingDebt': 0}) == 0.0
+    assert math.isclose(calculate_ebitda_margin(pl_data), 15.0)
+    assert math.isclose(calculate_fcf_margin(pl_data), 8.0)
+    assert calculate_ebitda_margin({'ebitda': 150, 'revenue': 0}) == 0.0
 
 
 def test_evaluate_score_thresholds():
@@ -50,3 +50,11 @@ def test_evaluate_score_thresholds():
     assert evaluate_score(12, thresholds) == 'green'
     assert evaluate_score(7, thresholds) == 'yellow'
     assert evaluate_score(3, thresholds) == 'red'
+
+
+def test_evaluate_score_lower_is_better():
+    thresholds = {'green': 4, 'yellow': 5, 'direction': 'lower'}
+
+    assert evaluate_score(3, thresholds) == 'green'
+    assert evaluate_score(4.5, thresholds) == 'yellow'
+    assert evaluate_score(6, thresholds) == 'red'
@@ -0,0 +1,85 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import fetch_edinet  # noqa: E402
+from edinet_replay_server import FaultInjector, ReplayArchive, start_server  # noqa: E402
+from synthetic_edinet import generate_corpus  # noqa: E402
+
+
+@pytest.fixture
+def archive(tmp_path):
+    registry = generate_corpus(tmp_path / 'source', companies=2, years=2, facts=100, contexts=10)
+    return ReplayArchive(tmp_path / 'source' / 'XBRL', registry_file=registry)
+
+
+@pytest.fixture
+def serve(monkeypatch, tmp_path):
+    servers = []
+
+    def start(archive, faults=None):
+        server = start_server(archive, faults)
+        servers.append(server)
+        monkeypatch.setattr(fetch_edinet, 'EDINET_API_BASE', server.base_url)
+        monkeypatch.setattr(fetch_edinet, 'XBRL_DIR', tmp_path / 'downloads')
+        monkeypatch.setattr(fetch_edinet, 'REQUEST_INTERVAL', 0)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_bulk_fetch_downloads_from_replay_and_resumes(archive, serve, tmp_path):
+    server = serve(archive)
+    dates = ['2018-06-26', '2018-06-27', '2019-06-27']
+    codes = ['E90000', 'E90001']
+
+    result = fetch_edinet.fetch_bulk_xbrl(codes, dates, download_workers=2)
+
+    assert result['failed'] == []
+    assert sorted(p.name for p in result['downloaded']['E90000']) == ['2018-06-27_S9000000.zip', '2019-06-27_S9000001.zip']
+    downloaded = tmp_path / 'downloads' / 'E90001' / '2019-06-27_S9000101.zip'
+    assert downloaded.read_bytes() == archive.files['S9000101'].read_bytes()
+    assert server.stats.count('list') == 3 and server.stats.count('document', 200) == 4
+
+    # 2回目はダウンロード済みのZIPを使い、書類一覧だけを取得する
+    fetch_edinet.fetch_bulk_xbrl(codes, dates, download_workers=2)
+    assert server.stats.count('list') == 6 and server.stats.count('document') == 4
+
+
+def test_fixtures_replace_listing_for_their_date(tmp_path):
+    registry = generate_corpus(tmp_path / 'source', companies=1, years=1, facts=50, contexts=5)
+    fixtures = tmp_path / 'fixtures'
+    fixtures.mkdir()
+    recorded = {'results': [{'docID': 'S9000000', 'edinetCode': 'E90000', 'docTypeCode': '120', 'xbrlFlag': '1'},
+                            {'docID': 'S1OTHER', 'edinetCode': 'E00001', 'docTypeCode': '030', 'xbrlFlag': '0'}]}
+    (fixtures / '2018-06-27.json').write_text(json.dumps(recorded), encoding='utf-8')
+
+    archive = ReplayArchive(tmp_path / 'source' / 'XBRL', fixtures, registry)
+
+    assert archive.document_list('2018-06-27')['results'] == recorded['results']
+    assert archive.document_list('2018-06-27')['metadata']['resultset']['count'] == 2
+    assert archive.document_list('2018-06-28')['results'] == []
+
+
+def test_faults_are_injected(archive, serve):
+    server = serve(archive, FaultInjector(rate_limit=2, retry_after=3))
+    url = f'{server.base_url}/documents.json'
+
+    statuses = [requests.get(url, params={'date': '2018-06-27'}, timeout=5).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    throttled = requests.get(url, params={'date': '2018-06-27'}, timeout=5)
+    assert throttled.headers['Retry-After'] == '3'
+
+    server.faults = FaultInjector(failure_rate=1.0)
+    assert requests.get(f'{server.base_url}/documents/S9000000', params={'type': 1}, timeout=5).status_code == 500
+    server.faults = FaultInjector()
+    assert requests.get(f'{server.base_url}/documents/UNKNOWN', params={'type': 1}, timeout=5).status_code == 404
+    assert fetch_edinet.get_document_list('2018-06-27')[0]['docID'] == 'S9000000'
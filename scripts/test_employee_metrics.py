@@ -0,0 +1,96 @@
+import json
+import sys
+from pathlib import Path
+
+from lxml import etree
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from employee_metrics import employee_record, select_headcount_basis, update_employees_json  # noqa: E402
+from extract_xbrl_to_csv import scan_facts  # noqa: E402
+
+SALARY = 'AverageAnnualSalaryInformationAboutReportingCompanyInformationAboutEmployees'
+
+XBRL = f"""<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance"
+  xmlns:jpcrp_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jpcrp/2023-11-01/jpcrp_cor"
+  xmlns:jppfs_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jppfs/2023-11-01/jppfs_cor"
+  xmlns:jpdei_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jpdei/2013-08-31/jpdei_cor">
+  <jpdei_cor:CurrentFiscalYearStartDateDEI contextRef="FilingDateInstant">2024-04-01</jpdei_cor:CurrentFiscalYearStartDateDEI>
+  <jppfs_cor:Assets contextRef="CurrentYearInstant">1000</jppfs_cor:Assets>
+  <jppfs_cor:NetSales contextRef="CurrentYearDuration">500</jppfs_cor:NetSales>
+  <jpcrp_cor:NumberOfEmployees contextRef="CurrentYearInstant">38074</jpcrp_cor:NumberOfEmployees>
+  <jpcrp_cor:NumberOfEmployees contextRef="CurrentYearInstant_NonConsolidatedMember">4800</jpcrp_cor:NumberOfEmployees>
+  <jpcrp_cor:{SALARY} contextRef="CurrentYearInstant_NonConsolidatedMember">8595666</jpcrp_cor:{SALARY}>
+</xbrli:xbrl>"""
+
+
+def test_scan_facts_collects_statements_and_employees_in_one_pass():
+    facts = scan_facts(etree.fromstring(XBRL.encode()))
+
+    assert facts['instant']['Assets'] == 1000.0
+    assert facts['duration']['NetSales'] == 500.0
+    assert facts['dei']['CurrentFiscalYearStartDate'] == '2024-04-01'
+    assert facts['employees'][('NumberOfEmployees', 'CurrentYearInstant')] == 38074.0
+    assert facts['employees'][(SALARY, 'CurrentYearInstant_NonConsolidatedMember')] == 8595666.0
+
+
+def test_employee_record_prefers_reporting_company_averages_and_consolidated_headcount():
+    facts = scan_facts(etree.fromstring(XBRL.encode()))['employees']
+    record = employee_record(facts, '2025-03-31')
+
+    assert record['year'] == 2025
+    assert record['averageAnnualSalary'] == 8595666
+    assert record['numberOfEmployees'] == 38074
+    assert record['numberOfEmployeesBasis'] == 'consolidated'
+    assert record['averageAgeYears'] is None
+    assert employee_record({}, '2025-03-31') is None
+
+
+def test_headcount_basis_is_consistent_across_years():
+    # 2024年の有報は単体（_NonConsolidatedMember）の従業員数しか持たない
+    non_consolidated_only = XBRL.replace(
+        '<jpcrp_cor:NumberOfEmployees contextRef="CurrentYearInstant">38074</jpcrp_cor:NumberOfEmployees>', '')
+    records = [
+        employee_record(scan_facts(etree.fromstring(XBRL.encode()))['employees'], '2025-03-31'),
+        employee_record(scan_facts(etree.fromstring(non_consolidated_only.encode()))['employees'], '2024-03-31'),
+    ]
+    assert records[1]['numberOfEmployees'] == 4800
+    assert records[1]['numberOfEmployeesBasis'] == 'nonConsolidated'
+
+    select_headcount_basis(records)
+
+    # 連結が全年度そろわないので、連結のある年度も単体に揃える（連結と単体の比較にしない）
+    assert [(r['numberOfEmployees'], r['numberOfEmployeesBasis']) for r in records] == [
+        (4800, 'nonConsolidated'), (4800, 'nonConsolidated')]
+    assert all('headcounts' not in r for r in records)
+
+
+def test_headcount_basis_stays_per_year_when_no_basis_covers_all_years():
+    records = [
+        employee_record({('NumberOfEmployees', 'CurrentYearInstant'): 100.0}, '2025-03-31'),
+        employee_record({('NumberOfEmployees', 'CurrentYearInstant_NonConsolidatedMember'): 40.0}, '2024-03-31'),
+    ]
+    select_headcount_basis(records)
+
+    assert [(r['numberOfEmployees'], r['numberOfEmployeesBasis']) for r in records] == [
+        (100, 'consolidated'), (40, 'nonConsolidated')]
+
+
+def test_update_employees_json_replaces_only_the_company_and_dates_given(tmp_path):
+    path = tmp_path / 'employees.json'
+    path.write_text(json.dumps({
+        'asOf': '2025-01-01',
+        'TEPCO': [{'year': 2024, 'date': '2024-03-31', 'numberOfEmployees': 1},
+                  {'year': 2023, 'date': '2023-03-31', 'numberOfEmployees': 2}],
+        'CHUBU': [{'year': 2024, 'date': '2024-03-31', 'numberOfEmployees': 3}],
+    }), encoding='utf-8')
+
+    update_employees_json(path, 'TEPCO', [{'year': 2025, 'date': '2025-03-31', 'numberOfEmployees': 5},
+                                          {'year': 2024, 'date': '2024-03-31', 'numberOfEmployees': 4}],
+                          as_of='2025-07-01')
+    data = json.loads(path.read_text(encoding='utf-8'))
+
+    assert data['asOf'] == '2025-07-01'
+    assert [r['numberOfEmployees'] for r in data['TEPCO']] == [5, 4, 2]
+    assert data['CHUBU'] == [{'year': 2024, 'date': '2024-03-31', 'numberOfEmployees': 3}]
+    assert not (tmp_path / 'employees.json.tmp').exists()
@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from fact_store import (  # noqa: E402
+    build_fact_index, changed_keys, load_documents, load_supersession_index, lookup_as_of, parse_zip_name,
+    record_amendments, resolve_as_of, save_documents, supersession_chains,
+)
+from testing_documents import make_document  # noqa: E402
+
+
+DOCUMENTS = [
+    make_document('S1', '2023-06-28', 2022),
+    make_document('S2', '2024-06-27', 2023, revenue=200.0),
+    make_document('A1', '2024-11-15', 2023, parent='S2', revenue=210.0),
+    make_document('A2', '2025-02-10', 2023, parent='S2', revenue=215.0),
+]
+
+
+def test_lookup_returns_latest_filing_known_as_of_date():
+    index = build_fact_index(DOCUMENTS)
+
+    assert lookup_as_of(index, (2023, 'FY'))['docID'] == 'A2'
+    assert lookup_as_of(index, (2023, 'FY'), '2024-12-31')['docID'] == 'A1'
+    assert lookup_as_of(index, (2023, 'FY'), '2024-06-27')['docID'] == 'S2'
+    assert lookup_as_of(index, (2023, 'FY'), '2024-06-26') is None
+    assert lookup_as_of(index, (2030, 'FY')) is None
+    assert [d['docID'] for d in resolve_as_of(index, '2024-12-31')] == ['S1', 'A1']
+
+
+def test_only_amended_period_is_invalidated():
+    before = resolve_as_of(build_fact_index(DOCUMENTS[:2]))
+    after = resolve_as_of(build_fact_index(DOCUMENTS))
+    assert changed_keys(before, after) == [(2023, 'FY')]
+    assert changed_keys(after, after) == []
+
+
+def test_reparsed_values_are_invalidated_even_with_same_doc_id():
+    # --full や PARSER_VERSION 更新で同じ書類を再解析し、抽出値だけが変わった場合
+    before = resolve_as_of(build_fact_index(DOCUMENTS))
+    after = [dict(r, pl={'revenue': 1.0}) if r['fiscalYear'] == 2022 else dict(r) for r in before]
+    assert changed_keys(before, after) == [(2022, 'FY')]
+
+
+def test_supersession_index_round_trip(tmp_path):
+    record_amendments(tmp_path, [
+        {'docID': 'A2', 'parentDocID': 'S2', 'docTypeCode': '130', 'submitDateTime': '2025-02-10 15:00'},
+        {'docID': 'A1', 'parentDocID': 'S2', 'docTypeCode': '130', 'submitDateTime': '2024-11-15 09:00'},
+    ])
+    index = load_supersession_index(tmp_path)
+    assert index['A1']['parentDocID'] == 'S2'
+    assert supersession_chains(index) == {'S2': ['A1', 'A2']}
+    assert load_supersession_index(tmp_path / 'missing') == {}
+
+
+def test_document_cache_is_discarded_when_parser_changes(tmp_path):
+    save_documents(tmp_path, 'TEPCO', DOCUMENTS, parser_version=1)
+    assert set(load_documents(tmp_path, 'TEPCO', 1)) == {d['source'] for d in DOCUMENTS}
+    assert load_documents(tmp_path, 'TEPCO', 2) == {}
+    assert parse_zip_name(Path('XBRL/E04498/amendments/2024-11-15_S100ABCD.zip')) == ('2024-11-15', 'S100ABCD')
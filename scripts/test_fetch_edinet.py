@@ -0,0 +1,119 @@
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import fetch_edinet  # noqa: E402
+
+
+def make_doc(code, doc_id, doc_type='120', xbrl='1'):
+    return {'edinetCode': code, 'docID': doc_id, 'docTypeCode': doc_type, 'xbrlFlag': xbrl,
+            'docDescription': f'有価証券報告書 {code}'}
+
+
+def test_filing_months_and_scan_dates():
+    assert fetch_edinet.filing_months(['03-31']) == [6, 7]
+    assert fetch_edinet.filing_months(['03-31', '12-31']) == [3, 4, 6, 7]
+    dates = fetch_edinet.bulk_scan_dates(1, [6], today=datetime(2025, 6, 10))
+    assert dates[0] == '2024-06-01' and dates[-1] == '2025-06-10'
+    assert len(dates) == 30 + 10
+
+
+def test_bulk_fetch_scans_each_date_once_for_all_companies(tmp_path, monkeypatch):
+    listing = {
+        '2025-06-20': [make_doc('E00001', 'S1'), make_doc('E00002', 'S2'), make_doc('E99999', 'S9'),
+                       make_doc('E00003', 'S3', doc_type='130'), make_doc('E00004', 'S4', xbrl='0')],
+        '2025-06-27': [make_doc('E00003', 'S5')],
+    }
+    list_calls = []
+    active = {'now': 0, 'peak': 0}
+    lock = threading.Lock()
+    # 同じ日付の2件（S1, S2）は互いの開始を待つ: 並列数2なら必ず同時実行になる（逐次ならタイムアウト）
+    both_started = threading.Barrier(2, timeout=5)
+
+    def fake_list(date_str):
+        list_calls.append(date_str)
+        return listing.get(date_str, [])
+
+    def fake_download(doc_id, company_code, date_str, doc_type="120"):
+        with lock:
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+        if doc_id in ('S1', 'S2'):
+            both_started.wait()
+        time.sleep(0.01)
+        with lock:
+            active['now'] -= 1
+        path = tmp_path / company_code / f'{date_str}_{doc_id}.zip'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'zip')
+        return path
+
+    monkeypatch.setattr(fetch_edinet, 'XBRL_DIR', tmp_path)
+    monkeypatch.setattr(fetch_edinet, 'get_document_list', fake_list)
+    monkeypatch.setattr(fetch_edinet, 'download_xbrl', fake_download)
+    monkeypatch.setattr(fetch_edinet, 'REQUEST_INTERVAL', 0)
+
+    dates = ['2025-06-20', '2025-06-27', '2025-06-30']
+    targets = ['E00001', 'E00002', 'E00003', 'E00004']
+    result = fetch_edinet.fetch_bulk_xbrl(targets, dates, download_workers=2)
+
+    assert list_calls == dates
+    assert result['listCalls'] == 3
+    assert {code: [p.name for p in files] for code, files in result['downloaded'].items()} == {
+        'E00001': ['2025-06-20_S1.zip'],
+        'E00002': ['2025-06-20_S2.zip'],
+        'E00003': ['2025-06-27_S5.zip'],
+        'E00004': [],
+    }
+    assert result['failed'] == []
+    assert active['peak'] == 2
+
+    # 2回目はダウンロード済みを再利用し、ダウンロードしない
+    monkeypatch.setattr(fetch_edinet, 'download_xbrl', lambda *a: (_ for _ in ()).throw(AssertionError('re-download')))
+    again = fetch_edinet.fetch_bulk_xbrl(targets, dates, download_workers=2)
+    assert [p.name for p in again['downloaded']['E00001']] == ['2025-06-20_S1.zip']
+
+
+def test_periodic_reports_are_saved_under_periodic_dir(tmp_path, monkeypatch):
+    listing = {'2025-08-10': [make_doc('E00001', 'Q1', doc_type='140'), make_doc('E00001', 'Y1')]}
+    saved = []
+
+    def fake_download(doc_id, company_code, date_str, doc_type='120'):
+        path = fetch_edinet.report_dir(company_code, doc_type) / f'{date_str}_{doc_id}.zip'
+        saved.append(path.relative_to(tmp_path).as_posix())
+        return path
+
+    monkeypatch.setattr(fetch_edinet, 'XBRL_DIR', tmp_path)
+    monkeypatch.setattr(fetch_edinet, 'get_document_list', lambda d: listing.get(d, []))
+    monkeypatch.setattr(fetch_edinet, 'download_xbrl', fake_download)
+    monkeypatch.setattr(fetch_edinet, 'REQUEST_INTERVAL', 0)
+
+    annual_only = fetch_edinet.fetch_bulk_xbrl(['E00001'], ['2025-08-10'])
+    assert saved == ['E00001/2025-08-10_Y1.zip'] and annual_only['failed'] == []
+
+    saved.clear()
+    doc_types = fetch_edinet.ANNUAL_REPORT_DOC_TYPES + fetch_edinet.PERIODIC_REPORT_DOC_TYPES
+    fetch_edinet.fetch_bulk_xbrl(['E00001'], ['2025-08-10'], force=True, doc_types=doc_types)
+    assert sorted(saved) == ['E00001/2025-08-10_Y1.zip', 'E00001/periodic/2025-08-10_Q1.zip']
+    assert fetch_edinet.periodic_filing_months(['03-31']) == [1, 2, 3, 7, 8, 9, 10, 11, 12]
+
+
+def test_amendments_are_saved_and_indexed(tmp_path, monkeypatch):
+    amendment = dict(make_doc('E00001', 'A1', doc_type='130'), parentDocID='Y1', submitDateTime='2025-11-04 09:00')
+    listing = {'2025-11-04': [amendment]}
+    monkeypatch.setattr(fetch_edinet, 'XBRL_DIR', tmp_path)
+    monkeypatch.setattr(fetch_edinet, 'get_document_list', lambda d: listing.get(d, []))
+    monkeypatch.setattr(fetch_edinet, 'download_xbrl',
+                        lambda doc_id, code, date_str, doc_type='120':
+                        fetch_edinet.report_dir(code, doc_type) / f'{date_str}_{doc_id}.zip')
+    monkeypatch.setattr(fetch_edinet, 'REQUEST_INTERVAL', 0)
+
+    result = fetch_edinet.fetch_bulk_xbrl(['E00001'], ['2025-11-04'], doc_types=['120', '130'])
+
+    assert [p.relative_to(tmp_path).as_posix() for p in result['downloaded']['E00001']] == [
+        'E00001/amendments/2025-11-04_A1.zip']
+    assert result['amendments'] == {'E00001': [amendment]}
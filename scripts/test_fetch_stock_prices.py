@@ -0,0 +1,141 @@
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import fetch_stock_prices  # noqa: E402
+from fetch_stock_prices import CSVPriceSource, fetch_all_symbols, fetch_stock_data  # noqa: E402
+
+
+def write_source(directory: Path, symbol: str, dates, closes):
+    directory.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({
+        'Date': dates,
+        'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+        'Volume': [1000] * len(dates),
+    }).to_csv(directory / f'{symbol}.csv', index=False)
+
+
+class CountingSource(CSVPriceSource):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.calls = []
+
+    def fetch(self, symbol, start_date, end_date):
+        self.calls.append((symbol, start_date, end_date))
+        return super().fetch(symbol, start_date, end_date)
+
+
+class FlakySource(CSVPriceSource):
+    """最初の failures 回だけ例外を投げ、同時実行数を記録するデータソース"""
+
+    def __init__(self, directory, failures=None):
+        super().__init__(directory)
+        self.failures = dict(failures or {})
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def fetch(self, symbol, start_date, end_date):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            with self.lock:
+                remaining = self.failures.get(symbol, 0)
+                self.failures[symbol] = remaining - 1
+            if remaining > 0:
+                raise ConnectionError(f'{symbol}: 429 Too Many Requests')
+            return super().fetch(symbol, start_date, end_date)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def read_output(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, comment='#')
+
+
+def test_full_fetch_writes_schema_header(tmp_path):
+    write_source(tmp_path / 'src', '9501.T', ['2025-01-06', '2025-01-07'], [500.0, 510.0])
+    out = tmp_path / 'prices'
+
+    assert fetch_stock_data('9501.T', '2025-01-01', '2025-01-31', out, source=CSVPriceSource(tmp_path / 'src'))
+
+    text = (out / '9501.T.csv').read_text(encoding='utf-8')
+    assert text.startswith('# schema_version: 1.0\n')
+    df = read_output(out / '9501.T.csv')
+    assert df['Date'].tolist() == ['2025-01-06', '2025-01-07']
+    assert df['symbol'].unique().tolist() == ['9501.T']
+
+
+def test_incremental_fetch_requests_only_missing_range_and_dedupes(tmp_path):
+    src = tmp_path / 'src'
+    out = tmp_path / 'prices'
+    write_source(src, '9501.T', ['2025-01-06', '2025-01-07'], [500.0, 510.0])
+    fetch_stock_data('9501.T', '2025-01-01', '2025-01-07', out, source=CSVPriceSource(src))
+
+    # 最終日の終値が訂正され、新しい営業日が追加された
+    write_source(src, '9501.T', ['2025-01-06', '2025-01-07', '2025-01-08'], [500.0, 512.0, 520.0])
+    source = CountingSource(src)
+    assert fetch_stock_data('9501.T', '2025-01-01', '2025-01-31', out, source=source, incremental=True)
+
+    assert source.calls == [('9501.T', '2025-01-07', '2025-01-31')]
+    df = read_output(out / '9501.T.csv')
+    assert df['Date'].tolist() == ['2025-01-06', '2025-01-07', '2025-01-08']
+    assert df['Close'].tolist() == [500.0, 512.0, 520.0]
+    assert not list(out.glob('*.tmp'))
+
+
+def test_incremental_fetch_skips_when_up_to_date(tmp_path):
+    src = tmp_path / 'src'
+    out = tmp_path / 'prices'
+    write_source(src, '9502.T', ['2025-01-06', '2025-01-07'], [1500.0, 1510.0])
+    fetch_stock_data('9502.T', '2025-01-01', '2025-01-07', out, source=CSVPriceSource(src))
+
+    source = CountingSource(src)
+    assert fetch_stock_data('9502.T', '2025-01-01', '2025-01-06', out, source=source, incremental=True)
+    assert source.calls == []
+
+
+def test_fetch_all_symbols_retries_and_reports(tmp_path):
+    src = tmp_path / 'src'
+    out = tmp_path / 'prices'
+    symbols = [f'95{i:02d}.T' for i in range(8)]
+    for symbol in symbols[:-1]:
+        write_source(src, symbol, ['2025-01-06', '2025-01-07'], [500.0, 510.0])
+    source = FlakySource(src, failures={symbols[0]: 1, symbols[1]: 5})
+
+    report = fetch_all_symbols(symbols, '2025-01-01', '2025-01-31', out, source=source,
+                               max_workers=3, retries=2, retry_wait=0)
+
+    assert [r['symbol'] for r in report['results']] == symbols
+    assert report['total'] == 8
+    assert report['succeeded'] == 6
+    # symbols[1] は再試行しても失敗し続け、最後の銘柄はデータなし
+    assert report['failed'] == [symbols[1], symbols[-1]]
+    attempts = {r['symbol']: r['attempts'] for r in report['results']}
+    assert attempts[symbols[0]] == 2
+    assert attempts[symbols[1]] == 3
+    assert attempts[symbols[2]] == 1
+    assert source.peak <= 3
+    assert sorted(p.name for p in out.glob('*.csv')) == sorted(f'{s}.csv' for s in symbols[:-1] if s != symbols[1])
+
+
+def test_main_defaults_to_registry_tickers(tmp_path, monkeypatch):
+    requested = []
+
+    def fake_fetch_all(symbols, *args, **kwargs):
+        requested.append(list(symbols))
+        return {'results': [], 'succeeded': 0, 'total': 0, 'workers': 1, 'elapsedSeconds': 0.0, 'failed': []}
+
+    monkeypatch.setattr(fetch_stock_prices, 'fetch_all_symbols', fake_fetch_all)
+
+    assert fetch_stock_prices.main(['--source-dir', str(tmp_path)]) == 0
+    assert fetch_stock_prices.main(['--source-dir', str(tmp_path), '--companies', 'CHUBU']) == 0
+    assert fetch_stock_prices.main(['--source-dir', str(tmp_path), '--symbols', '9531.T']) == 0
+    # 非上場企業（JERA）は銘柄コードがないため対象外
+    assert requested == [['9501.T', '9502.T'], ['9502.T'], ['9531.T']]
@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from fiscal_calendar import (  # noqa: E402
+    calendar_from_date, calendar_from_dei, period_label, read_dei, select_period,
+)
+import fetch_edinet  # noqa: E402
+
+
+DEI_XBRL = """<?xml version="1.0" encoding="UTF-8"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance"
+  xmlns:jpdei_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jpdei/2013-08-31/jpdei_cor">
+  <jpdei_cor:CurrentFiscalYearStartDateDEI contextRef="FilingDateInstant">2024-01-01</jpdei_cor:CurrentFiscalYearStartDateDEI>
+  <jpdei_cor:CurrentPeriodEndDateDEI contextRef="FilingDateInstant">2024-06-30</jpdei_cor:CurrentPeriodEndDateDEI>
+  <jpdei_cor:TypeOfCurrentPeriodDEI contextRef="FilingDateInstant">HY</jpdei_cor:TypeOfCurrentPeriodDEI>
+  <jpdei_cor:CurrentFiscalYearEndDateDEI contextRef="FilingDateInstant">2024-12-31</jpdei_cor:CurrentFiscalYearEndDateDEI>
+</xbrli:xbrl>
+"""
+
+
+def test_december_year_end_from_dei(tmp_path):
+    path = tmp_path / 'instance.xbrl'
+    path.write_text(DEI_XBRL, encoding='utf-8')
+
+    calendar = calendar_from_dei(read_dei(str(path)))
+
+    assert calendar == {'fiscalYear': 2024, 'fiscalPeriod': 'Q2',
+                        'fiscalYearEnd': '2024-12-31', 'periodEnd': '2024-06-30'}
+    assert calendar_from_dei({}) is None
+
+
+def test_calendar_from_date_for_march_and_december():
+    assert calendar_from_date('2025-03-31')['fiscalYear'] == 2024
+    assert calendar_from_date('2024-12-31', '12-31') == {
+        'fiscalYear': 2024, 'fiscalPeriod': 'FY', 'fiscalYearEnd': '2024-12-31', 'periodEnd': '2024-12-31'}
+    assert calendar_from_date('2024-09-30', '12-31')['fiscalPeriod'] == 'Q3'
+    # 3月決算企業の12月末は第3四半期
+    assert calendar_from_date('2024-12-31')['fiscalPeriod'] == 'Q3'
+    assert calendar_from_date('2024-05-15') is None
+
+
+def test_february_year_end_follows_leap_years():
+    # レジストリの '02-28' / '02-29' はどちらも2月末決算（閏年の FY2023 は 2024-02-29 に終わる）
+    for fiscal_year_end in ('02-28', '02-29'):
+        assert calendar_from_date('2024-02-29', fiscal_year_end) == {
+            'fiscalYear': 2023, 'fiscalPeriod': 'FY', 'fiscalYearEnd': '2024-02-29', 'periodEnd': '2024-02-29'}
+        assert calendar_from_date('2025-02-28', fiscal_year_end) == {
+            'fiscalYear': 2024, 'fiscalPeriod': 'FY', 'fiscalYearEnd': '2025-02-28', 'periodEnd': '2025-02-28'}
+        assert calendar_from_date('2023-11-30', fiscal_year_end)['fiscalPeriod'] == 'Q3'
+        assert calendar_from_date('2024-05-31', fiscal_year_end) == {
+            'fiscalYear': 2024, 'fiscalPeriod': 'Q1', 'fiscalYearEnd': '2025-02-28', 'periodEnd': '2024-05-31'}
+
+
+def test_select_annual_records_uses_company_year_end():
+    financials = [
+        {'date': '2024-06-30', 'bs': {}},
+        {'date': '2023-12-31', 'bs': {}},
+        {'date': '2024-12-31', 'bs': {}},
+    ]
+    annual = select_period(financials, 'FY', '12-31')
+    assert [(r['fiscalYear'], r['date']) for r in annual] == [(2023, '2023-12-31'), (2024, '2024-12-31')]
+    assert period_label(financials[0], '12-31') == 'Q2'
+    # 解析時に付与された会計カレンダーは上書きしない
+    tagged = {'date': '2024-12-31', 'fiscalYear': 2024, 'fiscalPeriod': 'Q3'}
+    assert period_label(tagged, '12-31') == 'Q3'
+
+
+def test_cleanup_keeps_filings_for_company_year_end(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_edinet, 'XBRL_DIR', tmp_path)
+    company_dir = tmp_path / 'E00001'
+    company_dir.mkdir()
+    for name in ['2025-03-27_S1.zip', '2025-06-26_S2.zip', '2024-08-10_S3.zip']:
+        (company_dir / name).write_bytes(b'zip')
+
+    fetch_edinet.cleanup_non_annual_files('E00001', '12-31')
+
+    assert sorted(p.name for p in company_dir.glob('*.zip')) == ['2025-03-27_S1.zip']
@@ -0,0 +1,60 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import instrumentation  # noqa: E402
+from company_registry import run_in_batches  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_recorder():
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+def test_nested_spans_keep_their_own_peak_memory():
+    instrumentation.enable(memory=True)
+    with instrumentation.span('outer', 'stage'):
+        with instrumentation.span('inner', 'company', stage='outer'):
+            block = bytearray(4_000_000)
+            del block
+        with instrumentation.span('after', 'company', stage='outer'):
+            pass
+
+    spans = {s['name']: s for s in instrumentation.report()['spans']}
+    assert spans['inner']['peakBytes'] >= 4_000_000
+    assert spans['after']['peakBytes'] < 4_000_000
+    assert spans['outer']['peakBytes'] >= spans['inner']['peakBytes']
+    assert spans['inner']['stage'] == 'outer'
+
+
+def test_report_summarises_spans_counters_and_cache_hit_rate(tmp_path):
+    run_in_batches(lambda code, key: key, [{'edinetCode': 'E1', 'key': 'A'}, {'edinetCode': 'E2', 'key': 'B'}])
+    instrumentation.increment('http.edinet.list')
+    instrumentation.increment('http.edinet.list', 2)
+    for hit in (True, True, False, True):
+        instrumentation.cache_access('parse.documents', hit)
+
+    instrumentation.write_report(tmp_path / 'report.json', status={'x': 'ran'})
+    report = json.loads((tmp_path / 'report.json').read_text(encoding='utf-8'))
+
+    assert set(report['summary']['company']) == {'A', 'B'}
+    assert report['counters'] == {'http.edinet.list': 3}
+    assert report['caches']['parse.documents'] == {'hits': 3, 'misses': 1, 'hitRate': 0.75}
+    assert report['status'] == {'x': 'ran'}
+    assert 'peakBytes' not in report['spans'][0]
+
+
+def test_profile_dump_per_stage(tmp_path):
+    instrumentation.enable(profile_dir=tmp_path)
+    with instrumentation.span('build_valuation'):
+        sum(range(1000))
+    with instrumentation.span('TEPCO', 'company'):
+        pass
+
+    assert [p.name for p in tmp_path.iterdir()] == ['build_valuation.prof']
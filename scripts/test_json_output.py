@@ -0,0 +1,40 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from json_output import canonical, encode_json, write_json  # noqa: E402
+
+
+def test_canonical_normalises_numbers():
+    data = {'a': np.float64(0.1) + np.float64(0.2), 'b': float('nan'), 'c': -0.0, 'd': np.int64(3), 'e': (1, 2)}
+    assert canonical(data) == {'a': 0.3, 'b': None, 'c': 0.0, 'd': 3, 'e': [1, 2]}
+    assert encode_json({'x': 1.5, 'y': [1]}, compact=True) == b'{"x":1.5,"y":[1]}'
+
+
+def test_write_json_writes_every_destination_from_the_same_bytes(tmp_path):
+    data_file, public_file = tmp_path / 'data' / 'x.json', tmp_path / 'public' / 'x.json'
+
+    written = write_json({'asOf': '2025-01-01', 'v': 1.0}, data_file, public_file, compact=True)
+
+    assert written == [data_file, public_file]
+    assert data_file.read_bytes() == public_file.read_bytes() == b'{"asOf":"2025-01-01","v":1.0}'
+    assert not list(tmp_path.rglob('*.tmp'))
+
+
+def test_unchanged_content_is_not_rewritten_and_keeps_previous_as_of(tmp_path):
+    data_file, public_file = tmp_path / 'data' / 'x.json', tmp_path / 'public' / 'x.json'
+    write_json({'asOf': '2025-01-01', 'v': 1.0}, data_file, public_file)
+
+    assert write_json({'asOf': '2025-06-30', 'v': 1.0}, data_file, public_file) == []
+    assert json.loads(public_file.read_text(encoding='utf-8'))['asOf'] == '2025-01-01'
+
+    public_file.unlink()
+    assert write_json({'asOf': '2025-06-30', 'v': 1.0}, data_file, public_file) == [public_file]
+    assert json.loads(public_file.read_text(encoding='utf-8'))['asOf'] == '2025-01-01'
+
+    assert write_json({'asOf': '2025-06-30', 'v': 2.0}, data_file, public_file) == [data_file, public_file]
+    assert json.loads(data_file.read_text(encoding='utf-8')) == {'asOf': '2025-06-30', 'v': 2.0}
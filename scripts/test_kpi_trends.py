@@ -0,0 +1,80 @@
+import math
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from kpi_trends import compute_trends, trends_to_dict  # noqa: E402
+
+
+def make_frame():
+    return pd.DataFrame({
+        'company': ['A', 'B', 'A', 'A', 'A', 'A', 'A', 'A'],
+        'period': ['Annual', 'Annual', 'Annual', 'Annual', 'Annual', 'Annual', 'Annual', 'Q2'],
+        'date': ['2021-03-31', '2021-03-31', '2022-03-31', '2020-03-31',
+                 '2023-03-31', '2024-03-31', '2025-03-31', '2024-09-30'],
+        'roic': [2.0, 5.0, 3.0, 1.0, 4.0, 5.0, 6.0, 9.0],
+    })
+
+
+def test_yoy_change_stays_within_company_and_period():
+    trends = compute_trends(make_frame(), ['roic'], period_col='period')
+
+    assert trends.loc[2, 'roic_change'] == 1.0  # 2022 vs 2021
+    assert math.isnan(trends.loc[1, 'roic_change'])  # B has no history
+    assert math.isnan(trends.loc[7, 'roic_change'])  # first Q2
+    # 前期比は期間種別を問わない: 2025-03-31 vs 2024-09-30
+    assert trends.loc[6, 'roic_popChange'] == 6.0 - 9.0
+    assert trends.loc[7, 'roic_popChange'] == 9.0 - 5.0
+
+
+def test_rolling_averages_and_cagr():
+    trends = compute_trends(make_frame(), ['roic'], period_col='period')
+
+    assert trends.loc[2, 'roic_avg3'] == 2.0
+    assert math.isnan(trends.loc[4, 'roic_avg5'])
+    assert trends.loc[6, 'roic_avg5'] == 4.0
+    assert math.isclose(trends.loc[6, 'roic_cagr3'], ((6.0 / 3.0) ** (1 / 3) - 1) * 100)
+    assert math.isclose(trends.loc[6, 'roic_cagr5'], ((6.0 / 1.0) ** (1 / 5) - 1) * 100)
+
+
+def test_cagr_is_undefined_for_nonpositive_values():
+    frame = pd.DataFrame({
+        'company': ['A'] * 4,
+        'date': ['2021', '2022', '2023', '2024'],
+        'fcfMargin': [-1.0, 2.0, 3.0, 4.0],
+    })
+    trends = compute_trends(frame, ['fcfMargin'])
+    assert math.isnan(trends.loc[3, 'fcfMargin_cagr3'])
+
+
+def test_trends_to_dict_uses_none_for_missing():
+    trends = compute_trends(make_frame(), ['roic'], period_col='period')
+    payload = trends_to_dict(trends, ['roic'])
+
+    assert payload['roic']['change'][1] is None
+    assert payload['roic']['change'][2] == 1.0
+    assert len(payload['roic']['cagr5']) == 8
+
+
+def test_missing_fiscal_year_is_not_bridged():
+    # FY2022 が欠損: FY2023 の前年差・3年平均・3年CAGRは FY2021 で代用しない
+    frame = pd.DataFrame({
+        'company': ['A'] * 5,
+        'fiscalYear': [2019, 2020, 2021, 2023, 2024],
+        'date': ['2020-03-31', '2021-03-31', '2022-03-31', '2024-03-31', '2025-03-31'],
+        'roic': [1.0, 2.0, 3.0, 5.0, 6.0],
+    })
+    trends = compute_trends(frame, ['roic'], year_col='fiscalYear')
+
+    assert math.isnan(trends.loc[3, 'roic_change'])
+    assert trends.loc[4, 'roic_change'] == 1.0
+    assert math.isnan(trends.loc[3, 'roic_avg3'])
+    assert math.isnan(trends.loc[4, 'roic_avg3'])
+    # FY2024 の3年前は FY2021（行では2つ前だが年度では3年前）
+    assert math.isclose(trends.loc[4, 'roic_cagr3'], ((6.0 / 3.0) ** (1 / 3) - 1) * 100)
+    assert math.isclose(trends.loc[4, 'roic_cagr5'], ((6.0 / 1.0) ** (1 / 5) - 1) * 100)
+    # 前期比は直前レコードとの差のまま
+    assert trends.loc[3, 'roic_popChange'] == 2.0
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from peer_ranking import LOWER_IS_BETTER, load_kpi_frame, rank_peers  # noqa: E402
+
+
+def long_frame(rows):
+    """(company, fiscalYear, metric, value) の縦持ち"""
+    return pd.DataFrame(rows, columns=['company', 'fiscalYear', 'metric', 'value'])
+
+
+def ranks_of(ranked, metric, fiscal_year=2024):
+    subset = ranked[(ranked['metric'] == metric) & (ranked['fiscalYear'] == fiscal_year)]
+    return {row.company: (row.rank, row.percentile) for row in subset.itertuples()}
+
+
+def test_lower_is_better_metrics_are_flipped():
+    ranked = rank_peers(long_frame([
+        ('A', 2024, 'roic', 3.0), ('B', 2024, 'roic', 5.0), ('C', 2024, 'roic', 4.0),
+        ('A', 2024, 'per', 8.0), ('B', 2024, 'per', 20.0), ('C', 2024, 'per', 12.0),
+    ]), LOWER_IS_BETTER)
+
+    assert ranks_of(ranked, 'roic') == {'B': (1, 100.0), 'C': (2, 50.0), 'A': (3, 0.0)}
+    assert ranks_of(ranked, 'per') == {'A': (1, 100.0), 'C': (2, 50.0), 'B': (3, 0.0)}
+
+
+def test_ties_share_the_best_rank():
+    ranked = rank_peers(long_frame([
+        ('A', 2024, 'roic', 5.0), ('B', 2024, 'roic', 5.0), ('C', 2024, 'roic', 1.0),
+    ]), LOWER_IS_BETTER)
+
+    ranks = ranks_of(ranked, 'roic')
+    assert ranks['A'][0] == ranks['B'][0] == 1
+    assert ranks['C'][0] == 3
+    assert ranks['A'][1] == ranks['B'][1] == 50.0
+
+
+def test_single_company_group_is_best():
+    ranked = rank_peers(long_frame([
+        ('A', 2023, 'roic', 2.0), ('A', 2024, 'roic', 3.0), ('B', 2024, 'roic', 4.0),
+    ]), LOWER_IS_BETTER)
+
+    assert ranks_of(ranked, 'roic', fiscal_year=2023) == {'A': (1, 100.0)}
+    assert ranked.loc[ranked['fiscalYear'] == 2023, 'peers'].tolist() == [1]
+
+
+def test_sentinel_and_missing_values_are_not_ranked():
+    # 赤字（純利益≦0）の期は PER=0.0 が出力される。符号反転で最良にならないこと
+    timeseries = {
+        'A': [{'date': '2025-03-31', 'fiscalYear': 2024, 'roic': 3.0, 'per': 0.0, 'pbr': 0.0, 'evEbitdaRatio': -1.0}],
+        'B': [{'date': '2025-03-31', 'fiscalYear': 2024, 'roic': None, 'per': 15.0, 'pbr': 0.8, 'evEbitdaRatio': 6.0}],
+        'C': [{'date': '2025-03-31', 'fiscalYear': 2024, 'roic': 'n/a', 'per': 10.0, 'pbr': None, 'evEbitdaRatio': 7.0}],
+    }
+    ranked = rank_peers(load_kpi_frame(timeseries), LOWER_IS_BETTER)
+
+    assert ranks_of(ranked, 'per') == {'C': (1, 100.0), 'B': (2, 0.0)}
+    assert ranks_of(ranked, 'pbr') == {'B': (1, 100.0)}
+    assert ranks_of(ranked, 'evEbitdaRatio') == {'B': (1, 100.0), 'C': (2, 0.0)}
+    assert ranks_of(ranked, 'roic') == {'A': (1, 100.0)}
@@ -0,0 +1,58 @@
+import sys
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from fact_store import save_documents  # noqa: E402
+from parse_edinet_xbrl import PARSER_VERSION  # noqa: E402
+from point_in_time import build_pit_index, load_document_frame, snapshot, snapshots  # noqa: E402
+from testing_documents import make_document  # noqa: E402
+
+document = partial(make_document, bs={'equity': 1.0})
+
+
+def make_frame(tmp_path):
+    save_documents(tmp_path, 'TEPCO', [
+        document('S1', '2023-06-28', 2022, revenue=100.0),
+        document('Q1', '2023-08-10', 2023, 'Q1', revenue=30.0),
+        document('S2', '2024-06-27', 2023, revenue=200.0),
+        # 古い期間（FY2022）の訂正は最新期間の採用を変えない
+        document('A0', '2024-09-01', 2022, parent='S1', revenue=90.0),
+        document('A2', '2024-11-15', 2023, parent='S2', revenue=210.0),
+    ], PARSER_VERSION)
+    save_documents(tmp_path, 'CHUBU', [document('C1', '2024-06-26', 2023, revenue=300.0)], PARSER_VERSION)
+    return load_document_frame(tmp_path, ['TEPCO', 'CHUBU', 'JERA'])
+
+
+def test_snapshot_returns_only_what_was_filed(tmp_path):
+    frame = make_frame(tmp_path)
+    index = build_pit_index(frame)
+
+    assert snapshot(frame, index, '2023-06-27').empty
+    known = snapshot(frame, index, '2024-06-26')
+    assert dict(zip(known['company'], known['docID'])) == {'TEPCO': 'Q1', 'CHUBU': 'C1'}
+    assert snapshot(frame, index, '2024-10-01', ['TEPCO'])['docID'].tolist() == ['S2']
+    assert snapshot(frame, index, '2024-11-15', ['TEPCO'])['pl_revenue'].tolist() == [210.0]
+
+
+def test_as_reported_ignores_amendments(tmp_path):
+    frame = make_frame(tmp_path)
+    index = build_pit_index(frame, as_reported=True)
+    assert snapshot(frame, index, '2025-01-01', ['TEPCO'])['pl_revenue'].tolist() == [200.0]
+
+
+def test_daily_snapshots_match_single_day_queries(tmp_path):
+    frame = make_frame(tmp_path)
+    index = build_pit_index(frame)
+    dates = pd.date_range('2023-01-01', '2025-01-01', freq='D')
+
+    daily = snapshots(frame, index, dates)
+
+    for day in ['2023-06-28', '2023-12-31', '2024-06-27', '2024-11-14', '2024-11-15']:
+        expected = snapshot(frame, index, day)
+        got = daily[daily['asOf'] == pd.Timestamp(day)]
+        assert got['docID'].tolist() == expected['docID'].tolist()
+    assert set(daily['company']) == {'TEPCO', 'CHUBU'}
@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from price_store import load_price_columns, load_price_frame, store_path, write_price_store  # noqa: E402
+
+
+def write_csv(prices_dir: Path, symbol: str, dates, closes):
+    prices_dir.mkdir(parents=True, exist_ok=True)
+    with open(prices_dir / f'{symbol}.csv', 'w', encoding='utf-8') as f:
+        f.write('# schema_version: 1.0\n')
+        pd.DataFrame({'Date': dates, 'Close': closes, 'Volume': [100] * len(dates)}).to_csv(f, index=False)
+
+
+def test_store_is_sorted_deduped_and_memory_mapped(tmp_path):
+    df = pd.DataFrame({
+        'Date': ['2025-01-07', '2025-01-06', '2025-01-07'],
+        'Close': [510.0, 500.0, 512.0],
+        'Volume': [1, 2, 3],
+    })
+    write_price_store(df, '9501.T', tmp_path)
+
+    arrays = load_price_columns('9501.T', ('Close',), tmp_path)
+    assert isinstance(arrays['Close'], np.memmap)
+    assert arrays['Date'].dtype == np.dtype('datetime64[D]')
+    assert arrays['Date'].astype(str).tolist() == ['2025-01-06', '2025-01-07']
+    assert arrays['Close'].tolist() == [500.0, 512.0]
+    assert 'Volume' not in arrays
+
+
+def test_load_price_frame_builds_store_from_csv_and_rebuilds_when_stale(tmp_path):
+    write_csv(tmp_path, '9502.T', ['2025-01-06', '2025-01-07'], [1500.0, 1510.0])
+
+    df = load_price_frame('9502.T', prices_dir=tmp_path)
+    assert (store_path('9502.T', tmp_path) / 'Close.npy').exists()
+    assert df.index.is_monotonic_increasing
+    assert df['Close'].tolist() == [1500.0, 1510.0]
+
+    # CSVがストアより新しくなったら作り直す
+    write_csv(tmp_path, '9502.T', ['2025-01-06', '2025-01-07', '2025-01-08'], [1500.0, 1510.0, 1520.0])
+    meta_file = store_path('9502.T', tmp_path) / 'meta.json'
+    stamp = meta_file.stat().st_mtime
+    os.utime(tmp_path / '9502.T.csv', (stamp + 10, stamp + 10))
+
+    df = load_price_frame('9502.T', prices_dir=tmp_path)
+    assert df['Close'].tolist() == [1500.0, 1510.0, 1520.0]
+    assert df.loc[pd.Timestamp('2025-01-08'), 'Close'] == 1520.0
+
+
+def test_load_price_frame_returns_none_without_data(tmp_path):
+    assert load_price_frame('9999.T', prices_dir=tmp_path) is None
+
+
+def test_concurrent_loads_of_a_stale_store_never_return_none(tmp_path):
+    # パイプラインは build_timeseries / build_valuation / wacc_sensitivity をスレッドで並列実行する
+    write_csv(tmp_path, '9501.T', ['2025-01-06', '2025-01-07', '2025-01-08'], [500.0, 510.0, 520.0])
+    csv_path = tmp_path / '9501.T.csv'
+    workers = 4
+    start = threading.Barrier(workers)
+
+    def load(_):
+        start.wait()
+        return load_price_frame('9501.T', prices_dir=tmp_path)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for round_ in range(30):
+            # CSVをストアより新しくして、全スレッドがストアを作り直そうとする状態にする
+            future = csv_path.stat().st_mtime + 1000 + round_
+            os.utime(csv_path, (future, future))
+            frames = list(executor.map(load, range(workers)))
+            assert all(frame is not None and frame['Close'].tolist() == [500.0, 510.0, 520.0] for frame in frames)
@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from compute_scores import evaluate_score  # noqa: E402
+from rescore import build_scorecards, parse_thresholds, score_values  # noqa: E402
+
+TARGETS = {
+    'thresholds': [
+        {'kpiName': 'roic', 'greenThreshold': 5.0, 'yellowThreshold': 3.0},
+        {'kpiName': 'wacc', 'greenThreshold': 4.0, 'yellowThreshold': 5.0, 'direction': 'lower'},
+    ]
+}
+
+
+def make_values():
+    return {
+        'asOf': '2025-12-15',
+        'kpis': ['roic', 'wacc'],
+        'columns': {
+            'company': ['A', 'A', 'A', 'B'],
+            'companyCode': ['E1', 'E1', 'E1', 'E2'],
+            'date': ['2024-03-31', '2025-03-31', '2024-09-30', '2025-03-31'],
+            'period': ['Annual', 'Annual', 'Q2', 'Annual'],
+            'roic': [6.0, 4.0, 2.0, 5.0],
+            'wacc': [3.9, 4.5, 5.0, 4.0],
+        },
+    }
+
+
+def test_score_values_matches_scalar_evaluation():
+    thresholds = parse_thresholds(TARGETS)
+    values = np.array([2.0, 3.0, 4.99, 5.0, 7.5, np.nan])
+
+    for kpi in ('roic', 'wacc'):
+        vectorized = score_values(values[:-1], thresholds[kpi])
+        expected = [evaluate_score(v, thresholds[kpi]) for v in values[:-1]]
+        assert vectorized.tolist() == expected
+
+    assert score_values(values[-1:], thresholds['roic']).tolist() == ['red']
+
+
+def test_build_scorecards_picks_latest_per_period():
+    scorecards = build_scorecards(make_values(), parse_thresholds(TARGETS))
+    company = scorecards['companies']['A']
+
+    assert company['Annual']['date'] == '2025-03-31'
+    assert company['Annual']['roic'] == {'value': 4.0, 'score': 'yellow', 'change': 0}
+    assert company['Annual']['wacc']['score'] == 'yellow'
+    assert company['Q2']['wacc']['score'] == 'red'
+    assert company['latest'] is company['Annual']
+    assert scorecards['companies']['B']['Annual']['roic']['score'] == 'green'
+
+
+def test_threshold_edit_only_rescores():
+    edited = {'thresholds': [dict(t) for t in TARGETS['thresholds']]}
+    edited['thresholds'][0]['greenThreshold'] = 3.5
+
+    scorecards = build_scorecards(make_values(), parse_thresholds(edited))
+    assert scorecards['companies']['A']['Annual']['roic']['score'] == 'green'
+
+
+def test_build_scorecards_carries_precomputed_trends():
+    values = make_values()
+    values['kpis'] = ['roic']
+    values['trends'] = {
+        'roic': {
+            'change': [None, -2.0, None, None],
+            'popChange': [None, 2.0, -4.0, None],
+            'avg3': [None, None, None, None],
+        }
+    }
+
+    company = build_scorecards(values, parse_thresholds(TARGETS))['companies']['A']
+    assert company['Annual']['roic']['change'] == -2.0
+    assert company['Annual']['roic']['popChange'] == 2.0
+    # 比較対象がない場合の change は 0
+    assert company['Q2']['roic']['change'] == 0
@@ -0,0 +1,44 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import extract_xbrl_to_csv  # noqa: E402
+import parse_edinet_xbrl  # noqa: E402
+from synthetic_edinet import build_instance, generate_corpus  # noqa: E402
+
+
+def test_generation_is_deterministic(tmp_path):
+    first = generate_corpus(tmp_path / 'a', companies=2, years=2, facts=300, contexts=40)
+    second = generate_corpus(tmp_path / 'b', companies=2, years=2, facts=300, contexts=40)
+
+    zips = sorted(p.relative_to(tmp_path / 'a') for p in (tmp_path / 'a').rglob('*.zip'))
+    assert len(zips) == 4
+    assert all((tmp_path / 'a' / p).read_bytes() == (tmp_path / 'b' / p).read_bytes() for p in zips)
+    assert first.read_text(encoding='utf-8') == second.read_text(encoding='utf-8')
+    assert build_instance('E90000', 2020, seed=1) != build_instance('E90000', 2020, seed=0)
+
+
+def test_instance_has_requested_shape():
+    instance = build_instance('E90000', 2020, facts=500, contexts=60, dimensions=3).decode('utf-8')
+
+    assert instance.count('<xbrli:context ') == 61  # FilingDateInstant を含む
+    assert instance.count('contextRef=') == 500
+    assert instance.count('<xbrldi:explicitMember') == 1 + (60 - 5) * 3
+
+
+def test_parsers_read_synthetic_filings(tmp_path):
+    registry = generate_corpus(tmp_path, companies=1, years=2, facts=200, contexts=20)
+    common = ['--input', str(tmp_path / 'XBRL'), '--registry', str(registry)]
+
+    parse_edinet_xbrl.main(common + ['--output', str(tmp_path / 'parsed')])
+    extract_xbrl_to_csv.main(common + ['--output', str(tmp_path / 'csv'),
+                                       '--employees', str(tmp_path / 'employees.json')])
+
+    financials = json.loads((tmp_path / 'parsed' / 'SYN0000_financials.json').read_text(encoding='utf-8'))
+    assert [(f['fiscalYear'], f['fiscalPeriod']) for f in financials] == [(2017, 'FY'), (2018, 'FY')]
+    assert financials[0]['pl']['revenue'] > financials[0]['pl']['operatingIncome'] > 0
+    assert (tmp_path / 'csv' / 'SYN0000' / 'PL.csv').exists()
+    employees = json.loads((tmp_path / 'employees.json').read_text(encoding='utf-8'))
+    assert employees['SYN0000'][0]['numberOfEmployees'] > 0
@@ -0,0 +1,89 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from ttm_financials import (  # noqa: E402
+    attach_ttm, financials_file, latest_valuation_record, load_period_financials, trailing_twelve_months,
+)
+from parse_edinet_xbrl import is_current_context  # noqa: E402
+
+
+def record(date, fiscal_year, period, revenue, ebitda=None, equity=100.0):
+    pl = {'revenue': revenue, 'ebitda': revenue / 10 if ebitda is None else ebitda}
+    pl.update({item: 0.0 for item in ('operatingIncome', 'ordinaryIncome', 'interestExpenses', 'netIncome',
+                                      'depreciation', 'operatingCashFlow', 'investingCashFlow',
+                                      'financingCashFlow')})
+    return {'date': date, 'fiscalYear': fiscal_year, 'fiscalPeriod': period,
+            'bs': {'equity': equity}, 'pl': pl}
+
+
+QUARTERS = [
+    record('2023-06-30', 2023, 'Q1', 100.0),
+    record('2023-09-30', 2023, 'Q2', 220.0),
+    record('2023-12-31', 2023, 'Q3', 330.0),
+    record('2024-03-31', 2023, 'FY', 460.0),
+    record('2024-06-30', 2024, 'Q1', 130.0),
+    record('2024-09-30', 2024, 'Q2', 250.0, equity=120.0),
+]
+
+
+def test_ttm_equals_rolling_sum_of_discrete_quarters():
+    ttm = trailing_twelve_months(QUARTERS)
+
+    # 単独四半期 100, 120, 110, 130 | 130, 120 → 4期移動合計
+    discrete = np.array([100.0, 120.0, 110.0, 130.0, 130.0, 120.0])
+    rolling = np.convolve(discrete, np.ones(4), mode='valid')
+    assert ttm.loc[(2024, 'Q1'), 'revenue'] == rolling[1]
+    assert ttm.loc[(2024, 'Q2'), 'revenue'] == rolling[2]
+    assert ttm.loc[(2023, 'FY'), 'revenue'] == 460.0
+    # 前期のデータがない四半期は計算しない
+    assert np.isnan(ttm.loc[(2023, 'Q2'), 'revenue'])
+
+
+def test_latest_valuation_record_uses_newest_quarter_with_ttm():
+    latest = latest_valuation_record([dict(r) for r in QUARTERS])
+
+    assert latest['date'] == '2024-09-30'
+    assert latest['pl']['revenue'] == 250.0 + 460.0 - 220.0
+    assert latest['pl']['ebitda'] == 25.0 + 46.0 - 22.0
+    assert latest['bs']['equity'] == 120.0
+
+    # 四半期しかなければTTMは作れず、通期もないのでNone
+    assert latest_valuation_record([dict(r) for r in QUARTERS[:3]]) is None
+    assert [r['ttm'] is None for r in attach_ttm([dict(r) for r in QUARTERS])] == [
+        True, True, True, False, False, False,
+    ]
+
+
+def test_semiannual_only_filer():
+    halves = [
+        record('2023-09-30', 2023, 'Q2', 200.0),
+        record('2024-03-31', 2023, 'FY', 420.0),
+        record('2024-09-30', 2024, 'Q2', 230.0),
+    ]
+    assert latest_valuation_record(halves)['pl']['revenue'] == 450.0
+
+
+def test_period_partitions_round_trip(tmp_path):
+    for period in ('FY', 'Q1', 'Q2'):
+        rows = [r for r in QUARTERS if r['fiscalPeriod'] == period]
+        financials_file(tmp_path, 'TEPCO', period).write_text(json.dumps(rows), encoding='utf-8')
+
+    assert financials_file(tmp_path, 'TEPCO').name == 'TEPCO_financials.json'
+    assert financials_file(tmp_path, 'TEPCO', 'Q3').name == 'TEPCO_financials_Q3.json'
+    loaded = load_period_financials(tmp_path, 'TEPCO')
+    assert sorted(r['date'] for r in loaded) == sorted(r['date'] for r in QUARTERS if r['fiscalPeriod'] != 'Q3')
+
+
+def test_only_current_period_contexts_are_read():
+    assert is_current_context('CurrentYearInstant', 'Instant')
+    assert is_current_context('CurrentQuarterInstant', 'Instant')
+    assert is_current_context('CurrentYTDDuration', 'Duration')
+    assert is_current_context('InterimDuration', 'Duration')
+    assert not is_current_context('Prior1YearInstant', 'Instant')
+    assert not is_current_context('CurrentQuarterDuration', 'Duration')
+    assert not is_current_context('CurrentYearDuration', 'Instant')
@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from validate_thresholds import DataValidator  # noqa: E402
+
+THRESHOLDS = {
+    'roic': {'green': 5.0, 'yellow': 3.0, 'direction': 'higher'},
+    'wacc': {'green': 4.0, 'yellow': 5.0, 'direction': 'lower'},
+}
+
+
+def timeseries_record(fiscal_year, listed=True):
+    """整合した時系列の1年度分（億円）"""
+    record = {
+        'date': f'{fiscal_year + 1}-03-31', 'year': fiscal_year + 1, 'fiscalYear': fiscal_year,
+        'roic': 5.0, 'wacc': 3.5, 'ebitdaMargin': 15.0, 'fcfMargin': 8.0,
+        'revenue': 10000.0, 'operatingIncome': 500.0, 'ordinaryIncome': 400.0, 'netIncome': 300.0,
+        'ebitda': 1500.0, 'totalAssets': 20000.0, 'netAssets': 4000.0, 'equity': 4000.0,
+        'interestBearingDebt': 6000.0, 'cashAndDeposits': 1000.0, 'netDebt': 5000.0,
+        'operatingCashFlow': 800.0, 'investingCashFlow': -700.0, 'financingCashFlow': -100.0,
+        'enterpriseValue': 7000.0, 'marketCap': 2000.0, 'evEbitdaRatio': 4.67, 'per': 6.67, 'pbr': 0.5,
+        'trends': {'roic': {'change': None}},
+    }
+    if not listed:
+        record.update({'enterpriseValue': None, 'marketCap': None, 'evEbitdaRatio': None, 'per': None, 'pbr': None})
+    return record
+
+
+@pytest.fixture
+def outputs():
+    timeseries = {
+        'AAA': [timeseries_record(year) for year in (2022, 2023, 2024)],
+        'BBB': [timeseries_record(year, listed=False) for year in (2023, 2024)],
+    }
+    valuation = {
+        'AAA': {'date': '2025-03-31', 'revenue': 1000000.0, 'operatingIncome': 50000.0, 'netIncome': 30000.0,
+                'totalAssets': 2000000.0, 'equity': 400000.0, 'interestBearingDebt': 600000.0,
+                'cashAndDeposits': 100000.0, 'netDebt': 500000.0, 'ebitda': 150000.0, 'roic': 3.5,
+                'marketCap': 200000.0, 'enterpriseValue': 700000.0, 'evEbitdaRatio': 700000 / 150000,
+                'per': 200000 / 30000, 'pbr': 0.5},
+        # 非上場企業（EVなどは null）
+        'BBB': {'date': '2025-03-31', 'revenue': 1000000.0, 'operatingIncome': None, 'netIncome': -1000.0,
+                'totalAssets': 2000000.0, 'equity': 400000.0, 'interestBearingDebt': 600000.0,
+                'cashAndDeposits': 100000.0, 'netDebt': 500000.0, 'ebitda': 0.0, 'roic': None,
+                'marketCap': None, 'enterpriseValue': None, 'evEbitdaRatio': None, 'per': None, 'pbr': None},
+    }
+    card = {'date': '2025-03-31', 'companyCode': 'E00001',
+            'roic': {'value': 5.0, 'score': 'green'}, 'wacc': {'value': 3.5, 'score': 'green'},
+            'ebitdaMargin': {'value': 15.0, 'score': 'green'}, 'fcfMargin': {'value': 8.0, 'score': 'green'}}
+    scorecards = {company: {'Annual': dict(card), 'latest': dict(card)} for company in timeseries}
+    return timeseries, valuation, scorecards
+
+
+def validate(timeseries, valuation, scorecards):
+    validator = DataValidator()
+    success, frame = validator.validate_timeseries(timeseries)
+    success &= validator.validate_valuation(valuation, frame)
+    success &= validator.validate_scorecard(scorecards, THRESHOLDS, frame)
+    return success, validator
+
+
+def test_consistent_outputs_pass(outputs):
+    success, validator = validate(*outputs)
+
+    assert success
+    assert [str(e) for e in validator.errors + validator.warnings] == []
+
+
+def test_all_violations_are_reported_in_one_pass(outputs):
+    timeseries, valuation, scorecards = outputs
+    timeseries['AAA'][0]['enterpriseValue'] = 7100.0   # EV ≠ 時価総額 + 純有利子負債（EV/EBITDA も不一致）
+    timeseries['AAA'][1]['roic'] = 3.5                 # 税引後の値（ROIC の計算式と不一致）
+    timeseries['AAA'][2]['per'] = 'n/a'                # 型エラー
+    timeseries['BBB'][0]['revenue'] = -1.0             # 範囲エラー（マージンも不一致）
+    timeseries['BBB'][1]['pbr'] = 0.5                  # 株価関連指標の一部だけが値を持つ
+    valuation['AAA']['enterpriseValue'] = None         # 一部だけ null（旧実装は例外で停止）
+    valuation['BBB']['netDebt'] = 0.0                  # 計算式・時系列と不一致
+    scorecards['AAA']['latest']['wacc'] = {'value': 5.5, 'score': 'green'}  # 閾値・時系列と不一致
+    scorecards['BBB']['Annual']['roic'] = {'value': 4.0, 'score': 'yellow'}  # 時系列の値と不一致
+    scorecards['BBB']['latest']['fcfMargin'] = {'value': 8.0, 'score': 'blue'}
+
+    success, validator = validate(timeseries, valuation, scorecards)
+
+    assert not success
+    assert sorted((e.company, e.field) for e in validator.errors) == sorted([
+        ('AAA FY2022', 'enterpriseValue'), ('AAA FY2022', 'evEbitdaRatio'),
+        ('AAA FY2023', 'roic'),
+        ('AAA FY2024', 'per'), ('AAA FY2024', 'marketCap'),
+        ('BBB FY2023', 'revenue'), ('BBB FY2023', 'ebitdaMargin'), ('BBB FY2023', 'fcfMargin'),
+        ('BBB FY2024', 'marketCap'),
+        ('AAA 2025-03-31', 'marketCap'),
+        ('BBB 2025-03-31', 'netDebt'), ('BBB 2025-03-31', 'netDebt'),  # 計算式・時系列の両方と不一致
+        ('AAA/latest', 'wacc.score'), ('AAA/latest', 'wacc.value'),
+        ('BBB/Annual', 'roic.value'),
+        ('BBB/latest', 'score'),
+    ])
+    assert validator.print_report() == len(validator.errors)
+
+
+def test_ranges_above_max_are_warnings(outputs):
+    timeseries, valuation, scorecards = outputs
+    for record in timeseries['AAA']:
+        record.update({'marketCap': 200000.0, 'enterpriseValue': 205000.0, 'evEbitdaRatio': 136.67,
+                       'per': 666.67, 'pbr': 50.0})
+    del valuation['AAA']
+
+    success, validator = validate(timeseries, valuation, scorecards)
+
+    assert success
+    assert {(e.field, e.reason) for e in validator.warnings} == {('evEbitdaRatio', '警告: 最大値=100を超過')}
+    assert len(validator.warnings) == 3
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import valuescope  # noqa: E402
+from valuescope import code_files, run_pipeline, select_stages  # noqa: E402
+
+
+def test_select_stages_includes_upstream_but_not_fetch_unless_requested():
+    assert select_stages(['peer_ranking'], include_fetch=False) == [
+        'parse_edinet_xbrl', 'extract_xbrl_to_csv', 'build_timeseries', 'peer_ranking']
+    assert 'fetch_edinet' in select_stages(['peer_ranking'], include_fetch=True)
+    assert select_stages(['peer_ranking'], include_fetch=False, only=True) == ['peer_ranking']
+    assert not any(valuescope.STAGES[s].get('fetch') for s in select_stages(None, include_fetch=False))
+
+
+def test_each_output_has_one_writer_and_price_readers_depend_on_fetch():
+    writers = {}
+    for name, stage in valuescope.STAGES.items():
+        for pattern in stage['outputs']:
+            writers.setdefault(pattern, []).append(name)
+    assert {pattern: names for pattern, names in writers.items() if len(names) > 1} == {}
+
+    price_readers = [name for name, stage in valuescope.STAGES.items() if 'data/prices/*.csv' in stage['inputs']]
+    assert {'build_timeseries', 'build_valuation', 'wacc_sensitivity'} <= set(price_readers)
+    assert all('fetch_stock_prices' in valuescope.STAGES[name]['deps'] for name in price_readers)
+
+
+def test_code_files_follow_sibling_imports():
+    names = {p.name for p in code_files('compute_scores')}
+    assert {'compute_scores.py', 'rescore.py', 'json_output.py', 'fiscal_calendar.py'} <= names
+    assert 'pandas.py' not in names
+
+
+@pytest.fixture
+def toy_dag(tmp_path, monkeypatch):
+    stages = {
+        'a': {'module': 'json_output', 'args': [], 'deps': [], 'inputs': ['in.txt'], 'outputs': ['a.txt']},
+        'b': {'module': 'json_output', 'args': [], 'deps': ['a'], 'inputs': ['a.txt'], 'outputs': ['b.txt']},
+        'c': {'module': 'json_output', 'args': [], 'deps': ['a'], 'inputs': ['a.txt'], 'outputs': ['c.txt']},
+    }
+    monkeypatch.setattr(valuescope, 'STAGES', stages)
+    (tmp_path / 'in.txt').write_text('1')
+    calls = []
+    lock = threading.Lock()
+
+    def runner(name):
+        with lock:
+            calls.append(name)
+        source = 'in.txt' if name == 'a' else 'a.txt'
+        (tmp_path / f'{name}.txt').write_text((tmp_path / source).read_text())
+
+    return tmp_path, calls, runner
+
+
+def test_unchanged_inputs_are_skipped_and_changes_propagate(toy_dag):
+    root, calls, runner = toy_dag
+
+    assert run_pipeline(['a', 'b', 'c'], root=root, runner=runner) == {'a': 'ran', 'b': 'ran', 'c': 'ran'}
+    assert calls[0] == 'a' and sorted(calls[1:]) == ['b', 'c']
+
+    calls.clear()
+    assert set(run_pipeline(['a', 'b', 'c'], root=root, runner=runner).values()) == {'skipped'}
+    assert calls == []
+
+    (root / 'in.txt').write_text('2')
+    assert run_pipeline(['a', 'b', 'c'], root=root, runner=runner) == {'a': 'ran', 'b': 'ran', 'c': 'ran'}
+    assert (root / 'c.txt').read_text() == '2'
+
+    (root / 'b.txt').write_text('edited')
+    assert run_pipeline(['a', 'b', 'c'], root=root, runner=runner) == {'a': 'skipped', 'b': 'ran', 'c': 'skipped'}
+
+
+def test_failed_stage_blocks_dependents(toy_dag):
+    root, calls, _ = toy_dag
+
+    def failing(name):
+        raise RuntimeError('boom')
+
+    assert run_pipeline(['a', 'b', 'c'], root=root, runner=failing) == {'a': 'failed', 'b': 'blocked', 'c': 'blocked'}
+
+
+def test_trivial_commands_do_not_import_heavy_modules():
+    # 一覧・閾値検証は pandas・numpy・lxml を読み込まずに結果を出す
+    script = (
+        "import sys, valuescope\n"
+        "assert valuescope.main(['companies', '--sector', 'electric']) == 0\n"
+        "assert valuescope.main(['validate', '--timeseries', 'none', '--valuation', 'none', '--scorecards', 'none',"
+        " '--thresholds', 'public/data/kpi_targets.json']) == 0\n"
+        "print(sorted({'pandas', 'numpy', 'lxml', 'pandas_datareader'} & set(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=valuescope.ROOT_DIR, capture_output=True,
+                            text=True, env={**os.environ, 'PYTHONPATH': str(valuescope.SCRIPTS_DIR)}, check=True)
+
+    assert 'TEPCO\tE04498\t9501.T' in result.stdout
+    assert result.stdout.strip().endswith('[]')
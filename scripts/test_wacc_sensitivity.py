@@ -0,0 +1,71 @@
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from compute_scores import calculate_wacc, COST_OF_EQUITY, TAX_RATE  # noqa: E402
+from wacc_sensitivity import build_cube, compute_sensitivity, parse_grid  # noqa: E402
+
+
+def make_inputs():
+    return {
+        'company': np.array(['A', 'B'], dtype=object),
+        'date': np.array(['2024-03-31', '2025-03-31'], dtype=object),
+        'equity': np.array([2000.0, 0.0]),
+        'interestBearingDebt': np.array([3000.0, 0.0]),
+        'interestExpenses': np.array([60.0, 0.0]),
+        'operatingIncome': np.array([250.0, 10.0]),
+        'ebitda': np.array([500.0, 20.0]),
+        'marketCap': np.array([1000.0, np.nan]),
+        'netDebt': np.array([2500.0, 0.0]),
+    }
+
+
+def test_parse_grid_range_and_list():
+    assert parse_grid('4:6:1').tolist() == [4.0, 5.0, 6.0]
+    values = parse_grid('actual,1.5')
+    assert math.isnan(values[0]) and values[1] == 1.5
+
+
+def test_base_scenario_matches_calculate_wacc():
+    inputs = make_inputs()
+    cube = compute_sensitivity(inputs, np.array([COST_OF_EQUITY]), np.array([TAX_RATE]), np.array([np.nan]))
+
+    expected = calculate_wacc(
+        {'equity': 2000.0, 'interestBearingDebt': 3000.0},
+        {'interestExpenses': 60.0},
+    )
+    assert cube['wacc'].shape == (2, 1, 1, 1)
+    assert math.isclose(cube['wacc'][0, 0, 0, 0], expected)
+    # 投下資本ゼロは 0 として扱う（calculate_wacc と同じ）
+    assert cube['wacc'][1, 0, 0, 0] == 0.0
+
+
+def test_cost_of_debt_override_and_spread():
+    inputs = make_inputs()
+    cube = compute_sensitivity(inputs, np.array([5.0, 7.0]), np.array([0.3]), np.array([np.nan, 2.0]))
+
+    # E/V=0.4, D/V=0.6, Rd=2% → 0.4*7 + 0.6*2*0.7
+    assert math.isclose(cube['wacc'][0, 1, 0, 1], 0.4 * 7.0 + 0.6 * 2.0 * 0.7)
+    roic = 250.0 / 5000.0 * 100
+    assert math.isclose(cube['spread'][0, 1, 0, 1], roic - cube['wacc'][0, 1, 0, 1])
+
+
+def test_build_cube_is_flat_row_major():
+    inputs = make_inputs()
+    re = np.array([5.0, 6.0])
+    tax = np.array([0.25, 0.3, 0.35])
+    rd = np.array([np.nan, 1.0])
+    cube = build_cube(inputs, re, tax, rd, decimals=6)
+
+    assert cube['shape'] == [2, 2, 3, 2]
+    assert len(cube['metrics']['wacc']) == 2 * 2 * 3 * 2
+    full = compute_sensitivity(inputs, re, tax, rd)['wacc']
+    i, r, t, k = 0, 1, 2, 1
+    flat_index = ((i * 2 + r) * 3 + t) * 2 + k
+    assert math.isclose(cube['metrics']['wacc'][flat_index], round(full[i, r, t, k], 6))
+    assert cube['axes']['costOfDebt'] == [None, 1.0]
+    assert cube['marketEvEbitda'][1] is None
@@ -0,0 +1,16 @@
+# テスト用の書類レコード生成ヘルパー
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# fact_store / point_in_time のテストで共通に使う、解析済み書類レコード（<企業>_documents.json の1件）を作る。
+
+from typing import Dict, Any, Optional
+
+
+def make_document(doc_id: str, filed_at: str, fiscal_year: int, period: str = 'FY',
+                  parent: Optional[str] = None, revenue: float = 100.0,
+                  bs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """3月決算企業の書類レコード（期末日は会計年度の翌年3月末）"""
+    return {'docID': doc_id, 'parentDocID': parent, 'filedAt': filed_at, 'source': f'{filed_at}_{doc_id}.zip',
+            'date': f'{fiscal_year + 1}-03-31', 'fiscalYear': fiscal_year, 'fiscalPeriod': period,
+            'bs': dict(bs or {}), 'pl': {'revenue': revenue}}
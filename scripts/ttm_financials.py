@@ -0,0 +1,116 @@
+# 期間パーティション・TTM（直近12か月）財務モジュール
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# 有価証券報告書（通期）に加え、四半期報告書（140）・半期報告書（160）の解析結果を
+# 期間種別ごとのファイル（パーティション）に分けて保存・読み込みする。
+#   data/edinet_parsed/<企業>_financials.json      … 通期（従来どおり）
+#   data/edinet_parsed/<企業>_financials_Q1.json   … 第1四半期（Q2: 半期を含む, Q3 も同様）
+# 四半期・半期のPL/CFは期首からの累計（YTD）なので、TTMは
+#   TTM = 当期YTD + 前期通期 − 前期同期YTD
+# で求める（四半期ごとの4期移動合計と同じ値。半期報告のみの企業でも計算できる）。
+
+import json
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from fiscal_calendar import DEFAULT_FISCAL_YEAR_END, index_records
+
+# 期間パーティション（通期以外）
+QUARTER_PERIODS = ('Q1', 'Q2', 'Q3')
+
+# 期間累計で報告されるフロー項目（TTMに変換する項目）
+FLOW_ITEMS = (
+    'revenue', 'operatingIncome', 'ordinaryIncome', 'interestExpenses', 'netIncome', 'ebitda',
+    'depreciation', 'operatingCashFlow', 'investingCashFlow', 'financingCashFlow',
+)
+
+
+def financials_file(data_dir: Path, company: str, period: str = 'FY') -> Path:
+    """期間パーティションのファイルパス（通期は従来の <企業>_financials.json）"""
+    suffix = '' if period == 'FY' else f'_{period}'
+    return Path(data_dir) / f'{company}_financials{suffix}.json'
+
+
+def load_period_financials(data_dir: Path, company: str,
+                           periods: tuple = ('FY',) + QUARTER_PERIODS) -> List[Dict[str, Any]]:
+    """指定した期間パーティションを読み込んで1つのリストにまとめる（存在しないファイルは無視）"""
+    financials: List[Dict[str, Any]] = []
+    for period in periods:
+        path = financials_file(data_dir, company, period)
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                financials.extend(data)
+    return financials
+
+
+def trailing_twelve_months(financials: List[Dict[str, Any]],
+                           fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END) -> pd.DataFrame:
+    """
+    全期間のフロー項目をTTMに変換（行: (会計年度, 期間種別)、列: FLOW_ITEMS + date）
+
+    通期はそのまま。四半期・半期は前期通期と前期同期YTDが揃わなければNaN。
+    """
+    index = index_records(financials, fiscal_year_end)
+    columns = list(FLOW_ITEMS) + ['date']
+    if not index:
+        return pd.DataFrame(columns=columns)
+
+    keys = sorted(index)
+    ytd = pd.DataFrame(
+        [[index[key]['pl'].get(item, np.nan) for item in FLOW_ITEMS] for key in keys],
+        index=pd.MultiIndex.from_tuples(keys, names=['fiscalYear', 'fiscalPeriod']),
+        columns=list(FLOW_ITEMS),
+        dtype=float,
+    )
+    years = ytd.index.get_level_values('fiscalYear') - 1
+    periods = ytd.index.get_level_values('fiscalPeriod')
+    prior_same = ytd.reindex(pd.MultiIndex.from_arrays([years, periods])).to_numpy()
+    prior_annual = ytd.reindex(pd.MultiIndex.from_arrays([years, ['FY'] * len(ytd)])).to_numpy()
+
+    is_annual = (periods == 'FY')[:, None]
+    values = ytd.to_numpy()
+    ttm = pd.DataFrame(np.where(is_annual, values, values + prior_annual - prior_same),
+                       index=ytd.index, columns=list(FLOW_ITEMS))
+    ttm['date'] = [index[key]['date'] for key in keys]
+    return ttm
+
+
+def attach_ttm(financials: List[Dict[str, Any]],
+               fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END) -> List[Dict[str, Any]]:
+    """各レコードに 'ttm'（FLOW_ITEMS のTTM値、計算できない場合はNone）を付与して返す（その場で更新）"""
+    ttm = trailing_twelve_months(financials, fiscal_year_end)
+    complete = ttm[list(FLOW_ITEMS)].notna().all(axis=1)
+    lookup = {
+        key: {item: round(float(row[item]), 6) for item in FLOW_ITEMS}
+        for key, row in ttm[complete].iterrows()
+    }
+    for record in financials:
+        record['ttm'] = lookup.get((record.get('fiscalYear'), record.get('fiscalPeriod')))
+    return financials
+
+
+def latest_valuation_record(financials: List[Dict[str, Any]],
+                            fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END) -> Optional[Dict[str, Any]]:
+    """
+    企業価値評価に使う最新レコード
+
+    通期と、TTMを計算できた四半期・半期のうち期末日が最新のもの。
+    四半期・半期の場合は PL をTTM値に置き換えたコピーを返す（BSはその期末時点）。
+    """
+    candidates = [
+        record for record in attach_ttm(financials, fiscal_year_end)
+        if record['fiscalPeriod'] == 'FY' or (record['fiscalPeriod'] in QUARTER_PERIODS and record['ttm'])
+    ]
+    if not candidates:
+        return None
+
+    latest = max(candidates, key=lambda r: (r['date'], r['fiscalPeriod'] == 'FY'))
+    if latest['fiscalPeriod'] == 'FY':
+        return latest
+    return {**latest, 'pl': {**latest['pl'], **latest['ttm']}}
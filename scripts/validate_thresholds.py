@@ -1,37 +1,92 @@
 #!/usr/bin/env python3
 """
-企業価値データとKPIスコアカードのスキーマ検証・異常値検出
+時系列・企業価値データとKPIスコアカードのスキーマ検証・異常値検出
+
+timeseries.json / valuation.json / scorecards.json を企業×年度の表（pandas DataFrame）に
+展開し、スキーマ・値の範囲・項目間の恒等式（EV = 時価総額 + 純有利子負債、ROIC = 営業利益 ÷
+投下資本 など）を列単位の演算で全行まとめて検証する。違反は途中で打ち切らず1回の実行で全て報告する。
 
 憲法遵守:
-- 厳格な型チェック（ValuationData, ScoreCardData）
-- 異常値検出（負の値、範囲外の値）
-- 詳細なエラーレポート
-- ゼロ除算防止
+- 厳格な型チェック（数値列・スコア値）
+- 異常値検出（負の値、範囲外の値、計算式との不一致）
+- 詳細なエラーレポート（企業・年度・項目・値・理由）
+- ゼロ除算防止（分母が0の行は恒等式の検証対象外）
+
+pandas は出力データの検証時にのみ読み込む（閾値定義だけの検証は valuescope.py validate から
+すぐに結果を返す）。
 """
 
 import json
 import argparse
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Tuple
 
 
-# スキーマ定義
-VALUATION_SCHEMA = {
-    "marketCap": {"type": float, "min": 0, "unit": "百万円"},
-    "enterpriseValue": {"type": float, "min": 0, "unit": "百万円"},
-    "ebitda": {"type": float, "min": 0, "unit": "百万円"},
-    "evEbitdaRatio": {"type": float, "min": 0, "max": 100, "unit": "倍"},
-    "per": {"type": float, "min": 0, "max": 1000, "unit": "倍"},
-    "pbr": {"type": float, "min": 0, "max": 100, "unit": "倍"},
+# 数値列の検証定義
+#   min: 下回るとエラー / max: 上回ると警告 / nullable: null を許可（未上場企業の株価関連指標など）
+KPI_SCHEMA = {
+    "roic": {"min": -100, "max": 100, "unit": "%"},
+    "wacc": {"min": 0, "max": 20, "unit": "%"},
+    "ebitdaMargin": {"min": -100, "max": 100, "unit": "%"},
+    "fcfMargin": {"min": -100, "max": 100, "unit": "%"},
 }
 
-SCORECARD_SCHEMA = {
-    "roe": {"type": float, "min": -100, "max": 100, "unit": "%"},
-    "equityRatio": {"type": float, "min": 0, "max": 100, "unit": "%"},
-    "dscr": {"type": float, "min": 0, "max": 1000, "unit": "倍"},
-    "score": {"type": str, "values": ["green", "yellow", "red"]},
+MARKET_SCHEMA = {
+    "marketCap": {"min": 0, "nullable": True},
+    "enterpriseValue": {"min": 0, "nullable": True},
+    "evEbitdaRatio": {"min": 0, "max": 100, "nullable": True, "unit": "倍"},
+    "per": {"min": 0, "max": 1000, "nullable": True, "unit": "倍"},
+    "pbr": {"min": 0, "max": 100, "nullable": True, "unit": "倍"},
 }
 
+# timeseries.json（金額は億円単位に丸め、比率は小数2桁に丸め）
+TIMESERIES_SCHEMA = {
+    "fiscalYear": {"min": 1900},
+    **KPI_SCHEMA,
+    "revenue": {"min": 0},
+    "operatingIncome": {},
+    "ordinaryIncome": {},
+    "netIncome": {},
+    "ebitda": {},
+    "totalAssets": {"min": 0},
+    "netAssets": {},
+    "equity": {},
+    "interestBearingDebt": {"min": 0},
+    "cashAndDeposits": {"min": 0},
+    "netDebt": {},
+    "operatingCashFlow": {},
+    "investingCashFlow": {},
+    "financingCashFlow": {},
+    **MARKET_SCHEMA,
+}
+
+# valuation.json（百万円単位、丸めなし。0以下の損益・0の有利子負債は null で出力される）
+VALUATION_SCHEMA = {
+    "revenue": {"min": 0, "nullable": True},
+    "operatingIncome": {"min": 0, "nullable": True},
+    "netIncome": {},
+    "totalAssets": {"min": 0, "nullable": True},
+    "equity": {},
+    "interestBearingDebt": {"min": 0, "nullable": True},
+    "cashAndDeposits": {"min": 0},
+    "netDebt": {},
+    "ebitda": {},
+    "roic": {"min": -100, "max": 100, "nullable": True, "unit": "%"},
+    **MARKET_SCHEMA,
+}
+
+SCORE_VALUES = ["green", "yellow", "red"]
+
+# 株価がある（上場）企業・年度だけ値を持つ列（一部だけ null なら不整合）
+NULL_TOGETHER = ["marketCap", "enterpriseValue", "evEbitdaRatio", "per", "pbr"]
+
+# 丸めの誤差（timeseries.json の億円・比率、scorecards.json のKPI値）
+AMOUNT_ROUNDING = 0.5
+RATIO_ROUNDING = 0.005
+
+# JSON出力は浮動小数点を有効12桁に正規化するため、丸めなしの値にもこの相対誤差を許容する
+RELATIVE_PRECISION = 1e-9
+
 THRESHOLD_SCHEMA = {
     "green": {"type": float},
     "yellow": {"type": float},
@@ -40,251 +95,392 @@ THRESHOLD_SCHEMA = {
 
 class ValidationError:
     """検証エラー情報"""
-    
+
     def __init__(self, company: str, field: str, value: Any, reason: str):
         self.company = company
         self.field = field
         self.value = value
         self.reason = reason
-    
+
     def __str__(self) -> str:
         return f"[{self.company}] {self.field}={self.value} → {self.reason}"
 
 
+def ratio(num, den, scale: float = 1.0, num_error: float = 0.0, den_error: float = 0.0, rounding: float = 0.0):
+    """
+    num ÷ den × scale と、丸め誤差（入力の num_error・den_error と出力の rounding）による許容誤差の列
+
+    出力側の計算（build_timeseries.py / build_valuation.py）と同じく分母が負なら 0。
+    分母が 0 の行は検証できないので NaN（検証対象外）とする。
+    """
+    safe_den = den.where(den != 0)
+    expected = (num / safe_den * scale).where(den > 0, 0.0).where(den != 0)
+    propagated = scale * (num_error / safe_den.abs() + num.abs() * den_error / safe_den ** 2)
+    return expected, propagated.where(den > 0, 0.0) + rounding
+
+
+def rounded_ratio(num, den, scale: float = 1.0, den_terms: int = 1):
+    """timeseries.json の比率（億円に丸めた金額から計算し、小数2桁に丸めた値）の期待値と許容誤差"""
+    return ratio(num, den, scale, AMOUNT_ROUNDING, den_terms * AMOUNT_ROUNDING, RATIO_ROUNDING)
+
+
+def numeric(raw):
+    """列を数値に変換し、(数値の列, 数値でない非null値の位置) を返す（bool は数値として扱わない）"""
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(raw) and not pd.api.types.is_bool_dtype(raw):
+        return raw, pd.Series(False, index=raw.index)
+    values = pd.to_numeric(raw.where(~raw.map(lambda v: isinstance(v, bool))), errors="coerce")
+    return values, raw.notna() & values.isna()
+
+
+# 型エラーの理由（値の型名を埋め込む）
+TYPE_ERROR = "型エラー: {.__class__.__name__} (期待: 数値)"
+
+
+def _valuation_roic(frame):
+    from compute_scores import TAX_RATE
+
+    invested = frame["equity"] + frame["interestBearingDebt"].fillna(0.0)
+    return ratio(frame["operatingIncome"] * (1 - TAX_RATE), invested, 100)
+
+
+# 項目間の恒等式: (列, frame → (期待値, 許容誤差), 説明)
+Identity = Tuple[str, Callable[[Any], Tuple[Any, Any]], str]
+
+TIMESERIES_IDENTITIES: List[Identity] = [
+    ("netDebt", lambda f: (f["interestBearingDebt"] - f["cashAndDeposits"], 3 * AMOUNT_ROUNDING),
+     "純有利子負債 = 有利子負債 - 現金及び預金"),
+    ("enterpriseValue", lambda f: (f["marketCap"] + f["netDebt"], 3 * AMOUNT_ROUNDING),
+     "EV = 時価総額 + 純有利子負債"),
+    ("roic", lambda f: rounded_ratio(f["operatingIncome"], f["equity"] + f["interestBearingDebt"], 100, 2),
+     "ROIC = 営業利益 ÷ (自己資本 + 有利子負債) × 100"),
+    ("ebitdaMargin", lambda f: rounded_ratio(f["ebitda"], f["revenue"], 100),
+     "EBITDAマージン = EBITDA ÷ 売上高 × 100"),
+    ("fcfMargin", lambda f: rounded_ratio(f["operatingCashFlow"], f["revenue"], 100),
+     "FCFマージン = 営業CF ÷ 売上高 × 100"),
+    ("evEbitdaRatio", lambda f: rounded_ratio(f["enterpriseValue"], f["ebitda"]),
+     "EV/EBITDA = EV ÷ EBITDA"),
+    ("per", lambda f: rounded_ratio(f["marketCap"], f["netIncome"]),
+     "PER = 時価総額 ÷ 当期純利益"),
+    ("pbr", lambda f: rounded_ratio(f["marketCap"], f["equity"]),
+     "PBR = 時価総額 ÷ 自己資本"),
+]
+
+VALUATION_IDENTITIES: List[Identity] = [
+    ("netDebt", lambda f: (f["interestBearingDebt"].fillna(0.0) - f["cashAndDeposits"], 0.0),
+     "純有利子負債 = 有利子負債 - 現金及び預金"),
+    ("enterpriseValue", lambda f: (f["marketCap"] + f["netDebt"], 0.0),
+     "EV = 時価総額 + 純有利子負債"),
+    ("roic", _valuation_roic, "ROIC = 営業利益 × (1 - 税率) ÷ (自己資本 + 有利子負債) × 100"),
+    ("evEbitdaRatio", lambda f: ratio(f["enterpriseValue"], f["ebitda"]), "EV/EBITDA = EV ÷ EBITDA"),
+    ("per", lambda f: ratio(f["marketCap"], f["netIncome"]), "PER = 時価総額 ÷ 当期純利益"),
+    ("pbr", lambda f: ratio(f["marketCap"], f["equity"]), "PBR = 時価総額 ÷ 自己資本"),
+]
+
+# valuation.json（百万円）と timeseries.json（億円）の同一企業・同一日付で一致すべき列
+CROSS_CHECK_AMOUNTS = ["marketCap", "netDebt", "enterpriseValue"]
+
+
+def timeseries_frame(data: Dict[str, Any]):
+    """timeseries.json（企業 → 年度のリスト）を 企業×年度 の表に展開（trends は除く）"""
+    import pandas as pd
+
+    rows = [
+        {**{k: v for k, v in record.items() if k != "trends"}, "company": company}
+        for company, records in data.items()
+        if isinstance(records, list)
+        for record in records
+        if isinstance(record, dict)
+    ]
+    return pd.DataFrame.from_records(rows)
+
+
+def valuation_frame(data: Dict[str, Any]):
+    """valuation.json の companies（企業 → 最新値）を 企業 ごとの表に展開"""
+    import pandas as pd
+
+    rows = [{**values, "company": company} for company, values in data.items() if isinstance(values, dict)]
+    return pd.DataFrame.from_records(rows)
+
+
+def scorecard_frame(data: Dict[str, Any]):
+    """scorecards.json の companies（企業 → 期間 → KPI）を 企業×期間×KPI の縦持ちの表に展開"""
+    import pandas as pd
+
+    rows = [
+        {
+            "company": company,
+            "period": period,
+            "date": card.get("date"),
+            "kpi": kpi,
+            "value": detail.get("value") if isinstance(detail, dict) else detail,
+            "score": detail.get("score") if isinstance(detail, dict) else None,
+        }
+        for company, periods in data.items()
+        if isinstance(periods, dict)
+        for period, card in periods.items()
+        if isinstance(card, dict)
+        for kpi, detail in card.items()
+        if kpi in KPI_SCHEMA
+    ]
+    return pd.DataFrame.from_records(rows, columns=["company", "period", "date", "kpi", "value", "score"])
+
+
 class DataValidator:
     """データ検証クラス"""
-    
+
     def __init__(self):
         self.errors: List[ValidationError] = []
         self.warnings: List[ValidationError] = []
-    
-    def validate_field(
-        self,
-        company: str,
-        field: str,
-        value: Any,
-        schema: Dict[str, Any]
-    ) -> bool:
+
+    def _report(self, mask, labels, field: str, values, reason: str, detail=None, warning: bool = False) -> bool:
+        """
+        mask が True の行を違反として記録（理由の文字列は違反行についてだけ作る）
+
+        Args:
+            mask: 違反行を示す真偽値の列（NaN は違反なし）
+            labels: 行ごとの表示名（企業・年度など）
+            field: 項目名
+            values: 行ごとの値
+            reason: 理由（detail があれば str.format でその行の値を埋め込む）
+            detail: 理由に埋め込む行ごとの値（期待値など）
+            warning: エラーではなく警告として記録
+
+        Returns:
+            違反がなければTrue
+        """
+        mask = mask.fillna(False).astype(bool)
+        if not mask.any():
+            return True
+        target = self.warnings if warning else self.errors
+        details = detail[mask] if detail is not None else [None] * int(mask.sum())
+        for label, value, extra in zip(labels[mask], values[mask], details):
+            target.append(ValidationError(label, field, value, reason.format(extra) if detail is not None else reason))
+        return False
+
+    def validate_columns(self, frame, labels, schema: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        スキーマ（必須列・数値型・null・範囲）を列ごとに一括検証
+
+        Args:
+            frame: 検証対象の表
+            labels: 行ごとの表示名
+            schema: 列名 → {min, max, nullable}
+
+        Returns:
+            検証成功ならTrue（範囲の上限超過は警告のみ）
         """
-        フィールド値の検証
-        
+        success = True
+        for field, rule in schema.items():
+            if field not in frame.columns:
+                self.errors.append(ValidationError("*", field, None, "必須フィールドが欠落"))
+                success = False
+                continue
+
+            raw = frame[field]
+            values, wrong_type = numeric(raw)
+            success &= self._report(wrong_type, labels, field, raw, TYPE_ERROR, raw)
+            if not rule.get("nullable"):
+                success &= self._report(raw.isna(), labels, field, raw, "必須値が欠落（null）")
+
+            if rule.get("min") is not None:
+                success &= self._report(values < rule["min"], labels, field, values,
+                                        f"範囲エラー: 最小値={rule['min']}")
+            if rule.get("max") is not None:
+                self._report(values > rule["max"], labels, field, values,
+                             f"警告: 最大値={rule['max']}を超過", warning=True)
+            frame[field] = values
+        return success
+
+    def validate_identities(self, frame, labels, identities: List[Identity]) -> bool:
+        """
+        項目間の恒等式を全行まとめて検証（期待値・実際の値のどちらかが null の行は対象外）
+
         Args:
-            company: 企業名
-            field: フィールド名
-            value: 値
-            schema: スキーマ定義
-        
+            frame: 数値列を変換済みの表
+            labels: 行ごとの表示名
+            identities: (列, 期待値と許容誤差の計算, 説明) のリスト
+
         Returns:
             検証成功ならTrue
         """
-        # 型チェック
-        expected_type = schema.get("type")
-        if expected_type and not isinstance(value, expected_type):
-            self.errors.append(
-                ValidationError(
-                    company, field, value,
-                    f"型エラー: {type(value).__name__} (期待: {expected_type.__name__})"
-                )
-            )
-            return False
-        
-        # 値の範囲チェック（文字列の場合）
-        if expected_type == str and "values" in schema:
-            allowed = schema["values"]
-            if value not in allowed:
-                self.errors.append(
-                    ValidationError(
-                        company, field, value,
-                        f"値エラー: 許可値={allowed}"
-                    )
-                )
-                return False
-        
-        # 数値の範囲チェック
-        if isinstance(value, (int, float)):
-            min_val = schema.get("min")
-            max_val = schema.get("max")
-            
-            if min_val is not None and value < min_val:
-                self.errors.append(
-                    ValidationError(
-                        company, field, value,
-                        f"範囲エラー: 最小値={min_val}"
-                    )
-                )
-                return False
-            
-            if max_val is not None and value > max_val:
-                self.warnings.append(
-                    ValidationError(
-                        company, field, value,
-                        f"警告: 最大値={max_val}を超過"
-                    )
-                )
-        
-        return True
-    
-    def validate_valuation(self, data: Dict[str, Any]) -> bool:
+        success = True
+        for field, compute, description in identities:
+            if field not in frame.columns:
+                continue
+            try:
+                expected, tolerance = compute(frame)
+            except KeyError:
+                # 入力列の欠落はスキーマ検証で報告済み
+                continue
+            actual = frame[field]
+            limit = tolerance + RELATIVE_PRECISION * expected.abs()
+            mismatch = (actual - expected).abs() > limit
+            success &= self._report(mismatch, labels, field, actual,
+                                    f"計算不一致: {description}（期待値={{:.6g}}）", expected)
+        return success
+
+    def validate_null_groups(self, frame, labels, columns: List[str]) -> bool:
+        """株価関連指標が一部の列だけ null になっていないか検証"""
+        present = [col for col in columns if col in frame.columns]
+        if not present:
+            return True
+        nulls = frame[present].isna()
+        partial = nulls.any(axis=1) & ~nulls.all(axis=1)
+        missing = nulls[partial].apply(lambda row: ", ".join(row.index[row]), axis=1)
+        return self._report(partial, labels, present[0], frame[present[0]],
+                            "株価関連指標の一部だけが null: {}", missing.reindex(frame.index))
+
+    def validate_timeseries(self, data: Dict[str, Any]):
+        """
+        時系列データ（全企業×全年度）の検証
+
+        Args:
+            data: timeseries.json（企業 → 年度のリスト）
+
+        Returns:
+            (検証成功ならTrue, 数値列を変換済みの表)
+        """
+        import pandas as pd
+
+        frame = timeseries_frame(data)
+        if frame.empty:
+            self.errors.append(ValidationError("*", "timeseries", None, "時系列データが空"))
+            return False, frame
+        if "fiscalYear" in frame.columns:
+            labels = frame["company"] + " FY" + frame["fiscalYear"].astype(str)
+        else:
+            labels = frame["company"] + " " + frame.get("date", pd.Series("?", index=frame.index)).astype(str)
+
+        success = self.validate_columns(frame, labels, TIMESERIES_SCHEMA)
+        if "date" in frame.columns:
+            dates = pd.to_datetime(frame["date"], format="%Y-%m-%d", errors="coerce")
+            success &= self._report(dates.isna(), labels, "date", frame["date"], "日付エラー: YYYY-MM-DD ではない")
+        else:
+            self.errors.append(ValidationError("*", "date", None, "必須フィールドが欠落"))
+            success = False
+        if "fiscalYear" in frame.columns:
+            duplicated = frame.duplicated(["company", "fiscalYear"], keep=False) & frame["fiscalYear"].notna()
+            success &= self._report(duplicated, labels, "fiscalYear", frame["fiscalYear"], "同じ企業・年度の行が重複")
+        success &= self.validate_identities(frame, labels, TIMESERIES_IDENTITIES)
+        success &= self.validate_null_groups(frame, labels, NULL_TOGETHER)
+        return success, frame
+
+    def validate_valuation(self, data: Dict[str, Any], timeseries=None) -> bool:
         """
         企業価値データの検証
-        
+
         Args:
             data: valuation.json の companies オブジェクト
-        
+            timeseries: validate_timeseries が返した表（同じ日付の金額と照合する）
+
         Returns:
             検証成功ならTrue
         """
-        success = True
-        
-        for company, values in data.items():
-            if not isinstance(values, dict):
-                self.errors.append(
-                    ValidationError(
-                        company, "root", values,
-                        "企業データが辞書型ではない"
-                    )
-                )
-                success = False
-                continue
-            
-            for field, schema in VALUATION_SCHEMA.items():
-                if field not in values:
-                    self.errors.append(
-                        ValidationError(
-                            company, field, None,
-                            "必須フィールドが欠落"
-                        )
-                    )
-                    success = False
+        frame = valuation_frame(data)
+        if frame.empty:
+            return True
+        labels = frame["company"] + (" " + frame["date"].astype(str) if "date" in frame.columns else "")
+
+        success = self.validate_columns(frame, labels, VALUATION_SCHEMA)
+        success &= self.validate_identities(frame, labels, VALUATION_IDENTITIES)
+        success &= self.validate_null_groups(frame, labels, NULL_TOGETHER)
+
+        # EVが時価総額から極端に乖離（純有利子負債が時価総額の5倍超）
+        if {"enterpriseValue", "marketCap"} <= set(frame.columns):
+            ev_ratio = frame["enterpriseValue"] / frame["marketCap"].where(frame["marketCap"] > 0)
+            self._report((ev_ratio - 1.0).abs() > 5.0, labels, "enterpriseValue", frame["enterpriseValue"],
+                         "警告: EV/時価総額比率={:.2f}（極端な負債）", ev_ratio, warning=True)
+
+        # timeseries.json（億円）との照合
+        if timeseries is not None and "date" in timeseries.columns and "date" in frame.columns:
+            merged = frame.merge(timeseries, on=["company", "date"], how="inner", suffixes=("", "_ts"))
+            merged_labels = merged["company"] + " " + merged["date"].astype(str)
+            for field in CROSS_CHECK_AMOUNTS:
+                if field not in merged.columns or f"{field}_ts" not in merged.columns:
                     continue
-                
-                value = values[field]
-                if not self.validate_field(company, field, value, schema):
-                    success = False
-            
-            # ビジネスロジック検証
-            if "enterpriseValue" in values and "marketCap" in values:
-                ev = values["enterpriseValue"]
-                mc = values["marketCap"]
-                
-                # EV < 0はあり得ない（純有利子負債が巨額でない限り）
-                if ev < 0:
-                    self.errors.append(
-                        ValidationError(
-                            company, "enterpriseValue", ev,
-                            "負の企業価値（純有利子負債が異常）"
-                        )
-                    )
-                    success = False
-                
-                # EV/時価総額が極端に乖離
-                if mc > 0 and abs(ev / mc - 1.0) > 5.0:
-                    self.warnings.append(
-                        ValidationError(
-                            company, "enterpriseValue", ev,
-                            f"警告: EV/時価総額比率={ev/mc:.2f}（極端な負債）"
-                        )
-                    )
-        
+                mismatch = (merged[field] / 100 - merged[f"{field}_ts"]).abs() > AMOUNT_ROUNDING + 1e-6
+                success &= self._report(mismatch, merged_labels, field, merged[field],
+                                        "時系列データと不一致（timeseries: {} 億円）", merged[f"{field}_ts"])
         return success
-    
-    def validate_scorecard(self, data: Dict[str, Any]) -> bool:
+
+    def validate_scorecard(self, data: Dict[str, Any], thresholds: Optional[Dict[str, Dict[str, Any]]] = None,
+                           timeseries=None) -> bool:
         """
         KPIスコアカードの検証
-        
+
         Args:
             data: scorecards.json の companies オブジェクト
-        
+            thresholds: rescore.parse_thresholds 形式の閾値（スコアと値の整合を検証する）
+            timeseries: validate_timeseries が返した表（同じ日付のKPI値と照合する）
+
         Returns:
             検証成功ならTrue
         """
+        import pandas as pd
+
+        frame = scorecard_frame(data)
+        if frame.empty:
+            return True
+        labels = frame["company"] + "/" + frame["period"].astype(str)
         success = True
-        
-        for company, company_data in data.items():
-            if not isinstance(company_data, dict):
-                self.errors.append(
-                    ValidationError(
-                        company, "root", company_data,
-                        "企業データが辞書型ではない"
-                    )
-                )
-                success = False
-                continue
-            
-            # date, companyCodeフィールドをスキップ（メタデータ）
-            for kpi_name in ["roe", "equityRatio", "dscr"]:
-                if kpi_name not in company_data:
-                    continue
-                
-                kpi_data = company_data[kpi_name]
-                
-                if not isinstance(kpi_data, dict):
-                    self.errors.append(
-                        ValidationError(
-                            company, kpi_name, kpi_data,
-                            "KPI詳細が辞書型ではない"
-                        )
-                    )
-                    success = False
-                    continue
-                
-                # valueフィールドの検証
-                if "value" not in kpi_data:
-                    self.errors.append(
-                        ValidationError(
-                            company, f"{kpi_name}.value", None,
-                            "必須フィールドが欠落"
-                        )
-                    )
-                    success = False
-                    continue
-                
-                value = kpi_data["value"]
-                
-                # KPI種別に応じた範囲チェック
-                if kpi_name == "roe":
-                    schema = {"type": float, "min": -100, "max": 100, "unit": "%"}
-                elif kpi_name == "equityRatio":
-                    schema = {"type": float, "min": 0, "max": 100, "unit": "%"}
-                elif kpi_name == "dscr":
-                    schema = {"type": float, "min": 0, "max": 1000, "unit": "倍"}
-                else:
-                    schema = {"type": float}
-                
-                if not self.validate_field(company, f"{kpi_name}.value", value, schema):
-                    success = False
-                
-                # scoreフィールドの検証
-                if "score" not in kpi_data:
-                    self.errors.append(
-                        ValidationError(
-                            company, f"{kpi_name}.score", None,
-                            "必須フィールドが欠落"
-                        )
-                    )
-                    success = False
+
+        raw = frame["value"]
+        values, wrong_type = numeric(raw)
+        for kpi, rule in KPI_SCHEMA.items():
+            in_kpi = frame["kpi"] == kpi
+            field = f"{kpi}.value"
+            success &= self._report(in_kpi & raw.isna(), labels, field, raw, "必須フィールドが欠落")
+            success &= self._report(in_kpi & wrong_type, labels, field, raw, TYPE_ERROR, raw)
+            success &= self._report(in_kpi & (values < rule["min"]), labels, field, values,
+                                    f"範囲エラー: 最小値={rule['min']}")
+            self._report(in_kpi & (values > rule["max"]), labels, field, values,
+                         f"警告: 最大値={rule['max']}を超過", warning=True)
+
+        scores = frame["score"]
+        success &= self._report(~scores.isin(SCORE_VALUES), labels, "score", scores,
+                                f"値エラー: 許可値={SCORE_VALUES}")
+
+        # スコアと閾値の整合（値は小数2桁に丸めてあるので、丸め幅の両端のどちらかで一致すればよい）
+        if thresholds:
+            from rescore import score_values
+
+            for kpi, rule in thresholds.items():
+                in_kpi = (frame["kpi"] == kpi) & values.notna()
+                if not in_kpi.any():
                     continue
-                
-                score = kpi_data["score"]
-                score_schema = {"type": str, "values": ["green", "yellow", "red"]}
-                
-                if not self.validate_field(company, f"{kpi_name}.score", score, score_schema):
-                    success = False
-        
+                low = score_values(values[in_kpi] - RATIO_ROUNDING, rule)
+                high = score_values(values[in_kpi] + RATIO_ROUNDING, rule)
+                stored = scores[in_kpi].to_numpy()
+                mismatch = pd.Series((stored != low) & (stored != high), index=frame.index[in_kpi])
+                success &= self._report(mismatch, labels[in_kpi], f"{kpi}.score", scores[in_kpi],
+                                        "閾値と不一致（値={}）", values[in_kpi])
+
+        # timeseries.json の同じ企業・日付のKPI値と照合
+        if timeseries is not None and "date" in timeseries.columns:
+            kpis = [kpi for kpi in KPI_SCHEMA if kpi in timeseries.columns]
+            long = timeseries.melt(id_vars=["company", "date"], value_vars=kpis, var_name="kpi", value_name="timeseries")
+            merged = frame.assign(value=values).merge(long, on=["company", "date", "kpi"], how="inner")
+            merged_labels = merged["company"] + "/" + merged["period"].astype(str)
+            mismatch = (merged["value"] - merged["timeseries"]).abs() > 2 * RATIO_ROUNDING + 1e-9
+            for kpi in kpis:
+                success &= self._report(mismatch & (merged["kpi"] == kpi), merged_labels, f"{kpi}.value", merged["value"],
+                                        "時系列データと不一致（timeseries: {}）", merged["timeseries"])
         return success
-    
+
     def validate_thresholds(self, data: Dict[str, Any]) -> bool:
         """
         閾値定義の検証
-        
+
         Args:
             data: kpi_targets.json
-        
+
         Returns:
             検証成功ならTrue
         """
         success = True
-        
+
         # バージョン情報の検証
         if "version" not in data:
             self.errors.append(
@@ -294,7 +490,7 @@ class DataValidator:
                 )
             )
             success = False
-        
+
         # thresholdsが配列形式
         if "thresholds" not in data:
             self.errors.append(
@@ -304,7 +500,7 @@ class DataValidator:
                 )
             )
             return False
-        
+
         thresholds = data["thresholds"]
         if not isinstance(thresholds, list):
             self.errors.append(
@@ -314,7 +510,7 @@ class DataValidator:
                 )
             )
             return False
-        
+
         for threshold in thresholds:
             if not isinstance(threshold, dict):
                 self.errors.append(
@@ -325,9 +521,9 @@ class DataValidator:
                 )
                 success = False
                 continue
-            
+
             kpi_name = threshold.get("kpiName", "unknown")
-            
+
             # greenThreshold検証
             if "greenThreshold" not in threshold:
                 self.errors.append(
@@ -339,7 +535,6 @@ class DataValidator:
                 success = False
             else:
                 green = threshold["greenThreshold"]
-                schema = {"type": (int, float)}
                 if not isinstance(green, (int, float)):
                     self.errors.append(
                         ValidationError(
@@ -348,7 +543,7 @@ class DataValidator:
                         )
                     )
                     success = False
-            
+
             # yellowThreshold検証
             if "yellowThreshold" not in threshold:
                 self.errors.append(
@@ -368,14 +563,31 @@ class DataValidator:
                         )
                     )
                     success = False
-            
-            # 閾値の論理チェック（green > yellow）
+
+            # 閾値の論理チェック（green > yellow、低いほど良いKPIは green < yellow）
             if "greenThreshold" in threshold and "yellowThreshold" in threshold:
                 green = threshold["greenThreshold"]
                 yellow = threshold["yellowThreshold"]
-                
-                if isinstance(green, (int, float)) and isinstance(yellow, (int, float)):
-                    if green <= yellow:
+                direction = threshold.get("direction", "higher")
+
+                if direction not in ("higher", "lower"):
+                    self.errors.append(
+                        ValidationError(
+                            "threshold", f"{kpi_name}.direction", direction,
+                            "値エラー: 許可値=['higher', 'lower']"
+                        )
+                    )
+                    success = False
+                elif isinstance(green, (int, float)) and isinstance(yellow, (int, float)):
+                    if direction == "lower" and green >= yellow:
+                        self.errors.append(
+                            ValidationError(
+                                "threshold", kpi_name, {"green": green, "yellow": yellow},
+                                f"閾値エラー: green({green}) >= yellow({yellow})（低いほど良いKPI）"
+                            )
+                        )
+                        success = False
+                    elif direction == "higher" and green <= yellow:
                         self.errors.append(
                             ValidationError(
                                 "threshold", kpi_name, {"green": green, "yellow": yellow},
@@ -383,101 +595,114 @@ class DataValidator:
                             )
                         )
                         success = False
-        
+
         return success
-    
+
     def print_report(self) -> int:
         """
         検証レポートを出力
-        
+
         Returns:
             エラー数
         """
         print("=== Validation Report ===")
         print()
-        
+
         if self.errors:
             print(f"❌ Errors: {len(self.errors)}")
             for error in self.errors:
                 print(f"  {error}")
             print()
-        
+
         if self.warnings:
             print(f"⚠️  Warnings: {len(self.warnings)}")
             for warning in self.warnings:
                 print(f"  {warning}")
             print()
-        
+
         if not self.errors and not self.warnings:
             print("✅ All validations passed!")
-        
+
         return len(self.errors)
 
 
-def main():
+def load_json(path: Path) -> Optional[Dict[str, Any]]:
+    """検証対象のJSONを読み込む（存在しなければ警告を出して None）"""
+    if not path.exists():
+        print(f"Warning: {path} not found")
+        return None
+    print(f"Validating {path}...")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None):
+    root = Path(__file__).parent.parent
     parser = argparse.ArgumentParser(
-        description="企業価値データとKPIスコアカードの検証"
+        description="時系列・企業価値データとKPIスコアカードの検証（全企業×全年度）"
+    )
+    parser.add_argument(
+        "--timeseries",
+        type=Path,
+        default=root / "data" / "timeseries.json",
+        help="時系列データファイル（デフォルト: data/timeseries.json）"
     )
     parser.add_argument(
         "--valuation",
         type=Path,
-        default=Path(__file__).parent.parent / "data" / "valuation.json",
-        help="企業価値データファイル"
+        default=root / "data" / "valuation.json",
+        help="企業価値データファイル（デフォルト: data/valuation.json）"
     )
     parser.add_argument(
         "--scorecards",
         type=Path,
-        default=Path(__file__).parent.parent / "data" / "scorecards.json",
-        help="KPIスコアカードファイル"
+        default=root / "data" / "scorecards.json",
+        help="KPIスコアカードファイル（デフォルト: data/scorecards.json）"
     )
     parser.add_argument(
         "--thresholds",
         type=Path,
-        default=Path(__file__).parent.parent / "data" / "kpi_targets.json",
-        help="閾値定義ファイル"
+        default=root / "public" / "data" / "kpi_targets.json",
+        help="閾値定義ファイル（デフォルト: public/data/kpi_targets.json）"
     )
-    
-    args = parser.parse_args()
-    
+
+    args = parser.parse_args(argv)
+
     validator = DataValidator()
     exit_code = 0
-    
+
+    # 閾値定義検証（スコアカードのスコアの検証にも使う）
+    threshold_data = load_json(args.thresholds)
+    if threshold_data is not None and not validator.validate_thresholds(threshold_data):
+        threshold_data = None
+        exit_code = 1
+
+    # 時系列データ検証（企業価値・スコアカードとの照合にも使う）
+    timeseries = None
+    timeseries_data = load_json(args.timeseries)
+    if timeseries_data is not None:
+        success, timeseries = validator.validate_timeseries(timeseries_data)
+        if not success:
+            exit_code = 1
+
     # 企業価値データ検証
-    if args.valuation.exists():
-        print(f"Validating {args.valuation}...")
-        with open(args.valuation, "r", encoding="utf-8") as f:
-            valuation_data = json.load(f)
-        
-        if not validator.validate_valuation(valuation_data.get("companies", {})):
+    valuation_data = load_json(args.valuation)
+    if valuation_data is not None:
+        if not validator.validate_valuation(valuation_data.get("companies", {}), timeseries):
             exit_code = 1
-    else:
-        print(f"Warning: {args.valuation} not found")
-    
+
     # KPIスコアカード検証
-    if args.scorecards.exists():
-        print(f"Validating {args.scorecards}...")
-        with open(args.scorecards, "r", encoding="utf-8") as f:
-            scorecard_data = json.load(f)
-        
-        if not validator.validate_scorecard(scorecard_data.get("companies", {})):
-            exit_code = 1
-    else:
-        print(f"Warning: {args.scorecards} not found")
-    
-    # 閾値定義検証
-    if args.thresholds.exists():
-        print(f"Validating {args.thresholds}...")
-        with open(args.thresholds, "r", encoding="utf-8") as f:
-            threshold_data = json.load(f)
-        
-        if not validator.validate_thresholds(threshold_data):
+    scorecard_data = load_json(args.scorecards)
+    if scorecard_data is not None:
+        from rescore import parse_thresholds
+
+        thresholds = parse_thresholds(threshold_data) if threshold_data is not None else None
+        if not validator.validate_scorecard(scorecard_data.get("companies", {}), thresholds, timeseries):
             exit_code = 1
-    else:
-        print(f"Warning: {args.thresholds} not found")
-    
+
     print()
     validator.print_report()
-    
+
     return exit_code
 
 
@@ -0,0 +1,460 @@
+# ValueScope パイプライン実行スクリプト（DAGランナー）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# fetch → parse → extract → build → score の各スクリプトを、入力・出力を宣言したDAGとして
+# 1つのPythonプロセス内で実行する。
+#   - 入力ファイル・スクリプト本体（兄弟モジュールを含む）・引数のハッシュが前回成功時と同じで、
+#     出力も前回のままなら、そのステージはスキップする
+#   - 依存関係のないステージはスレッドで並列実行する（pandas/lxml の読み込みやキャッシュは共有）
+#   - 取得系（EDINET・株価）はネットワーク依存のため --fetch 指定時のみ実行し、常に再実行する
+# 前回の実行状態は data/pipeline_state.json に保存する（ファイルのハッシュは サイズ・更新時刻 が
+# 変わったものだけ計算し直す）。
+# 各ステージの時間・メモリ・I/O と、スキップ（キャッシュヒット）率は --report のJSONに出力する。
+#
+# ValueScope の統一CLIを兼ねる（サブコマンドを省略した場合は run）:
+#   python scripts/valuescope.py [run] [ステージ ...] [--fetch] ...   パイプライン実行
+#   python scripts/valuescope.py companies [--sector electric]       企業レジストリの一覧
+#   python scripts/valuescope.py validate [--thresholds ...]          閾値定義・出力データの検証
+#   python scripts/valuescope.py stage <ステージ> [引数 ...]            1ステージを単体実行
+# pandas・numpy・lxml は各ステージのモジュール内でのみ読み込む。このファイルと company_registry・
+# validate_thresholds（閾値定義の検証）はそれらを読み込まないので、一覧・検証は起動してすぐ結果を出す
+# （起動時間は bench_pipeline.py の cli_startup で計測）。
+
+import os
+import ast
+import sys
+import json
+import time
+import hashlib
+import argparse
+import importlib
+import traceback
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Optional, Set
+
+import instrumentation
+from json_output import write_json
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parent
+
+# 実行状態ファイル（リポジトリルートからの相対パス）
+STATE_FILE = 'data/pipeline_state.json'
+
+# 実行レポート（ステージごとの時間・メモリ・I/O、HTTP呼び出し回数、キャッシュヒット率）
+REPORT_FILE = 'data/run_report.json'
+
+REGISTRY = 'public/data/companies.json'
+TARGETS = 'public/data/kpi_targets.json'
+
+# ステージ定義
+#   module:   実行する scripts/ のモジュール（main(argv) を呼ぶ。args が None なら main()）
+#   deps:     先に完了している必要があるステージ
+#   inputs:   入力ファイルのglob（リポジトリルートからの相対）
+#   outputs:  出力ファイルのglob（入力と重なる場合は入力のハッシュから除外）
+#   fetch:    ネットワーク取得（--fetch 指定時のみ実行、常に再実行）
+#   optional: 失敗しても後続ステージを実行する
+STAGES: Dict[str, Dict[str, Any]] = {
+    'fetch_stock_prices': {
+        'module': 'fetch_stock_prices',
+        'args': ['--years', '10', '--incremental'],
+        'deps': [],
+        'inputs': [REGISTRY],
+        'outputs': ['data/prices/*.csv'],
+        'fetch': True,
+        'optional': True,
+    },
+    'fetch_edinet': {
+        'module': 'fetch_edinet',
+        'args': ['--years', '10', '--bulk', '--periodic', '--amendments'],
+        'deps': [],
+        'inputs': [REGISTRY],
+        'outputs': ['XBRL/**/*.zip', 'XBRL/*/amendments/index.json'],
+        'fetch': True,
+    },
+    'parse_edinet_xbrl': {
+        'module': 'parse_edinet_xbrl',
+        'args': [],
+        'deps': ['fetch_edinet'],
+        'inputs': ['XBRL/**/*.zip', 'XBRL/*/amendments/index.json', REGISTRY],
+        'outputs': ['data/edinet_parsed/*.json', 'data/edinet_parsed/*.csv'],
+    },
+    'extract_xbrl_to_csv': {
+        'module': 'extract_xbrl_to_csv',
+        'args': [],
+        'deps': ['fetch_edinet'],
+        'inputs': ['XBRL/*/*.zip', REGISTRY],
+        'outputs': ['XBRL_output/*/*.csv', 'public/data/employees.json'],
+    },
+    'build_timeseries': {
+        'module': 'build_timeseries',
+        'args': None,
+        'deps': ['parse_edinet_xbrl', 'fetch_stock_prices'],
+        'inputs': ['data/edinet_parsed/*.json', 'data/prices/*.csv', REGISTRY],
+        'outputs': ['data/timeseries.json', 'public/data/timeseries.json'],
+    },
+    'build_valuation': {
+        'module': 'build_valuation',
+        'args': ['--monte-carlo', '--mc-seed', '0'],
+        'deps': ['parse_edinet_xbrl', 'fetch_stock_prices'],
+        'inputs': ['data/edinet_parsed/*.json', 'data/prices/*.csv', REGISTRY],
+        'outputs': ['data/valuation.json', 'public/data/valuation.json',
+                    'data/valuation_bands.json', 'public/data/valuation_bands.json'],
+    },
+    'compute_scores': {
+        'module': 'compute_scores',
+        'args': [],
+        'deps': ['parse_edinet_xbrl'],
+        'inputs': ['data/edinet_parsed/*.json', TARGETS, REGISTRY],
+        'outputs': ['data/kpi_values.json', 'data/scorecards.json',
+                    'public/data/kpi_values.json', 'public/data/scorecards.json'],
+    },
+    'wacc_sensitivity': {
+        'module': 'wacc_sensitivity',
+        'args': [],
+        # 時価総額（株価CSV）で負債・株主資本の加重を決める
+        'deps': ['parse_edinet_xbrl', 'fetch_stock_prices'],
+        'inputs': ['data/edinet_parsed/*.json', 'data/prices/*.csv', REGISTRY],
+        'outputs': ['data/wacc_sensitivity.json', 'public/data/wacc_sensitivity.json'],
+    },
+    'peer_ranking': {
+        'module': 'peer_ranking',
+        'args': [],
+        'deps': ['build_timeseries', 'extract_xbrl_to_csv'],
+        'inputs': ['data/timeseries.json', 'XBRL_output/*/*.csv', TARGETS],
+        'outputs': ['data/peer_ranks.json', 'public/data/peer_ranks.json'],
+    },
+    'build_statement_payloads': {
+        'module': 'build_statement_payloads',
+        'args': [],
+        'deps': ['extract_xbrl_to_csv'],
+        'inputs': ['XBRL_output/*/*.csv', REGISTRY],
+        'outputs': ['public/statements/*'],
+    },
+    'build_manifest': {
+        'module': 'build_manifest',
+        'args': [],
+        'deps': ['extract_xbrl_to_csv', 'build_valuation', 'compute_scores', 'wacc_sensitivity',
+                 'peer_ranking', 'build_statement_payloads'],
+        'inputs': ['public/data/*.json', 'public/XBRL_output/*/*.csv', 'public/statements/*', REGISTRY],
+        'outputs': ['public/data/manifest.json', 'public/data/shards/**/*'],
+    },
+}
+
+
+def load_state(root: Path) -> Dict[str, Any]:
+    """前回の実行状態を読み込む（なければ空）"""
+    path = root / STATE_FILE
+    if not path.exists():
+        return {'files': {}, 'stages': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    state.setdefault('files', {})
+    state.setdefault('stages', {})
+    return state
+
+
+def save_state(root: Path, state: Dict[str, Any]) -> None:
+    write_json(state, root / STATE_FILE, sort_keys=True)
+
+
+def expand(root: Path, patterns: List[str]) -> List[Path]:
+    """globパターンに一致するファイル（重複なし・パス順）"""
+    paths: Set[Path] = set()
+    for pattern in patterns:
+        paths.update(p for p in root.glob(pattern) if p.is_file())
+    return sorted(paths)
+
+
+def file_hash(path: Path, root: Path, cache: Dict[str, List[Any]]) -> str:
+    """ファイルのSHA-256（サイズ・更新時刻が前回と同じならキャッシュを使う）"""
+    stat = path.stat()
+    key = path.relative_to(root).as_posix()
+    cached = cache.get(key)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    cache[key] = [stat.st_size, stat.st_mtime_ns, digest]
+    return digest
+
+
+def tree_hash(root: Path, paths: List[Path], cache: Dict[str, List[Any]]) -> str:
+    """ファイル群（パスと内容）のハッシュ"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.relative_to(root).as_posix().encode('utf-8'))
+        digest.update(file_hash(path, root, cache).encode('ascii'))
+    return digest.hexdigest()
+
+
+def code_files(module: str, scripts_dir: Path = SCRIPTS_DIR) -> List[Path]:
+    """モジュールと、そこから（間接的に）importされる scripts/ 内の兄弟モジュールのファイル"""
+    seen: Set[str] = set()
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        path = scripts_dir / f'{name}.py'
+        if name in seen or not path.exists():
+            continue
+        seen.add(name)
+        tree = ast.parse(path.read_text(encoding='utf-8'))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name.split('.')[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                pending.append(node.module.split('.')[0])
+    return sorted(scripts_dir / f'{name}.py' for name in seen)
+
+
+def stage_fingerprint(name: str, root: Path, cache: Dict[str, List[Any]],
+                      scripts_dir: Path = SCRIPTS_DIR) -> Dict[str, str]:
+    """ステージの入力（ファイル・コード・引数）と出力のハッシュ"""
+    stage = STAGES[name]
+    outputs = expand(root, stage['outputs'])
+    inputs = [p for p in expand(root, stage['inputs']) if p not in set(outputs)]
+    code = code_files(stage['module'], scripts_dir)
+    digest = hashlib.sha256()
+    digest.update(tree_hash(root, inputs, cache).encode('ascii'))
+    digest.update(tree_hash(scripts_dir, code, cache).encode('ascii'))
+    digest.update(json.dumps(stage['args']).encode('utf-8'))
+    return {'inputs': digest.hexdigest(), 'outputs': tree_hash(root, outputs, cache) if outputs else ''}
+
+
+def select_stages(targets: Optional[List[str]], include_fetch: bool, only: bool = False) -> List[str]:
+    """
+    実行対象のステージ（指定ステージとその上流、定義順）
+
+    取得系ステージは include_fetch=False なら除外する（既存のダウンロード済みファイルを使う）。
+    only=True なら上流を含めず指定ステージだけ。
+    """
+    wanted = list(targets) if targets else [n for n, s in STAGES.items() if include_fetch or not s.get('fetch')]
+    selected: Set[str] = set()
+    pending = list(wanted)
+    while pending:
+        name = pending.pop()
+        if name in selected:
+            continue
+        if STAGES[name].get('fetch') and not include_fetch and name not in wanted:
+            continue
+        selected.add(name)
+        if not only:
+            pending.extend(STAGES[name]['deps'])
+    return [name for name in STAGES if name in selected]
+
+
+def run_stage(name: str) -> Any:
+    """ステージのモジュールを読み込んで main を実行（戻り値が0/None以外、または SystemExit(≠0) は失敗）"""
+    stage = STAGES[name]
+    module = importlib.import_module(stage['module'])
+    try:
+        result = module.main() if stage['args'] is None else module.main(list(stage['args']))
+    except SystemExit as e:
+        result = e.code
+    if result not in (None, 0):
+        raise RuntimeError(f'{name} が終了コード {result} で終了しました')
+    return result
+
+
+def run_pipeline(stages: List[str], root: Path = ROOT_DIR, jobs: int = 4, force: bool = False,
+                 dry_run: bool = False, runner=run_stage) -> Dict[str, str]:
+    """
+    選択したステージを依存順に実行
+
+    Returns:
+        {ステージ: 'ran' | 'skipped' | 'failed' | 'blocked' | 'planned'}
+    """
+    state = load_state(root)
+    cache = state['files']
+    status: Dict[str, str] = {}
+    fingerprints: Dict[str, Dict[str, str]] = {}
+    selected = set(stages)
+
+    def ready(name: str) -> bool:
+        return all(dep not in selected or dep in status for dep in STAGES[name]['deps'])
+
+    def measured(name: str) -> Any:
+        with instrumentation.span(name, 'stage'):
+            return runner(name)
+
+    def blocked(name: str) -> bool:
+        return any(status.get(dep) in ('failed', 'blocked') and not STAGES[dep].get('optional')
+                   for dep in STAGES[name]['deps'])
+
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        while pending or running:
+            for name in [n for n in pending if ready(n)]:
+                pending.remove(name)
+                if blocked(name):
+                    status[name] = 'blocked'
+                    print(f"⚠ {name}: 上流ステージの失敗によりスキップ")
+                    continue
+                fingerprint = stage_fingerprint(name, root, cache)
+                previous = state['stages'].get(name)
+                unchanged = previous == fingerprint and bool(fingerprint['outputs'])
+                if not STAGES[name].get('fetch'):
+                    instrumentation.cache_access('pipeline.stages', unchanged)
+                if not force and not STAGES[name].get('fetch') and unchanged:
+                    status[name] = 'skipped'
+                    print(f"✓ {name}: 入力に変更なし（スキップ）")
+                    continue
+                if dry_run:
+                    status[name] = 'planned'
+                    print(f"→ {name}: 実行予定")
+                    continue
+                fingerprints[name] = fingerprint
+                print(f"▶ {name}: 実行開始")
+                running[executor.submit(measured, name)] = (name, time.perf_counter())
+
+            if not running:
+                if pending and not any(ready(n) for n in pending):
+                    raise RuntimeError(f'依存関係を解決できません: {pending}')
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, started = running.pop(future)
+                elapsed = time.perf_counter() - started
+                try:
+                    future.result()
+                except Exception as e:
+                    status[name] = 'failed'
+                    traceback.print_exc()
+                    print(f"⚠ {name}: 失敗 ({e}) [{elapsed:.1f}s]")
+                    continue
+                status[name] = 'ran'
+                # 出力のハッシュは実行後に計算（入力は実行前の状態で記録）
+                outputs = expand(root, STAGES[name]['outputs'])
+                fingerprints[name]['outputs'] = tree_hash(root, outputs, cache) if outputs else ''
+                state['stages'][name] = fingerprints[name]
+                print(f"✓ {name}: 完了 [{elapsed:.1f}s]")
+
+    if not dry_run:
+        save_state(root, state)
+    return status
+
+
+def run_command(argv: List[str]) -> int:
+    """run: パイプライン実行"""
+    parser = argparse.ArgumentParser(prog='valuescope.py [run]',
+                                     description='ValueScope パイプライン実行（入力ハッシュによる差分実行・並列実行）',
+                                     epilog=COMMANDS_HELP, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('stages', nargs='*',
+                        help='実行するステージ（上流も含めて実行。デフォルト: 取得系以外の全ステージ）')
+    parser.add_argument('--fetch', action='store_true', help='EDINET・株価の取得ステージも実行する')
+    parser.add_argument('--only', action='store_true', help='指定したステージだけを実行する（上流を含めない）')
+    parser.add_argument('--force', action='store_true', help='入力に変更がなくても全ステージを実行する')
+    parser.add_argument('--jobs', type=int, default=4, help='並列実行するステージ数（デフォルト: 4）')
+    parser.add_argument('--dry-run', action='store_true', help='実行せずに実行予定のステージを表示')
+    parser.add_argument('--list', action='store_true', help='ステージと依存関係を表示')
+    parser.add_argument('--report', type=str, default=REPORT_FILE,
+                        help=f'実行レポートの出力先（デフォルト: {REPORT_FILE}）')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='ステージ・企業ごとのピークメモリを計測する（tracemalloc。実行は遅くなる）')
+    parser.add_argument('--profile', type=str, default=None,
+                        help='ステージごとの cProfile 結果（<ステージ>.prof）の出力先ディレクトリ（デフォルト: なし）')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"不明なステージ: {', '.join(unknown)}（--list で一覧を表示）")
+
+    if args.list:
+        for name, stage in STAGES.items():
+            tag = '（取得）' if stage.get('fetch') else ''
+            print(f"{name}{tag} ← {', '.join(stage['deps']) or '-'}")
+        return 0
+
+    # 各スクリプトはリポジトリルートからの相対パスで入出力する
+    os.chdir(ROOT_DIR)
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    stages = select_stages(args.stages, args.fetch, args.only)
+    instrumentation.reset()
+    instrumentation.enable(memory=args.trace_memory, profile_dir=args.profile)
+    started = time.perf_counter()
+    status = run_pipeline(stages, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+
+    counts = {key: sum(1 for s in status.values() if s == key) for key in ('ran', 'skipped', 'failed', 'blocked')}
+    print(f"\n✓ パイプライン完了 [{time.perf_counter() - started:.1f}s]: 実行 {counts['ran']} / "
+          f"スキップ {counts['skipped']} / 失敗 {counts['failed']} / 未実行 {counts['blocked']}")
+    if not args.dry_run:
+        instrumentation.write_report(Path(args.report), status=status)
+        print(f"✓ 実行レポート: {args.report}")
+    required_failed = [n for n, s in status.items() if s in ('failed', 'blocked') and not STAGES[n].get('optional')]
+    return 1 if required_failed else 0
+
+
+def companies_command(argv: List[str]) -> int:
+    """companies: 企業レジストリの一覧（キー・EDINETコード・ティッカー・決算期末・業種・企業名）"""
+    import company_registry
+
+    parser = argparse.ArgumentParser(prog='valuescope.py companies', description='企業レジストリの一覧を表示')
+    company_registry.add_registry_arguments(parser)
+    parser.add_argument('--json', action='store_true', help='JSON形式で出力する')
+    args = parser.parse_args(argv)
+    try:
+        companies = company_registry.companies_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.json:
+        print(json.dumps(companies, ensure_ascii=False, indent=2))
+        return 0
+    for c in companies:
+        print(f"{c['key']}\t{c['edinetCode']}\t{c['ticker'] or '-'}\t{c['fiscalYearEnd']}\t{c['sector']}\t{c['name']}")
+    return 0
+
+
+def validate_command(argv: List[str]) -> int:
+    """validate: 閾値定義・出力データの検証（validate_thresholds.py）"""
+    import validate_thresholds
+
+    return validate_thresholds.main(argv)
+
+
+def stage_command(argv: List[str]) -> int:
+    """stage: 1ステージを単体実行（引数はそのままステージの main に渡す。キャッシュ判定・レポートなし）"""
+    if not argv or argv[0] in ('-h', '--help'):
+        print('使い方: valuescope.py stage <ステージ> [引数 ...]')
+        print(f"ステージ: {', '.join(STAGES)}")
+        return 0 if argv else 2
+    name, stage_args = argv[0], argv[1:]
+    if name not in STAGES:
+        print(f"⚠ 不明なステージ: {name}（valuescope.py --list で一覧を表示）")
+        return 2
+    if STAGES[name]['args'] is None and stage_args:
+        print(f"⚠ {name} は引数を受け付けません")
+        return 2
+
+    os.chdir(ROOT_DIR)
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    module = importlib.import_module(STAGES[name]['module'])
+    result = module.main() if STAGES[name]['args'] is None else module.main(stage_args)
+    return result or 0
+
+
+# サブコマンド（各コマンドは必要なモジュールを実行時に読み込む）
+COMMANDS = {
+    'run': run_command,
+    'companies': companies_command,
+    'validate': validate_command,
+    'stage': stage_command,
+}
+
+COMMANDS_HELP = """サブコマンド（省略時は run）:
+  run        パイプライン実行
+  companies  企業レジストリの一覧
+  validate   閾値定義・出力データの検証
+  stage      1ステージを単体実行"""
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    return run_command(argv)
+
+
+if __name__ == '__main__':
+    exit(main())
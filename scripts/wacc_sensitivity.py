@@ -0,0 +1,214 @@
+# WACC感度分析スクリプト（シナリオ×全企業年度の一括計算）
+# Version: 1.0.0
+# Date: 2026-10-19
+#
+# (株主資本コストRe, 実効税率T, 負債コストRd上書き) のグリッドについて
+# WACC・ROIC−WACCスプレッド・理論EV/EBITDA倍率を全企業・全年度まとめて
+# NumPyブロードキャストで計算し、ダッシュボードでスライス可能なキューブとして保存する。
+
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+import numpy as np
+
+from compute_scores import COST_OF_EQUITY, TAX_RATE
+from company_registry import add_registry_arguments, companies_from_args, company_keys, fiscal_year_end_for
+from fiscal_calendar import select_period
+from json_output import write_json
+
+# 既定グリッド（中心値は compute_scores の前提値）
+DEFAULT_COST_OF_EQUITY_GRID = '4.0:8.0:0.5'
+DEFAULT_TAX_RATE_GRID = '0.25:0.35:0.025'
+DEFAULT_COST_OF_DEBT_GRID = 'actual,0.5,1.0,1.5,2.0,3.0'
+
+METRICS = ('wacc', 'spread', 'impliedEvEbitda')
+
+
+def parse_grid(spec: str) -> np.ndarray:
+    """グリッド指定文字列を配列に変換
+
+    'start:stop:step'（stopを含む）またはカンマ区切りの値リストを受け付ける。
+    'actual' は NaN（=実績値を使用）として扱う。
+    """
+    spec = spec.strip()
+    if ':' in spec and ',' not in spec:
+        start, stop, step = (float(x) for x in spec.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        return np.round(start + step * np.arange(count), 6)
+
+    values = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        values.append(np.nan if item.lower() == 'actual' else float(item))
+    return np.asarray(values, dtype=float)
+
+
+def load_inputs(companies: List[str], input_dir: Path) -> Dict[str, np.ndarray]:
+    """全企業の年次レコードを列指向の配列にまとめる（単位: 百万円）"""
+    from build_timeseries import load_stock_prices, get_stock_price
+
+    rows = []
+    for company in companies:
+        financials_file = input_dir / f"{company}_financials.json"
+        if not financials_file.exists():
+            print(f"⚠ {company} のデータが見つかりません。スキップします。")
+            continue
+
+        with open(financials_file, 'r', encoding='utf-8') as f:
+            financials = json.load(f)
+
+        stock_df = load_stock_prices(company, financials)
+        annual_records = select_period(financials, 'FY', fiscal_year_end_for(company))
+        for record in sorted(annual_records, key=lambda x: x['date']):
+            bs = record['bs']
+            pl = record['pl']
+            market_cap = get_stock_price(stock_df, record['date'], column='MarketCap')
+            market_cap = market_cap if market_cap is not None else np.nan
+            rows.append((
+                company,
+                record['date'],
+                bs.get('equity', 0.0),
+                bs.get('interestBearingDebt', 0.0),
+                pl.get('interestExpenses', 0.0),
+                pl.get('operatingIncome', 0.0),
+                pl.get('ebitda', 0.0),
+                market_cap,
+                bs.get('interestBearingDebt', 0.0) - bs.get('cashAndDeposits', 0.0),
+            ))
+
+    columns = list(zip(*rows)) if rows else [()] * 9
+    return {
+        'company': np.asarray(columns[0], dtype=object),
+        'date': np.asarray(columns[1], dtype=object),
+        'equity': np.asarray(columns[2], dtype=float),
+        'interestBearingDebt': np.asarray(columns[3], dtype=float),
+        'interestExpenses': np.asarray(columns[4], dtype=float),
+        'operatingIncome': np.asarray(columns[5], dtype=float),
+        'ebitda': np.asarray(columns[6], dtype=float),
+        'marketCap': np.asarray(columns[7], dtype=float),
+        'netDebt': np.asarray(columns[8], dtype=float),
+    }
+
+
+def compute_sensitivity(inputs: Dict[str, np.ndarray], cost_of_equity: np.ndarray,
+                        tax_rate: np.ndarray, cost_of_debt: np.ndarray) -> Dict[str, np.ndarray]:
+    """感度キューブを計算
+
+    戻り値の各配列は (企業年度, Re, T, Rd) の4次元。
+    cost_of_debt の NaN は実績負債コスト（支払利息 / 有利子負債）を意味する。
+    ROICの定義は compute_scores.calculate_roic と同じ（EBIT / 投下資本）。
+    理論EV/EBITDA倍率 = NOPAT / WACC / EBITDA（ゼロ成長の永続価値）
+    """
+    equity = inputs['equity'][:, None, None, None]
+    debt = inputs['interestBearingDebt'][:, None, None, None]
+    ebit = inputs['operatingIncome'][:, None, None, None]
+    ebitda = inputs['ebitda'][:, None, None, None]
+    interest = inputs['interestExpenses'][:, None, None, None]
+
+    re = np.asarray(cost_of_equity, dtype=float)[None, :, None, None]
+    tax = np.asarray(tax_rate, dtype=float)[None, None, :, None]
+    rd_override = np.asarray(cost_of_debt, dtype=float)[None, None, None, :]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        capital = equity + debt
+        valid = capital > 0
+        e_ratio = np.where(valid, equity / capital, 0.0)
+        d_ratio = np.where(valid, debt / capital, 0.0)
+        rd_actual = np.where(debt > 0, interest / debt * 100, 0.0)
+        rd = np.where(np.isnan(rd_override), rd_actual, rd_override)
+
+        wacc = np.where(valid, e_ratio * re + d_ratio * rd * (1 - tax), 0.0)
+        roic = np.where(valid, ebit / capital * 100, 0.0)
+        spread = np.broadcast_to(roic, wacc.shape) - wacc
+
+        nopat = ebit * (1 - tax)
+        implied_ev = np.where(wacc > 0, nopat / (wacc / 100), np.nan)
+        implied_ev_ebitda = np.where(ebitda > 0, implied_ev / ebitda, np.nan)
+
+    return {
+        'wacc': wacc,
+        'spread': spread,
+        'impliedEvEbitda': implied_ev_ebitda,
+    }
+
+
+def build_cube(inputs: Dict[str, np.ndarray], cost_of_equity: np.ndarray, tax_rate: np.ndarray,
+               cost_of_debt: np.ndarray, decimals: int = 2) -> Dict[str, Any]:
+    """ダッシュボード用のコンパクトなキューブを作成
+
+    各指標は行優先（企業年度, Re, T, Rd）でフラット化した配列として保存する。
+    インデックス = ((i * nRe + r) * nTax + t) * nRd + k
+    """
+    cube = compute_sensitivity(inputs, cost_of_equity, tax_rate, cost_of_debt)
+    shape = list(cube['wacc'].shape)
+
+    def to_list(values: np.ndarray) -> List[Optional[float]]:
+        flat = np.round(values.ravel(), decimals)
+        return np.where(np.isnan(flat), None, flat).tolist()
+
+    # 実績ベースの参考値（シナリオに依存しない）
+    with np.errstate(divide='ignore', invalid='ignore'):
+        market_ev = inputs['marketCap'] + inputs['netDebt']
+        market_ev_ebitda = np.where(inputs['ebitda'] > 0, market_ev / inputs['ebitda'], np.nan)
+
+    return {
+        'asOf': datetime.now().strftime('%Y-%m-%d'),
+        'base': {'costOfEquity': COST_OF_EQUITY, 'taxRate': TAX_RATE},
+        'axes': {
+            'index': [
+                {'company': c, 'date': d, 'year': int(d[:4])}
+                for c, d in zip(inputs['company'], inputs['date'])
+            ],
+            'costOfEquity': [float(v) for v in cost_of_equity],
+            'taxRate': [float(v) for v in tax_rate],
+            'costOfDebt': [None if np.isnan(v) else float(v) for v in cost_of_debt],
+        },
+        'shape': shape,
+        'metrics': {name: to_list(cube[name]) for name in METRICS},
+        'marketEvEbitda': to_list(market_ev_ebitda),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='WACC感度分析スクリプト')
+    parser.add_argument('--input', default='data/edinet_parsed', help='入力ディレクトリ（デフォルト: data/edinet_parsed）')
+    parser.add_argument('--output', default='data/wacc_sensitivity.json', help='出力ファイル（デフォルト: data/wacc_sensitivity.json）')
+    parser.add_argument('--re', default=DEFAULT_COST_OF_EQUITY_GRID, help=f'株主資本コスト（%%）のグリッド（デフォルト: {DEFAULT_COST_OF_EQUITY_GRID}）')
+    parser.add_argument('--tax', default=DEFAULT_TAX_RATE_GRID, help=f'実効税率のグリッド（デフォルト: {DEFAULT_TAX_RATE_GRID}）')
+    parser.add_argument('--rd', default=DEFAULT_COST_OF_DEBT_GRID, help=f'負債コスト（%%）の上書きグリッド、actual=実績値（デフォルト: {DEFAULT_COST_OF_DEBT_GRID}）')
+    add_registry_arguments(parser)
+    args = parser.parse_args(argv)
+
+    input_dir = Path(args.input)
+    output_file = Path(args.output)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    cost_of_equity = parse_grid(args.re)
+    tax_rate = parse_grid(args.tax)
+    cost_of_debt = parse_grid(args.rd)
+    scenarios = len(cost_of_equity) * len(tax_rate) * len(cost_of_debt)
+
+    print(f"WACC感度分析開始: {input_dir}")
+    print(f"  シナリオ数: {scenarios} (Re {len(cost_of_equity)} × T {len(tax_rate)} × Rd {len(cost_of_debt)})")
+
+    companies = company_keys(companies_from_args(args))
+    inputs = load_inputs(companies, input_dir)
+    if len(inputs['company']) == 0:
+        print("⚠ 年次データがありません。")
+        return
+
+    cube = build_cube(inputs, cost_of_equity, tax_rate, cost_of_debt)
+    print(f"  ✓ {len(inputs['company'])} 企業年度 × {scenarios} シナリオを計算")
+
+    # JSON保存（publicにも同じ内容を保存）
+    write_json(cube, output_file, Path('public/data/wacc_sensitivity.json'), compact=True)
+
+    print(f"\n✓ WACC感度分析完了: {output_file}")
+
+if __name__ == '__main__':
+    main()
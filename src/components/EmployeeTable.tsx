@@ -115,6 +115,9 @@ export function EmployeeTable({ data }: EmployeeTableProps) {
                       {value !== undefined && value !== null
                         ? `${metric.formatter(value as number)}${metric.unit}`
                         : '-'}
+                      {metric.key === 'numberOfEmployees' && companyData?.numberOfEmployeesBasis === 'nonConsolidated' && (
+                        <span className="ml-1 text-xs text-gray-400">（単体）</span>
+                      )}
                     </td>
                   )
                 })}
@@ -125,7 +128,7 @@ export function EmployeeTable({ data }: EmployeeTableProps) {
       </div>
 
       <div className="mt-4 text-xs text-gray-500 text-center">
-        ※ 平均年間給与は税込年収、勤続年数・年齢は年度末時点
+        ※ 平均年間給与は税込年収、勤続年数・年齢は年度末時点。従業員数は連結（連結の開示がない年度を含む企業は単体）
       </div>
     </div>
   )
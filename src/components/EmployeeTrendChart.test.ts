@@ -0,0 +1,45 @@
+import { describe, expect, it } from 'vitest'
+import { buildEmployeeChartData } from './EmployeeTrendChart'
+import type { EmployeeData, EmployeeDataResponse } from '../types'
+
+function employee(year: number, overrides: Partial<EmployeeData> = {}): EmployeeData {
+  return {
+    year,
+    date: `${year}-03-31`,
+    averageAnnualSalary: 8_000_000,
+    averageLengthOfServiceYears: 20.1,
+    averageLengthOfServiceMonths: null,
+    averageAgeYears: 44.5,
+    averageAgeMonths: null,
+    numberOfEmployees: 30_000,
+    ...overrides,
+  }
+}
+
+// JERA は給与・勤続年数・平均年齢を開示していない（全年度 null）
+const undisclosed = { averageAnnualSalary: null, averageLengthOfServiceYears: null, averageAgeYears: null }
+
+const mockEmployeeData: EmployeeDataResponse = {
+  asOf: '2025-06-30',
+  TEPCO: [employee(2024), employee(2025, { averageAnnualSalary: 8_500_000 })],
+  CHUBU: [employee(2025)],
+  JERA: [employee(2024, { ...undisclosed, numberOfEmployees: 5_000 }), employee(2025, { ...undisclosed, numberOfEmployees: 5_200 })],
+}
+
+describe('buildEmployeeChartData', () => {
+  it('leaves null metrics undefined instead of plotting them as 0', () => {
+    const chartData = buildEmployeeChartData(mockEmployeeData, 'averageAnnualSalary')
+
+    expect(chartData).toEqual([
+      { year: 'FY2023', TEPCO: 8_000_000 },
+      { year: 'FY2024', TEPCO: 8_500_000, CHUBU: 8_000_000 },
+    ])
+    expect(chartData.every((point) => !('JERA' in point))).toBe(true)
+  })
+
+  it('keeps metrics that the company does disclose', () => {
+    const chartData = buildEmployeeChartData(mockEmployeeData, 'numberOfEmployees')
+
+    expect(chartData.map((point) => point.JERA)).toEqual([5_000, 5_200])
+  })
+})
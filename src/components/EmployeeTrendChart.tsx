@@ -23,11 +23,17 @@ const COMPANY_COLORS: Record<CompanyName, string> = {
   JERA: '#00D4FF',
 }
 
+type EmployeeMetricKey = EmployeeTrendChartProps['metricKey']
+
 /**
- * 従業員情報のトレンドチャート
+ * 年度ごとのチャートデータを作成
+ *
+ * 値が null（非開示など）の企業・年度は点を置かない（0 として描画しない）
  */
-export function EmployeeTrendChart({ data, metricKey, title, unit }: EmployeeTrendChartProps) {
-  // 年度ごとのデータを結合
+export function buildEmployeeChartData(
+  data: EmployeeDataResponse,
+  metricKey: EmployeeMetricKey,
+): Record<string, number | string>[] {
   const allYears = new Set<number>()
   COMPANY_ORDER.forEach((company) => {
     data[company]?.forEach((item) => allYears.add(item.year))
@@ -35,18 +41,26 @@ export function EmployeeTrendChart({ data, metricKey, title, unit }: EmployeeTre
 
   const sortedYears = Array.from(allYears).sort((a, b) => a - b)
 
-  const chartData = sortedYears.map((year) => {
+  return sortedYears.map((year) => {
     const point: Record<string, number | string> = { year: `FY${year - 1}` }
-    
+
     COMPANY_ORDER.forEach((company) => {
-      const companyData = data[company]?.find((item) => item.year === year)
-      if (companyData) {
-        point[company] = companyData[metricKey] ?? 0
+      const value = data[company]?.find((item) => item.year === year)?.[metricKey]
+      if (value != null) {
+        point[company] = value
       }
     })
-    
+
     return point
   })
+}
+
+/**
+ * 従業員情報のトレンドチャート
+ */
+export function EmployeeTrendChart({ data, metricKey, title, unit }: EmployeeTrendChartProps) {
+  // 年度ごとのデータを結合
+  const chartData = buildEmployeeChartData(data, metricKey)
 
   return (
     <div className="chart-container">
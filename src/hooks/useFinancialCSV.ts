@@ -9,8 +9,93 @@ export interface CompanyFinancialData {
   data: FinancialData[];
 }
 
+interface StatementIndex {
+  concepts: string;
+  statements: Record<string, Record<string, string>>;
+}
+
+interface StatementPayload {
+  company: string;
+  statement: string;
+  rows: number;
+  columns: number[];
+  values: (string | number | null)[][];
+}
+
+// 索引・項目名辞書は全ての財務諸表で共有するので1回だけ取得する
+let statementIndexPromise: Promise<StatementIndex | null> | null = null;
+const conceptPromises: Record<string, Promise<string[]>> = {};
+
+const getBasePath = () => {
+  // GitHub Pages対応: BASE_URLを正しく適用
+  const basePath = import.meta.env.BASE_URL || '/';
+  // 末尾のスラッシュを正規化
+  return basePath.endsWith('/') ? basePath : basePath + '/';
+};
+
+/**
+ * statements/index.json を取得（build_statement_payloads.py 未実行の環境ではnull）
+ */
+function fetchStatementIndex(): Promise<StatementIndex | null> {
+  if (!statementIndexPromise) {
+    statementIndexPromise = fetch(`${getBasePath()}statements/index.json`, { cache: 'no-cache' })
+      .then((response) => (response.ok ? (response.json() as Promise<StatementIndex>) : null))
+      .catch(() => null);
+  }
+  return statementIndexPromise;
+}
+
+function fetchConcepts(fileName: string): Promise<string[]> {
+  if (!conceptPromises[fileName]) {
+    conceptPromises[fileName] = fetch(`${getBasePath()}statements/${fileName}`).then((response) => {
+      if (!response.ok) {
+        throw new Error(`Failed to fetch concepts: ${response.status} ${response.statusText}`);
+      }
+      return response.json() as Promise<string[]>;
+    });
+  }
+  return conceptPromises[fileName];
+}
+
+/**
+ * 列指向ペイロードを行の配列に展開（空欄は '' としてCSVと同じ形にする）
+ */
+function expandPayload(payload: StatementPayload, concepts: string[]): FinancialData[] {
+  const headers = payload.columns.map((id) => concepts[id]);
+  return Array.from({ length: payload.rows }, (_, rowIndex) => {
+    const obj: FinancialData = {};
+    headers.forEach((header, columnIndex) => {
+      const value = payload.values[columnIndex][rowIndex];
+      obj[header] = value === null || value === undefined ? '' : value;
+    });
+    return obj;
+  });
+}
+
+/**
+ * 事前生成された列指向ペイロード（public/statements/）から読み込む
+ * 索引にない場合はnull（CSVにフォールバック）
+ */
+async function fetchStatementPayload(company: string, statementType: string): Promise<FinancialData[] | null> {
+  const index = await fetchStatementIndex();
+  const fileName = index?.statements?.[company]?.[statementType];
+  if (!index || !fileName) {
+    return null;
+  }
+
+  const [concepts, response] = await Promise.all([
+    fetchConcepts(index.concepts),
+    fetch(`${getBasePath()}statements/${fileName}`),
+  ]);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch ${company} ${statementType} data: ${response.status} ${response.statusText}`);
+  }
+  return expandPayload((await response.json()) as StatementPayload, concepts);
+}
+
 /**
  * XBRL_outputからCSVデータを読み込むカスタムフック
+ * public/statements/ の列指向ペイロードがあればそちらを使う
  * @param company 企業名（TEPCO, CHUBU, JERA）
  * @param statementType 財務諸表タイプ（PL, BS, CF）
  */
@@ -24,12 +109,14 @@ export function useFinancialCSV(company: string, statementType: 'PL' | 'BS' | 'C
       try {
         setLoading(true);
         setError(null);
+
+        const payloadData = await fetchStatementPayload(company, statementType);
+        if (payloadData) {
+          setData(payloadData);
+          return;
+        }
         
-        // GitHub Pages対応: BASE_URLを正しく適用
-        const basePath = import.meta.env.BASE_URL || '/';
-        // 末尾のスラッシュを正規化
-        const normalizedBase = basePath.endsWith('/') ? basePath : basePath + '/';
-        const csvPath = `${normalizedBase}XBRL_output/${company}/${statementType}.csv`;
+        const csvPath = `${getBasePath()}XBRL_output/${company}/${statementType}.csv`;
         
         console.log(`[useFinancialCSV] Fetching: ${csvPath}`);
         
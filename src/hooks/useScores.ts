@@ -11,6 +11,11 @@ export interface ScoreDataItem {
   value: number;
   score: ScoreColor;
   change: number;
+  popChange?: number | null;
+  avg3?: number | null;
+  avg5?: number | null;
+  cagr3?: number | null;
+  cagr5?: number | null;
 }
 
 export interface ScoreCardDataItem {
@@ -41,6 +41,21 @@ export interface TimeSeriesDataPoint {
   // CF項目
   investingCashFlow?: number; // 投資活動CF
   financingCashFlow?: number; // 財務活動CF
+  // トレンド（build_timeseries.py で事前計算）
+  trends?: Partial<Record<TrendKPI, KPITrend>>;
+}
+
+/** トレンドを事前計算しているKPI */
+export type TrendKPI = 'roic' | 'wacc' | 'ebitdaMargin' | 'fcfMargin' | 'evEbitdaRatio' | 'per' | 'pbr';
+
+/** 前年比・移動平均・CAGR（比較対象がない場合は null） */
+export interface KPITrend {
+  change: number | null; // 前年同期比の差分
+  popChange: number | null; // 前期比の差分
+  avg3: number | null; // 3期移動平均
+  avg5: number | null; // 5期移動平均
+  cagr3: number | null; // 3期CAGR（%）
+  cagr5: number | null; // 5期CAGR（%）
 }
 
 export type CompanyTimeseries = Partial<Record<CompanyName, TimeSeriesDataPoint[]>>;
@@ -235,17 +235,19 @@ export interface EmployeeData {
   /** 日付（YYYY-MM-DD） */
   date: string;
   /** 平均年間給与（円） */
-  averageAnnualSalary: number;
+  averageAnnualSalary: number | null;
   /** 平均勤続年数（年） */
-  averageLengthOfServiceYears: number;
+  averageLengthOfServiceYears: number | null;
   /** 平均勤続年数（月） */
   averageLengthOfServiceMonths: number | null;
   /** 平均年齢（歳） */
-  averageAgeYears: number;
+  averageAgeYears: number | null;
   /** 平均年齢（月） */
   averageAgeMonths: number | null;
   /** 従業員数（人） */
   numberOfEmployees: number;
+  /** 従業員数の基準（連結/単体。企業内の全年度で同じ基準。旧データはなし） */
+  numberOfEmployeesBasis?: 'consolidated' | 'nonConsolidated' | null;
 }
 
 /** 従業員情報レスポンス */